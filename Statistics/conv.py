@@ -1,33 +1,33 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import Dict, Tuple
 
+from kiva_stats.instrument import stage, traced
+from kiva_stats.schema import CONVERGENCE_SCHEMA, apply_schema, read_convergence, set_category
+from kiva_stats.segment import assign_run_ids
+
 
 # ============================
 # 1. LOADING & PREPROCESSING
 # ============================
 
+@traced()
 def load_algorithm_log(path: str, alg_name: str) -> pd.DataFrame:
     """
     Load convergence log for a single algorithm.
     Expected columns:
     Algorithm;Iteration;TimeMs;Manhattan;Fitness;BestPathLength
     """
-    df = pd.read_csv(path, sep=';', decimal=',')
+    df = read_convergence(path)  # typy wg kiva_stats.schema
     # Enforce algorithm name (in case file contains only one algorithm)
-    df['Algorithm'] = alg_name
-
-    # Ensure numeric types
-    numeric_cols = ['Iteration', 'TimeMs', 'Manhattan', 'Fitness', 'BestPathLength']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    set_category(df, 'Algorithm', alg_name)
 
     df = df.dropna(subset=['TimeMs', 'Manhattan', 'Fitness', 'BestPathLength'])
+    apply_schema(df, CONVERGENCE_SCHEMA)
 
-    # Detect runs: whenever time goes backwards -> new run
+    # Detect runs: time or Iteration goes backwards, or Manhattan changes -> new run
     df = df.sort_index()  # keep original order
-    df['RunId'] = (df['TimeMs'].diff() < 0).cumsum()
+    df['RunId'] = assign_run_ids(df)
 
     return df
 
@@ -36,6 +36,7 @@ def load_algorithm_log(path: str, alg_name: str) -> pd.DataFrame:
 # 2. PER-RUN METRICS
 # ============================
 
+@traced()
 def summarize_time_metrics(per_run: pd.DataFrame, timeout_ms: float = 1000.0) -> pd.DataFrame:
     """
     Zbiorcze statystyki po algorytmie:
@@ -65,6 +66,7 @@ def summarize_time_metrics(per_run: pd.DataFrame, timeout_ms: float = 1000.0) ->
 
     return pd.DataFrame(rows)
 
+@traced()
 def compute_run_metrics(
     df_alg: pd.DataFrame,
     alg_name: str,
@@ -86,6 +88,7 @@ def compute_run_metrics(
     - OptRatio_final            – BestPathLength_final / Manhattan
 
     --- czasy (ms) ---
+    - RunEndTimeMs              – ostatni TimeMs w przebiegu (moment ucięcia / cenzurowania)
     - TimeFirstGoal             – czas znalezienia pierwszej "drogi do celu"
     - TimeFirstOptimal          – czas pierwszego osiągnięcia Fitness == Fitness_final
     - TimeFirstGoalNorm         – TimeFirstGoal / Manhattan
@@ -206,6 +209,8 @@ def compute_run_metrics(
             'ImprovementCount': improvement_count,
             'OptRatio_final': final_opt_ratio,
 
+            'RunEndTimeMs': float(times[-1]),
+
             'TimeFirstGoal': time_first_goal,
             'TimeFirstOptimal': time_first_opt,
             'TimeFirstGoalNorm': time_first_goal_norm,
@@ -238,6 +243,14 @@ def classify_range(manh: float) -> str:
     else:
         return 'długie trasy (M > 80)'
 
+
+RANGE_LABELS = ['krótkie trasy (M ≤ 40)', 'średnie trasy (41 ≤ M ≤ 80)', 'długie trasy (M > 80)']
+
+
+def classify_range_vec(manh: pd.Series) -> pd.Series:
+    """Vectorized classify_range (same bucket edges), returns a categorical Series."""
+    return pd.cut(manh, bins=[-np.inf, 40, 80, np.inf], labels=RANGE_LABELS)
+
 def build_time_grid(df_alg: pd.DataFrame,
                     dt: float = 50.0,
                     max_time: float = 1000.0) -> np.ndarray:
@@ -247,6 +260,7 @@ def build_time_grid(df_alg: pd.DataFrame,
     return grid
 
 
+@traced()
 def build_optratio_and_improvement_curves(
     df_alg: pd.DataFrame,
     dt: float = 50.0,
@@ -270,27 +284,28 @@ def build_optratio_and_improvement_curves(
     opt_curves = {r: [] for r in ranges}
     imp_curves = {r: [] for r in ranges}
 
-    for run_id, run in df_alg.groupby('RunId'):
-        run = run.sort_values('TimeMs').reset_index(drop=True)
-        manh = run['Manhattan'].iloc[0]
-        rlabel = classify_range(manh)
+    with stage('conv.resample_runs_ffill', rows_in=len(df_alg)):
+        for run_id, run in df_alg.groupby('RunId'):
+            run = run.sort_values('TimeMs').reset_index(drop=True)
+            manh = run['Manhattan'].iloc[0]
+            rlabel = classify_range(manh)
 
-        # OptRatio(t)
-        opt_ratio = run['BestPathLength'] / manh
-        series = opt_ratio.copy()
-        series.index = run['TimeMs']
+            # OptRatio(t)
+            opt_ratio = run['BestPathLength'] / manh
+            series = opt_ratio.copy()
+            series.index = run['TimeMs']
 
-        # Reindex on common time grid with forward-fill
-        series_resampled = series.reindex(time_grid, method='ffill')
+            # Reindex on common time grid with forward-fill
+            series_resampled = series.reindex(time_grid, method='ffill')
 
-        # Improvement%(t) relative to first known value
-        first_valid = series_resampled.dropna().iloc[0] if series_resampled.notna().any() else np.nan
-        if np.isnan(first_valid):
-            continue
-        improvement = (first_valid - series_resampled) / first_valid * 100.0
+            # Improvement%(t) relative to first known value
+            first_valid = series_resampled.dropna().iloc[0] if series_resampled.notna().any() else np.nan
+            if np.isnan(first_valid):
+                continue
+            improvement = (first_valid - series_resampled) / first_valid * 100.0
 
-        opt_curves[rlabel].append(series_resampled.values)
-        imp_curves[rlabel].append(improvement.values)
+            opt_curves[rlabel].append(series_resampled.values)
+            imp_curves[rlabel].append(improvement.values)
 
     curves = {}
     for rlabel in ranges:
@@ -325,10 +340,137 @@ def build_optratio_and_improvement_curves(
 
     return curves
 
+
+# ============================
+# 4. ANALIZA PRZEŻYCIA (CENZUROWANIE NA TIMEOUT)
+# ============================
+
+def survival_events(per_run: pd.DataFrame,
+                    time_col: str,
+                    timeout_ms: float = 1000.0) -> pd.DataFrame:
+    """
+    Zamienia kolumnę czasu z per_run na parę (Duration, Event).
+
+    Event = 1 gdy zdarzenie zaobserwowano przed timeoutem.
+    Brak zdarzenia (NaN) albo czas > timeout to obserwacja cenzurowana
+    w chwili końca przebiegu (RunEndTimeMs, przycięte do timeout_ms),
+    a nie porażka.
+    """
+    t = per_run[time_col]
+    if 'RunEndTimeMs' in per_run.columns:
+        end = per_run['RunEndTimeMs'].clip(upper=timeout_ms)
+    else:
+        end = pd.Series(timeout_ms, index=per_run.index)
+
+    event = t.notna() & (t <= timeout_ms)
+    out = per_run[['Algorithm', 'Manhattan']].copy()
+    out['Range'] = classify_range_vec(out['Manhattan'])
+    out['Duration'] = t.where(event, end).astype(float)
+    out['Event'] = event.astype(np.int64)
+    return out
+
+
+def kaplan_meier(events: pd.DataFrame,
+                 group_cols=('Algorithm', 'Range'),
+                 duration_col: str = 'Duration',
+                 event_col: str = 'Event') -> pd.DataFrame:
+    """
+    Estymator Kaplana–Meiera dla wielu grup naraz, bez pętli po grupach.
+
+    Jedno sortowanie po (grupa, czas), agregacja do unikalnych czasów
+    i grupowy cumprod(1 - d/n). Zwraca po jednym wierszu na (grupa, czas):
+        group_cols..., TimeMs, AtRisk, Events, Censored, Survival
+    Survival to S(t) tuż po czasie TimeMs.
+    """
+    group_cols = list(group_cols)
+    df = events.dropna(subset=[duration_col])
+
+    km = (
+        df.groupby(group_cols + [duration_col], observed=True, sort=True)[event_col]
+        .agg(Events='sum', Total='size')
+        .reset_index()
+        .rename(columns={duration_col: 'TimeMs'})
+    )
+
+    by_group = km.groupby(group_cols, observed=True, sort=False)
+    n_group = by_group['Total'].transform('sum')
+    removed_before = by_group['Total'].cumsum() - km['Total']
+
+    km['AtRisk'] = n_group - removed_before
+    km['Censored'] = km['Total'] - km['Events']
+    km['Survival'] = (1.0 - km['Events'] / km['AtRisk']).groupby(
+        [km[c] for c in group_cols], observed=True, sort=False
+    ).cumprod()
+
+    return km[group_cols + ['TimeMs', 'AtRisk', 'Events', 'Censored', 'Survival']]
+
+
+def restricted_mean_survival(km: pd.DataFrame,
+                             tau: float,
+                             group_cols=('Algorithm', 'Range')) -> pd.DataFrame:
+    """
+    RMST(tau) = pole pod krzywą S(t) na [0, tau] – oczekiwany czas do zdarzenia
+    przy ograniczeniu do budżetu tau. Dodatkowo mediana z KM (NaN, jeśli
+    S(t) nie spada do 0.5) i 1 - S(tau) jako odsetek zdarzeń przed tau.
+    """
+    group_cols = list(group_cols)
+    keys = [km[c] for c in group_cols]
+    by_group = km.groupby(keys, observed=True, sort=False)
+
+    t = km['TimeMs'].clip(upper=tau)
+    prev_t = by_group['TimeMs'].shift(1).fillna(0.0).clip(upper=tau)
+    prev_s = by_group['Survival'].shift(1).fillna(1.0)
+    area = prev_s * (t - prev_t)
+
+    last = by_group.tail(1)
+    tail = last['Survival'] * (tau - last['TimeMs'].clip(upper=tau))
+    # indeks po kluczach grup (nie po pozycji), żeby dodawanie nie zależało od kolejności grup
+    tail = tail.groupby([last[c] for c in group_cols], observed=True).sum()
+
+    rmst = area.groupby(keys, observed=True).sum()
+    rmst = rmst.add(tail.reindex(rmst.index), fill_value=0.0)
+
+    below = km[km['Survival'] <= 0.5]
+    median = below.groupby([below[c] for c in group_cols], observed=True)['TimeMs'].min()
+
+    at_tau = km[km['TimeMs'] <= tau]
+    s_tau = at_tau.groupby([at_tau[c] for c in group_cols], observed=True)['Survival'].last()
+
+    out = pd.DataFrame({'RMST': rmst})
+    out['Median'] = median.reindex(out.index)
+    out['EventRate'] = 1.0 - s_tau.reindex(out.index).fillna(1.0)
+    return out
+
+
+@traced()
+def summarize_survival_metrics(per_run: pd.DataFrame,
+                               timeout_ms: float = 1000.0) -> pd.DataFrame:
+    """
+    Tabela per (Algorithm, Range) dla czasu do celu, do optimum i do k×optimum:
+    RMST_<col>, Median_<col>, EventRate_<col> (KM z cenzurowaniem na timeout).
+    Zastępuje obciążone średnie i SuccessRate_opt_le_timeout z
+    summarize_time_metrics.
+    """
+    time_cols = [c for c in ('TimeFirstGoal', 'TimeFirstOptimal') if c in per_run.columns]
+    time_cols += [c for c in per_run.columns if c.startswith('Time_k')]
+
+    parts = []
+    for col in time_cols:
+        ev = survival_events(per_run, col, timeout_ms=timeout_ms)
+        stats = restricted_mean_survival(kaplan_meier(ev), tau=timeout_ms)
+        parts.append(stats.add_suffix(f'_{col}'))
+
+    table = pd.concat(parts, axis=1)
+    table.index.names = ['Algorithm', 'Range']
+    return table.round(3)
+
 # ============================
 # 5. ZBIORCZE FIGURY (algorytmy jeden pod drugim)
 # ============================
+@traced()
 def plot_optratio_time_by_range_all(alg_curves: Dict[str, Dict[str, Dict[str, pd.DataFrame]]]):
+    import matplotlib.pyplot as plt  # tylko dla wykresów – tabele nie potrzebują matplotlib
+
     ranges = ['krótkie trasy (M ≤ 40)', 'średnie trasy (41 ≤ M ≤ 80)', 'długie trasy (M > 80)']
     algs = list(alg_curves.keys())
 
@@ -355,7 +497,10 @@ def plot_optratio_time_by_range_all(alg_curves: Dict[str, Dict[str, Dict[str, pd
     fig.suptitle('Zbieżność współczynnika nadmiarowości ścieżki')
     plt.tight_layout(rect=[0, 0.02, 1, 0.95])
     plt.show()
+@traced()
 def plot_improvementpct_time_by_range_all(alg_curves: Dict[str, Dict[str, Dict[str, pd.DataFrame]]]):
+    import matplotlib.pyplot as plt
+
     ranges = ['krótkie trasy (M ≤ 40)', 'średnie trasy (41 ≤ M ≤ 80)', 'długie trasy (M > 80)']
     algs = list(alg_curves.keys())
 
@@ -407,6 +552,12 @@ if __name__ == "__main__":
         alg_per_run[alg_name] = per_run
         alg_curves[alg_name] = curves
 
+    # Czasy z cenzurowaniem na timeout (Kaplan–Meier + RMST)
+    survival = summarize_survival_metrics(pd.concat(alg_per_run.values(), ignore_index=True),
+                                          timeout_ms=1000.0)
+    print("\n=== CZAS DO CELU / OPTIMUM (KM, RMST do 1000 ms) ===")
+    print(survival)
+
     # Wykresy zbiorcze (algorytmy jeden pod drugim, zakresy obok siebie)
     plot_optratio_time_by_range_all(alg_curves)
     plot_improvementpct_time_by_range_all(alg_curves)
\ No newline at end of file
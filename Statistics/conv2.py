@@ -3,6 +3,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from typing import Dict, Tuple
 
+from kiva_stats.schema import CONVERGENCE_SCHEMA, apply_schema, read_convergence, set_category
+from kiva_stats.segment import assign_run_ids
+
 
 # ============================
 # 1. LOADING & PREPROCESSING
@@ -14,20 +17,16 @@ def load_algorithm_log(path: str, alg_name: str) -> pd.DataFrame:
     Expected columns:
     Algorithm;Iteration;TimeMs;Manhattan;Fitness;BestPathLength
     """
-    df = pd.read_csv(path, sep=';', decimal=',')
+    df = read_convergence(path)  # typy wg kiva_stats.schema
     # Enforce algorithm name (in case file contains only one algorithm)
-    df['Algorithm'] = alg_name
-
-    # Ensure numeric types
-    numeric_cols = ['Iteration', 'TimeMs', 'Manhattan', 'Fitness', 'BestPathLength']
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    set_category(df, 'Algorithm', alg_name)
 
     df = df.dropna(subset=['TimeMs', 'Manhattan', 'Fitness', 'BestPathLength'])
+    apply_schema(df, CONVERGENCE_SCHEMA)
 
-    # Detect runs: whenever time goes backwards -> new run
+    # Detect runs: time or Iteration goes backwards, or Manhattan changes -> new run
     df = df.sort_index()  # keep original order
-    df['RunId'] = (df['TimeMs'].diff() < 0).cumsum()
+    df['RunId'] = assign_run_ids(df)
 
     return df
 
@@ -1,18 +1,15 @@
 import pandas as pd
 
+from kiva_stats.schema import read_results
+
 # === 1. Wczytanie danych ===
 
 plik = "dane.csv"  # zmień na własną ścieżkę
-df = pd.read_csv(plik, sep=';')
-
-# Upewniamy się, że kolumna Success jest booleana
-if df['Success'].dtype == 'object':
-    df['Success'] = df['Success'].map({'True': True, 'False': False, 'true': True, 'false': False})
-elif pd.api.types.is_numeric_dtype(df['Success']):
-    df['Success'] = df['Success'].astype(int).astype(bool)
+# typy wg kiva_stats.schema (Success jako bool, Algorithm jako category)
+df = read_results(plik)
 
 # Zakładamy, że co 3 wiersze to ta sama trajektoria
-df['Trajektoria'] = df.index // 3
+df['Trajektoria'] = (df.index // 3).astype('int32')
 
 # === 2. Pula A – procent udanych ścieżek (Success%) ===
 
@@ -1,27 +1,29 @@
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 
+from kiva_stats.instrument import traced
+from kiva_stats.schema import RESULTS_SCHEMA, add_derived_columns, apply_schema, read_results
+
 
 # ===============================
 # 1. Wczytanie danych i przygotowanie pól
 # ===============================
 
+@traced()
 def load_and_prepare(path: str) -> pd.DataFrame:
     """Wczytuje CSV, konwertuje Success na bool, dodaje ID trajektorii."""
-    df = pd.read_csv(path, sep=';')
-
-    # Konwersja kolumny Success na bool
-    if df['Success'].dtype == 'object':
-        df['Success'] = df['Success'].map({
-            'True': True, 'False': False,
-            'true': True, 'false': False,
-            '1': True, '0': False
-        })
-    elif pd.api.types.is_numeric_dtype(df['Success']):
-        df['Success'] = df['Success'].astype(int).astype(bool)
+    df = read_results(path)
+    return prepare(df)
+
+
+def prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Konwertuje Success na bool i dodaje ID trajektorii do już wczytanej ramki."""
+    # Success -> bool, Algorithm -> category, kompaktowe typy liczbowe
+    apply_schema(df, RESULTS_SCHEMA)
 
     # Każde 3 wiersze = jedna trajektoria (ta sama trasa, różne algorytmy)
-    df['Trajektoria'] = df.index // 3
+    df['Trajektoria'] = (np.arange(len(df)) // 3).astype('int32')
 
     return df
 
@@ -30,6 +32,7 @@ def load_and_prepare(path: str) -> pd.DataFrame:
 # 2. Metryki: success, nadwyżki, optymalność, SoC, % wygranych
 # ===============================
 
+@traced()
 def compute_metrics(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     """
     Zwraca:
@@ -41,10 +44,9 @@ def compute_metrics(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
     success_rate = df.groupby('Algorithm')['Success'].mean() * 100  # w %
 
     # --- PULA B: tylko udane ścieżki z niezerową długością ---
-    df_ok = df[(df['Success'] == True) & (df['PathLength'] > 0)].copy()
-    df_ok['Nadwyżka'] = df_ok['PathLength'] - df_ok['Manhattan']
-    df_ok['Nadwyżka%'] = df_ok['Nadwyżka'] / df_ok['Manhattan'] * 100
-    df_ok['Optymalność'] = df_ok['PathLength'] / (df_ok['Manhattan'])
+    # (filtr i tak tworzy nową ramkę – bez dodatkowej .copy(); kolumny pochodne w float32/int16)
+    df_ok = df[df['Success'] & (df['PathLength'] > 0)]
+    add_derived_columns(df_ok)
 
     # --- PULA C: trajektorie ukończone przez wszystkie algorytmy (do SoC) ---
     traj_ok_all = []
@@ -137,6 +139,7 @@ def compute_metrics(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
 # 3. WYKRESY – osobne funkcje
 # ===============================
 
+@traced()
 def plot_mean_path_vs_manhattan_all(df_ok: pd.DataFrame, bins: int = 15):
     """
     Średnia długość ścieżki względem Manhattan (bez scattera),
@@ -190,6 +193,7 @@ def plot_mean_path_vs_manhattan_all(df_ok: pd.DataFrame, bins: int = 15):
 
 
 
+@traced()
 def plot_mean_path_vs_manhattan_separate(df_ok: pd.DataFrame, bins: int = 15):
     """
     Średnia długość ścieżki względem Manhattan dla każdego algorytmu osobno,
@@ -246,6 +250,7 @@ def plot_mean_path_vs_manhattan_separate(df_ok: pd.DataFrame, bins: int = 15):
 
 
 
+@traced()
 def plot_boxplots_nadwyzka(df_ok: pd.DataFrame):
     """Boxplot nadwyżki absolutnej i procentowej - jeden pod drugim."""
     fig, axes = plt.subplots(2, 1, figsize=(7, 8), sharex=True)
@@ -268,6 +273,7 @@ def plot_boxplots_nadwyzka(df_ok: pd.DataFrame):
     plt.show()
 
 
+@traced()
 def plot_aco_failures_two_plots(df: pd.DataFrame, bins: int = 12):
     """
     Dwa wykresy dla ACO pod sobą:
@@ -318,6 +324,7 @@ def plot_aco_failures_two_plots(df: pd.DataFrame, bins: int = 12):
 
 
 
+@traced()
 def plot_opt_vs_path_common(df_ok: pd.DataFrame, bins: int = 15):
     """
     Średni współczynnik optymalności względem odległości Manhattan – wszystkie algorytmy na jednym wykresie.
@@ -360,6 +367,7 @@ def plot_opt_vs_path_common(df_ok: pd.DataFrame, bins: int = 15):
     plt.show()
 
 
+@traced()
 def plot_opt_vs_path_separate(df_ok: pd.DataFrame, bins: int = 15):
     """
     Średni współczynnik optymalności względem odległości Manhattan – osobno dla każdego algorytmu.
@@ -415,6 +423,7 @@ def plot_opt_vs_path_separate(df_ok: pd.DataFrame, bins: int = 15):
 
 
 
+@traced()
 def plot_rank_distributions(df_ok: pd.DataFrame):
     """Rozkład miejsc 1/2/3 dla algorytmów (stacked bar + bump chart)."""
     # sortujemy po trajektorii i długości ścieżki
@@ -457,6 +466,7 @@ def plot_rank_distributions(df_ok: pd.DataFrame):
     plt.tight_layout()
     plt.show()
 
+@traced()
 def plot_path_distribution_vs_manhattan(df_ok: pd.DataFrame, bins: int = 20):
     """
     Rozkład ścieżek: liczba unikalnych tras (trajektorii) w zależności od
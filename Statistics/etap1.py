@@ -1,10 +1,9 @@
 import pandas as pd
 
-df = pd.read_csv("dane.csv", sep=';')
+from kiva_stats.schema import read_results
 
-# konwersja kolumny success jeśli potrzeba
-if df['Success'].dtype == 'object':
-    df['Success'] = df['Success'].map({'True': True, 'False': False})
+# typy wg kiva_stats.schema (Success jako bool)
+df = read_results("dane.csv")
 
 # skuteczność
 skutecznosc = df.groupby('Algorithm')['Success'].mean() * 100
@@ -69,12 +68,9 @@ plt.show()
 
 import pandas as pd
 
-df = pd.read_csv("dane.csv", sep=';')
+df = read_results("dane.csv")
 
 # filtrujemy tylko udane wykonania
-if df['Success'].dtype == 'object':
-    df['Success'] = df['Success'].map({'True': True, 'False': False})
-
 df_ok = df[df['Success'] == True].copy()
 
 # wyliczenie nadwyżki (kroki + %)
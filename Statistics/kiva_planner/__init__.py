@@ -0,0 +1,10 @@
+"""
+Planery ścieżek z Assets/Scripts (ACO, Firefly, Camel) w Pythonie.
+
+Model jak w PathManager.cs: stan (x, y, heading), akcje Forward /
+TurnLeft / TurnRight / Wait, mapa 106×46 z GridManager.cs. Silniki
+liczą na wspólnej tablicy przejść (kiva_planner.transitions), więc
+krok agenta to gather po tablicach NumPy zamiast wywołań Apply.
+"""
+
+__version__ = "0.1.0"
@@ -0,0 +1,111 @@
+"""
+ACO z ACO.cs na tablicy przejść: wszystkie mrówki idą równolegle.
+
+Krok mrówki to gather po next_state/valid/eta zamiast Apply i
+ACO_HeuristicDesirability dla czterech akcji, a depozycja na
+best-so-far to jeden np.add.at po (stan, akcja) zapisanych w trakcie
+budowy ścieżki – bez ACO_InferAction.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .budget import Budget, resolve
+from .grid import WAIT, state_index
+from .memory import WarmStartMemory
+from .plan import ConvergenceTrace, Plan, can_enter, goal_free, roulette
+from .stopping import RouteInfo, StopMonitor, StopRule
+from .transitions import TransitionTable
+
+ANTS = 40
+ALPHA = 1.0
+BETA = 3.0
+EVAPORATION = 0.5
+Q = 100.0
+TAU0 = 0.1
+MAX_STEPS = 300
+LOG_EVERY_MS = 50.0
+
+
+def construct_ant_paths(table: TransitionTable, tau: np.ndarray, eta_beta: np.ndarray, s0: int, goal_tile: int,
+                        rng: np.random.Generator, ants: int = ANTS, alpha: float = ALPHA,
+                        max_steps: int = MAX_STEPS, reserved: Optional[np.ndarray] = None
+                        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ConstructAntPath dla `ants` mrówek naraz. Zwraca (states, actions,
+    lengths): macierze (ants, max_steps) i długość ścieżki per mrówka,
+    0 gdy mrówka nie doszła do celu w max_steps krokach albo utknęła.
+    """
+    states = np.full((ants, max_steps), -1, dtype=np.int32)
+    actions = np.full((ants, max_steps), WAIT, dtype=np.int8)
+    lengths = np.zeros(ants, dtype=np.int32)
+    states[:, 0] = s0
+    cur = np.full(ants, s0, dtype=np.int32)
+    active = np.arange(ants)
+    goal_ok = goal_free(reserved, goal_tile)
+    for step in range(max_steps):
+        reached = cur[active] // 4 == goal_tile
+        if reached.any():
+            lengths[active[reached]] = step + 1
+            active = active[~reached]
+        if not len(active) or step == max_steps - 1:
+            break
+        s = cur[active]
+        ok = table.valid[s] & can_enter(reserved, step, table.next_tile[s], goal_tile, goal_ok)
+        weights = np.maximum(tau[s], 1e-6) ** alpha * eta_beta[s] * ok
+        chosen = roulette(weights, rng)
+        moving = chosen >= 0                           # mrówka bez dozwolonego ruchu (nawet Wait) odpada
+        active, s, chosen = active[moving], s[moving], chosen[moving]
+        nxt = table.next_state[s, chosen]
+        cur[active] = nxt
+        states[active, step + 1] = nxt
+        actions[active, step + 1] = chosen
+    return states, actions, lengths
+
+
+def plan(table: TransitionTable, start: Tuple[int, int], head: int, goal: Tuple[int, int], start_step: int = 0,
+         reserved: Optional[np.ndarray] = None, rng: Optional[np.random.Generator] = None,
+         budget: Optional[Budget] = None, stop: Optional[StopRule] = None, shadow: bool = False,
+         memory: Optional[WarmStartMemory] = None, ants: int = ANTS, alpha: float = ALPHA, beta: float = BETA,
+         evaporation: float = EVAPORATION, q: float = Q, tau0: float = TAU0, max_steps: int = MAX_STEPS) -> Plan:
+    """ACO_Coroutine: iteracje do wyczerpania budżetu, najkrótsza ścieżka mrówek."""
+    rng = rng or np.random.default_rng()
+    meter = resolve(budget).start()
+    manhattan = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+    s0 = int(state_index(start[0], start[1], head, table.width))
+    goal_tile = goal[1] * table.width + goal[0]
+
+    tau = np.full((table.n_states, 4), tau0, dtype=np.float32)
+    prior = memory.recall("ACO", goal) if memory is not None else None
+    if prior is not None:
+        tau += prior                                   # ślad feromonu z poprzednich tras do regionu
+    eta_beta = table.heuristic(goal, "aco") ** beta
+    best_states = best_actions = None
+    trace = ConvergenceTrace(LOG_EVERY_MS)
+    monitor = StopMonitor(stop, RouteInfo("ACO", table, s0, goal_tile, manhattan), shadow)
+    while meter.running() and not monitor.stopped:
+        meter.next_iteration()
+        tau *= 1.0 - evaporation
+        states, actions, lengths = construct_ant_paths(table, tau, eta_beta, s0, goal_tile, rng,
+                                                       ants, alpha, max_steps, reserved)
+        meter.evaluated(ants)
+        improved = False
+        done = np.flatnonzero(lengths)
+        if len(done):
+            k = done[np.argmin(lengths[done])]     # pierwsza najkrótsza, jak ścisłe '<' w pętli mrówek
+            if best_states is None or lengths[k] < len(best_states):
+                n = lengths[k]
+                best_states, best_actions = states[k, :n].copy(), actions[k, :n].copy()
+                improved = True
+        if best_states is not None and len(best_states) > 1:
+            # depozycja na best-so-far: (stan, akcja) prowadzące do następnego węzła
+            np.add.at(tau, (best_states[:-1], best_actions[1:]), q / max(1, len(best_states)))
+        if best_states is not None:
+            trace.record(meter, -float(len(best_states)), len(best_states), improved)
+            monitor.update(meter, len(best_states), True, improved)
+
+    if memory is not None and best_states is not None:
+        memory.store("ACO", goal, tau)
+    return Plan("ACO", best_states, best_actions, start_step, manhattan, iterations=meter.iterations,
+                evaluations=meter.evaluations, elapsed_ms=meter.elapsed_ms(), found=best_states is not None,
+                log=trace.rows, stop=monitor.event, first_goal=trace.first_goal)
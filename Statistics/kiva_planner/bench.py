@@ -0,0 +1,176 @@
+"""
+Benchmark planerów niezależny od maszyny.
+
+Instancje to trasy ze standardowego cyklu robota (AssignStandardCyclePath:
+spawn -> regał -> punkt transferowy -> regał -> spawn), losowane z ziarna.
+Każda para (instancja, algorytm, powtórzenie) ma własny strumień RNG
+(budget.rng_stream), więc z budżetem iteracji/ewaluacji dwa hosty dają
+te same ścieżki i te same wiersze logu (poza TimeMs). Wynik trafia do
+dane.csv i *ConvergenceLog.csv w katalogu wyjściowym – gotowe dla
+`python -m kiva_stats ... --data-dir <out>`.
+
+Z regułą zatrzymania (stopping.py) każdy plan dostaje wiersz w stops.csv;
+w trybie cienia plany idą do końca budżetu, a stops.csv zapisuje, kiedy
+reguła by zadziałała – z tego liczy się `stop-report`.
+
+run_warmstart przechodzi ten sam ciąg cykli dwa razy – bez pamięci i ze
+wspólną WarmStartMemory – z tymi samymi strumieniami RNG i porównuje czas
+do pierwszej ścieżki do celu i do ostatecznej ścieżki, osobno dla tras
+z trafieniem i bez trafienia w pamięć.
+"""
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .budget import Budget, rng_stream
+from .engines import ENGINES, get_engine
+from .grid import NORTH, SHELF, Grid, build_warehouse
+from .logs import LogWriter
+from .memory import WarmStartMemory
+from .stopping import StopRule
+from .transitions import TransitionTable
+
+# (start, heading, goal)
+LEGS = ("ToShelf", "ToTP", "ToShelf", "ToSpawn")
+Instance = Tuple[Tuple[int, int], int, Tuple[int, int]]
+
+
+def standard_cycle(grid: Grid, rng: np.random.Generator, shelves: Optional[List] = None) -> List[Instance]:
+    """
+    Cztery trasy jednego cyklu: ToShelf, ToTP, ToShelf, ToSpawn (heading po
+    dojeździe losowy); `shelves` zawęża regały (domyślnie wszystkie).
+    """
+    shelves = grid.tiles_with(SHELF) if shelves is None else shelves
+    spawn = grid.spawn_points[rng.integers(len(grid.spawn_points))]
+    shelf1 = shelves[rng.integers(len(shelves))]
+    tp = grid.transfer_points[rng.integers(len(grid.transfer_points))]
+    shelf2 = shelves[rng.integers(len(shelves))]
+    heads = rng.integers(0, 4, 3).tolist()
+    return [(spawn, NORTH, shelf1), (shelf1, heads[0], tp), (tp, heads[1], shelf2), (shelf2, heads[2], spawn)]
+
+
+def make_instances(grid: Grid, n: int, seed: int = 0, legs: bool = False,
+                   hot_shelves: Optional[int] = None) -> List:
+    """
+    n tras z kolejnych cykli; trasy o zerowej długości są pomijane.
+    Z legs=True elementy to (trasa, nazwa odcinka cyklu), `hot_shelves` –
+    losowy stały podzbiór regałów (jak Simulator(hot_shelves=...)).
+    """
+    rng = np.random.default_rng(seed)
+    shelves = None
+    if hot_shelves:
+        all_shelves = grid.tiles_with(SHELF)
+        pick = rng.choice(len(all_shelves), min(hot_shelves, len(all_shelves)), replace=False)
+        shelves = [all_shelves[i] for i in np.sort(pick)]
+    out = []
+    while len(out) < n:
+        out += [(inst, leg) for inst, leg in zip(standard_cycle(grid, rng, shelves), LEGS) if inst[0] != inst[2]]
+    out = out[:n]
+    return out if legs else [inst for inst, _ in out]
+
+
+def run_benchmark(out_dir: Path, n_instances: int = 30, algorithms: Sequence[str] = tuple(ENGINES),
+                  replicates: int = 1, budget: Optional[Budget] = None, seed: int = 0,
+                  map_seed: int = 0, stop: Optional[StopRule] = None, shadow: bool = False,
+                  traces: bool = False, cost: Optional[np.ndarray] = None) -> int:
+    """
+    Każda instancja x powtórzenie x algorytm; wiersze dane.csv w blokach po
+    len(algorithms) (ta sama trasa), jak oczekuje tab.assign_instances.
+    Z traces=True ścieżki trafiają też do <out>/traces (Instance = numer
+    trasy), `cost` to warstwa kosztu kafli dla TransitionTable. Zwraca
+    liczbę zapisanych planów.
+    """
+    budget = budget or Budget("time", 1.0)
+    grid = build_warehouse(seed=map_seed)
+    table = TransitionTable(grid, cost=cost)
+    instances = make_instances(grid, n_instances, seed)
+    engines = [(alg, get_engine(alg)) for alg in algorithms]
+
+    t0 = time.perf_counter()
+    count = 0
+    with LogWriter(out_dir, stops=stop is not None, shadow=shadow, traces=traces) as writer:
+        for i, (start, head, goal) in enumerate(instances):
+            for rep in range(replicates):
+                for alg, engine in engines:
+                    plan = engine(table, start, head, goal, rng=rng_stream(seed, i, alg, rep), budget=budget,
+                                  stop=stop, shadow=shadow)
+                    writer.write(plan, instance=i)
+                    count += 1
+            print(f"[INFO] Instancja {i + 1}/{len(instances)} "
+                  f"({time.perf_counter() - t0:.1f} s, budżet {budget})")
+    return count
+
+
+def run_warmstart(out_dir: Path, cycles: int = 25, algorithms: Sequence[str] = tuple(ENGINES),
+                  budget: Optional[Budget] = None, seed: int = 0, map_seed: int = 0,
+                  max_bytes: int = 64 * 1024 * 1024, decay: float = 0.98, cluster: int = 1,
+                  hot_shelves: Optional[int] = 8):
+    """
+    Ciąg 4 * cycles tras standardowego cyklu, raz "cold" (bez pamięci), raz
+    "warm" (jedna pamięć na algorytm przez cały ciąg). Regały z małego
+    stałego zbioru `hot_shelves` (None = wszystkie), żeby cele się
+    powtarzały jak w magazynie z popularnymi regałami. Każdy przebieg
+    (tryb x algorytm) startuje z pustym LRU heurystyk TransitionTable –
+    inaczej "warm" korzystałby z heurystyk policzonych w "cold". Zapisuje
+    warmstart.csv (trasa x algorytm x tryb) i warmstart_summary.csv
+    (algorytm x odcinek x MemoryHit – trafienie trasy w trybie warm),
+    zwraca podsumowanie.
+    """
+    import pandas as pd
+
+    budget = budget or Budget("iterations", 40)
+    grid = build_warehouse(seed=map_seed)
+    table = TransitionTable(grid)
+    routes = make_instances(grid, 4 * cycles, seed, legs=True, hot_shelves=hot_shelves)
+
+    rows = []
+    for mode in ("cold", "warm"):
+        for alg in algorithms:
+            engine = get_engine(alg)
+            table.clear_cache()
+            memory = WarmStartMemory(max_bytes, decay, cluster) if mode == "warm" else None
+            t0 = time.perf_counter()
+            for i, ((start, head, goal), leg) in enumerate(routes):
+                hit = memory is not None and memory.key(alg, goal) in memory
+                plan = engine(table, start, head, goal, rng=rng_stream(seed, i, alg), budget=budget, memory=memory)
+                first, best = plan.first_goal, plan.first_optimal()
+                rows.append({
+                    "Mode": mode, "Algorithm": alg, "Route": i, "Leg": leg, "Manhattan": plan.manhattan,
+                    "MemoryHit": hit, "Success": plan.found, "PathLength": plan.length if plan.found else 0,
+                    "FirstGoalIter": first[0] if first else np.nan,
+                    "FirstGoalMs": first[1] if first else np.nan,
+                    "OptimumIter": best[0] if best else np.nan,
+                    "OptimumMs": best[1] if best else np.nan,
+                })
+            info = f", pamięć {memory.info()}" if memory is not None else ""
+            print(f"[INFO] {alg} {mode}: {len(routes)} tras w {time.perf_counter() - t0:.1f} s{info}")
+
+    df = pd.DataFrame(rows)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_dir / "warmstart.csv", sep=";", index=False)
+
+    # trasy grupowane po trafieniu w pamięć w trybie warm (ta sama trasa cold w tej samej grupie):
+    # chybienia liczą się jak cold, więc średnia po wszystkich trasach rozmywałaby efekt pamięci
+    warm_hit = df[df["Mode"] == "warm"].set_index(["Algorithm", "Route"])["MemoryHit"]
+    paired = df.assign(MemoryHit=pd.MultiIndex.from_frame(df[["Algorithm", "Route"]]).map(warm_hit))
+    groups = ["Algorithm", "Leg", "MemoryHit"]
+
+    metrics = ["FirstGoalIter", "FirstGoalMs", "OptimumIter", "OptimumMs", "PathLength"]
+    ok = paired[paired["Success"]]
+    mean = ok.pivot_table(index=groups, columns="Mode", values=metrics, aggfunc="mean", observed=True)
+    summary = pd.DataFrame(index=mean.index)
+    summary["Routes"] = paired[paired["Mode"] == "warm"].groupby(groups)["Route"].count()
+    for m in metrics:
+        summary[f"{m}_cold"] = mean[(m, "cold")]
+        summary[f"{m}_warm"] = mean[(m, "warm")]
+        if m != "PathLength":
+            summary[f"{m}_reduction%"] = 100.0 * (1.0 - mean[(m, "warm")] / mean[(m, "cold")])
+    rates = paired.groupby(groups + ["Mode"])["Success"].mean().unstack("Mode")
+    summary["SuccessRate_cold"] = rates["cold"]
+    summary["SuccessRate_warm"] = rates["warm"]
+    summary.to_csv(out_dir / "warmstart_summary.csv", sep=";", float_format="%.3f")
+    print(f"[INFO] Zapisano warmstart.csv i warmstart_summary.csv w {out_dir}")
+    return summary
@@ -0,0 +1,110 @@
+"""
+Budżet planowania i ziarna RNG dla porównywalnych benchmarków.
+
+W Unity każdy algorytm kończy się po `Time.realtimeSinceStartup - t0 < 1f`,
+więc jakość zależy od obciążenia maszyny. Tutaj budżet to jedno z:
+
+  time         sekundy zegara ściennego (jak w C#)
+  iterations   liczba iteracji / generacji / stad
+  evaluations  liczba ocenionych ścieżek kandydujących (mrówki,
+               świetliki, wielbłądy)
+
+Z budżetem iteracji lub ewaluacji i generatorem z `rng_stream` wynik jest
+powtarzalny bit w bit na każdej maszynie; zmienia się tylko TimeMs.
+Budżet sprawdzany jest między iteracjami, więc ewaluacje mogą przekroczyć
+limit o jedną iterację.
+"""
+import time
+import zlib
+from typing import Optional
+
+import numpy as np
+
+KINDS = ("time", "iterations", "evaluations")
+
+
+class Budget:
+    """Opis budżetu (kind, limit); `start()` daje licznik na jeden przebieg."""
+
+    def __init__(self, kind: str = "time", limit: float = 1.0):
+        if kind not in KINDS:
+            raise ValueError(f"Nieznany rodzaj budżetu: {kind!r} ({', '.join(KINDS)})")
+        if limit <= 0:
+            raise ValueError(f"Budżet musi być dodatni, dostałem {limit}")
+        self.kind = kind
+        self.limit = float(limit)
+
+    @classmethod
+    def parse(cls, text: str) -> "Budget":
+        """'time=1', 'iterations=50', 'evaluations=2000' (samo '1.5' = sekundy)."""
+        kind, sep, value = text.partition("=")
+        if not sep:
+            kind, value = "time", kind
+        try:
+            return cls(kind.strip(), float(value))
+        except ValueError as exc:
+            raise ValueError(f"Zły budżet {text!r}: {exc}") from None
+
+    @property
+    def deterministic(self) -> bool:
+        return self.kind != "time"
+
+    def start(self) -> "BudgetMeter":
+        return BudgetMeter(self)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}={self.limit:g}"
+
+
+class BudgetMeter:
+    """Zużycie budżetu w jednym przebiegu: iteracje, ewaluacje, czas."""
+
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.t0 = time.perf_counter()
+        self.iterations = 0
+        self.evaluations = 0
+
+    def running(self) -> bool:
+        """Warunek pętli głównej (odpowiednik `realtimeSinceStartup - t0 < 1f`)."""
+        kind, limit = self.budget.kind, self.budget.limit
+        if kind == "time":
+            return time.perf_counter() - self.t0 < limit
+        if kind == "iterations":
+            return self.iterations < limit
+        return self.evaluations < limit
+
+    def next_iteration(self) -> int:
+        self.iterations += 1
+        return self.iterations
+
+    def evaluated(self, n: int = 1) -> None:
+        self.evaluations += n
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def clock_ms(self) -> float:
+        """
+        Zegar reguły logowania "co N ms": ścienny dla budżetu czasu, a dla
+        pozostałych zużyty ułamek budżetu przeskalowany na 1000 ms – wtedy
+        także zestaw wierszy logu nie zależy od maszyny.
+        """
+        kind = self.budget.kind
+        if kind == "time":
+            return self.elapsed_ms()
+        used = self.iterations if kind == "iterations" else self.evaluations
+        return 1000.0 * used / self.budget.limit
+
+
+DEFAULT_BUDGET = Budget("time", 1.0)
+
+
+def rng_stream(seed: int, instance: int, algorithm: str, replicate: int = 0) -> np.random.Generator:
+    """Niezależny strumień PCG64 dla (seed, instancja, algorytm, powtórzenie)."""
+    key = [int(seed), int(instance), zlib.crc32(algorithm.encode("utf-8")), int(replicate)]
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(key)))
+
+
+def resolve(budget: Optional[Budget]) -> Budget:
+    return DEFAULT_BUDGET if budget is None else budget
@@ -0,0 +1,81 @@
+"""
+Cache planów dla powtarzalnych tras standardowego cyklu.
+
+Klucz to (kafel startu, heading, kafel celu) – w cyklu ToShelf -> ToTP ->
+ToShelf -> ToSpawn roboty wciąż jeżdżą między tymi samymi spawnami,
+punktami transferowymi i regałami. Wartość to najlepsza znaleziona
+ścieżka (stany + akcje). Przy trafieniu ścieżka jest sprawdzana na
+aktualnych rezerwacjach w czasie dla wszystkich opóźnień startu
+0..max_delay naraz (ReservationTable.feasible_delays) i wydawana z
+najmniejszym bezkolizyjnym opóźnieniem – robot czeka na starcie (Wait).
+Dopiero gdy żadne opóźnienie nie pasuje, planuje silnik.
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .grid import WAIT
+from .plan import Plan
+
+Key = Tuple[int, int, int]
+
+
+def retime(plan: Plan, start_step: int, delay: int = 0) -> Plan:
+    """Ta sama ścieżka od start_step, poprzedzona `delay` węzłami Wait na starcie."""
+    states = np.r_[np.full(delay, plan.states[0], dtype=np.int32), plan.states]
+    actions = np.r_[plan.actions[:1], np.full(delay, WAIT, dtype=np.int8), plan.actions[1:]]
+    return Plan(plan.algorithm, states, actions, start_step, plan.manhattan, iterations=plan.iterations,
+                evaluations=plan.evaluations, elapsed_ms=plan.elapsed_ms, found=True, log=plan.log,
+                stop=plan.stop, first_goal=plan.first_goal)
+
+
+class PlanCache:
+    """LRU ścieżek per (start, heading, cel) z rewalidacją i przesunięciem w czasie."""
+
+    def __init__(self, max_entries: int = 4096, max_delay: int = 8):
+        self.max_entries = max_entries
+        self.max_delay = max_delay
+        self._entries: "OrderedDict[Key, Plan]" = OrderedDict()
+        self.hits = 0                 # trafienia wydane bez planowania
+        self.misses = 0               # brak klucza
+        self.revalidations = 0        # trafienia sprawdzane na rezerwacjach
+        self.retimed = 0              # ... wydane z opóźnieniem > 0
+        self.conflicts = 0            # ... odrzucone – powrót do silnika
+
+    def store(self, start_tile: int, head: int, goal_tile: int, plan: Plan) -> None:
+        """Zapamiętuje ścieżkę, jeśli klucza nie ma albo nowa jest nie dłuższa (najlepsza znaleziona)."""
+        if not plan.found:
+            return
+        key = (start_tile, head, goal_tile)
+        old = self._entries.get(key)
+        if old is None or plan.length <= old.length:
+            self._entries[key] = plan
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, start_tile: int, head: int, goal_tile: int, start_step: int, res) -> Optional[Plan]:
+        """Ścieżka z cache przesunięta na start_step (+ opóźnienie) albo None (planuj)."""
+        key = (start_tile, head, goal_tile)
+        plan = self._entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.revalidations += 1
+        ok = np.flatnonzero(res.feasible_delays(plan.states, start_step, self.max_delay))
+        if not len(ok):
+            self.conflicts += 1
+            return None
+        self.hits += 1
+        if ok[0]:
+            self.retimed += 1
+        return retime(plan, start_step, int(ok[0]))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "revalidations": self.revalidations, "retimed": self.retimed, "conflicts": self.conflicts}
@@ -0,0 +1,145 @@
+"""
+Camel z Camel.cs na tablicy przejść: stado wysyła `camels` wielbłądów
+równolegle na camelsteps kroków, a do ścieżki stada dopisuje pierwsze
+camelStepsToAssign węzłów najlepszego (największa wilgotność).
+
+humiditySum w C# jest zadeklarowane, ale nieużywane; tutaj mapa
+wilgotności na kaflach (jak światło FA) przychodzi tylko z pamięci
+między zapytaniami (memory.py) – bez niej wagi są jak w Camel.cs.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .budget import Budget, resolve
+from .grid import FORWARD, WAIT, state_index
+from .memory import WarmStartMemory
+from .plan import ConvergenceTrace, Plan, can_enter, goal_free, light_term, path_fitness, roulette
+from .stopping import RouteInfo, StopMonitor, StopRule
+from .transitions import TransitionTable
+
+CAMELS = 20
+CAMEL_STEPS = 32
+STEPS_TO_ASSIGN = 3
+SAFETY_SEGMENTS = 1000
+LOG_EVERY_MS = 5.0
+
+
+def set_paths(table: TransitionTable, eta: np.ndarray, s0: int, t0: int, goal_tile: int,
+              rng: np.random.Generator, camels: int = CAMELS, camel_steps: int = CAMEL_STEPS,
+              reserved: Optional[np.ndarray] = None, humidity: Optional[np.ndarray] = None
+              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Camel_SetPath dla `camels` wielbłądów z węzła s0 w kroku t0 (względem
+    startStep). Zwraca (states, actions, lengths) bez węzła startowego.
+    `humidity` (kafle) to premia za ruchy naprzód z poprzednich tras.
+    """
+    width = camel_steps + 1
+    states = np.full((camels, width), -1, dtype=np.int32)
+    actions = np.full((camels, width), WAIT, dtype=np.int8)
+    lengths = np.zeros(camels, dtype=np.int32)
+    cur = np.full(camels, s0, dtype=np.int32)
+    active = np.arange(camels) if s0 // 4 != goal_tile else np.zeros(0, dtype=np.int64)
+    goal_ok = goal_free(reserved, goal_tile)
+    rows = np.arange(camels)
+
+    while len(active):
+        s = cur[active]
+        t = t0 + lengths[active]
+        n1 = table.next_state[s]
+        ok1 = table.valid[s] & can_enter(reserved, t[:, None], table.next_tile[s], goal_tile, goal_ok)
+        w = eta[s].copy()
+        if humidity is not None:
+            w[:, FORWARD] = light_term(w[:, FORWARD], humidity[table.next_tile[s, FORWARD]])
+
+        # każda akcja poza Forward dostaje krok naprzód (Wait bez niego ma wagę 0)
+        n2 = np.full_like(n1, -1)
+        for a in range(1, 4):
+            mid = n1[:, a]
+            ok2 = table.valid[mid, FORWARD] & can_enter(reserved, t + 1, table.next_tile[mid, FORWARD],
+                                                        goal_tile, goal_ok)
+            bonus = eta[mid, FORWARD]
+            if humidity is not None:
+                bonus = light_term(bonus, humidity[table.next_tile[mid, FORWARD]])
+            w[:, a] = np.where(ok2, (w[:, a] + bonus) * 0.20, 0.0 if a == WAIT else w[:, a])
+            n2[:, a] = np.where(ok2, table.next_state[mid, FORWARD], -1)
+        w = np.where(ok1, w, 0.0)
+
+        chosen = roulette(w, rng)
+        stuck = chosen < 0
+        act, ch = active[~stuck], chosen[~stuck]
+        r = rows[: len(act)]
+        first, second = n1[~stuck][r, ch], n2[~stuck][r, ch]
+        states[act, lengths[act]] = first
+        actions[act, lengths[act]] = ch
+        lengths[act] += 1
+        two = second >= 0
+        states[act[two], lengths[act[two]]] = second[two]
+        actions[act[two], lengths[act[two]]] = FORWARD
+        lengths[act[two]] += 1
+        cur[act] = np.where(two, second, first)
+
+        keep = (cur[act] // 4 != goal_tile) & (lengths[act] < camel_steps)
+        active = act[keep]
+    return states, actions, lengths
+
+
+def plan(table: TransitionTable, start: Tuple[int, int], head: int, goal: Tuple[int, int], start_step: int = 0,
+         reserved: Optional[np.ndarray] = None, rng: Optional[np.random.Generator] = None,
+         budget: Optional[Budget] = None, stop: Optional[StopRule] = None, shadow: bool = False,
+         memory: Optional[WarmStartMemory] = None, camels: int = CAMELS, camel_steps: int = CAMEL_STEPS,
+         steps_to_assign: int = STEPS_TO_ASSIGN) -> Plan:
+    """Camel_Coroutine: kolejne stada do wyczerpania budżetu, najwilgotniejsza ścieżka stada."""
+    rng = rng or np.random.default_rng()
+    meter = resolve(budget).start()
+    manhattan = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+    s0 = int(state_index(start[0], start[1], head, table.width))
+    goal_tile = goal[1] * table.width + goal[0]
+    eta = table.heuristic(goal, "camel")
+    wet_prior = memory.recall("CHA", goal) if memory is not None else None
+
+    best_states = best_actions = None
+    best_humidity = -np.inf
+    trace = ConvergenceTrace(LOG_EVERY_MS)
+    monitor = StopMonitor(stop, RouteInfo("CHA", table, s0, goal_tile, manhattan), shadow)
+    while meter.running() and not monitor.stopped:
+        meter.next_iteration()
+        herd_states, herd_actions = [np.array([s0], dtype=np.int32)], [np.array([WAIT], dtype=np.int8)]
+        last, n_nodes = s0, 1
+        for _ in range(SAFETY_SEGMENTS + 1):
+            if last // 4 == goal_tile:
+                break
+            states, actions, lengths = set_paths(table, eta, last, n_nodes - 1, goal_tile, rng,
+                                                 camels, camel_steps, reserved, wet_prior)
+            meter.evaluated(camels)
+            ends = states[np.arange(camels), np.maximum(lengths - 1, 0)]
+            humidity = [path_fitness(ends[c] // 4, lengths[c], start, goal, table.width) if lengths[c] else -np.inf
+                        for c in range(camels)]
+            c = int(np.argmax(humidity))
+            if not np.isfinite(humidity[c]):
+                break                                     # żaden wielbłąd nie ruszył – stado utknęło
+            n = min(int(lengths[c]), steps_to_assign)
+            herd_states.append(states[c, :n])
+            herd_actions.append(actions[c, :n])
+            last, n_nodes = int(states[c, n - 1]), n_nodes + n
+
+        path_states, path_actions = np.concatenate(herd_states), np.concatenate(herd_actions)
+        humidity = path_fitness(path_states[-1] // 4, len(path_states), start, goal, table.width)
+        improved = humidity > best_humidity
+        if improved:
+            best_humidity, best_states, best_actions = humidity, path_states, path_actions
+        reached = best_states[-1] // 4 == goal_tile
+        trace.record(meter, best_humidity, len(best_states), improved, reached)
+        monitor.update(meter, len(best_states), reached, improved)
+
+    # Camel zwraca najlepszą ścieżkę stada także wtedy, gdy nie doszła do celu
+    found = best_states is not None and best_states[-1] // 4 == goal_tile
+    if memory is not None and found:
+        # wilgotność najlepszej ścieżki stada na kaflach, na które weszła naprzód
+        wet = np.zeros(table.n_tiles, dtype=np.float32)
+        fwd = best_actions[1:] == FORWARD
+        np.add.at(wet, best_states[1:][fwd] // 4, best_humidity)
+        memory.store("CHA", goal, wet)
+    return Plan("CHA", best_states, best_actions, start_step, manhattan, iterations=meter.iterations,
+                evaluations=meter.evaluations, elapsed_ms=meter.elapsed_ms(), found=found, log=trace.rows,
+                stop=monitor.event, first_goal=trace.first_goal)
@@ -0,0 +1,395 @@
+"""
+python -m kiva_planner <polecenie> [opcje]
+"""
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+
+def _budget(text: str):
+    from .budget import Budget
+
+    try:
+        return Budget.parse(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+
+def _algorithms(text: str) -> List[str]:
+    return [a.strip() for a in text.split(",") if a.strip()]
+
+
+def _cost(args):
+    if args.cost_layer is None:
+        return None
+    from .heatmap import load_cost_layer
+
+    try:
+        return load_cost_layer(args.cost_layer, args.cost_weight)
+    except (ValueError, OSError) as exc:
+        raise SystemExit(f"[ERROR] Warstwa kosztu {args.cost_layer}: {exc}")
+
+
+def _add_cost_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--cost-layer", type=Path, default=None, metavar="PLIK",
+                   help="mapa zatorów (congestion.npy / .csv z polecenia heatmap) jako koszt kafli")
+    p.add_argument("--cost-weight", type=float, default=1.0, help="mnożnik warstwy kosztu")
+
+
+def cmd_bench(args) -> int:
+    from .bench import run_benchmark
+    from .stopping import parse_rules
+
+    try:
+        stop = parse_rules(args.stop or [])
+    except (ValueError, OSError) as exc:
+        raise SystemExit(f"[ERROR] {exc}")
+    if args.stop_shadow and stop is None:
+        raise SystemExit("[ERROR] --stop-shadow wymaga co najmniej jednej reguły --stop")
+    count = run_benchmark(args.out, n_instances=args.instances, algorithms=_algorithms(args.algorithms),
+                          replicates=args.replicates, budget=args.budget, seed=args.seed,
+                          map_seed=args.map_seed, stop=stop, shadow=args.stop_shadow, traces=args.traces,
+                          cost=_cost(args))
+    print(f"[INFO] Zapisano {count} planów w {args.out}")
+    return 0
+
+
+def cmd_warmstart(args) -> int:
+    from .bench import run_warmstart
+
+    summary = run_warmstart(args.out, cycles=args.cycles, algorithms=_algorithms(args.algorithms),
+                            budget=args.budget, seed=args.seed, map_seed=args.map_seed,
+                            max_bytes=int(args.memory_mb * 1024 * 1024), decay=args.decay, cluster=args.cluster,
+                            hot_shelves=args.hot_shelves or None)
+    cols = ["Routes"] + [c for c in summary.columns if c.endswith("reduction%")]
+    print(summary[cols].round(1).to_string())
+    return 0
+
+
+def cmd_sim(args) -> int:
+    from .cache import PlanCache
+    from .sim import run_simulation
+
+    cache = PlanCache(args.cache_size, args.max_delay) if args.cache else None
+    if cache is not None and args.workers is not None:
+        raise SystemExit("[ERROR] --cache działa tylko bez --workers")
+    if args.traces and args.out is None:
+        raise SystemExit("[ERROR] --traces wymaga --out")
+    sim = run_simulation(args.robots, args.steps, args.algorithm, budget=args.budget, seed=args.seed,
+                         map_seed=args.map_seed, cache=cache, out_dir=args.out, hot_shelves=args.hot_shelves,
+                         workers=args.workers, batch=args.batch, max_delay=args.max_delay,
+                         record=args.plans_out is not None or args.check_plans, traces=args.traces,
+                         cost=_cost(args))
+    st = sim.stats
+    code = 0
+    if args.plans_out is not None or args.check_plans:
+        from .conflicts import print_conflicts, validate_plans
+
+        plans = sim.plan_set()
+        if args.plans_out is not None:
+            plans.save(args.plans_out)
+            print(f"[INFO] Zapisano {len(plans)} węzłów planów w {args.plans_out}")
+        if args.check_plans:
+            report = validate_plans(plans, sim.grid)
+            print_conflicts(report, len(plans))
+            code = 1 if (report["Severity"] == "error").any() else 0
+    print(f"[INFO] {st.steps} kroków, {st.requests} zapytań: {st.planned} z silnika, {st.cached} z cache, "
+          f"{st.failed} bez ścieżki ({st.merge_conflicts} kolizji przy scalaniu, "
+          f"{st.replanned} ponowionych w tym samym kroku), {st.legs_done} odcinków cyklu")
+    print(f"[INFO] Planowanie {st.planning_ms / 1000.0:.1f} s z {st.wall_s:.1f} s symulacji")
+    if cache is not None:
+        print(f"[INFO] Cache planów: {cache.info()}")
+    return code
+
+
+def cmd_pool_bench(args) -> int:
+    import pandas as pd
+
+    from .pool import measure_throughput
+
+    workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    rows = measure_throughput(workers, args.steps, args.algorithm, budget=args.budget, seed=args.seed,
+                              map_seed=args.map_seed, n_robots=args.robots, batch=args.batch)
+    df = pd.DataFrame(rows).set_index("Workers")
+    df["Speedup"] = df["LegsPerS"] / df["LegsPerS"].iloc[0]
+    print(df.round(2).to_string())
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.out, sep=";", float_format="%.3f")
+        print(f"[INFO] Zapisano {args.out}")
+    return 0
+
+
+def cmd_heatmap(args) -> int:
+    import time
+
+    from .grid import build_warehouse
+    from .heatmap import TileHeatmap, render, save_congestion
+    from .traces import TraceStore
+
+    algorithms = _algorithms(args.algorithms) if args.algorithms else None
+    heat = TileHeatmap(window=args.window)
+    t0 = time.perf_counter()
+    nodes = 0
+    for path in args.traces:
+        try:
+            store = TraceStore(path)
+        except (ValueError, OSError) as exc:
+            raise SystemExit(f"[ERROR] {exc}")
+        heat.add_store(store, algorithms, found_only=not args.all)
+        nodes += store.n_nodes
+    if not heat.counts:
+        raise SystemExit("[ERROR] Brak ścieżek do zliczenia")
+    print(f"[INFO] {sum(heat.paths.values())} ścieżek, {nodes} węzłów w {time.perf_counter() - t0:.2f} s")
+    if heat.outside:
+        print(f"[WARN] {heat.outside} węzłów poza mapą {heat.width}x{heat.length} pominięto")
+    args.out.mkdir(parents=True, exist_ok=True)
+    heat.save(args.out / "heatmap.npz")
+    saved = save_congestion(heat.congestion(), args.out)
+    saved += render(heat, args.out, grid=build_warehouse(seed=args.map_seed), reference=args.reference,
+                    log=not args.linear)
+    print(f"[INFO] Zapisano heatmap.npz, {', '.join(p.name for p in saved)} w {args.out}")
+    return 0
+
+
+def cmd_trace_info(args) -> int:
+    from .grid import ACTIONS, HEADINGS
+    from .traces import TraceStore
+
+    try:
+        store = TraceStore(args.traces)
+        print(f"[INFO] {len(store)} ścieżek, {store.n_nodes} węzłów w {args.traces}")
+        print(store.summary().round(1).to_string())
+    except (ValueError, OSError) as exc:
+        raise SystemExit(f"[ERROR] {exc}")
+    if args.path is not None:
+        try:
+            trace = store[args.path]
+        except IndexError as exc:
+            raise SystemExit(f"[ERROR] {exc}")
+        print(store.meta.iloc[args.path].to_string())
+        for x, y, h, a, t in zip(*(col.tolist() for col in trace)):
+            print(f"{t};{x};{y};{HEADINGS[h]};{ACTIONS[a]}")
+    return 0
+
+
+def cmd_check_plans(args) -> int:
+    import time
+
+    from .conflicts import PlanSet, print_conflicts, validate_plans
+    from .grid import build_warehouse
+
+    try:
+        plans = PlanSet.load(args.plans)
+    except (ValueError, OSError, KeyError) as exc:
+        raise SystemExit(f"[ERROR] {exc}")
+    grid = None if args.no_map else build_warehouse(seed=args.map_seed)
+    t0 = time.perf_counter()
+    report = validate_plans(plans, grid)
+    elapsed = time.perf_counter() - t0
+    print_conflicts(report, len(plans))
+    out = args.out or args.plans.with_name("plan_conflicts.csv")
+    report.to_csv(out, sep=";", index=False)
+    print(f"[INFO] Zapisano {out} ({len(plans) / max(elapsed, 1e-9) / 1e6:.1f} mln węzłów/s)")
+    return 1 if (report["Severity"] == "error").any() else 0
+
+
+def cmd_serve(args) -> int:
+    from .service import run_server
+
+    run_server(args.listen, args.algorithm, budget=args.budget, seed=args.seed, map_seed=args.map_seed,
+               workers=args.workers, batch=args.batch, batch_ms=args.batch_ms, max_delay=args.max_delay)
+    return 0
+
+
+def cmd_load(args) -> int:
+    import pandas as pd
+
+    from .service import load_sweep
+
+    counts = [int(r) for r in args.robots.split(",") if r.strip()]
+    try:
+        rows = load_sweep(args.connect, counts, args.requests, seed=args.seed, map_seed=args.map_seed,
+                          commit=args.commit)
+    except OSError as exc:
+        raise SystemExit(f"[ERROR] Brak połączenia z {args.connect}: {exc}")
+    df = pd.DataFrame(rows).set_index("Robots")
+    print(df.round(1).to_string())
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.out, sep=";", float_format="%.3f")
+        print(f"[INFO] Zapisano {args.out}")
+    return 0
+
+
+def cmd_learn_stop(args) -> int:
+    from .stopping import learn_model, save_model
+
+    logs = {alg: args.data_dir / f"{alg}ConvergenceLog.csv" for alg in _algorithms(args.algorithms)}
+    missing = [str(p) for p in logs.values() if not p.exists()]
+    if missing:
+        raise SystemExit(f"[ERROR] Brak logów: {', '.join(missing)}")
+    save_model(learn_model(logs, quantile=args.quantile), args.out)
+    return 0
+
+
+def cmd_stop_report(args) -> int:
+    from .stopping import STOPS_FILE, stopping_report
+
+    path = args.data_dir / STOPS_FILE
+    try:
+        report = stopping_report(path)
+    except (ValueError, OSError) as exc:
+        raise SystemExit(f"[ERROR] {exc}")
+    out = args.out or args.data_dir / "stop_report.csv"
+    report.to_csv(out, sep=";", float_format="%.3f")
+    print(report.round(2).to_string())
+    print(f"[INFO] Zapisano {out}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="kiva_planner",
+                                     description="Planery ACO / Firefly / Camel z symulacji Kiva.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("bench", help="trasy standardowego cyklu -> dane.csv i *ConvergenceLog.csv")
+    p.add_argument("--out", type=Path, default=Path("bench_planner"), help="katalog wyjściowy")
+    p.add_argument("--instances", type=int, default=30, help="liczba tras (domyślnie 30)")
+    p.add_argument("--replicates", type=int, default=1, help="powtórzenia każdej trasy")
+    p.add_argument("--algorithms", default="ACO,FA,CHA", help="lista algorytmów po przecinku")
+    p.add_argument("--budget", type=_budget, default=None, metavar="RODZAJ=LIMIT",
+                   help="time=1 (s, domyślnie), iterations=N albo evaluations=N; "
+                        "dwa ostatnie dają wyniki powtarzalne między maszynami")
+    p.add_argument("--seed", type=int, default=0, help="ziarno tras i strumieni RNG")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów")
+    p.add_argument("--stop", action="append", metavar="REGUŁA=WARTOŚĆ",
+                   help="reguła wczesnego zatrzymania: noimprove=K, gap=G, gap-bfs=G, learned=PLIK "
+                        "(można powtórzyć – zatrzymuje pierwsza)")
+    p.add_argument("--stop-shadow", action="store_true",
+                   help="tylko zapisz moment zadziałania reguły w stops.csv, planuj do końca budżetu")
+    p.add_argument("--traces", action="store_true", help="zapisz węzły ścieżek w <out>/traces")
+    _add_cost_args(p)
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("warmstart", help="cykle tras bez pamięci i z pamięcią między zapytaniami")
+    p.add_argument("--out", type=Path, default=Path("bench_warmstart"), help="katalog wyjściowy")
+    p.add_argument("--cycles", type=int, default=25, help="liczba cykli spawn -> regał -> TP -> regał -> spawn")
+    p.add_argument("--algorithms", default="ACO,FA,CHA", help="lista algorytmów po przecinku")
+    p.add_argument("--budget", type=_budget, default=None, metavar="RODZAJ=LIMIT",
+                   help="budżet na trasę (domyślnie iterations=40)")
+    p.add_argument("--seed", type=int, default=0, help="ziarno tras i strumieni RNG")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów")
+    p.add_argument("--memory-mb", type=float, default=64.0, help="limit pamięci śladów na algorytm (MB)")
+    p.add_argument("--decay", type=float, default=0.98, help="wygaszenie śladu na każde zapamiętane zapytanie")
+    p.add_argument("--cluster", type=int, default=1, help="region celu: blok cluster x cluster kafli")
+    p.add_argument("--hot-shelves", type=int, default=8, metavar="N",
+                   help="regały z losowego stałego zbioru N (domyślnie 8; 0 = wszystkie regały)")
+    p.set_defaults(func=cmd_warmstart)
+
+    p = sub.add_parser("sim", help="symulacja robotów w standardowym cyklu na rezerwacjach w czasie")
+    p.add_argument("--robots", type=int, default=16, help="liczba robotów (najwyżej liczba spawnów)")
+    p.add_argument("--steps", type=int, default=500, help="liczba kroków symulacji")
+    p.add_argument("--algorithm", default="ACO", help="ACO, FA albo CHA")
+    p.add_argument("--budget", type=_budget, default=None, metavar="RODZAJ=LIMIT",
+                   help="budżet na plan (domyślnie iterations=20)")
+    p.add_argument("--seed", type=int, default=0, help="ziarno kolejności robotów, celów i strumieni RNG")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów")
+    p.add_argument("--hot-shelves", type=int, default=None, metavar="N",
+                   help="cele ToShelf tylko z N losowych regałów (domyślnie wszystkie)")
+    p.add_argument("--cache", action="store_true", help="cache planów (start, heading, cel) z rewalidacją")
+    p.add_argument("--cache-size", type=int, default=4096, help="maks. liczba ścieżek w cache")
+    p.add_argument("--max-delay", type=int, default=8,
+                   help="maks. opóźnienie startu przy przesuwaniu ścieżki (cache, plany silnika)")
+    p.add_argument("--workers", type=int, default=None,
+                   help="pula procesów planujących kilka celów na krok (0 = w procesie głównym)")
+    p.add_argument("--batch", type=int, default=4, help="celów obsługiwanych na krok przez pulę")
+    p.add_argument("--out", type=Path, default=None, help="katalog na dane.csv i logi planów silnika")
+    p.add_argument("--plans-out", type=Path, default=None, metavar="PLIK",
+                   help="przypisane plany (Robot;Step;X;Y;Heading) do .npz albo .csv")
+    p.add_argument("--check-plans", action="store_true",
+                   help="sprawdź kolizje w przypisanych planach; kod wyjścia 1 przy błędach")
+    p.add_argument("--traces", action="store_true", help="zapisz przypisane ścieżki w <out>/traces")
+    _add_cost_args(p)
+    p.set_defaults(func=cmd_sim)
+
+    p = sub.add_parser("heatmap", help="odwiedziny / oczekiwania / obroty per kafel ze śladów + mapa zatorów")
+    p.add_argument("traces", type=Path, nargs="+", help="katalogi śladów (np. bench_planner/traces)")
+    p.add_argument("--out", type=Path, default=Path("heatmaps"), help="katalog na PNG, heatmap.npz, congestion.*")
+    p.add_argument("--window", type=int, default=None, help="okno czasu w krokach (domyślnie całość)")
+    p.add_argument("--algorithms", default=None, help="tylko te algorytmy (po przecinku)")
+    p.add_argument("--reference", default=None, help="algorytm odniesienia map różnicowych (domyślnie pierwszy)")
+    p.add_argument("--all", action="store_true", help="licz także ścieżki nieudane (Found=False)")
+    p.add_argument("--linear", action="store_true", help="skala liniowa zamiast logarytmicznej")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów (przeszkody na rysunkach)")
+    p.set_defaults(func=cmd_heatmap)
+
+    p = sub.add_parser("trace-info", help="podsumowanie katalogu śladów i węzły wybranej ścieżki")
+    p.add_argument("traces", type=Path, help="katalog śladów (np. bench_planner/traces)")
+    p.add_argument("--path", type=int, default=None, help="wypisz węzły ścieżki o tym numerze")
+    p.set_defaults(func=cmd_trace_info)
+
+    p = sub.add_parser("check-plans", help="kolizje vertex / edge / blokad w zbiorze planów (raport dla CI)")
+    p.add_argument("plans", type=Path,
+                   help="plik .npz, .csv (Robot;Step;X;Y;Heading) albo katalog śladów symulacji (sim --traces)")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów (przeszkody mapy)")
+    p.add_argument("--no-map", action="store_true", help="bez kontroli przeszkód mapy (plany spoza build_warehouse)")
+    p.add_argument("--out", type=Path, default=None,
+                   help="plik CSV raportu (domyślnie plan_conflicts.csv obok pliku planów)")
+    p.set_defaults(func=cmd_check_plans)
+
+    p = sub.add_parser("pool-bench", help="przypisane odcinki/s symulacji z pulą dla różnej liczby procesów")
+    p.add_argument("--workers", default="0,1,2,4", help="liczby procesów po przecinku (0 = w procesie głównym)")
+    p.add_argument("--steps", type=int, default=50, help="kroki symulacji na każdą liczbę procesów")
+    p.add_argument("--robots", type=int, default=16, help="liczba robotów (maks. liczba spawnów)")
+    p.add_argument("--batch", type=int, default=4, help="celów obsługiwanych na krok przez pulę")
+    p.add_argument("--algorithm", default="ACO", help="ACO, FA albo CHA")
+    p.add_argument("--budget", type=_budget, default=None, metavar="RODZAJ=LIMIT",
+                   help="budżet na plan (domyślnie iterations=20)")
+    p.add_argument("--seed", type=int, default=0, help="ziarno kolejności robotów, celów i strumieni RNG")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów")
+    p.add_argument("--out", type=Path, default=None, help="plik CSV z wynikami")
+    p.set_defaults(func=cmd_pool_bench)
+
+    p = sub.add_parser("serve", help="lokalna usługa planowania (gniazdo Unix albo TCP)")
+    p.add_argument("--listen", default="127.0.0.1:7878", help="host:port albo unix:/ścieżka/gniazda")
+    p.add_argument("--algorithm", default="ACO", help="ACO, FA albo CHA")
+    p.add_argument("--budget", type=_budget, default=None, metavar="RODZAJ=LIMIT",
+                   help="budżet na plan (domyślnie iterations=20)")
+    p.add_argument("--seed", type=int, default=0, help="ziarno strumieni RNG")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów")
+    p.add_argument("--workers", type=int, default=2, help="procesy planujące (0 = w procesie serwera)")
+    p.add_argument("--batch", type=int, default=8, help="maks. zapytań w partii")
+    p.add_argument("--batch-ms", type=float, default=2.0, help="ile ms czekać na kolejne zapytania partii")
+    p.add_argument("--max-delay", type=int, default=0,
+                   help="maks. opóźnienie startu, gdy plan koliduje z rezerwacjami spoza migawki")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("load", help="generator obciążenia usługi: p50/p99 i plany/s")
+    p.add_argument("--connect", default="127.0.0.1:7878", help="host:port albo unix:/ścieżka/gniazda")
+    p.add_argument("--robots", default="1,10,100,500", help="liczby robotów naraz po przecinku")
+    p.add_argument("--requests", type=int, default=2, help="tras na robota")
+    p.add_argument("--seed", type=int, default=0, help="ziarno tras")
+    p.add_argument("--map-seed", type=int, default=0, help="ziarno zajętości regałów (jak w serve)")
+    p.add_argument("--commit", action="store_true", help="serwer wpisuje zwrócone plany do rezerwacji")
+    p.add_argument("--out", type=Path, default=None, help="plik CSV z wynikami")
+    p.set_defaults(func=cmd_load)
+
+    p = sub.add_parser("learn-stop", help="progi reguły learned z historycznych logów konwergencji")
+    p.add_argument("--data-dir", type=Path, default=Path("."), help="katalog z *ConvergenceLog.csv")
+    p.add_argument("--algorithms", default="ACO,FA,CHA", help="lista algorytmów po przecinku")
+    p.add_argument("--quantile", type=float, default=0.9,
+                   help="kwantyl IterFirstOptimal używany jako próg (domyślnie 0.9)")
+    p.add_argument("--out", type=Path, default=Path("stop_model.json"), help="plik modelu JSON")
+    p.set_defaults(func=cmd_learn_stop)
+
+    p = sub.add_parser("stop-report", help="oszczędzony czas vs utracona długość ścieżki (stops.csv)")
+    p.add_argument("--data-dir", type=Path, default=Path("bench_planner"), help="katalog wyniku bench")
+    p.add_argument("--out", type=Path, default=None, help="plik CSV raportu (domyślnie <data-dir>/stop_report.csv)")
+    p.set_defaults(func=cmd_stop_report)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,235 @@
+"""
+Walidacja zbioru planów wszystkich robotów po fakcie.
+
+AssignPlanToRobot wpisuje plan do RTgrid i blokuje kafel celu
+(BlockTileFuture), ale nic nie sprawdza całego zbioru planów naraz. Tu
+plany są tablicami (robot, krok, x, y, heading) – PlanSet – i są
+sprawdzane kilkoma przejściami NumPy (sortowanie po kluczu, searchsorted),
+bez pętli po robotach ani krokach.
+
+Trajektoria robota jest najpierw uzupełniana do każdego kroku: między
+planami i po ostatnim robot stoi na kaflu ostatniego węzła (blokada do
+odwołania), aż do ostatniego kroku w zbiorze. Potem, dla par robotów:
+
+  vertex         dwa roboty w tym samym (krok, kafel)
+  blocked_tile   robot wjeżdża na kafel, na którym stoi zaparkowany robot
+  edge_swap      zamiana miejsc p -> q i q -> p między krokami t i t+1
+  edge_follow    wjazd w t+1 na kafel, na którym w t stoi inny robot
+                 (AssignPlanToRobot rezerwuje następny węzeł już w kroku t)
+a dla pojedynczego robota:
+  static_obstacle  węzeł na przeszkodzie mapy (Grid.static_blocked)
+  teleport         kolejne kroki dalej niż jeden kafel
+  duplicate_step   dwa węzły robota w tym samym kroku (zostaje pierwszy)
+
+Raport to tabela Check/Severity/Step/X/Y/RobotA/RobotB (RobotB = -1 dla
+kontroli jednego robota) – pusta, gdy zbiór jest bezkolizyjny.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .grid import Grid, state_xyh
+from .plan import Plan
+
+REPORT_COLUMNS = ["Check", "Severity", "Step", "X", "Y", "RobotA", "RobotB"]
+SEVERITY = {"vertex": "error", "blocked_tile": "error", "edge_swap": "error", "edge_follow": "error",
+            "static_obstacle": "error", "teleport": "error", "duplicate_step": "warn"}
+CSV_HEADER = ("Robot", "Step", "X", "Y", "Heading")
+MAX_LISTED = 10                       # tyle konfliktów na kontrolę wypisuje print_conflicts
+
+
+# ============================
+# 1. ZBIÓR PLANÓW (STRUCT OF ARRAYS)
+# ============================
+
+@dataclass
+class PlanSet:
+    robot: np.ndarray                 # int32
+    step: np.ndarray                  # int32
+    x: np.ndarray                     # int16
+    y: np.ndarray                     # int16
+    heading: np.ndarray               # uint8
+
+    def __len__(self) -> int:
+        return len(self.step)
+
+    @classmethod
+    def from_arrays(cls, robot, step, x, y, heading) -> "PlanSet":
+        return cls(np.asarray(robot, np.int32), np.asarray(step, np.int32), np.asarray(x, np.int16),
+                   np.asarray(y, np.int16), np.asarray(heading, np.uint8))
+
+    @classmethod
+    def from_plans(cls, plans: Sequence[Tuple[int, Plan]], width: int) -> "PlanSet":
+        """[(id robota, plan)] -> PlanSet; plany bez ścieżki są pomijane."""
+        found = [(r, p) for r, p in plans if p.states is not None and len(p.states)]
+        if not found:
+            return cls.from_arrays(*([] for _ in CSV_HEADER))
+        states = np.concatenate([p.states for _, p in found])
+        robot = np.repeat([r for r, _ in found], [len(p.states) for _, p in found])
+        step = np.concatenate([p.start_step + np.arange(len(p.states)) for _, p in found])
+        x, y, h = state_xyh(states, width)
+        return cls.from_arrays(robot, step, x, y, h)
+
+    @classmethod
+    def concat(cls, parts: Sequence["PlanSet"]) -> "PlanSet":
+        return cls(*(np.concatenate([getattr(p, f) for p in parts]) for f in ("robot", "step", "x", "y", "heading")))
+
+    def save(self, path: Path) -> None:
+        """`.npz` (binarnie) albo CSV z separatorem ';' (Robot;Step;X;Y;Heading)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".npz":
+            np.savez_compressed(path, robot=self.robot, step=self.step, x=self.x, y=self.y, heading=self.heading)
+        else:
+            pd.DataFrame(dict(zip(CSV_HEADER, (self.robot, self.step, self.x, self.y, self.heading)))) \
+                .to_csv(path, sep=";", index=False)
+
+    @classmethod
+    def from_traces(cls, store) -> "PlanSet":
+        """
+        Ścieżki z katalogu śladów symulacji (traces.TraceStore, Robot z
+        paths.csv). Ślady benchmarku (Robot = -1, każda trasa od kroku 0 na
+        pustej mapie) to niezależne plany, nie jeden robot – ValueError.
+        """
+        robots = store.meta["Robot"].to_numpy()
+        if (robots < 0).any():
+            raise ValueError(f"{store.dir}: ślady bez robota (Robot = -1, np. z bench --traces) – "
+                             f"kontrola kolizji dotyczy tylko śladów symulacji (sim --traces)")
+        robot = np.repeat(robots, store.lengths)
+        nodes = store.nodes(0, store.n_nodes)
+        return cls.from_arrays(robot, nodes.step, nodes.x, nodes.y, nodes.heading)
+
+    @classmethod
+    def load(cls, path: Path) -> "PlanSet":
+        """`.npz`, CSV albo katalog śladów (traces.TraceStore)."""
+        path = Path(path)
+        if path.is_dir():
+            from .traces import TraceStore
+
+            return cls.from_traces(TraceStore(path))
+        if path.suffix == ".npz":
+            with np.load(path) as data:
+                return cls.from_arrays(data["robot"], data["step"], data["x"], data["y"], data["heading"])
+        df = pd.read_csv(path, sep=";", encoding="utf-8-sig")
+        missing = [c for c in CSV_HEADER if c not in df.columns]
+        if missing:
+            raise ValueError(f"{path.name}: brak kolumn {', '.join(missing)}")
+        return cls.from_arrays(*(df[c].to_numpy() for c in CSV_HEADER))
+
+
+# ============================
+# 2. KONTROLE
+# ============================
+
+def _report(check: str, step, x, y, a, b=None) -> pd.DataFrame:
+    n = len(step)
+    return pd.DataFrame({"Check": check, "Severity": SEVERITY[check], "Step": np.asarray(step, np.int64),
+                         "X": np.asarray(x, np.int64), "Y": np.asarray(y, np.int64),
+                         "RobotA": np.asarray(a, np.int64),
+                         "RobotB": np.full(n, -1, np.int64) if b is None else np.asarray(b, np.int64)},
+                        columns=REPORT_COLUMNS)
+
+
+def _densify(robot, step, tile, last_step: int) -> Tuple[np.ndarray, ...]:
+    """
+    Wiersze posortowane (robot, krok) -> po wierszu na każdy krok od
+    pierwszego węzła robota do `last_step`; parked = krok bez węzła planu.
+    """
+    end = np.r_[step[1:], 0]
+    last = np.r_[robot[1:] != robot[:-1], True]
+    end[last] = last_step + 1
+    counts = (end - step).astype(np.int64)
+    src = np.repeat(np.arange(len(step)), counts)
+    offset = np.arange(len(src)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return robot[src], step[src] + offset, tile[src], offset > 0
+
+
+def validate_plans(plans: PlanSet, grid: Optional[Grid] = None, width: Optional[int] = None) -> pd.DataFrame:
+    """Wszystkie kontrole; tabela REPORT_COLUMNS posortowana po (Step, Check)."""
+    if not len(plans):
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    if width is None:
+        width = grid.width if grid is not None else int(plans.x.max()) + 1
+    robot = plans.robot.astype(np.int64)
+    step = plans.step.astype(np.int64)
+    x, y = plans.x.astype(np.int64), plans.y.astype(np.int64)
+    tile = y * width + x
+    parts = []
+
+    # --- (robot, krok): duplikaty i uzupełnienie trajektorii ---
+    t_min, t_max = int(step.min()), int(step.max())
+    span = t_max - t_min + 1
+    order = np.argsort(robot * span + (step - t_min), kind="stable")
+    robot, step, tile = robot[order], step[order], tile[order]
+    dup = np.r_[False, (robot[1:] == robot[:-1]) & (step[1:] == step[:-1])]
+    if dup.any():
+        parts.append(_report("duplicate_step", step[dup], tile[dup] % width, tile[dup] // width, robot[dup]))
+        robot, step, tile = robot[~dup], step[~dup], tile[~dup]
+    if grid is not None:
+        hit = grid.static_blocked()[tile]
+        if hit.any():
+            parts.append(_report("static_obstacle", step[hit], tile[hit] % width, tile[hit] // width, robot[hit]))
+    robot, step, tile, parked = _densify(robot, step, tile, t_max)
+
+    nxt = np.r_[robot[1:] == robot[:-1], False]                  # wiersz i+1 to ten sam robot w kroku t+1
+    dx = np.abs(np.diff(tile % width)) + np.abs(np.diff(tile // width))
+    jump = np.flatnonzero(nxt[:-1] & (dx > 1))
+    if len(jump):
+        parts.append(_report("teleport", step[jump + 1], tile[jump + 1] % width, tile[jump + 1] // width,
+                             robot[jump + 1]))
+
+    # --- (krok, kafel): vertex i blocked_tile ---
+    n_tiles = int(tile.max()) + 1
+    key = (step - t_min) * n_tiles + tile
+    by_key = np.argsort(key, kind="stable")
+    k_sorted = key[by_key]
+    same = np.flatnonzero(k_sorted[1:] == k_sorted[:-1])
+    if len(same):
+        a, b = by_key[same], by_key[same + 1]
+        # jeden zaparkowany, drugi w ruchu: ten w ruchu wjechał na zablokowany kafel
+        blocked = parked[a] != parked[b]
+        mover, other = np.where(parked[a], b, a), np.where(parked[a], a, b)
+        for check, i, j in (("blocked_tile", mover[blocked], other[blocked]), ("vertex", a[~blocked], b[~blocked])):
+            if len(i):
+                parts.append(_report(check, step[i], tile[i] % width, tile[i] // width, robot[i], robot[j]))
+
+    # --- ruch p -> q między t i t+1: kto stoi na q w kroku t ---
+    move = np.flatnonzero(nxt & np.r_[tile[1:] != tile[:-1], False])
+    if len(move):
+        q = tile[move + 1]
+        pos = np.searchsorted(k_sorted, (step[move] - t_min) * n_tiles + q)
+        pos = np.minimum(pos, len(k_sorted) - 1)
+        occupied = k_sorted[pos] == (step[move] - t_min) * n_tiles + q
+        a, b = move[occupied], by_key[pos[occupied]]
+        # b w t+1 na kaflu p = zamiana miejsc (raportowana raz, dla mniejszego id)
+        b_next = np.where(nxt[b], b + 1, b)
+        swap = nxt[b] & (tile[b_next] == tile[a])
+        keep = swap & (robot[a] < robot[b])
+        if keep.any():
+            i, j = a[keep], b[keep]
+            parts.append(_report("edge_swap", step[i], tile[i] % width, tile[i] // width, robot[i], robot[j]))
+        # b stoi dalej na q w t+1 – to już vertex / blocked_tile w t+1
+        follow = ~swap & (tile[b_next] != tile[a + 1])
+        if follow.any():
+            i, j = a[follow], b[follow]
+            parts.append(_report("edge_follow", step[i] + 1, tile[i + 1] % width, tile[i + 1] // width,
+                                 robot[i], robot[j]))
+
+    if not parts:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values(["Step", "Check"], kind="stable", ignore_index=True)
+
+
+def print_conflicts(report: pd.DataFrame, n_steps: int) -> None:
+    if report.empty:
+        print(f"[INFO] Walidacja planów: brak konfliktów ({n_steps} kroków robotów)")
+        return
+    for check, part in report.groupby("Check", sort=False):
+        tag = "[ERROR]" if SEVERITY[check] == "error" else "[WARN]"
+        listed = ", ".join(f"t={r.Step} ({r.X},{r.Y}) R{r.RobotA}" + (f"/R{r.RobotB}" if r.RobotB >= 0 else "")
+                           for r in part.head(MAX_LISTED).itertuples(index=False))
+        more = ", ..." if len(part) > MAX_LISTED else ""
+        print(f"{tag} {check}: {len(part)} – {listed}{more}")
@@ -0,0 +1,17 @@
+"""Rejestr silników: nazwa algorytmu jak w dane.csv -> funkcja plan()."""
+from typing import Callable, Dict
+
+from . import aco, camel, firefly
+
+ENGINES: Dict[str, Callable] = {
+    "ACO": aco.plan,
+    "FA": firefly.plan,
+    "CHA": camel.plan,
+}
+
+
+def get_engine(name: str) -> Callable:
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Nieznany algorytm: {name!r} ({', '.join(ENGINES)})") from None
@@ -0,0 +1,141 @@
+"""
+Firefly z Firefly.cs na tablicy przejść: wszystkie świetliki jednej
+generacji budują ścieżki równolegle.
+
+Obrót ma "premię forward" (obrót + krok naprzód jako jeden ruch, waga
+* 0.1), więc świetliki rosną w różnym tempie – każdy ma własny licznik
+węzłów, a rezerwacje są sprawdzane w jego własnym kroku czasu.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .budget import Budget, resolve
+from .grid import FORWARD, TURN_LEFT, TURN_RIGHT, WAIT, state_index
+from .memory import WarmStartMemory
+from .plan import ConvergenceTrace, Plan, can_enter, goal_free, light_term, path_fitness, roulette
+from .stopping import RouteInfo, StopMonitor, StopRule
+from .transitions import TransitionTable
+
+FIREFLIES = 40
+FIRE_STEPS = 300
+LOG_EVERY_MS = 5.0
+
+
+def set_start_paths(table: TransitionTable, eta: np.ndarray, light: np.ndarray, s0: int, goal_tile: int,
+                    rng: np.random.Generator, fireflies: int = FIREFLIES, fire_steps: int = FIRE_STEPS,
+                    reserved: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    FA_SetStartPath dla `fireflies` świetlików naraz. Zwraca (states,
+    actions, lengths); ścieżka kończy się na celu, po fire_steps krokach
+    albo gdy nie ma dozwolonego ruchu.
+    """
+    width = fire_steps + 2
+    states = np.full((fireflies, width), -1, dtype=np.int32)
+    actions = np.full((fireflies, width), WAIT, dtype=np.int8)
+    states[:, 0] = s0
+    lengths = np.ones(fireflies, dtype=np.int32)
+    cur = np.full(fireflies, s0, dtype=np.int32)
+    active = np.flatnonzero(cur // 4 != goal_tile)
+    light = light.ravel()
+    goal_ok = goal_free(reserved, goal_tile)
+    rows = np.arange(fireflies)
+
+    while len(active):
+        s = cur[active]
+        t = lengths[active] - 1                          # krok względem startStep
+        n1 = table.next_state[s]
+        ok1 = table.valid[s] & can_enter(reserved, t[:, None], table.next_tile[s], goal_tile, goal_ok)
+        h1 = eta[s]
+        w = h1.copy()
+        w[:, FORWARD] = light_term(h1[:, FORWARD], light[table.next_tile[s, FORWARD]])
+
+        # premia forward po obrocie
+        n2 = np.full_like(n1, -1)
+        for a in (TURN_LEFT, TURN_RIGHT):
+            mid = n1[:, a]
+            ok2 = table.valid[mid, FORWARD] & can_enter(reserved, t + 1, table.next_tile[mid, FORWARD],
+                                                        goal_tile, goal_ok)
+            bonus = light_term(eta[mid, FORWARD], light[table.next_tile[mid, FORWARD]])
+            w[:, a] = np.where(ok2, (w[:, a] + bonus) * 0.10, w[:, a])
+            n2[:, a] = np.where(ok2, table.next_state[mid, FORWARD], -1)
+        w = np.where(ok1, w, 0.0)
+
+        chosen = roulette(w, rng)
+        stuck = chosen < 0
+        act, ch = active[~stuck], chosen[~stuck]
+        r = rows[: len(act)]
+        first, second = n1[~stuck][r, ch], n2[~stuck][r, ch]
+        states[act, lengths[act]] = first
+        actions[act, lengths[act]] = ch
+        lengths[act] += 1
+        two = second >= 0
+        states[act[two], lengths[act[two]]] = second[two]
+        actions[act[two], lengths[act[two]]] = FORWARD
+        lengths[act[two]] += 1
+        cur[act] = np.where(two, second, first)
+
+        keep = (cur[act] // 4 != goal_tile) & (lengths[act] - 1 < fire_steps)
+        active = act[keep]
+    return states, actions, lengths
+
+
+def plan(table: TransitionTable, start: Tuple[int, int], head: int, goal: Tuple[int, int], start_step: int = 0,
+         reserved: Optional[np.ndarray] = None, rng: Optional[np.random.Generator] = None,
+         budget: Optional[Budget] = None, stop: Optional[StopRule] = None, shadow: bool = False,
+         memory: Optional[WarmStartMemory] = None, fireflies: int = FIREFLIES,
+         fire_steps: int = FIRE_STEPS) -> Plan:
+    """Firefly_Coroutine: generacje do wyczerpania budżetu, najjaśniejsza ścieżka."""
+    rng = rng or np.random.default_rng()
+    meter = resolve(budget).start()
+    manhattan = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+    s0 = int(state_index(start[0], start[1], head, table.width))
+    goal_tile = goal[1] * table.width + goal[0]
+    eta = table.heuristic(goal, "fa")
+
+    light = np.zeros(table.n_tiles, dtype=np.float32)
+    # światło z poprzednich tras do regionu: dodawane do każdej generacji, gaśnie x0.5
+    prior = memory.recall("FA", goal) if memory is not None else None
+    if prior is not None:
+        light += prior
+    best_states = best_actions = None
+    best_fit, best_light = 0.0, 0.0
+    trace = ConvergenceTrace(LOG_EVERY_MS)
+    monitor = StopMonitor(stop, RouteInfo("FA", table, s0, goal_tile, manhattan), shadow)
+    while meter.running() and not monitor.stopped:
+        meter.next_iteration()
+        states, actions, lengths = set_start_paths(table, eta, light, s0, goal_tile, rng,
+                                                   fireflies, fire_steps, reserved)
+        meter.evaluated(fireflies)
+        last = states[np.arange(fireflies), lengths - 1]
+        fits = np.array([path_fitness(last[i] // 4, lengths[i], start, goal, table.width)
+                         for i in range(fireflies)], dtype=np.float32)
+        improved = False
+        for i in range(fireflies):
+            if best_states is None or fits[i] > best_fit:
+                n = lengths[i]
+                best_states, best_actions = states[i, :n].copy(), actions[i, :n].copy()
+                best_fit, best_light = float(fits[i]), 2.0 * float(fits[i])
+                improved = True
+
+        # nowe światło: wszystkie ścieżki generacji + best-so-far z podwójną jasnością
+        light[:] = 0.0
+        mask = (np.arange(states.shape[1]) < lengths[:, None]) & (actions == FORWARD)
+        mask[:, 0] = False
+        np.add.at(light, states[mask] // 4, np.broadcast_to(fits[:, None], mask.shape)[mask])
+        best_fwd = best_actions[1:] == FORWARD
+        np.add.at(light, best_states[1:][best_fwd] // 4, best_light)
+        if prior is not None:
+            prior *= 0.5
+            light += prior
+
+        reached = best_states[-1] // 4 == goal_tile
+        trace.record(meter, best_light, len(best_states), improved, reached)
+        monitor.update(meter, len(best_states), reached, improved)
+
+    found = best_states is not None and best_states[-1] // 4 == goal_tile
+    if memory is not None:
+        memory.store("FA", goal, light)
+    return Plan("FA", best_states if found else None, best_actions if found else None, start_step, manhattan,
+                iterations=meter.iterations, evaluations=meter.evaluations, elapsed_ms=meter.elapsed_ms(),
+                found=found, log=trace.rows, stop=monitor.event, first_goal=trace.first_goal)
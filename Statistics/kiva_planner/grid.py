@@ -0,0 +1,134 @@
+"""
+Mapa magazynu jak w GridManager.cs: flagi kafli w tablicy uint16.
+
+Tablica `flags[y, x]`, więc indeks płaski y * width + x to Tile.index1D.
+Stan robota (x, y, heading) ma indeks ((y * width) + x) * 4 + heading –
+ten sam układ co ACO_StateIndex.
+"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# ============================
+# 1. STAŁE MODELU (PathManager.cs, Tile.cs)
+# ============================
+
+WIDTH = 106
+LENGTH = 46
+
+# TileFlags
+BLOCKED = 1 << 0
+SPAWN = 1 << 2
+GOAL = 1 << 3
+SHELF = 1 << 4
+OCCUPIED = 1 << 5
+TRANSFER_POINT = 1 << 6
+
+# Heading: North, East, South, West
+NORTH, EAST, SOUTH, WEST = 0, 1, 2, 3
+HEADINGS = ("N", "E", "S", "W")
+DX = np.array([0, 1, 0, -1], dtype=np.int16)
+DY = np.array([1, 0, -1, 0], dtype=np.int16)
+
+# RobotAction: Forward, TurnLeft, TurnRight, Wait (kolejność _cachedActions)
+FORWARD, TURN_LEFT, TURN_RIGHT, WAIT = 0, 1, 2, 3
+ACTIONS = ("Forward", "TurnLeft", "TurnRight", "Wait")
+
+
+def state_index(x, y, head, width: int = WIDTH):
+    """ACO_StateIndex: (x, y, heading) -> indeks stanu (działa też na tablicach)."""
+    return ((y * width) + x) * 4 + head
+
+
+def state_xyh(state, width: int = WIDTH) -> Tuple:
+    """Odwrotność state_index: (x, y, heading)."""
+    tile, head = np.divmod(state, 4)
+    y, x = np.divmod(tile, width)
+    return x, y, head
+
+
+def manhattan(ax, ay, bx, by):
+    return abs(ax - bx) + abs(ay - by)
+
+
+# ============================
+# 2. MAPA
+# ============================
+
+class Grid:
+    """Statyczna mapa: flagi kafli + listy punktów startowych i transferowych."""
+
+    def __init__(self, flags: np.ndarray, spawn_points: List[Tuple[int, int]],
+                 transfer_points: List[Tuple[int, int]]):
+        self.flags = flags
+        self.length, self.width = flags.shape
+        self.spawn_points = spawn_points
+        self.transfer_points = transfer_points
+
+    @property
+    def n_tiles(self) -> int:
+        return self.width * self.length
+
+    @property
+    def n_states(self) -> int:
+        return self.n_tiles * 4
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.length
+
+    def blocked(self) -> np.ndarray:
+        """Płaska maska kafli z flagą Blocked (półki zajęte, spawny)."""
+        return (self.flags.ravel() & BLOCKED) != 0
+
+    def static_blocked(self) -> np.ndarray:
+        """
+        Przeszkody niezależne od czasu: Blocked bez spawnów. Spawn jest
+        zablokowany tylko, dopóki stoi na nim robot (FreeTileFuture /
+        BlockTileFuture), więc to rezerwacja, nie część mapy.
+        """
+        return ((self.flags.ravel() & BLOCKED) != 0) & ((self.flags.ravel() & SPAWN) == 0)
+
+    def tiles_with(self, flag: int, walkable: bool = True) -> List[Tuple[int, int]]:
+        """(x, y) kafli z flagą, domyślnie tylko przejezdnych (jak listy w SetShelfPath)."""
+        mask = (self.flags & flag) != 0
+        if walkable:
+            mask &= (self.flags & BLOCKED) == 0
+        ys, xs = np.nonzero(mask)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+
+def build_warehouse(width: int = WIDTH, length: int = LENGTH, shelf_occupation: float = 0.3,
+                    seed: Optional[int] = None) -> Grid:
+    """
+    SetupShelvesAndCorridors + PlaceSpawnPoints + PlaceTransferPoints.
+    Regały: kolumny x % 4 >= 2 dla x w [2, width-2), y < length-2, poza
+    poprzecznymi przejściami (y % 8 w {0, 1}); ułamek shelf_occupation
+    regałów jest zajęty (Occupied | Blocked).
+    """
+    rng = np.random.default_rng(seed)
+    flags = np.zeros((length, width), dtype=np.uint16)
+
+    ys, xs = np.mgrid[0:length, 0:width]
+    shelf = (ys < length - 2) & (xs >= 2) & (xs < width - 2) & (xs % 4 >= 2) & (ys % 8 >= 2)
+    flags[shelf] |= SHELF
+    # losowe zajęcie w kolejności corridorTiles (y, potem x)
+    occupied = np.zeros_like(shelf)
+    occupied[shelf] = rng.random(int(shelf.sum())) < shelf_occupation
+    flags[occupied] |= OCCUPIED | BLOCKED
+
+    spawn_points, transfer_points = [], []
+    spacing = width // 8
+    for i in range(8):
+        x = i * spacing + spacing // 2
+        for y in (0, length - 1):
+            spawn_points.append((x, y))
+            flags[y, x] |= SPAWN | BLOCKED
+
+    spacing = length // 8
+    for i in range(9):
+        y = i * spacing + spacing // 2
+        for x in (0, width - 1):
+            transfer_points.append((x, y))
+            flags[y, x] |= TRANSFER_POINT
+
+    return Grid(flags, spawn_points, transfer_points)
@@ -0,0 +1,264 @@
+"""
+Mapy odwiedzin kafli i zatorów z katalogów śladów (traces.TraceStore).
+
+Tile.heat w Unity nie jest nigdzie liczony, a jedyny wykres przestrzenny
+(plots_manhattan/17_heatmap_mean_stretch.png) jest w osiach Manhattan, nie
+na podłodze magazynu. Tu każdy węzeł ścieżki trafia do licznika swojego
+kafla (x, y) i okna czasu (krok // window):
+
+  visits   każdy węzeł
+  waits    węzły z akcją Wait (poza węzłem startowym ścieżki)
+  turns    węzły z TurnLeft / TurnRight (jw.)
+
+Zliczanie to jeden np.bincount na blok węzłów po spłaszczonym indeksie
+(algorytm, okno, kafel), więc katalog z milionami ścieżek przechodzi się
+blokami TraceStore.chunks bez ładowania całości. Wynik: rysunki per
+algorytm i różnicowe (na ścieżkę, względem algorytmu odniesienia), plik
+heatmap.npz z licznikami oraz mapa zatorów congestion.npy / .csv –
+warstwa kosztu dla TransitionTable(cost=...), którą silniki omijają
+zatłoczone kafle.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .grid import LENGTH, TURN_LEFT, TURN_RIGHT, WAIT, WIDTH, Grid
+from .traces import TraceStore
+
+KINDS = ("visits", "waits", "turns")
+KIND_LABELS = {"visits": "Odwiedziny", "waits": "Oczekiwania (Wait)", "turns": "Obroty"}
+CONGESTION_FILE = "congestion"
+
+
+# ============================
+# 1. LICZNIKI
+# ============================
+
+class TileHeatmap:
+    """Liczniki counts[alg][rodzaj, okno, y, x]; okna czasu dokładane w miarę potrzeby."""
+
+    def __init__(self, width: int = WIDTH, length: int = LENGTH, window: Optional[int] = None):
+        self.width, self.length = width, length
+        self.n_tiles = width * length
+        self.window = window
+        self.counts: Dict[str, np.ndarray] = {}
+        self.paths: Dict[str, int] = {}
+        self.outside = 0
+
+    @property
+    def n_windows(self) -> int:
+        return max((c.shape[1] for c in self.counts.values()), default=0)
+
+    def _grow(self, alg: str, n_windows: int) -> np.ndarray:
+        cur = self.counts.get(alg)
+        if cur is None or cur.shape[1] < n_windows:
+            grown = np.zeros((len(KINDS), n_windows, self.length, self.width), dtype=np.int64)
+            if cur is not None:
+                grown[:, :cur.shape[1]] = cur
+            self.counts[alg] = cur = grown
+        return cur
+
+    def add_store(self, store: TraceStore, algorithms: Optional[Sequence[str]] = None, found_only: bool = True,
+                  max_nodes: int = 1 << 22) -> "TileHeatmap":
+        """Strumieniowo dolicza ścieżki z katalogu śladów (domyślnie tylko udane)."""
+        meta = store.meta
+        names = list(meta["Algorithm"].cat.categories)
+        codes = meta["Algorithm"].cat.codes.to_numpy()
+        keep = np.ones(len(store), dtype=bool)
+        if algorithms is not None:
+            keep &= np.isin(meta["Algorithm"].astype(str).to_numpy(), list(algorithms))
+        if found_only:
+            keep &= meta["Found"].to_numpy()
+        for alg, n in zip(*np.unique(codes[keep], return_counts=True)):
+            self.paths[names[alg]] = self.paths.get(names[alg], 0) + int(n)
+
+        n_algs = len(names)
+        for first, last, nodes in store.chunks(max_nodes):
+            base = int(store.offsets[first])
+            path = store.path_ids(first, last)
+            starts = store.offsets[first:last] - base
+            x, y = nodes.x.astype(np.int64), nodes.y.astype(np.int64)
+            inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.length)
+            ok = keep[path] & inside
+            self.outside += int((keep[path] & ~inside).sum())
+            step = nodes.step.astype(np.int64)
+            win = np.maximum(step, 0) // self.window if self.window else np.zeros(len(step), np.int64)
+            n_win = int(win[ok].max()) + 1 if ok.any() else 1
+            flat = (codes[path] * n_win + win) * self.n_tiles + y * self.width + x
+            action = nodes.action
+            moved = np.ones(len(action), dtype=bool)
+            moved[starts[starts < len(moved)]] = False           # akcja węzła startowego nic nie znaczy
+            masks = (ok, ok & moved & (action == WAIT), ok & moved & ((action == TURN_LEFT) | (action == TURN_RIGHT)))
+            size = n_algs * n_win * self.n_tiles
+            counts = np.stack([np.bincount(flat[m], minlength=size) for m in masks])
+            counts = counts.reshape(len(KINDS), n_algs, n_win, self.length, self.width)
+            for code in np.flatnonzero(counts.sum(axis=(0, 2, 3, 4))):
+                self._grow(names[code], n_win)[:, :n_win] += counts[:, code]
+        return self
+
+    def total(self, alg: str, kind: str = "visits") -> np.ndarray:
+        """Suma po oknach czasu: [y, x]."""
+        return self.counts[alg][KINDS.index(kind)].sum(axis=0)
+
+    def per_path(self, alg: str, kind: str = "visits") -> np.ndarray:
+        return self.total(alg, kind) / max(self.paths.get(alg, 0), 1)
+
+    def congestion(self, algorithms: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Mapa zatorów [okno, y, x] w [0, 1]: oczekiwania + obroty na kaflu,
+        znormalizowane do maksimum w oknie (obrót w miejscu to też postój).
+        """
+        algs = list(algorithms or self.counts)
+        jam = np.zeros((self.n_windows, self.length, self.width), dtype=np.float64)
+        for alg in algs:
+            c = self.counts[alg]
+            jam[:c.shape[1]] += c[KINDS.index("waits")] + c[KINDS.index("turns")]
+        peak = jam.max(axis=(1, 2), keepdims=True)
+        return (jam / np.where(peak > 0, peak, 1.0)).astype(np.float32)
+
+    def save(self, path: Path) -> None:
+        arrays = {f"{alg}": c for alg, c in self.counts.items()}
+        np.savez_compressed(path, kinds=np.array(KINDS), window=np.int64(self.window or 0),
+                            paths=np.array([self.paths.get(a, 0) for a in self.counts]),
+                            algorithms=np.array(list(self.counts)), **arrays)
+
+
+# ============================
+# 2. WARSTWA KOSZTU
+# ============================
+
+def save_congestion(jam: np.ndarray, out_dir: Path) -> List[Path]:
+    """congestion.npy ([okno, y, x] float32) i congestion.csv (maksimum po oknach, wiersz = y, ';')."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    npy, csv = out_dir / f"{CONGESTION_FILE}.npy", out_dir / f"{CONGESTION_FILE}.csv"
+    np.save(npy, jam)
+    flat = jam.max(axis=0) if len(jam) else np.zeros(jam.shape[1:], dtype=np.float32)
+    np.savetxt(csv, flat, fmt="%.4f", delimiter=";")
+    return [npy, csv]
+
+
+def load_cost_layer(path: Path, weight: float = 1.0, window: Optional[int] = None) -> np.ndarray:
+    """
+    Płaska warstwa kosztu (n_tiles,) dla TransitionTable(cost=...): mapa
+    zatorów z .npy (okno `window` albo maksimum po oknach) lub .csv,
+    razy `weight`.
+    """
+    path = Path(path)
+    if path.suffix == ".npy":
+        jam = np.load(path)
+        if jam.ndim == 3:
+            jam = jam.max(axis=0) if window is None else jam[window]
+    else:
+        jam = np.loadtxt(path, delimiter=";", ndmin=2)
+    return (np.asarray(jam, dtype=np.float32) * np.float32(weight)).ravel()
+
+
+# ============================
+# 3. RYSUNKI
+# ============================
+
+def _floor(ax, values: np.ndarray, grid: Optional[Grid], **kwargs):
+    image = ax.imshow(values, origin="lower", interpolation="nearest", aspect="equal", **kwargs)
+    if grid is not None:
+        # przeszkody mapy (zajęte regały) szare, żeby nie myliły się z zerem
+        blocked = grid.static_blocked().reshape(grid.length, grid.width)
+        ax.imshow(np.ma.masked_where(~blocked, blocked), origin="lower", interpolation="nearest",
+                  aspect="equal", cmap="Greys", vmin=0, vmax=1.6, alpha=0.8)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    return image
+
+
+def plot_kind(heat: TileHeatmap, kind: str, grid: Optional[Grid] = None, log: bool = True):
+    """Mapa `kind` per algorytm na ścieżkę, wspólna skala kolorów."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm, Normalize
+
+    algs = sorted(heat.counts)
+    maps = {alg: heat.per_path(alg, kind) for alg in algs}
+    vmax = max((float(m.max()) for m in maps.values()), default=1.0) or 1.0
+    positive = [float(m[m > 0].min()) for m in maps.values() if (m > 0).any()]
+    norm = LogNorm(vmin=min(positive), vmax=max(vmax, min(positive) * 2)) if log and positive \
+        else Normalize(vmin=0, vmax=vmax)
+    fig, axes = plt.subplots(len(algs) or 1, 1, figsize=(10, 4.2 * max(len(algs), 1)), squeeze=False)
+    image = None
+    for ax, alg in zip(axes[:, 0], algs):
+        image = _floor(ax, np.ma.masked_equal(maps[alg], 0), grid, norm=norm, cmap="inferno")
+        ax.set_title(f"{alg} (ścieżek: {heat.paths.get(alg, 0)})")
+    fig.suptitle(f"{KIND_LABELS[kind]} na kafel, na ścieżkę")
+    fig.tight_layout()
+    if image is not None:
+        label = f"{KIND_LABELS[kind]} / ścieżkę" + (" (log)" if log else "")
+        fig.colorbar(image, ax=axes[:, 0].tolist(), label=label)
+    return fig
+
+
+def plot_difference(heat: TileHeatmap, kind: str, reference: str, grid: Optional[Grid] = None):
+    """Różnica na ścieżkę: algorytm - `reference`, skala symetryczna wokół zera."""
+    import matplotlib.pyplot as plt
+
+    others = [alg for alg in sorted(heat.counts) if alg != reference]
+    base = heat.per_path(reference, kind)
+    diffs = {alg: heat.per_path(alg, kind) - base for alg in others}
+    vmax = max((float(np.abs(d).max()) for d in diffs.values()), default=1.0) or 1.0
+    fig, axes = plt.subplots(len(others) or 1, 1, figsize=(10, 4.2 * max(len(others), 1)), squeeze=False)
+    image = None
+    for ax, alg in zip(axes[:, 0], others):
+        image = _floor(ax, diffs[alg], grid, cmap="RdBu_r", vmin=-vmax, vmax=vmax)
+        ax.set_title(f"{alg} − {reference}")
+    fig.suptitle(f"{KIND_LABELS[kind]}: różnica na ścieżkę względem {reference}")
+    fig.tight_layout()
+    if image is not None:
+        fig.colorbar(image, ax=axes[:, 0].tolist(), label=f"Δ {KIND_LABELS[kind]} / ścieżkę")
+    return fig
+
+
+def plot_windows(jam: np.ndarray, window: int, grid: Optional[Grid] = None, max_panels: int = 12):
+    """Mapa zatorów w kolejnych oknach czasu (pierwsze `max_panels` okien)."""
+    import matplotlib.pyplot as plt
+
+    n = min(len(jam), max_panels)
+    cols = min(n, 3)
+    rows = int(np.ceil(n / cols))
+    fig, axes = plt.subplots(rows, cols, figsize=(5.5 * cols, 2.8 * rows), squeeze=False)
+    image = None
+    for i, ax in enumerate(axes.ravel()):
+        if i >= n:
+            ax.axis("off")
+            continue
+        image = _floor(ax, np.ma.masked_equal(jam[i], 0), grid, cmap="magma", vmin=0, vmax=1)
+        ax.set_title(f"kroki {i * window}–{(i + 1) * window - 1}")
+    fig.suptitle("Zatory (oczekiwania + obroty) w oknach czasu, znormalizowane w oknie")
+    fig.tight_layout()
+    if image is not None:
+        fig.colorbar(image, ax=axes.ravel().tolist(), label="Zator [0, 1]")
+    return fig
+
+
+def render(heat: TileHeatmap, out_dir: Path, grid: Optional[Grid] = None, reference: Optional[str] = None,
+           log: bool = True) -> List[Path]:
+    """Wszystkie rysunki do out_dir (PNG, backend Agg); zwraca ścieżki plików."""
+    from kiva_stats.stages import use_headless_backend
+
+    use_headless_backend()
+    import matplotlib.pyplot as plt
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    algs = sorted(heat.counts)
+    figures = [(f"heatmap_{kind}", plot_kind(heat, kind, grid, log)) for kind in KINDS]
+    if len(algs) > 1:
+        reference = reference if reference in heat.counts else algs[0]
+        figures += [(f"heatmap_diff_{kind}_vs_{reference}", plot_difference(heat, kind, reference, grid))
+                    for kind in KINDS]
+    if heat.window and heat.n_windows > 1:
+        figures.append(("heatmap_congestion_windows", plot_windows(heat.congestion(), heat.window, grid)))
+    paths = []
+    for name, fig in figures:
+        path = out_dir / f"{name}.png"
+        fig.savefig(path, dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        paths.append(path)
+    return paths
@@ -0,0 +1,81 @@
+"""
+Zapis wyników w formatach z Unity, czytanych przez kiva_stats.
+
+  dane.csv              AlgorithmLogger.LogToCSV (TimeMs z przecinkiem)
+  <ALG>ConvergenceLog.csv   ConvergenceLogger.Log (kropka, InvariantCulture)
+                        + kolumna Evaluations na końcu
+  stops.csv             powód końca przebiegu (stopping.stop_row), gdy
+                        benchmark używa reguł zatrzymania
+  traces/               węzły ścieżek (traces.TraceWriter), z traces=True
+
+Success = ścieżka kończy się na celu; Camel w C# loguje True także dla
+niedokończonej ścieżki stada, tutaj to porażka (PathLength 0).
+"""
+from pathlib import Path
+from typing import Dict, List, TextIO
+
+from .plan import Plan
+from .stopping import STOPS_FILE, STOPS_HEADER, stop_row
+from .traces import TRACES_DIR, TraceWriter
+
+RESULTS_FILE = "dane.csv"
+RESULTS_HEADER = "Algorithm;TimeMs;PathLength;Rotations;Success;Step;Manhattan"
+CONVERGENCE_HEADER = "Algorithm;Iteration;TimeMs;Manhattan;Fitness;BestPathLength;Evaluations"
+
+
+def results_row(plan: Plan) -> str:
+    length, rotations = (plan.length, plan.rotations) if plan.found else (0, 0)
+    time_ms = f"{plan.elapsed_ms:.2f}".replace(".", ",")
+    return f"{plan.algorithm};{time_ms};{length};{rotations};{plan.found};{plan.start_step};{plan.manhattan}"
+
+
+def convergence_rows(plan: Plan) -> List[str]:
+    return [f"{plan.algorithm};{it};{ms:.2f};{plan.manhattan};{fit:.4f};{best};{ev}"
+            for it, ms, ev, fit, best in plan.log]
+
+
+class LogWriter:
+    """Dopisuje plany do dane.csv i logów konwergencji w katalogu (nagłówek przy nowym pliku)."""
+
+    def __init__(self, out_dir: Path, stops: bool = False, shadow: bool = False, traces: bool = False):
+        self.out_dir = Path(out_dir)
+        self.stops = stops
+        self.shadow = shadow
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._files: Dict[str, TextIO] = {}
+        self.traces = TraceWriter(self.out_dir / TRACES_DIR) if traces else None
+
+    def _file(self, name: str, header: str) -> TextIO:
+        f = self._files.get(name)
+        if f is None:
+            path = self.out_dir / name
+            new = not path.exists()
+            f = self._files[name] = open(path, "a", encoding="utf-8", newline="\n")
+            if new:
+                f.write(header + "\n")
+        return f
+
+    def write(self, plan: Plan, instance: int = -1, robot: int = -1) -> None:
+        self._file(RESULTS_FILE, RESULTS_HEADER).write(results_row(plan) + "\n")
+        rows = convergence_rows(plan)
+        if rows:
+            log = self._file(f"{plan.algorithm}ConvergenceLog.csv", CONVERGENCE_HEADER)
+            log.write("\n".join(rows) + "\n")
+        if self.stops:
+            self._file(STOPS_FILE, STOPS_HEADER).write(stop_row(plan, self.shadow) + "\n")
+        if self.traces is not None:
+            self.traces.write(plan, instance, robot)
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        if self.traces is not None:
+            self.traces.close()
+            self.traces = None
+
+    def __enter__(self) -> "LogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,106 @@
+"""
+Pamięć między zapytaniami: feromony ACO, mapa światła FA, wilgotność Camel.
+
+ACO_Coroutine zaczyna każdą trasę od tau = tau0, Firefly od zerowego
+światła, a Camel od pustego humiditySum, więc każda kolejna trasa
+regał -> punkt transferowy uczy się tych samych korytarzy od nowa. Tu
+wynik przebiegu jest zapamiętywany per (algorytm, region celu) i służy
+jako punkt startowy kolejnych zapytań z tym samym regionem:
+
+  ACO    tau[S, 4] na końcu przebiegu   -> tau = tau0 + ślad
+  FA     light[kafle] ostatniej generacji -> światło dodawane w kolejnych
+                                            generacjach, wygasające x0.5
+  CHA    wilgotność najlepszej ścieżki stada na kaflach forward
+                                          -> premia jak światło FA
+
+Region to kafel celu albo blok `cluster` x `cluster` kafli. Ślad wygasa
+o `decay` na każde zapamiętane zapytanie (zegar globalny), nowe wyniki
+uśredniają się ze starymi wagą zależną od tego wygaszenia. Wpisy są w
+LRU z limitem bajtów – jeden ślad ACO to S * 4 * 4 B (ok. 0.3 MB na mapie
+106 x 46).
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+Key = Tuple[str, int, int]
+
+
+@dataclass
+class _Entry:
+    value: np.ndarray       # float32, średnia ważona śladów
+    weight: float           # ile (wygaszonych) śladów weszło do średniej
+    stamp: int              # zegar przy ostatnim zapisie
+
+
+class WarmStartMemory:
+    """LRU śladów per (algorytm, region celu) z wygaszaniem i limitem pamięci."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, decay: float = 0.98, cluster: int = 1):
+        if not 0.0 < decay <= 1.0:
+            raise ValueError(f"decay musi być w (0, 1], dostałem {decay}")
+        if cluster < 1:
+            raise ValueError(f"cluster musi być >= 1, dostałem {cluster}")
+        self.max_bytes = int(max_bytes)
+        self.decay = float(decay)
+        self.cluster = int(cluster)
+        self.clock = 0
+        self.nbytes = 0
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, algorithm: str, goal: Tuple[int, int]) -> Key:
+        return algorithm, goal[0] // self.cluster, goal[1] // self.cluster
+
+    def _factor(self, entry: _Entry) -> float:
+        return self.decay ** (self.clock - entry.stamp)
+
+    def recall(self, algorithm: str, goal: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Wygaszony ślad dla regionu celu (nowa tablica) albo None."""
+        entry = self._entries.get(self.key(algorithm, goal))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(self.key(algorithm, goal))
+        return entry.value * np.float32(self._factor(entry))
+
+    def store(self, algorithm: str, goal: Tuple[int, int], value: np.ndarray) -> None:
+        """Dopisuje ślad przebiegu do regionu i przesuwa zegar wygaszania."""
+        self.clock += 1
+        key = self.key(algorithm, goal)
+        value = np.asarray(value, dtype=np.float32)
+        entry = self._entries.pop(key, None)
+        if entry is None or entry.value.shape != value.shape:
+            if entry is not None:
+                self.nbytes -= entry.value.nbytes
+            entry = _Entry(value.copy(), 1.0, self.clock)
+            self.nbytes += value.nbytes
+        else:
+            w = entry.weight * self._factor(entry)
+            entry.value *= np.float32(w / (w + 1.0))
+            entry.value += value * np.float32(1.0 / (w + 1.0))
+            entry.weight, entry.stamp = w + 1.0, self.clock
+        self._entries[key] = entry
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= old.value.nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,159 @@
+"""
+Wspólne elementy silników: wynik planowania, ruletka i rezerwacje w czasie.
+
+Ścieżka to tablica stanów (układ ACO_StateIndex) razem z akcjami, które
+do nich prowadzą (pierwszy węzeł: Wait, jak Node startowy w C#), więc
+PathLength = len(states), a obroty i depozycję feromonu liczy się bez
+ACO_InferAction.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .grid import TURN_LEFT, TURN_RIGHT, state_xyh
+from .stopping import BUDGET_REASON, StopEvent
+
+# wiersz logu konwergencji: Iteration, TimeMs, Evaluations, Fitness, BestPathLength
+LogRow = Tuple[int, float, int, float, int]
+# pierwsza ścieżka do celu: Iteration, TimeMs, Evaluations
+GoalHit = Tuple[int, float, int]
+
+
+@dataclass
+class Plan:
+    algorithm: str
+    states: Optional[np.ndarray]          # int32, None = brak ścieżki
+    actions: Optional[np.ndarray]         # int8, akcja prowadząca do węzła
+    start_step: int
+    manhattan: int
+    iterations: int = 0
+    evaluations: int = 0
+    elapsed_ms: float = 0.0
+    found: bool = False                   # ostatni węzeł na kaflu celu
+    log: List[LogRow] = field(default_factory=list)
+    stop: Optional[StopEvent] = None      # zadziałanie reguły zatrzymania (shadow: tylko zapis)
+    first_goal: Optional[GoalHit] = None
+
+    @property
+    def length(self) -> int:
+        """PathLength z AlgorithmLogger (liczba węzłów razem ze startem)."""
+        return 0 if self.states is None else len(self.states)
+
+    @property
+    def stop_reason(self) -> str:
+        """Dlaczego przebieg się skończył: reguła zatrzymania albo 'budget'."""
+        if self.stop is None or self.stop.shadow:
+            return BUDGET_REASON
+        return self.stop.reason
+
+    @property
+    def rotations(self) -> int:
+        if self.actions is None:
+            return 0
+        return int(np.isin(self.actions, (TURN_LEFT, TURN_RIGHT)).sum())
+
+    def first_optimal(self) -> Optional[GoalHit]:
+        """Pierwszy wpis logu z ostateczną długością ścieżki (TimeFirstOptimal z conv.py)."""
+        if not self.found:
+            return None
+        first = self.first_goal[0] if self.first_goal else 0
+        for it, ms, ev, _, best in self.log:
+            if best == self.length and it >= first:
+                return it, ms, ev
+        return None
+
+    def nodes(self, width: int) -> List[Tuple[int, int, int, int, int]]:
+        """Lista węzłów (x, y, heading, action, step) jak List<Node>."""
+        if self.states is None:
+            return []
+        x, y, h = state_xyh(self.states, width)
+        steps = self.start_step + np.arange(len(self.states))
+        return list(zip(x.tolist(), y.tolist(), h.tolist(), self.actions.tolist(), steps.tolist()))
+
+
+def roulette(weights: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Wybór akcji per wiersz (K, A) proporcjonalnie do wag, tylko spośród
+    wag > 0; -1 dla wierszy bez dozwolonej akcji.
+    """
+    cum = np.cumsum(weights, axis=1)
+    total = cum[:, -1]
+    r = rng.random(len(weights)) * total
+    hit = (cum >= r[:, None]) & (weights > 0)
+    return np.where(total > 0, hit.argmax(axis=1), -1)
+
+
+def light_term(h: np.ndarray, light: np.ndarray) -> np.ndarray:
+    """Światło (FA) / wilgotność (Camel) dodawane tylko do "dobrych" ruchów (heurystyka > 1)."""
+    return h + np.where(h > 1.0, light, 0.0)
+
+
+def free_at(reserved: Optional[np.ndarray], t: np.ndarray, tiles: np.ndarray) -> np.ndarray:
+    """
+    Czy kafle są wolne w krokach t (względem startStep). reserved[t, tile]
+    to zajętość w czasie; za horyzontem obowiązuje ostatni wiersz.
+    """
+    if reserved is None:
+        return np.ones(np.shape(tiles), dtype=bool)
+    t = np.minimum(t, len(reserved) - 1)
+    return ~reserved[t, tiles]
+
+
+def goal_free(reserved: Optional[np.ndarray], goal_tile: int) -> Optional[np.ndarray]:
+    """
+    goal_ok[t]: kafel celu wolny od kroku t do końca okna – dojazd w t i
+    BlockTileFuture nie nadpisują cudzej rezerwacji (busy_after).
+    """
+    if reserved is None:
+        return None
+    return ~np.logical_or.accumulate(reserved[::-1, goal_tile])[::-1]
+
+
+def can_enter(reserved: Optional[np.ndarray], t: np.ndarray, tiles: np.ndarray, goal_tile: int = -1,
+              goal_ok: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Czy ruch z węzła w kroku t do kafli `tiles` (w t + 1) przejdzie
+    ReservationTable.feasible_delays: kafel wolny w t + 1 (vertex) i w t
+    (AssignPlanToRobot rezerwuje następny węzeł też w kroku bieżącego, więc
+    inaczej zamiana miejsc). Dotyczy także Wait i obrotów – wtedy `tiles`
+    to kafel bieżący. Kafel celu musi być wolny do końca okna (goal_free).
+    """
+    ok = free_at(reserved, t + 1, tiles) & free_at(reserved, t, tiles)
+    if goal_ok is not None:
+        ok &= (tiles != goal_tile) | goal_ok[np.minimum(t + 1, len(goal_ok) - 1)]
+    return ok
+
+
+def path_fitness(last_tile: int, length: int, start: Tuple[int, int], goal: Tuple[int, int],
+                 width: int) -> float:
+    """Fitness (FA) i Camel_Humidity: 30 * M / len po dojściu, inaczej 10 * postęp."""
+    if length == 0:
+        return 0.0
+    ly, lx = divmod(int(last_tile), width)
+    whole = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+    dist = abs(lx - goal[0]) + abs(ly - goal[1])
+    if dist == 0:
+        return 30.0 * whole / length
+    return 10.0 * (1.0 - dist / whole) if whole else 0.0
+
+
+class ConvergenceTrace:
+    """
+    Reguła ConvergenceLogger z coroutines: wpis po poprawie albo co
+    `every_ms` według zegara budżetu (BudgetMeter.clock_ms).
+    """
+
+    def __init__(self, every_ms: float):
+        self.every_ms = every_ms
+        self.rows: List[LogRow] = []
+        self.first_goal: Optional[GoalHit] = None
+        self._last_ms = 0.0
+
+    def record(self, meter, fitness: float, best_len: int, improved: bool, found: bool = True) -> None:
+        if found and self.first_goal is None:
+            self.first_goal = (meter.iterations, meter.elapsed_ms(), meter.evaluations)
+        clock = meter.clock_ms()
+        if improved or clock - self._last_ms >= self.every_ms:
+            self.rows.append((meter.iterations, meter.elapsed_ms(), meter.evaluations, float(fitness), best_len))
+            self._last_ms = clock
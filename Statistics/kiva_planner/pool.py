@@ -0,0 +1,244 @@
+"""
+Pula procesów planujących kilka zapytań robotów naraz.
+
+W MoveAllRobots planowanie jest szeregowe: jeden cel na krok (`return` po
+pierwszym SetShelfPath / SetSpawnpointPath / SetTransferPointPath), więc
+przy wielu robotach rośnie kolejka. Tutaj procesy robocze dołączają przez
+multiprocessing.shared_memory do flag mapy (z nich raz budują
+TransitionTable) i do migawki rezerwacji (occ, parked_from, base).
+Symulator publikuje migawkę, pula planuje `batch` zapytań naraz na tej
+samej migawce, a scalanie po kolei sprawdza każdy plan na bieżących
+rezerwacjach (już z planami wcześniej scalonymi w tej partii,
+ReservationTable.feasible_delays) – kolizję rozwiązuje opóźnienie startu,
+a gdy nie wystarcza, ponowne planowanie w tym samym kroku na migawce z
+już scalonymi planami (ParallelSimulator.retries).
+
+Strumień RNG zależy od numeru zapytania, nie od procesu, więc wynik nie
+zależy od liczby procesów. workers=0 planuje w procesie głównym (ta sama
+ścieżka kodu, punkt odniesienia dla skalowania).
+"""
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .budget import Budget, rng_stream
+from .engines import get_engine
+from .grid import Grid, build_warehouse
+from .plan import Plan
+from .sim import HORIZON, ReservationTable, Robot, Simulator
+from .transitions import TransitionTable
+
+ArraySpec = Tuple[str, Tuple[int, ...], str]
+# (numer zapytania, start, heading, cel, krok startu)
+Job = Tuple[int, Tuple[int, int], int, Tuple[int, int], int]
+
+
+class SharedArray:
+    """Tablica numpy w bloku shared_memory; `spec` wystarcza, by dołączyć w innym procesie."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape: Tuple[int, ...], dtype) -> "SharedArray":
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        arr = cls(shared_memory.SharedMemory(create=True, size=size), shape, dtype, owner=True)
+        arr.array[...] = 0
+        return arr
+
+    @classmethod
+    def attach(cls, spec: ArraySpec) -> "SharedArray":
+        name, shape, dtype = spec
+        # procesy puli dzielą resource_tracker z procesem głównym, więc
+        # ponowna rejestracja nazwy niczego nie zmienia; wyrejestrowanie tu
+        # zdjęłoby wpis właściciela (KeyError przy jego unlink)
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, dtype, owner=False)
+
+    @property
+    def spec(self) -> ArraySpec:
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self) -> None:
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ============================
+# 1. PROCES ROBOCZY
+# ============================
+
+_WORKER: Dict = {}
+
+
+def _setup(shared: Dict[str, SharedArray], algorithm: str, budget: Budget, seed: int, horizon: int) -> None:
+    grid = Grid(shared["flags"].array, [], [])
+    cost = shared["cost"].array if "cost" in shared else None
+    _WORKER.update(shared=shared, table=TransitionTable(grid, cost=cost), engine=get_engine(algorithm),
+                   algorithm=algorithm, budget=budget, seed=seed, horizon=horizon)
+
+
+def _init_worker(specs: Dict[str, ArraySpec], algorithm: str, budget: Budget, seed: int, horizon: int) -> None:
+    # Ctrl-C trafia do całej grupy procesów; zamyka proces główny (close), nie procesy puli
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _setup({name: SharedArray.attach(spec) for name, spec in specs.items()}, algorithm, budget, seed, horizon)
+
+
+def _plan_job(job: Job) -> Plan:
+    request, start, head, goal, start_step = job
+    w = _WORKER
+    shared = w["shared"]
+    res = ReservationTable.view(shared["occ"].array, shared["parked"].array, int(shared["meta"].array[0]))
+    table = w["table"]
+    return w["engine"](table, start, head, goal, start_step=start_step,
+                       reserved=res.window(start_step, w["horizon"], ignore_parked=start[1] * table.width + start[0]),
+                       rng=rng_stream(w["seed"], request, w["algorithm"]), budget=w["budget"])
+
+
+# ============================
+# 2. PULA
+# ============================
+
+class PlannerPool:
+    """Procesy robocze na wspólnej mapie i migawce rezerwacji (`rows` kroków od base)."""
+
+    def __init__(self, grid: Grid, algorithm: str = "ACO", budget: Optional[Budget] = None, seed: int = 0,
+                 workers: int = 2, horizon: int = HORIZON, rows: int = 4096, cost: Optional[np.ndarray] = None):
+        self.workers = workers
+        self.rows = rows
+        self.flags = SharedArray.create(grid.flags.shape, grid.flags.dtype)
+        self.flags.array[...] = grid.flags
+        self.occ = SharedArray.create((rows, grid.n_tiles), np.bool_)
+        self.parked = SharedArray.create((grid.n_tiles,), np.int64)
+        self.meta = SharedArray.create((1,), np.int64)
+        shared = {"flags": self.flags, "occ": self.occ, "parked": self.parked, "meta": self.meta}
+        if cost is not None:
+            shared["cost"] = SharedArray.create((grid.n_tiles,), np.float32)
+            shared["cost"].array[:] = np.asarray(cost, dtype=np.float32).ravel()
+        self._shared = list(shared.values())
+        args = (algorithm, budget or Budget("iterations", 20), seed, horizon)
+        if workers > 0:
+            specs = {name: arr.spec for name, arr in shared.items()}
+            self._executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(specs,) + args)
+        else:
+            self._executor = None
+            _setup(shared, *args)
+
+    def publish(self, res: ReservationTable) -> None:
+        """Kopiuje rezerwacje do migawki (tylko wiersze z jakąkolwiek rezerwacją)."""
+        used = np.flatnonzero(res.occ.any(axis=1))
+        n = int(used[-1]) + 1 if len(used) else 0
+        if n > self.rows:
+            raise RuntimeError(f"Rezerwacje sięgają {n} kroków naprzód, migawka ma {self.rows} (zwiększ rows)")
+        self.occ.array[:n] = res.occ[:n]
+        self.occ.array[n:] = False
+        self.parked.array[:] = res.parked_from
+        self.meta.array[0] = res.base
+
+    def plan(self, jobs: Sequence[Job]) -> List[Plan]:
+        if self._executor is None:
+            return [_plan_job(job) for job in jobs]
+        return list(self._executor.map(_plan_job, jobs))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+        for arr in self._shared:
+            arr.close()
+
+    def __enter__(self) -> "PlannerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ParallelSimulator(Simulator):
+    """
+    Simulator obsługujący do `batch` celów na krok przez PlannerPool i
+    scalanie z kontrolą kolizji. Plany odrzucone przy scalaniu (kolizja z
+    planem scalonym wcześniej w tej partii) są planowane ponownie w tym
+    samym kroku na zaktualizowanej migawce – do `retries` razy.
+    """
+
+    def __init__(self, grid: Grid, pool: PlannerPool, batch: int = 4, retries: int = 1, **kwargs):
+        super().__init__(grid, **kwargs)
+        self.pool = pool
+        self.batch = batch
+        self.retries = retries
+        self._jobs = 0
+
+    def tick(self) -> None:
+        requests = self.pending(self.batch)
+        for attempt in range(self.retries + 1):
+            if not requests:
+                break
+            requests = self._plan_batch(requests, last=attempt == self.retries)
+        self.advance()
+
+    def _plan_batch(self, requests: List[Tuple[Robot, int, int]], last: bool) -> List[Tuple[Robot, int, int]]:
+        """Partia zapytań na bieżącej migawce; zwraca zapytania do ponowienia (kolizja, nie ostatnia próba)."""
+        w = self.grid.width
+        jobs = []
+        for robot, goal_tile, start_step in requests:
+            jobs.append((self._jobs, (robot.tile % w, robot.tile // w), robot.head,
+                         (goal_tile % w, goal_tile // w), start_step))
+            self._jobs += 1
+        t0 = time.perf_counter()
+        self.pool.publish(self.res)
+        plans = self.pool.plan(jobs)
+        self.stats.planning_ms += (time.perf_counter() - t0) * 1000.0
+        self.stats.planned += len(plans)
+        retry = []
+        for request, plan in zip(requests, plans):
+            robot, _, start_step = request
+            if self.writer is not None:
+                self.writer.write(plan, robot=robot.id)
+            merged = self._merge(plan, start_step)
+            if merged is None and plan.found and not last:
+                self.stats.replanned += 1
+                retry.append(request)
+            else:
+                self.commit(robot, merged)
+        return retry
+
+
+# ============================
+# 3. POMIAR SKALOWANIA
+# ============================
+
+def measure_throughput(workers: Sequence[int], steps: int = 50, algorithm: str = "ACO",
+                       budget: Optional[Budget] = None, seed: int = 0, map_seed: int = 0, n_robots: int = 16,
+                       batch: int = 4) -> List[Dict]:
+    """
+    Przypisane odcinki cyklu na sekundę: ta sama symulacja
+    (ParallelSimulator, `steps` kroków po `batch` celów) przy różnej
+    liczbie procesów. Plany odrzucone przy scalaniu nie są liczone –
+    PlansPerS (surowe plany puli) jest obok dla porównania.
+    """
+    from .bench import make_instances
+
+    grid = build_warehouse(seed=map_seed)
+    warmup = [(i, start, head, goal, 0) for i, (start, head, goal) in enumerate(make_instances(grid, 4, seed))]
+    out = []
+    for n in workers:
+        with PlannerPool(grid, algorithm, budget, seed, workers=n) as pool:
+            pool.publish(ReservationTable(grid.n_tiles))
+            pool.plan(warmup[:max(n, 1)])                    # rozgrzewka: start procesów, TransitionTable
+            sim = ParallelSimulator(grid, pool, batch=batch, n_robots=n_robots, algorithm=algorithm,
+                                    budget=budget, seed=seed)
+            st = sim.run(steps)
+        out.append({"Workers": n, "Steps": steps, "WallS": st.wall_s, "LegsDone": st.legs_done,
+                    "LegsPerS": st.legs_done / st.wall_s, "PlansPerS": st.planned / st.wall_s,
+                    "MergeConflicts": st.merge_conflicts, "Replanned": st.replanned})
+        print(f"[INFO] {n} procesów: {st.legs_done / st.wall_s:.2f} odcinków/s, "
+              f"{st.planned / st.wall_s:.2f} planów/s ({st.wall_s:.1f} s, {st.merge_conflicts} kolizji)")
+    return out
@@ -0,0 +1,448 @@
+"""
+Lokalna usługa planowania (asyncio) dla symulatora.
+
+W Unity ACO / Firefly / Camel działają jako korutyny na głównym wątku i
+blokują klatkę do 1 s na zapytanie. Tu planowanie jest osobnym procesem:
+serwer na gnieździe Unix (`unix:/ścieżka`) albo TCP (`host:port`)
+przyjmuje zapytania (start, heading, cel, startStep, delta rezerwacji),
+zbiera je w partie i planuje na PlannerPool (pool.py), a odpowiada listą
+węzłów (x, y, heading, akcja, krok) jak List<Node>.
+
+Ramka: długość `<I` + treść; treść zaczyna się od `<BI` (typ, id
+zapytania nadane przez klienta, unikalne w ramach połączenia). Wszystko
+little-endian.
+
+  PLAN    (1)  <hhBhhiBI  start x, y, heading, cel x, y, startStep, flagi,
+                          liczba wpisów delty; dalej wpisy <Bihh
+                          (op, krok, x, y):
+                            0 RESERVE  ReserveSpecificStep(kafel, krok)
+                            1 BLOCK    BlockTileFuture(kafel, krok)
+                            2 FREE     FreeTileFuture(kafel, krok)
+                            3 TRIM     zapomnij kroki sprzed `krok`
+  CANCEL  (2)  samo id
+  RESULT  (0x81) <BIfI   status, iteracje, czas ms, liczba węzłów;
+                          dalej węzły <hhBBi (x, y, heading, akcja, krok)
+
+Statusy: 0 ok, 1 brak ścieżki, 2 kolizja (plan z migawki nie przeszedł
+sprawdzenia na bieżących rezerwacjach), 3 anulowane, 4 błąd zapytania.
+
+Delta trafia do rezerwacji serwera od razu po odebraniu; partia jest
+planowana na migawce z chwili jej wysłania do puli, a wynik sprawdzany
+po kolei na bieżących rezerwacjach (ReservationTable.feasible_delays,
+z opóźnieniem startu do `max_delay`). Z flagą COMMIT serwer wpisuje
+zwrócony plan do rezerwacji jak AssignPlanToRobot – klient nie musi go
+odsyłać w delcie (powtórzenie niczego nie zmienia). Każde zapytanie
+dostaje dokładnie jedną odpowiedź; CANCEL przed wysłaniem partii do puli
+usuwa je z kolejki, później tylko odrzuca wynik (procesu w trakcie
+planowania się nie przerywa).
+"""
+import asyncio
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .budget import Budget
+from .cache import retime
+from .grid import Grid, build_warehouse, state_xyh
+from .plan import Plan
+from .pool import PlannerPool
+from .sim import ReservationTable
+
+DEFAULT_ADDRESS = "127.0.0.1:7878"
+MAX_FRAME = 16 * 1024 * 1024
+
+MSG_PLAN, MSG_CANCEL, MSG_RESULT = 1, 2, 0x81
+OP_RESERVE, OP_BLOCK, OP_FREE, OP_TRIM = 0, 1, 2, 3
+FLAG_COMMIT = 1
+STATUS_OK, STATUS_NO_PATH, STATUS_CONFLICT, STATUS_CANCELLED, STATUS_ERROR = range(5)
+STATUS_NAMES = ("OK", "NoPath", "Conflict", "Cancelled", "Error")
+
+_LEN = struct.Struct("<I")
+_HEAD = struct.Struct("<BI")
+_PLAN = struct.Struct("<hhBhhiBI")
+_RESULT = struct.Struct("<BIfI")
+DELTA_DTYPE = np.dtype([("op", "u1"), ("step", "<i4"), ("x", "<i2"), ("y", "<i2")])
+NODE_DTYPE = np.dtype([("x", "<i2"), ("y", "<i2"), ("heading", "u1"), ("action", "u1"), ("step", "<i4")])
+
+
+# ============================
+# 1. PROTOKÓŁ
+# ============================
+
+@dataclass
+class PlanRequest:
+    id: int
+    start: Tuple[int, int]
+    heading: int
+    goal: Tuple[int, int]
+    start_step: int
+    delta: np.ndarray = field(default_factory=lambda: np.zeros(0, DELTA_DTYPE))
+    flags: int = 0
+
+
+@dataclass
+class PlanResult:
+    id: int
+    status: int
+    iterations: int = 0
+    elapsed_ms: float = 0.0
+    nodes: np.ndarray = field(default_factory=lambda: np.zeros(0, NODE_DTYPE))
+
+    @property
+    def status_name(self) -> str:
+        return STATUS_NAMES[self.status]
+
+
+def frame(body: bytes) -> bytes:
+    return _LEN.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Treść kolejnej ramki albo None na końcu strumienia."""
+    try:
+        head = await reader.readexactly(_LEN.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _LEN.unpack(head)
+    if size > MAX_FRAME:
+        raise ValueError(f"Ramka {size} B przekracza limit {MAX_FRAME} B")
+    return await reader.readexactly(size)
+
+
+def encode_plan(req: PlanRequest) -> bytes:
+    delta = np.ascontiguousarray(req.delta, dtype=DELTA_DTYPE)
+    return (_HEAD.pack(MSG_PLAN, req.id)
+            + _PLAN.pack(req.start[0], req.start[1], req.heading, req.goal[0], req.goal[1], req.start_step,
+                         req.flags, len(delta))
+            + delta.tobytes())
+
+
+def decode_plan(rid: int, body: bytes) -> PlanRequest:
+    sx, sy, head, gx, gy, step, flags, n = _PLAN.unpack_from(body)
+    if len(body) != _PLAN.size + n * DELTA_DTYPE.itemsize:
+        raise ValueError(f"Zła długość zapytania {rid}: {n} wpisów delty, {len(body)} B")
+    delta = np.frombuffer(body, DELTA_DTYPE, count=n, offset=_PLAN.size)
+    return PlanRequest(rid, (sx, sy), head, (gx, gy), step, delta, flags)
+
+
+def encode_cancel(rid: int) -> bytes:
+    return _HEAD.pack(MSG_CANCEL, rid)
+
+
+def encode_result(res: PlanResult) -> bytes:
+    nodes = np.ascontiguousarray(res.nodes, dtype=NODE_DTYPE)
+    return (_HEAD.pack(MSG_RESULT, res.id)
+            + _RESULT.pack(res.status, res.iterations, res.elapsed_ms, len(nodes))
+            + nodes.tobytes())
+
+
+def decode_result(rid: int, body: bytes) -> PlanResult:
+    status, iterations, elapsed_ms, n = _RESULT.unpack_from(body)
+    nodes = np.frombuffer(body, NODE_DTYPE, count=n, offset=_RESULT.size)
+    return PlanResult(rid, status, iterations, elapsed_ms, nodes)
+
+
+def plan_nodes(plan: Plan, width: int) -> np.ndarray:
+    """Węzły planu jako tablica NODE_DTYPE (Plan.nodes bez list Pythona)."""
+    nodes = np.zeros(plan.length, NODE_DTYPE)
+    if plan.length:
+        nodes["x"], nodes["y"], nodes["heading"] = state_xyh(plan.states, width)
+        nodes["action"] = plan.actions
+        nodes["step"] = plan.start_step + np.arange(plan.length)
+    return nodes
+
+
+async def _open(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[5:])
+    host, port = address.rsplit(":", 1)
+    return await asyncio.open_connection(host, int(port))
+
+
+async def _listen(handler, address: str) -> asyncio.AbstractServer:
+    if address.startswith("unix:"):
+        return await asyncio.start_unix_server(handler, address[5:])
+    host, port = address.rsplit(":", 1)
+    return await asyncio.start_server(handler, host, int(port))
+
+
+# ============================
+# 2. SERWER
+# ============================
+
+@dataclass
+class _Pending:
+    req: PlanRequest
+    writer: Optional[asyncio.StreamWriter]
+    conn: int
+    cancelled: bool = False
+
+
+class PlanningServer:
+    """Serwer planowania: rezerwacje, kolejka partii, PlannerPool."""
+
+    def __init__(self, grid: Grid, algorithm: str = "ACO", budget: Optional[Budget] = None, seed: int = 0,
+                 workers: int = 2, batch: int = 8, batch_ms: float = 2.0, max_delay: int = 0):
+        self.grid = grid
+        self.pool = PlannerPool(grid, algorithm, budget, seed, workers=workers)
+        self.res = ReservationTable(grid.n_tiles)
+        self.batch = batch
+        self.batch_ms = batch_ms
+        self.max_delay = max_delay
+        self.counts = dict.fromkeys(STATUS_NAMES, 0)
+        self.batches = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[Tuple[int, int], _Pending] = {}
+        self._jobs = 0
+
+    async def serve(self, address: str = DEFAULT_ADDRESS, ready: Optional[asyncio.Event] = None) -> None:
+        self._queue = asyncio.Queue()
+        server = await _listen(self._handle, address)
+        dispatcher = asyncio.create_task(self._dispatch())
+        print(f"[INFO] Serwer planowania na {address} ({self.pool.workers} procesów, partie do {self.batch})")
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            dispatcher.cancel()
+            self.pool.close()
+            print(f"[INFO] Odpowiedzi: {self.counts}, partii: {self.batches}")
+
+    # --- połączenia ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = id(writer)
+        try:
+            while (body := await read_frame(reader)) is not None:
+                kind, rid = _HEAD.unpack_from(body)
+                if kind == MSG_PLAN:
+                    self._submit(conn, rid, body[_HEAD.size:], writer)
+                elif kind == MSG_CANCEL:
+                    pending = self._pending.get((conn, rid))
+                    if pending is not None:
+                        pending.cancelled = True
+                else:
+                    raise ValueError(f"Nieznany typ wiadomości {kind}")
+        except (ValueError, struct.error, ConnectionError, asyncio.IncompleteReadError) as exc:
+            print(f"[WARN] Połączenie zamknięte: {exc}")
+        finally:
+            # zapytania zamkniętego połączenia: bez odpowiedzi, wyniki odrzucane
+            for pending in self._pending.values():
+                if pending.conn == conn:
+                    pending.cancelled, pending.writer = True, None
+            writer.close()
+
+    def _submit(self, conn: int, rid: int, body: bytes, writer: asyncio.StreamWriter) -> None:
+        pending = _Pending(None, writer, conn)
+        try:
+            pending.req = req = decode_plan(rid, body)
+            self._apply(req.delta)
+            self._check(req)
+        except (ValueError, struct.error) as exc:
+            print(f"[WARN] Zapytanie {rid} odrzucone: {exc}")
+            self._reply(pending, PlanResult(rid, STATUS_ERROR))
+            return
+        self._pending[(conn, rid)] = pending
+        self._queue.put_nowait(pending)
+
+    def _check(self, req: PlanRequest) -> None:
+        for name, (x, y) in (("start", req.start), ("cel", req.goal)):
+            if not self.grid.in_bounds(x, y):
+                raise ValueError(f"{name} {(x, y)} poza mapą")
+        if not 0 <= req.heading < 4:
+            raise ValueError(f"heading {req.heading} poza 0..3")
+        if req.start_step < self.res.base:
+            raise ValueError(f"startStep {req.start_step} sprzed obciętych rezerwacji (od {self.res.base})")
+
+    def _apply(self, delta: np.ndarray) -> None:
+        """Delta rezerwacji; RESERVE tylko dopisuje, więc idzie naraz, reszta po kolei."""
+        if not len(delta):
+            return
+        x, y = delta["x"].astype(np.int64), delta["y"].astype(np.int64)
+        if ((x < 0) | (x >= self.grid.width) | (y < 0) | (y >= self.grid.length)).any():
+            raise ValueError("kafel delty poza mapą")
+        tiles = y * self.grid.width + x
+        steps = delta["step"].astype(np.int64)
+        ops = delta["op"]
+        if (ops > OP_TRIM).any():
+            raise ValueError(f"nieznana operacja delty {int(ops.max())}")
+        reserve = ops == OP_RESERVE
+        self.res.reserve(steps[reserve], tiles[reserve])
+        for i in np.flatnonzero(~reserve):
+            if ops[i] == OP_BLOCK:
+                self.res.block_future(int(tiles[i]), int(steps[i]))
+            elif ops[i] == OP_FREE:
+                self.res.free_future(int(tiles[i]), int(steps[i]))
+            else:
+                self.res.trim(int(steps[i]))
+
+    def _reply(self, pending: _Pending, result: PlanResult) -> None:
+        if pending.req is not None:
+            self._pending.pop((pending.conn, pending.req.id), None)
+        self.counts[result.status_name] += 1
+        if pending.writer is not None and not pending.writer.is_closing():
+            pending.writer.write(frame(encode_result(result)))
+
+    # --- partie ---
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self.batch > 1:
+                await asyncio.sleep(self.batch_ms / 1000.0)
+            while len(batch) < self.batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            live = []
+            for pending in batch:
+                if pending.cancelled:
+                    self._reply(pending, PlanResult(pending.req.id, STATUS_CANCELLED))
+                else:
+                    live.append(pending)
+            if not live:
+                continue
+            jobs = []
+            for pending in live:
+                req = pending.req
+                jobs.append((self._jobs, req.start, req.heading, req.goal, req.start_step))
+                self._jobs += 1
+            self.batches += 1
+            try:
+                self.pool.publish(self.res)
+                plans = await loop.run_in_executor(None, self.pool.plan, jobs)
+            except Exception as exc:                      # np. BrokenProcessPool, za długi horyzont
+                print(f"[ERROR] Partia {len(jobs)} zapytań: {exc}")
+                for pending in live:
+                    self._reply(pending, PlanResult(pending.req.id, STATUS_ERROR))
+                continue
+            for pending, plan in zip(live, plans):
+                self._reply(pending, self._merge(pending, plan))
+
+    def _merge(self, pending: _Pending, plan: Plan) -> PlanResult:
+        req = pending.req
+        result = PlanResult(req.id, STATUS_NO_PATH, plan.iterations, plan.elapsed_ms)
+        if pending.cancelled:
+            result.status = STATUS_CANCELLED
+            return result
+        if not plan.found:
+            return result
+        ok = np.flatnonzero(self.res.feasible_delays(plan.states, req.start_step, self.max_delay))
+        if not len(ok):
+            result.status = STATUS_CONFLICT
+            return result
+        plan = retime(plan, req.start_step, int(ok[0]))
+        if req.flags & FLAG_COMMIT:
+            self.res.assign(plan)
+        result.status, result.nodes = STATUS_OK, plan_nodes(plan, self.grid.width)
+        return result
+
+
+def run_server(address: str = DEFAULT_ADDRESS, algorithm: str = "ACO", budget: Optional[Budget] = None,
+               seed: int = 0, map_seed: int = 0, workers: int = 2, batch: int = 8, batch_ms: float = 2.0,
+               max_delay: int = 0) -> None:
+    server = PlanningServer(build_warehouse(seed=map_seed), algorithm, budget, seed, workers=workers, batch=batch,
+                            batch_ms=batch_ms, max_delay=max_delay)
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+# ============================
+# 3. KLIENT I GENERATOR OBCIĄŻENIA
+# ============================
+
+class PlanningClient:
+    """Jedno połączenie, wiele zapytań naraz; anulowanie `plan()` wysyła CANCEL."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader, self._writer = reader, writer
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._next = 0
+        self._task = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, address: str = DEFAULT_ADDRESS) -> "PlanningClient":
+        return cls(*await _open(address))
+
+    async def _receive(self) -> None:
+        try:
+            while (body := await read_frame(self._reader)) is not None:
+                kind, rid = _HEAD.unpack_from(body)
+                waiting = self._waiting.pop(rid, None)
+                if kind == MSG_RESULT and waiting is not None and not waiting.done():
+                    waiting.set_result(decode_result(rid, body[_HEAD.size:]))
+        finally:
+            for waiting in self._waiting.values():
+                if not waiting.done():
+                    waiting.set_exception(ConnectionError("Serwer zamknął połączenie"))
+
+    async def plan(self, req: PlanRequest) -> PlanResult:
+        req.id, self._next = self._next, self._next + 1
+        waiting = asyncio.get_running_loop().create_future()
+        self._waiting[req.id] = waiting
+        self._writer.write(frame(encode_plan(req)))
+        try:
+            return await waiting
+        except asyncio.CancelledError:
+            if not self._writer.is_closing():
+                self._writer.write(frame(encode_cancel(req.id)))
+            raise
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._task.cancel()
+
+
+async def _robot(client: PlanningClient, routes: List, flags: int, latencies: List[float],
+                 counts: Dict[str, int]) -> None:
+    """Kolejne trasy jednego robota; startStep po końcu poprzedniego planu."""
+    step = 0
+    for start, head, goal in routes:
+        t0 = time.perf_counter()
+        result = await client.plan(PlanRequest(0, start, head, goal, step, flags=flags))
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        counts[result.status_name] += 1
+        if result.status == STATUS_OK:
+            step = int(result.nodes["step"][-1]) + 1
+
+
+async def load_test(address: str, robots: int, requests: int = 2, seed: int = 0, map_seed: int = 0,
+                    commit: bool = False) -> Dict:
+    """
+    `robots` robotów naraz na jednym połączeniu, każdy wysyła `requests`
+    tras standardowego cyklu (bench.make_instances) jedna po drugiej.
+    """
+    from .bench import make_instances
+
+    routes = make_instances(build_warehouse(seed=map_seed), robots * requests, seed)
+    client = await PlanningClient.connect(address)
+    latencies: List[float] = []
+    counts = dict.fromkeys(STATUS_NAMES, 0)
+    t0 = time.perf_counter()
+    try:
+        await asyncio.gather(*(_robot(client, routes[i::robots], FLAG_COMMIT if commit else 0, latencies, counts)
+                               for i in range(robots)))
+    finally:
+        await client.close()
+    wall = time.perf_counter() - t0
+    lat = np.array(latencies)
+    return {"Robots": robots, "Requests": len(lat), "WallS": wall, "PlansPerS": len(lat) / wall,
+            "P50Ms": float(np.percentile(lat, 50)), "P99Ms": float(np.percentile(lat, 99)), **counts}
+
+
+def load_sweep(address: str, robot_counts: Sequence[int], requests: int = 2, seed: int = 0, map_seed: int = 0,
+               commit: bool = False) -> List[Dict]:
+    out = []
+    for robots in robot_counts:
+        row = asyncio.run(load_test(address, robots, requests, seed, map_seed, commit))
+        print(f"[INFO] {robots} robotów: {row['PlansPerS']:.1f} planów/s, p50 {row['P50Ms']:.0f} ms, "
+              f"p99 {row['P99Ms']:.0f} ms")
+        out.append(row)
+    return out
@@ -0,0 +1,413 @@
+"""
+Symulator magazynu w Pythonie: rezerwacje w czasie i cykl zadań robotów.
+
+ReservationTable odpowiada RTgrid z GridManager: `occ[t, tile]` to
+rezerwacje kroków (ReserveSpecificStep), a `parked_from[tile]` – blokada
+od kroku do odwołania (BlockTileFuture na końcu planu). FreeTileFuture
+zamienia taką blokadę w zwykłe rezerwacje [od, do). Wiersze starsze niż
+bieżący krok są obcinane, więc pamięć zależy od horyzontu, nie od
+długości symulacji.
+
+Simulator odtwarza RobotManager: każdy robot ma kolejkę celów
+(AssignStandardCyclePath: ToShelf, ToTP, ToShelf, ToSpawn), a
+MoveAllRobots obsługuje w kroku jeden cel – pierwszego robota z
+niepustą kolejką w losowej kolejności. Plan zaczyna się w kroku po
+ostatnim węźle poprzedniego planu robota i jest wpisywany do rezerwacji
+jak w AssignPlanToRobot. Silniki sprawdzają te same warunki co
+feasible_delays (plan.can_enter), ale tylko w oknie `horizon`, więc przed
+wpisaniem plan i tak przechodzi feasible_delays – kolizję rozwiązuje
+opóźnienie startu albo ponowne zapytanie w następnym kroku.
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .budget import Budget, rng_stream
+from .cache import retime
+from .engines import get_engine
+from .grid import NORTH, SHELF, SOUTH, TRANSFER_POINT, Grid, build_warehouse
+from .plan import Plan
+from .transitions import TransitionTable
+
+NEVER = np.iinfo(np.int64).max
+HORIZON = 512                     # wiersze okna rezerwacji dla silnika (MAX_STEPS ACO = 300)
+CYCLE = ("ToShelf", "ToTP", "ToShelf", "ToSpawn")
+
+
+# ============================
+# 1. REZERWACJE W CZASIE
+# ============================
+
+class ReservationTable:
+    """RTgrid: rezerwacje (krok, kafel) + blokady kafli od kroku do odwołania."""
+
+    def __init__(self, n_tiles: int, capacity: int = 1024):
+        self.n_tiles = n_tiles
+        self.base = 0                                       # krok wiersza occ[0]
+        self.occ = np.zeros((capacity, n_tiles), dtype=bool)
+        self.parked_from = np.full(n_tiles, NEVER, dtype=np.int64)
+
+    @classmethod
+    def view(cls, occ: np.ndarray, parked_from: np.ndarray, base: int) -> "ReservationTable":
+        """Tabela na gotowych tablicach (np. migawka w pamięci współdzielonej), bez kopiowania."""
+        res = cls.__new__(cls)
+        res.n_tiles = occ.shape[1]
+        res.base, res.occ, res.parked_from = int(base), occ, parked_from
+        return res
+
+    def _ensure(self, step_end: int) -> None:
+        need = step_end - self.base
+        if need > len(self.occ):
+            grown = np.zeros((max(need, 2 * len(self.occ)), self.n_tiles), dtype=bool)
+            grown[: len(self.occ)] = self.occ
+            self.occ = grown
+
+    def trim(self, step: int) -> None:
+        """Zapomina wiersze sprzed `step` (przeszłość nie jest już sprawdzana)."""
+        drop = step - self.base
+        if drop <= 0:
+            return
+        if drop >= len(self.occ):
+            self.occ[:] = False
+        else:
+            self.occ[:-drop] = self.occ[drop:]
+            self.occ[-drop:] = False
+        self.base = step
+
+    def reserve_path(self, tiles: np.ndarray, steps: np.ndarray) -> None:
+        """AssignPlanToRobot: węzeł w swoim kroku i następny węzeł w kroku bieżącego."""
+        self._ensure(int(steps.max()) + 1)
+        rows = steps - self.base
+        self.occ[rows, tiles] = True
+        self.occ[rows[:-1], tiles[1:]] = True
+
+    def reserve(self, steps: np.ndarray, tiles: np.ndarray) -> None:
+        """ReserveSpecificStep dla par (krok, kafel) naraz; kroki sprzed base są pomijane."""
+        keep = steps >= self.base
+        if keep.any():
+            steps, tiles = steps[keep], tiles[keep]
+            self._ensure(int(steps.max()) + 1)
+            self.occ[steps - self.base, tiles] = True
+
+    def assign(self, plan: Plan) -> None:
+        """AssignPlanToRobot: zwolnienie startu, rezerwacje ścieżki, blokada celu."""
+        tiles = (plan.states // 4).astype(np.int64)
+        steps = plan.start_step + np.arange(len(tiles), dtype=np.int64)
+        self.free_future(int(tiles[0]), int(steps[0]) + 1)
+        self.reserve_path(tiles, steps)
+        self.block_future(int(tiles[-1]), int(steps[-1]))
+
+    def block_future(self, tile: int, step: int) -> None:
+        """BlockTileFuture: kafel zajęty od `step` do odwołania."""
+        self.parked_from[tile] = step
+
+    def free_future(self, tile: int, step: int) -> None:
+        """FreeTileFuture: blokada kończy się przed `step`, zostaje jako rezerwacje [od, step)."""
+        start = self.parked_from[tile]
+        if start != NEVER and step > max(start, self.base):
+            self._ensure(step)
+            self.occ[max(start, self.base) - self.base: step - self.base, tile] = True
+        self.parked_from[tile] = NEVER
+
+    def parked(self, step: int) -> np.ndarray:
+        """Maska kafli zablokowanych w kroku `step` (BlockTileFuture)."""
+        return self.parked_from <= step
+
+    def window(self, start_step: int, length: int = HORIZON, ignore_parked: int = -1) -> np.ndarray:
+        """
+        reserved[t, tile] dla kroków start_step + t – format `reserved`
+        silników; blokada kafla `ignore_parked` (własny start robota)
+        pominięta jak w feasible_delays.
+        """
+        self._ensure(start_step + length)
+        rows = self.occ[start_step - self.base: start_step - self.base + length]
+        steps = np.arange(start_step, start_step + length)
+        parked = self.parked_from[None, :] <= steps[:, None]
+        if ignore_parked >= 0:
+            parked[:, ignore_parked] = False
+        return rows | parked
+
+    def busy(self, steps: np.ndarray, tiles: np.ndarray, ignore_parked: int = -1) -> np.ndarray:
+        """Zajętość par (krok, kafel) naraz; blokada kafla `ignore_parked` (własny start) pominięta."""
+        self._ensure(int(np.max(steps, initial=self.base)) + 1)
+        hit = self.occ[steps - self.base, tiles]
+        parked = self.parked_from[tiles] <= steps
+        if ignore_parked >= 0:
+            parked &= tiles != ignore_parked
+        return hit | parked
+
+    def busy_after(self, tile: int, step: int) -> bool:
+        """Czy kafel ma jakąkolwiek rezerwację od `step` (BlockTileFuture na celu by ją nadpisał)."""
+        row = max(step - self.base, 0)
+        return bool(self.occ[row:, tile].any()) or self.parked_from[tile] != NEVER
+
+    def feasible_delays(self, states: np.ndarray, start_step: int, max_delay: int = 0) -> np.ndarray:
+        """
+        Maska (max_delay + 1,): czy ścieżka ruszająca k kroków po start_step
+        (k razy Wait na starcie) nie koliduje z rezerwacjami. Sprawdzane jak
+        wpisuje je AssignPlanToRobot: węzeł w swoim kroku, następny węzeł
+        w kroku bieżącego (zamiana miejsc), czekanie na starcie i cel wolny
+        od kroku dojazdu. Wszystkie opóźnienia naraz – macierz k x węzeł.
+        """
+        tiles = (states // 4).astype(np.int64)
+        k = np.arange(max_delay + 1, dtype=np.int64)
+        steps = start_step + k[:, None] + np.arange(len(tiles), dtype=np.int64)[None, :]
+        start = int(tiles[0])
+        tile_grid = np.broadcast_to(tiles, steps.shape)
+
+        vertex = self.busy(steps[:, 1:], tile_grid[:, 1:], ignore_parked=start).any(axis=1)
+        swap = self.busy(steps[:, :-1], tile_grid[:, 1:], ignore_parked=start).any(axis=1)
+        wait_steps = start_step + 1 + k[:-1]
+        wait_busy = self.busy(wait_steps, np.full(len(wait_steps), start), ignore_parked=start)
+        waiting = np.r_[False, np.logical_or.accumulate(wait_busy)]
+        goal = np.array([self.busy_after(int(tiles[-1]), int(s)) for s in steps[:, -1]])
+        return ~(vertex | swap | waiting | goal)
+
+
+# ============================
+# 2. ROBOTY I SYMULACJA
+# ============================
+
+@dataclass
+class Robot:
+    id: int
+    spawn: Tuple[int, int]
+    tile: int                        # kafel ostatniego węzła planu (lastPlanElement)
+    head: int
+    last_step: int
+    destinations: Deque[str] = field(default_factory=deque)
+
+
+@dataclass
+class SimStats:
+    steps: int = 0
+    requests: int = 0
+    planned: int = 0                 # plany z silnika
+    cached: int = 0                  # plany z cache (bez silnika)
+    failed: int = 0
+    merge_conflicts: int = 0         # plany silnika odrzucone przy sprawdzaniu na rezerwacjach
+    replanned: int = 0               # z tego zaplanowane ponownie w tym samym kroku (ParallelSimulator)
+    legs_done: int = 0
+    planning_ms: float = 0.0
+    wall_s: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(self.__dict__)
+
+
+class Simulator:
+    """
+    Roboty na spawnach, każdy w pętli standardowego cyklu; w kroku
+    obsługiwany jeden cel (MoveAllRobots). `cache` – opcjonalny PlanCache,
+    `hot_shelves` – losowy stały podzbiór regałów, z którego biorą się cele
+    ToShelf (domyślnie wszystkie przejezdne, jak w SetShelfPath). Z
+    `record` przypisane plany są zbierane do walidacji (plan_set), a
+    `traces` (traces.TraceWriter) dostaje je węzeł po węźle – Instance to
+    numer odcinka cyklu w symulacji. Plan silnika wchodzi z najmniejszym
+    bezkolizyjnym opóźnieniem startu do `max_delay`.
+    """
+
+    def __init__(self, grid: Grid, n_robots: int = 16, algorithm: str = "ACO", budget: Optional[Budget] = None,
+                 seed: int = 0, cache=None, table: Optional[TransitionTable] = None, horizon: int = HORIZON,
+                 writer=None, hot_shelves: Optional[int] = None, record: bool = False, traces=None,
+                 max_delay: int = 8):
+        if n_robots > len(grid.spawn_points):
+            raise ValueError(f"Za dużo robotów: {n_robots} > {len(grid.spawn_points)} spawnów")
+        self.grid = grid
+        self.table = table or TransitionTable(grid)
+        self.algorithm = algorithm
+        self.engine = get_engine(algorithm)
+        self.budget = budget or Budget("iterations", 20)
+        self.seed = seed
+        self.cache = cache
+        self.horizon = horizon
+        self.max_delay = max_delay
+        self.writer = writer
+        self.traces = traces
+        self.rng = np.random.default_rng(seed)
+        self.res = ReservationTable(grid.n_tiles)
+        self.stats = SimStats()
+        self.step = 0
+        self.assigned: Optional[List[Tuple[int, Plan]]] = [] if record else None
+
+        w = grid.width
+        self.shelves = np.array([y * w + x for x, y in grid.tiles_with(SHELF)], dtype=np.int64)
+        if hot_shelves:
+            # zamówienia skupione na kilku regałach zamiast losowania ze wszystkich (SetShelfPath)
+            self.shelves = np.sort(self.rng.choice(self.shelves, min(hot_shelves, len(self.shelves)), replace=False))
+        self.tps = np.array([y * w + x for x, y in grid.tiles_with(TRANSFER_POINT)], dtype=np.int64)
+        self.robots: List[Robot] = []
+        for i, (x, y) in enumerate(grid.spawn_points[:n_robots]):
+            tile = y * w + x
+            self.robots.append(Robot(i, (x, y), tile, NORTH if y == 0 else SOUTH, 0))
+            self.res.block_future(tile, 0)
+
+    # --- cele ---
+
+    def _pick(self, tiles: np.ndarray, step: int) -> int:
+        """Losowy kafel z listy, wolny w kroku `step` (Walkable w RTgrid[startStep])."""
+        free = tiles[~self.res.parked(step)[tiles]]
+        return int(free[self.rng.integers(len(free))]) if len(free) else -1
+
+    def _goal(self, robot: Robot, dest: str, step: int) -> int:
+        if dest == "ToSpawn":
+            return robot.spawn[1] * self.grid.width + robot.spawn[0]
+        return self._pick(self.shelves if dest == "ToShelf" else self.tps, step)
+
+    # --- planowanie ---
+
+    def plan_for(self, robot: Robot, goal_tile: int, start_step: int) -> Optional[Plan]:
+        """Plan z cache (po rewalidacji) albo z silnika (po _merge); None, gdy nie ma ścieżki."""
+        w = self.grid.width
+        start = (robot.tile % w, robot.tile // w)
+        goal = (goal_tile % w, goal_tile // w)
+        t0 = time.perf_counter()
+        if self.cache is not None:
+            hit = self.cache.lookup(robot.tile, robot.head, goal_tile, start_step, self.res)
+            if hit is not None:
+                self.stats.cached += 1
+                self.stats.planning_ms += (time.perf_counter() - t0) * 1000.0
+                return hit
+        plan = self.engine(self.table, start, robot.head, goal, start_step=start_step,
+                           reserved=self.res.window(start_step, self.horizon, ignore_parked=robot.tile),
+                           rng=rng_stream(self.seed, self.stats.requests, self.algorithm), budget=self.budget)
+        self.stats.planned += 1
+        self.stats.planning_ms += plan.elapsed_ms
+        if self.writer is not None:
+            self.writer.write(plan, robot=robot.id)
+        if not plan.found:
+            return None
+        if self.cache is not None:
+            self.cache.store(robot.tile, robot.head, goal_tile, plan)
+        return self._merge(plan, start_step)
+
+    def _merge(self, plan: Plan, start_step: int) -> Optional[Plan]:
+        """Plan silnika na bieżących rezerwacjach: najmniejsze bezkolizyjne opóźnienie albo None."""
+        if not plan.found:
+            return None
+        ok = np.flatnonzero(self.res.feasible_delays(plan.states, start_step, self.max_delay))
+        if not len(ok):
+            self.stats.merge_conflicts += 1
+            return None
+        return retime(plan, start_step, int(ok[0]))
+
+    def assign(self, robot: Robot, plan: Plan) -> None:
+        """AssignPlanToRobot: rezerwacje planu i nowa pozycja robota (koniec planu)."""
+        self.res.assign(plan)
+        if self.assigned is not None:
+            self.assigned.append((robot.id, plan))
+        if self.traces is not None:
+            self.traces.write(plan, instance=self.stats.legs_done, robot=robot.id)
+        robot.tile, robot.head = int(plan.states[-1] // 4), int(plan.states[-1] % 4)
+        robot.last_step = plan.start_step + len(plan.states) - 1
+
+    def pending(self, limit: int = 1) -> List[Tuple[Robot, int, int]]:
+        """
+        Do `limit` robotów z niepustą kolejką w losowej kolejności:
+        (robot, kafel celu, krok startu). Cel równy startowi zdejmuje się od
+        razu, brak wolnego celu liczy się jako porażka.
+        """
+        for robot in self.robots:
+            # nowy cykl tylko dla wolnego robota (GetFreeRobot): bez celów i po wykonaniu planu
+            if not robot.destinations and robot.last_step < self.step:
+                robot.destinations.extend(CYCLE)
+        out, served = [], 0
+        for i in self.rng.permutation(len(self.robots)):
+            if served >= limit:
+                break
+            robot = self.robots[i]
+            if not robot.destinations:
+                continue
+            served += 1
+            start_step = max(robot.last_step + 1, self.step)
+            goal_tile = self._goal(robot, robot.destinations[0], start_step)
+            self.stats.requests += 1
+            if goal_tile == robot.tile:
+                robot.destinations.popleft()
+            elif goal_tile < 0:
+                self.stats.failed += 1
+            else:
+                out.append((robot, goal_tile, start_step))
+        return out
+
+    def commit(self, robot: Robot, plan: Optional[Plan]) -> None:
+        if plan is None:
+            self.stats.failed += 1
+            return
+        self.assign(robot, plan)
+        robot.destinations.popleft()
+        self.stats.legs_done += 1
+
+    def advance(self) -> None:
+        self.step += 1
+        self.stats.steps += 1
+        if self.step % 256 == 0:
+            self.res.trim(self.step - 1)
+
+    def tick(self) -> None:
+        """Jeden krok: MoveAllRobots obsługuje cel pierwszego robota z kolejką (losowa kolejność)."""
+        for robot, goal_tile, start_step in self.pending(1):
+            self.commit(robot, self.plan_for(robot, goal_tile, start_step))
+        self.advance()
+
+    def plan_set(self):
+        """Przypisane plany (record=True) jako conflicts.PlanSet, z robotami na spawnach w kroku 0."""
+        from .conflicts import PlanSet
+
+        if self.assigned is None:
+            raise RuntimeError("Simulator bez record=True nie zbiera planów")
+        xs, ys = zip(*(r.spawn for r in self.robots))
+        spawn = PlanSet.from_arrays([r.id for r in self.robots], np.zeros(len(xs)), xs, ys,
+                                    [NORTH if y == 0 else SOUTH for y in ys])
+        return PlanSet.concat([spawn, PlanSet.from_plans(self.assigned, self.grid.width)])
+
+    def run(self, steps: int) -> SimStats:
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            self.tick()
+        self.stats.wall_s += time.perf_counter() - t0
+        return self.stats
+
+
+def run_simulation(n_robots: int = 16, steps: int = 500, algorithm: str = "ACO", budget: Optional[Budget] = None,
+                   seed: int = 0, map_seed: int = 0, cache=None, out_dir: Optional[Path] = None,
+                   hot_shelves: Optional[int] = None, workers: Optional[int] = None, batch: int = 4,
+                   max_delay: int = 8, record: bool = False, traces: bool = False,
+                   cost: Optional[np.ndarray] = None) -> Simulator:
+    """
+    Symulacja od zera; z `out_dir` plany silnika trafiają do dane.csv / logów
+    konwergencji, a z `traces` przypisane ścieżki do <out_dir>/traces;
+    `cost` – warstwa kosztu kafli dla silników (TransitionTable). Z
+    `workers` (także 0) cele obsługuje PlannerPool po `batch` na krok
+    (pool.ParallelSimulator).
+    """
+    from .logs import LogWriter
+    from .traces import TRACES_DIR, TraceWriter
+
+    if traces and out_dir is None:
+        raise ValueError("traces wymaga out_dir")
+    grid = build_warehouse(seed=map_seed)
+    writer = LogWriter(out_dir) if out_dir is not None else None
+    trace_writer = TraceWriter(Path(out_dir) / TRACES_DIR, grid.width) if traces else None
+    kwargs = dict(n_robots=n_robots, algorithm=algorithm, budget=budget, seed=seed, cache=cache, writer=writer,
+                  hot_shelves=hot_shelves, record=record, traces=trace_writer, max_delay=max_delay)
+    try:
+        if workers is None:
+            sim = Simulator(grid, table=TransitionTable(grid, cost=cost), **kwargs)
+            sim.run(steps)
+        else:
+            from .pool import ParallelSimulator, PlannerPool
+
+            with PlannerPool(grid, algorithm, budget, seed, workers=workers, cost=cost) as pool:
+                sim = ParallelSimulator(grid, pool, batch=batch, **kwargs)
+                sim.run(steps)
+    finally:
+        if writer is not None:
+            writer.close()
+        if trace_writer is not None:
+            trace_writer.close()
+    return sim
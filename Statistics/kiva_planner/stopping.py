@@ -0,0 +1,332 @@
+"""
+Reguły wczesnego zatrzymania planerów.
+
+Z metryk conv.py (TimeFirstOptimal, Time_k1_2) widać, że wiele przebiegów
+ma ostateczną ścieżkę długo przed końcem sekundy – reszta budżetu to tylko
+czas, przez który robot czeka w MoveAllRobots. Reguła zatrzymania jest
+sprawdzana po każdej iteracji (StopMonitor.update) i działa tylko, gdy
+jest już ścieżka do celu:
+
+  noimprove=K      brak poprawy od K iteracji
+  gap=G            najlepsza ścieżka <= (1 + G) * dolne ograniczenie,
+                   ograniczenie = Manhattan + 1 węzłów
+  gap-bfs=G        j.w., ograniczenie = najkrótsza ścieżka w modelu
+                   (x, y, heading) na statycznej mapie (BFS po tablicy przejść)
+  learned=PLIK     próg iteracji z historycznych logów konwergencji
+                   (kwantyl IterFirstOptimal per algorytm i zakres Manhattan,
+                   patrz learn_model)
+
+Kilka reguł łączy AnyOf – zatrzymuje pierwsza, która zadziała. W trybie
+cienia (shadow) monitor zapisuje moment zadziałania reguły, ale przebieg
+trwa do końca budżetu; przy tym samym strumieniu RNG przebieg zatrzymany
+jest prefiksem pełnego, więc para (moment reguły, koniec budżetu) daje
+dokładnie oszczędzony czas i utraconą długość ścieżki (stopping_report).
+"""
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .transitions import TransitionTable
+
+STOPS_FILE = "stops.csv"
+STOPS_HEADER = ("Algorithm;Manhattan;Reason;Shadow;StopIteration;StopTimeMs;StopEvaluations;StopPathLength;"
+                "FinalIteration;FinalTimeMs;FinalEvaluations;FinalPathLength")
+BUDGET_REASON = "budget"
+
+# zakresy jak classify_range w conv.py
+RANGE_LABELS = ["krótkie trasy (M ≤ 40)", "średnie trasy (41 ≤ M ≤ 80)", "długie trasy (M > 80)"]
+
+
+def classify_range(manhattan: float) -> str:
+    if manhattan <= 40:
+        return RANGE_LABELS[0]
+    if manhattan <= 80:
+        return RANGE_LABELS[1]
+    return RANGE_LABELS[2]
+
+
+# ============================
+# 1. REGUŁY
+# ============================
+
+@dataclass
+class RouteInfo:
+    """To, co reguła wie o planowanej trasie przed pierwszą iteracją."""
+    algorithm: str
+    table: TransitionTable
+    s0: int
+    goal_tile: int
+    manhattan: int
+
+
+class StopRule(ABC):
+    """
+    Bazowa reguła: `start` raz na przebieg, `check` po każdej iteracji ze
+    ścieżką do celu. Reguła bez `check` nie da się utworzyć (TypeError).
+    """
+
+    name = "rule"
+
+    def start(self, route: RouteInfo) -> None:
+        pass
+
+    @abstractmethod
+    def check(self, iteration: int, best_len: int, improved: bool) -> Optional[str]:
+        """Powód zatrzymania albo None."""
+
+
+class NoImprovement(StopRule):
+    name = "noimprove"
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError(f"noimprove: K musi być >= 1, dostałem {k}")
+        self.k = int(k)
+        self._last = 0
+
+    def start(self, route: RouteInfo) -> None:
+        self._last = 0
+
+    def check(self, iteration: int, best_len: int, improved: bool) -> Optional[str]:
+        if improved or not self._last:
+            self._last = iteration
+        if iteration - self._last >= self.k:
+            return f"{self.name}={self.k}"
+        return None
+
+
+class GapThreshold(StopRule):
+    """Względna odległość od dolnego ograniczenia długości (w węzłach, ze startem)."""
+
+    def __init__(self, gap: float, bound: str = "manhattan"):
+        if gap < 0:
+            raise ValueError(f"gap: próg musi być >= 0, dostałem {gap}")
+        if bound not in ("manhattan", "bfs"):
+            raise ValueError(f"Nieznane ograniczenie: {bound!r} (manhattan, bfs)")
+        self.gap = float(gap)
+        self.bound = bound
+        self.name = "gap" if bound == "manhattan" else "gap-bfs"
+        self._limit = 0.0
+
+    def start(self, route: RouteInfo) -> None:
+        if self.bound == "bfs":
+            lower = route.table.shortest_length(route.s0, route.goal_tile)
+            lower = route.manhattan + 1 if lower is None else lower
+        else:
+            lower = route.manhattan + 1
+        self._limit = (1.0 + self.gap) * lower
+
+    def check(self, iteration: int, best_len: int, improved: bool) -> Optional[str]:
+        if best_len <= self._limit + 1e-9:
+            return f"{self.name}={self.gap:g}"
+        return None
+
+
+class LearnedThreshold(StopRule):
+    """Zatrzymanie po progu iteracji wyuczonym z historii dla (algorytm, zakres Manhattan)."""
+
+    name = "learned"
+
+    def __init__(self, model: Dict):
+        self.model = model
+        self.thresholds: Dict[str, Dict[str, float]] = model["thresholds"]
+        self._limit: Optional[float] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "LearnedThreshold":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def start(self, route: RouteInfo) -> None:
+        # brak progu dla algorytmu / zakresu = reguła nie działa
+        self._limit = self.thresholds.get(route.algorithm, {}).get(classify_range(route.manhattan))
+
+    def check(self, iteration: int, best_len: int, improved: bool) -> Optional[str]:
+        if self._limit is not None and iteration >= self._limit:
+            return f"{self.name}(q={self.model.get('quantile', 0):g})"
+        return None
+
+
+class AnyOf(StopRule):
+    name = "any"
+
+    def __init__(self, rules: Sequence[StopRule]):
+        self.rules = list(rules)
+
+    def start(self, route: RouteInfo) -> None:
+        for rule in self.rules:
+            rule.start(route)
+
+    def check(self, iteration: int, best_len: int, improved: bool) -> Optional[str]:
+        # każda reguła widzi każdą iterację (noimprove liczy od ostatniej poprawy)
+        reasons = [rule.check(iteration, best_len, improved) for rule in self.rules]
+        return next((r for r in reasons if r), None)
+
+
+def parse_rule(text: str) -> StopRule:
+    """'noimprove=20', 'gap=0.1', 'gap-bfs=0', 'learned=stop_model.json'."""
+    name, sep, value = text.partition("=")
+    name = name.strip()
+    if not sep:
+        raise ValueError(f"Zła reguła {text!r}: oczekiwano NAZWA=WARTOŚĆ")
+    try:
+        if name == "noimprove":
+            return NoImprovement(int(value))
+        if name == "gap":
+            return GapThreshold(float(value))
+        if name == "gap-bfs":
+            return GapThreshold(float(value), bound="bfs")
+    except ValueError as exc:
+        raise ValueError(f"Zła reguła {text!r}: {exc}") from None
+    if name == "learned":
+        return LearnedThreshold.load(Path(value))
+    raise ValueError(f"Nieznana reguła: {name!r} (noimprove, gap, gap-bfs, learned)")
+
+
+def parse_rules(texts: Sequence[str]) -> Optional[StopRule]:
+    rules = [parse_rule(t) for t in texts]
+    if not rules:
+        return None
+    return rules[0] if len(rules) == 1 else AnyOf(rules)
+
+
+# ============================
+# 2. MONITOR W SILNIKU
+# ============================
+
+@dataclass
+class StopEvent:
+    reason: str
+    iteration: int
+    elapsed_ms: float
+    evaluations: int
+    path_length: int
+    shadow: bool = False
+
+
+class StopMonitor:
+    """
+    Łączy regułę z pętlą silnika: `while meter.running() and not monitor.stopped`.
+    Bez reguły nic nie liczy i nigdy nie zatrzymuje.
+    """
+
+    def __init__(self, rule: Optional[StopRule], route: RouteInfo, shadow: bool = False):
+        self.rule = rule
+        self.shadow = shadow
+        self.event: Optional[StopEvent] = None
+        if rule is not None:
+            rule.start(route)
+
+    @property
+    def stopped(self) -> bool:
+        return self.event is not None and not self.shadow
+
+    def update(self, meter, best_len: int, found: bool, improved: bool) -> None:
+        if self.rule is None or self.event is not None or not found:
+            return
+        reason = self.rule.check(meter.iterations, best_len, improved)
+        if reason:
+            self.event = StopEvent(reason, meter.iterations, meter.elapsed_ms(), meter.evaluations,
+                                   best_len, self.shadow)
+
+
+def stop_row(plan, shadow: bool = False) -> str:
+    """Wiersz stops.csv: moment zadziałania reguły (albo koniec budżetu) i koniec przebiegu."""
+    ev = plan.stop
+    length = plan.length if plan.found else 0
+    if ev is None:
+        head = f"{BUDGET_REASON};{shadow};{plan.iterations};{plan.elapsed_ms:.2f};{plan.evaluations};{length}"
+    else:
+        head = f"{ev.reason};{shadow};{ev.iteration};{ev.elapsed_ms:.2f};{ev.evaluations};{ev.path_length}"
+    return (f"{plan.algorithm};{plan.manhattan};{head};"
+            f"{plan.iterations};{plan.elapsed_ms:.2f};{plan.evaluations};{length}")
+
+
+# ============================
+# 3. UCZENIE Z HISTORII
+# ============================
+
+def first_optimal_iterations(df):
+    """
+    Per przebieg logu: Manhattan i IterFirstOptimal (pierwsza iteracja
+    z ostateczną BestPathLength), jak w conv.py.
+    """
+    from kiva_stats.segment import assign_run_ids
+
+    df = df.assign(RunId=assign_run_ids(df))
+    final = df.groupby("RunId", sort=False)["BestPathLength"].transform("last")
+    hit = df[df["BestPathLength"] == final]
+    return hit.groupby("RunId", sort=False).agg(Manhattan=("Manhattan", "first"),
+                                                IterFirstOptimal=("Iteration", "first"))
+
+
+def learn_model(logs: Dict[str, Path], quantile: float = 0.9) -> Dict:
+    """
+    Próg iteracji per (algorytm, zakres Manhattan) = kwantyl IterFirstOptimal
+    z historycznych przebiegów. Iteracje, a nie TimeMs, żeby model z logów
+    Unity pasował do silników Pythona (inna szybkość iteracji).
+    """
+    from kiva_stats.schema import read_convergence
+
+    thresholds: Dict[str, Dict[str, float]] = {}
+    runs: Dict[str, Dict[str, int]] = {}
+    for alg, path in logs.items():
+        per_run = first_optimal_iterations(read_convergence(path))
+        per_run["Range"] = [classify_range(m) for m in per_run["Manhattan"]]
+        grouped = per_run.groupby("Range")["IterFirstOptimal"]
+        thresholds[alg] = {r: float(np.ceil(v)) for r, v in grouped.quantile(quantile).items()}
+        runs[alg] = {r: int(n) for r, n in grouped.size().items()}
+        print(f"[INFO] {alg}: {len(per_run)} przebiegów, progi {thresholds[alg]}")
+    return {"quantile": quantile, "unit": "Iteration", "thresholds": thresholds, "runs": runs}
+
+
+def save_model(model: Dict, path: Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, ensure_ascii=False, indent=2)
+    print(f"[INFO] Zapisano model zatrzymania {path}")
+    return path
+
+
+# ============================
+# 4. RAPORT
+# ============================
+
+def stopping_report(stops_path: Path):
+    """
+    Per algorytm i zakres Manhattan, z wierszy trybu cienia: jak często
+    reguła zadziałała, ile czasu planowania oszczędza i ile węzłów ścieżki
+    kosztuje względem pełnego budżetu.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(stops_path, sep=";")
+    shadow = df[df["Shadow"].astype(str) == "True"].copy()
+    if shadow.empty:
+        raise ValueError(f"{stops_path}: brak wierszy trybu cienia (bench --stop-shadow)")
+    shadow["Range"] = pd.Categorical([classify_range(m) for m in shadow["Manhattan"]],
+                                     categories=RANGE_LABELS, ordered=True)
+    fired = shadow["Reason"] != BUDGET_REASON
+    # przebieg bez zadziałania reguły kończy się na budżecie: nic nie oszczędza, nic nie traci
+    shadow["SavedMs"] = np.where(fired, shadow["FinalTimeMs"] - shadow["StopTimeMs"], 0.0)
+    shadow["SavedIter"] = np.where(fired, shadow["FinalIteration"] - shadow["StopIteration"], 0)
+    shadow["Lost"] = np.where(fired, shadow["StopPathLength"] - shadow["FinalPathLength"], 0)
+    shadow["Fired"] = fired
+
+    g = shadow.groupby(["Algorithm", "Range"], observed=True)
+    report = pd.DataFrame({
+        "Runs": g.size(),
+        "StopRate": g["Fired"].mean(),
+        "MeanSavedMs": g["SavedMs"].mean(),
+        "SavedTime%": 100.0 * g["SavedMs"].sum() / g["FinalTimeMs"].sum(),
+        "SavedIter%": 100.0 * g["SavedIter"].sum() / g["FinalIteration"].sum(),
+        "MeanLostNodes": g["Lost"].mean(),
+        "LostRuns%": 100.0 * g["Lost"].apply(lambda s: (s > 0).mean()),
+        "Lost%": 100.0 * g["Lost"].sum() / g["FinalPathLength"].sum(),
+    })
+    return report
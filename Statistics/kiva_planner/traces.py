@@ -0,0 +1,225 @@
+"""
+Zapis ścieżek węzeł po węźle (struct of arrays z przesunięciami).
+
+W Unity ścieżka istnieje tylko jako List<Node>, a AlgorithmLogger
+zapisuje z niej PathLength i Rotations – po stronie Statistics nie da się
+policzyć metryk przestrzennych ani odtworzyć trasy. Katalog śladów:
+
+  x.i2, y.i2          int16, kafel węzła
+  heading.u1          uint8, 0..3 (N, E, S, W)
+  action.u1           uint8, akcja prowadząca do węzła (ACTIONS)
+  step.i4             int32, krok symulacji węzła
+  offsets.i8          int64, N + 1 wpisów; ścieżka i = węzły offsets[i]:offsets[i+1]
+  paths.csv           Algorithm;Instance;Robot;StartStep;Found – wiersz i = ścieżka i
+
+Kolumny to surowe tablice little-endian dopisywane na końcu pliku
+(TraceWriter buforuje je i zrzuca co `flush_nodes` węzłów), czytane przez
+np.memmap (TraceStore), więc dostęp do dowolnej ścieżki to dwa odczyty
+offsets i wycinki kolumn. O liczbie ścieżek decyduje offsets.i8 – jest
+zapisywany ostatni (po kolumnach i paths.csv), więc przerwany zapis
+zostawia najwyżej nadmiarowe węzły i wiersze, które czytnik pomija, a
+TraceWriter obcina przy ponownym otwarciu. Instance / Robot = -1, gdy
+nie dotyczy (benchmark nie ma robotów, symulacja – instancji).
+"""
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .grid import WIDTH, state_xyh
+from .plan import Plan
+
+TRACES_DIR = "traces"
+COLUMNS: Dict[str, np.dtype] = {"x": np.dtype("<i2"), "y": np.dtype("<i2"), "heading": np.dtype("u1"),
+                                "action": np.dtype("u1"), "step": np.dtype("<i4")}
+OFFSETS_FILE = "offsets.i8"
+META_FILE = "paths.csv"
+META_HEADER = "Algorithm;Instance;Robot;StartStep;Found"
+
+
+def column_file(name: str) -> str:
+    return f"{name}.{COLUMNS[name].str[1:]}"
+
+
+class Trace(NamedTuple):
+    x: np.ndarray
+    y: np.ndarray
+    heading: np.ndarray
+    action: np.ndarray
+    step: np.ndarray
+
+
+# ============================
+# 1. ZAPIS
+# ============================
+
+class TraceWriter:
+    """Dopisuje plany do katalogu śladów (tworzy go albo kontynuuje istniejący)."""
+
+    def __init__(self, out_dir: Path, width: int = WIDTH, flush_nodes: int = 1 << 16):
+        self.dir = Path(out_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.width = width
+        self.flush_nodes = flush_nodes
+        offsets = self.dir / OFFSETS_FILE
+        if not offsets.exists() or offsets.stat().st_size == 0:
+            np.zeros(1, np.int64).tofile(offsets)
+        self.total = int(np.fromfile(offsets, np.int64)[-1])
+        self.paths = offsets.stat().st_size // 8 - 1
+        meta = self.dir / META_FILE
+        new_meta = not meta.exists()
+        # po przerwanym zapisie kolumny i paths.csv mogą wyprzedzać offsets – obcinamy
+        for name, dtype in COLUMNS.items():
+            path = self.dir / column_file(name)
+            if path.exists() and path.stat().st_size > self.total * dtype.itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(self.total * dtype.itemsize)
+        if not new_meta:
+            with open(meta, "r+", encoding="utf-8", newline="\n") as f:
+                lines = f.readlines()
+                if len(lines) > self.paths + 1:
+                    f.seek(0)
+                    f.writelines(lines[:self.paths + 1])
+                    f.truncate()
+        self._files: Dict[str, BinaryIO] = {name: open(self.dir / column_file(name), "ab") for name in COLUMNS}
+        self._offsets = open(offsets, "ab")
+        self._meta: TextIO = open(meta, "a", encoding="utf-8", newline="\n")
+        if new_meta:
+            self._meta.write(META_HEADER + "\n")
+        self._buffers: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        self._ends: List[int] = []
+        self._rows: List[str] = []
+        self._buffered = 0
+
+    def write(self, plan: Plan, instance: int = -1, robot: int = -1) -> None:
+        """Ścieżka planu (także niedokończona, Found=False); plan bez węzłów to pusta ścieżka."""
+        n = 0 if plan.states is None else len(plan.states)
+        if n:
+            x, y, head = state_xyh(plan.states, self.width)
+            for name, values in (("x", x), ("y", y), ("heading", head), ("action", plan.actions),
+                                 ("step", plan.start_step + np.arange(n))):
+                self._buffers[name].append(np.asarray(values, dtype=COLUMNS[name]))
+        self.total += n
+        self.paths += 1
+        self._ends.append(self.total)
+        self._rows.append(f"{plan.algorithm};{instance};{robot};{plan.start_step};{plan.found}")
+        self._buffered += n
+        if self._buffered >= self.flush_nodes:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._ends:
+            return
+        for name, parts in self._buffers.items():
+            if parts:
+                np.concatenate(parts).tofile(self._files[name])
+            parts.clear()
+            self._files[name].flush()
+        self._meta.write("\n".join(self._rows) + "\n")
+        self._meta.flush()
+        np.asarray(self._ends, dtype=np.int64).tofile(self._offsets)
+        self._offsets.flush()
+        self._ends.clear()
+        self._rows.clear()
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        for f in (*self._files.values(), self._offsets, self._meta):
+            f.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ============================
+# 2. ODCZYT
+# ============================
+
+def _memmap(path: Path, dtype: np.dtype, count: Optional[int] = None) -> np.ndarray:
+    size = path.stat().st_size // dtype.itemsize if path.exists() else 0
+    count = size if count is None else min(count, size)
+    if count == 0:
+        return np.zeros(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class TraceStore:
+    """Katalog śladów tylko do odczytu: store[i] -> Trace (widoki memmap), meta -> DataFrame."""
+
+    def __init__(self, path: Path):
+        self.dir = Path(path)
+        if not (self.dir / OFFSETS_FILE).exists():
+            raise FileNotFoundError(f"{self.dir}: brak {OFFSETS_FILE} (to nie jest katalog śladów)")
+        self.offsets = _memmap(self.dir / OFFSETS_FILE, np.dtype("<i8"))
+        if not len(self.offsets):
+            self.offsets = np.zeros(1, np.int64)
+        self.n_nodes = int(self.offsets[-1])
+        self.columns = {name: _memmap(self.dir / column_file(name), dtype, self.n_nodes)
+                        for name, dtype in COLUMNS.items()}
+        short = [name for name, col in self.columns.items() if len(col) < self.n_nodes]
+        if short:
+            raise ValueError(f"{self.dir}: kolumny {', '.join(short)} krótsze niż {OFFSETS_FILE}")
+        self._meta: Optional[pd.DataFrame] = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> Trace:
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"Ścieżka {i} poza zakresem 0..{len(self) - 1}")
+        i %= len(self)
+        return self.nodes(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def nodes(self, start: int, stop: int) -> Trace:
+        """Węzły start:stop wszystkich ścieżek naraz (widoki, bez kopiowania)."""
+        return Trace(*(self.columns[name][start:stop] for name in COLUMNS))
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def meta(self) -> pd.DataFrame:
+        """paths.csv przycięty do liczby ścieżek w offsets (Algorithm jako category)."""
+        if self._meta is None:
+            meta = pd.read_csv(self.dir / META_FILE, sep=";", nrows=len(self),
+                               dtype={"Algorithm": "category", "Instance": np.int32, "Robot": np.int32,
+                                      "StartStep": np.int32})
+            if len(meta) < len(self):
+                raise ValueError(f"{self.dir}: {META_FILE} ma {len(meta)} wierszy, ścieżek jest {len(self)}")
+            meta["Found"] = meta["Found"].astype(str).str.lower().eq("true")
+            self._meta = meta
+        return self._meta
+
+    def select(self, algorithm: Optional[str] = None, found: Optional[bool] = None) -> np.ndarray:
+        """Numery ścieżek spełniających filtry."""
+        mask = np.ones(len(self), dtype=bool)
+        if algorithm is not None:
+            mask &= (self.meta["Algorithm"] == algorithm).to_numpy()
+        if found is not None:
+            mask &= self.meta["Found"].to_numpy() == found
+        return np.flatnonzero(mask)
+
+    def path_ids(self, start: int, stop: int) -> np.ndarray:
+        """Numer ścieżki każdego węzła ze ścieżek start:stop."""
+        return np.repeat(np.arange(start, stop), self.lengths[start:stop])
+
+    def chunks(self, max_nodes: int = 1 << 22) -> Iterator[Tuple[int, int, Trace]]:
+        """(pierwsza ścieżka, za ostatnią, węzły) – bloki po całych ścieżkach, do ok. max_nodes węzłów."""
+        first = 0
+        while first < len(self):
+            base = int(self.offsets[first])
+            last = int(np.searchsorted(self.offsets, base + max_nodes, side="right")) - 1
+            last = min(max(last, first + 1), len(self))
+            yield first, last, self.nodes(base, int(self.offsets[last]))
+            first = last
+
+    def summary(self) -> pd.DataFrame:
+        meta = self.meta.assign(Length=self.lengths)
+        return meta.groupby("Algorithm", observed=True).agg(Paths=("Length", "size"), Found=("Found", "sum"),
+                                                            Nodes=("Length", "sum"), MeanLength=("Length", "mean"))
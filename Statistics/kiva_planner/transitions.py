@@ -0,0 +1,130 @@
+"""
+Tablica przejść modelu (x, y, heading) x akcja, liczona raz dla mapy.
+
+next_state[s, a] (int32, S = width * length * 4 stanów w układzie
+ACO_StateIndex) zastępuje Apply(cur, a), a valid[s, a] – test granic
+i statycznie zablokowanych kafli. Rezerwacje w czasie (RTgrid[step + 1])
+silniki sprawdzają osobno, gatherem po next_tile. Heurystyki
+ACO/FA/Camel zależą jeszcze od celu, więc są liczone leniwie dla
+kafla celu i trzymane w małym cache LRU. Opcjonalna warstwa kosztu
+(`cost[tile]`, np. mapa zatorów z heatmap.load_cost_layer) dzieli
+atrakcyjność akcji przez 1 + koszt kafla, na którym akcja kończy.
+"""
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .grid import DX, DY, FORWARD, TURN_LEFT, TURN_RIGHT, WAIT, Grid
+
+HEURISTICS = ("aco", "fa", "camel")
+
+
+class TransitionTable:
+    """Przejścia i maski ważności dla statycznej mapy; heurystyki per cel w cache LRU."""
+
+    def __init__(self, grid: Grid, blocked: Optional[np.ndarray] = None, cache_size: int = 64,
+                 cost: Optional[np.ndarray] = None):
+        self.grid = grid
+        self.width, self.length = grid.width, grid.length
+        self.n_tiles = grid.n_tiles
+        self.n_states = grid.n_states
+        self.blocked = grid.static_blocked() if blocked is None else np.asarray(blocked, dtype=bool).ravel()
+        self.cache_size = cache_size
+        if cost is not None and np.size(cost) != self.n_tiles:
+            raise ValueError(f"Warstwa kosztu ma {np.size(cost)} kafli, mapa {self.n_tiles}")
+        self.cost = None if cost is None else np.asarray(cost, dtype=np.float32).ravel()
+        self._cache: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self._build()
+
+    def _build(self) -> None:
+        s = np.arange(self.n_states, dtype=np.int32)
+        tile, head = np.divmod(s, 4)
+        y, x = np.divmod(tile, self.width)
+        nx, ny = x + DX[head], y + DY[head]
+        inside = (nx >= 0) & (ny >= 0) & (nx < self.width) & (ny < self.length)
+        fwd_tile = np.where(inside, ny * self.width + nx, tile)
+
+        nxt = np.empty((self.n_states, 4), dtype=np.int32)
+        nxt[:, FORWARD] = np.where(inside, fwd_tile * 4 + head, s)   # Apply zwraca s, gdy ruch zabroniony
+        nxt[:, TURN_LEFT] = tile * 4 + ((head + 3) & 3)
+        nxt[:, TURN_RIGHT] = tile * 4 + ((head + 1) & 3)
+        nxt[:, WAIT] = s
+
+        valid = np.ones((self.n_states, 4), dtype=bool)
+        valid[:, FORWARD] = inside & ~self.blocked[fwd_tile]
+
+        self.next_state = nxt
+        self.next_tile = (nxt // 4).astype(np.int32)
+        self.valid = valid
+
+    # --- dolne ograniczenie długości ---
+
+    def shortest_length(self, s0: int, goal_tile: int) -> Optional[int]:
+        """
+        Najkrótsza ścieżka ze stanu s0 na kafel celu w węzłach (ze startem),
+        BFS po warstwach na statycznej mapie – bez rezerwacji, więc to dolne
+        ograniczenie dla każdego silnika. None, gdy cel jest nieosiągalny.
+        """
+        seen = np.zeros(self.n_states, dtype=bool)
+        frontier = np.array([s0], dtype=np.int32)
+        seen[s0] = True
+        depth = 0
+        while len(frontier):
+            if (frontier // 4 == goal_tile).any():
+                return depth + 1
+            nxt = self.next_state[frontier][self.valid[frontier]]
+            nxt = np.unique(nxt[~seen[nxt]])
+            seen[nxt] = True
+            frontier = nxt
+            depth += 1
+        return None
+
+    # --- heurystyki per cel ---
+
+    def heuristic(self, goal: Tuple[int, int], kind: str = "aco") -> np.ndarray:
+        """eta[s, a] (float32) dla kafla celu; LRU po (kind, kafel celu)."""
+        if kind not in HEURISTICS:
+            raise ValueError(f"Nieznana heurystyka: {kind!r} ({', '.join(HEURISTICS)})")
+        key = (kind, goal[1] * self.width + goal[0])
+        eta = self._cache.get(key)
+        if eta is not None:
+            self._cache.move_to_end(key)
+            return eta
+        eta = self._heuristic(goal, kind)
+        eta.setflags(write=False)
+        self._cache[key] = eta
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return eta
+
+    def _heuristic(self, goal: Tuple[int, int], kind: str) -> np.ndarray:
+        gx, gy = goal
+        cur = np.arange(self.n_states, dtype=np.int32) // 4
+        cy, cx = np.divmod(cur, self.width)
+        cur_m = (np.abs(cx - gx) + np.abs(cy - gy))[:, None].astype(np.float32)
+
+        ntile, nhead = np.divmod(self.next_state, 4)
+        ny, nx = np.divmod(ntile, self.width)
+        nex_m = (np.abs(nx - gx) + np.abs(ny - gy)).astype(np.float32)
+        dx, dy = gx - nx, gy - ny
+        toward = (((nhead == 1) & (dx > 0)) | ((nhead == 3) & (dx < 0)),
+                  ((nhead == 0) & (dy > 0)) | ((nhead == 2) & (dy < 0)))
+
+        if kind == "aco":
+            # ACO_HeuristicDesirability: premia za patrzenie wzdłuż dominującej osi
+            facing = np.where(np.abs(dx) > np.abs(dy), np.where(toward[0], 1.2, 1.0),
+                              np.where((np.abs(dy) > 0) & toward[1], 1.2, 1.0))
+            eta = cur_m - nex_m + 1 + facing / ((nex_m + 2.0) * 2)
+        else:
+            # FAHeuristicDesirability / Camel_HeuristicDesirability
+            scale, bonus = (30.0, 3.5) if kind == "fa" else (50.0, 2.5)
+            facing = np.where(toward[0] | toward[1], bonus, 1.0)
+            eta = np.maximum(scale * (cur_m - nex_m), 0.0) + facing
+        if self.cost is not None:
+            eta = eta / (1.0 + self.cost[ntile])
+        return eta.astype(np.float32)
+
+    def clear_cache(self) -> None:
+        """Zeruje LRU heurystyk (porównania na równym starcie)."""
+        self._cache.clear()
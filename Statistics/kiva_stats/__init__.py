@@ -0,0 +1,11 @@
+"""
+Jeden punkt wejścia dla skryptów analizy w Statistics/.
+
+    python -m kiva_stats tables --data-dir . --out wyniki/
+    python -m kiva_stats report --stages tables,convergence
+
+Moduł nie importuje pandas ani matplotlib przy starcie – każde
+polecenie dociąga tylko to, czego faktycznie potrzebuje.
+"""
+
+__version__ = "0.1.0"
@@ -0,0 +1,289 @@
+"""
+Benchmark etapów analizy na syntetycznych danych (kiva_stats.synth) z historią w JSON.
+
+Każdy pomiar (etap, rozmiar) idzie w świeżym procesie, więc szczytowe RSS
+nie jest zawyżone przez poprzednie pomiary. Wejście etapu (wczytana ramka)
+przygotowuje się poza pomiarem; etapy `load_*` mierzą samo wczytanie.
+
+Historia: {"schema": 1, "baseline": <id albo null>, "runs": [...]}.
+Nowy przebieg porównuje się z oznaczonym baseline (albo z poprzednim
+przebiegiem) i zgłasza etapy wolniejsze o więcej niż próg.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from statistics import median
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .scripts import SCRIPTS_DIR, load_script
+
+HISTORY_SCHEMA = 1
+BENCH_ALG = "FA"                    # log używany przez etapy konwergencji
+MIN_COMPARE_S = 0.05                # krótszych czasów nie porównujemy (szum)
+
+
+# ============================
+# 1. ETAPY
+# ============================
+# setup(ścieżka) -> wejście (poza pomiarem), run(wejście) -> wynik (mierzony)
+
+def _results_frame(path: str):
+    tab = load_script("tab")
+    df = tab.load_data(Path(path))
+    return tab.assign_instances(df, tab.find_algorithm_column(df))
+
+
+def _warm(script: str):
+    """Setup etapu `load_*`: importuje skrypt (i pandas) poza pomiarem, zwraca ścieżkę."""
+    def setup(path: str) -> str:
+        load_script(script)
+        return path
+    return setup
+
+
+def _tab_args(df):
+    tab = load_script("tab")
+    return df, tab.find_algorithm_column(df), tab.find_metric_column(df)
+
+
+BENCH_STAGES: Dict[str, Tuple[str, Callable, Callable]] = {
+    # nazwa: (plik wejściowy, setup, run)
+    "load_data": ("results", _warm("tab"), lambda p: load_script("tab").load_data(Path(p))),
+    "compute_metrics": ("results", lambda p: load_script("etap1+3").load_and_prepare(p),
+                        lambda df: load_script("etap1+3").compute_metrics(df)),
+    "compute_win_rate_and_ranks": ("results", lambda p: _tab_args(_results_frame(p)),
+                                   lambda a: load_script("tab").compute_win_rate_and_ranks(*a)),
+    "compute_dominance_matrix": ("results", lambda p: _tab_args(_results_frame(p)),
+                                 lambda a: load_script("tab").compute_dominance_matrix(*a)),
+    "load_algorithm_log": ("log", _warm("conv"),
+                           lambda p: load_script("conv").load_algorithm_log(p, BENCH_ALG)),
+    "compute_run_metrics": ("log", lambda p: load_script("conv").load_algorithm_log(p, BENCH_ALG),
+                            lambda df: load_script("conv").compute_run_metrics(df, BENCH_ALG,
+                                                                               ks_rel=(1.8, 1.5, 1.1))),
+    "build_optratio_and_improvement_curves": (
+        "log", lambda p: load_script("conv").load_algorithm_log(p, BENCH_ALG),
+        lambda df: load_script("conv").build_optratio_and_improvement_curves(df, dt=50.0, max_time=1000.0)),
+    "summarize_runs": ("log", lambda p: load_script("tab2").load_convergence_log(Path(p), BENCH_ALG),
+                       lambda df: load_script("tab2").summarize_runs(df)),
+}
+
+
+def _rows_out(result) -> int:
+    if isinstance(result, tuple):
+        result = result[0]
+    if isinstance(result, dict):
+        return len(result)
+    try:
+        return len(result)
+    except TypeError:
+        return 0
+
+
+# ============================
+# 2. POMIAR (w procesie potomnym)
+# ============================
+
+def _reset_peak_rss() -> bool:
+    """Zeruje VmHWM (Linux, /proc/self/clear_refs); False, gdy się nie da."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(stage: str, path: str, rows_in: int, repeat: int) -> Dict:
+    import gc
+    import warnings
+
+    warnings.simplefilter("ignore")
+    _, setup, run = BENCH_STAGES[stage]
+    inp = setup(path)
+    gc.collect()
+    _reset_peak_rss()
+
+    walls, cpus = [], []
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        t0, c0 = time.perf_counter(), time.process_time()
+        result = run(inp)
+        walls.append(time.perf_counter() - t0)
+        cpus.append(time.process_time() - c0)
+    wall = median(walls)
+    return {"Stage": stage, "Rows": rows_in, "RowsOut": _rows_out(result),
+            "WallS": round(wall, 4), "WallMinS": round(min(walls), 4), "WallMaxS": round(max(walls), 4),
+            "CpuS": round(median(cpus), 4),
+            "PeakRssMB": round(_peak_rss_mb(), 1),
+            "RowsPerS": round(rows_in / wall) if wall > 0 else None, "Status": "ok"}
+
+
+def measure_in_subprocess(stage: str, path: Path, rows_in: int, repeat: int = 5) -> Dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_measure, stage, str(path), rows_in, repeat).result()
+
+
+# ============================
+# 3. DANE WEJŚCIOWE
+# ============================
+
+def prepare_inputs(profile: Dict, sizes, cache_dir: Path, seed: int = 0) -> Dict[int, Dict[str, Tuple[Path, int]]]:
+    """Generuje (albo bierze z cache) dane.csv i log BENCH_ALG dla każdego rozmiaru."""
+    from . import synth
+
+    inputs = {}
+    for n in sizes:
+        d = Path(cache_dir) / f"synth_{n}_s{seed}"
+        meta = d / "rows.json"
+        if not meta.exists():
+            d.mkdir(parents=True, exist_ok=True)
+            res_rows, _ = synth.write_results(profile["results"], d / "dane.csv", n, seed=seed)
+            log_rows, _ = synth.write_log(profile["logs"][BENCH_ALG], d / "log.csv", n, seed=seed)
+            meta.write_text(json.dumps({"results": res_rows, "log": log_rows}), encoding="utf-8")
+            print(f"[INFO] Wygenerowano dane testowe: {d}")
+        rows = json.loads(meta.read_text(encoding="utf-8"))
+        inputs[n] = {"results": (d / "dane.csv", rows["results"]), "log": (d / "log.csv", rows["log"])}
+    return inputs
+
+
+# ============================
+# 4. HISTORIA I PORÓWNANIE
+# ============================
+
+def _git_revision() -> Tuple[Optional[str], bool]:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=SCRIPTS_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return rev, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def run_metadata() -> Dict:
+    import numpy as np
+    import pandas as pd
+
+    rev, dirty = _git_revision()
+    now = datetime.now(timezone.utc)
+    return {"id": now.strftime("%Y%m%dT%H%M%SZ"), "timestamp": now.isoformat(timespec="seconds"),
+            "git": rev, "dirty": dirty, "python": platform.python_version(),
+            "pandas": pd.__version__, "numpy": np.__version__,
+            "machine": platform.node(), "cpus": os.cpu_count()}
+
+
+def load_history(path: Path) -> Dict:
+    try:
+        history = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {"schema": HISTORY_SCHEMA, "baseline": None, "runs": []}
+    if history.get("schema") != HISTORY_SCHEMA:
+        raise ValueError(f"Nieobsługiwana wersja historii benchmarku: {history.get('schema')}")
+    return history
+
+
+def save_history(history: Dict, path: Path) -> None:
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(history, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def reference_run(history: Dict) -> Optional[Dict]:
+    """Baseline, jeśli oznaczony; w przeciwnym razie ostatni zapisany przebieg."""
+    runs = history["runs"]
+    if history.get("baseline"):
+        for run in runs:
+            if run["id"] == history["baseline"]:
+                return run
+    return runs[-1] if runs else None
+
+
+def compare(results: List[Dict], reference: Optional[Dict], threshold: float) -> List[Dict]:
+    """
+    Wiersze z relacją median czasu do referencji. Regression=True, gdy
+    mediana wolniejsza o > threshold i najszybsze powtórzenie wolniejsze
+    niż najwolniejsze w referencji (rozrzuty się nie nakładają) – pojedynczy
+    wolny pomiar to szum, nie regresja.
+    """
+    ref = {}
+    if reference:
+        ref = {(r["Stage"], r["Rows"]): r for r in reference["results"] if r["Status"] == "ok"}
+    out = []
+    for r in results:
+        row = dict(r)
+        base = ref.get((r["Stage"], r["Rows"]))
+        row["BaselineS"] = base["WallS"] if base else None
+        row["Ratio"] = None
+        row["Regression"] = False
+        if base and r["Status"] == "ok" and base["WallS"] > 0:
+            row["Ratio"] = round(r["WallS"] / base["WallS"], 3)
+            slow_enough = max(r["WallS"], base["WallS"]) >= MIN_COMPARE_S
+            above_noise = r.get("WallMinS", r["WallS"]) > base.get("WallMaxS", base["WallS"])
+            row["Regression"] = slow_enough and above_noise and row["Ratio"] > 1.0 + threshold
+        out.append(row)
+    return out
+
+
+# ============================
+# 5. PRZEBIEG
+# ============================
+
+def run_benchmark(profile: Dict, sizes, stages: List[str], cache_dir: Path,
+                  repeat: int = 5, max_seconds: float = 600.0) -> List[Dict]:
+    """
+    Mierzy etapy rosnąco po rozmiarze. Jeśli czas z poprzedniego rozmiaru,
+    przeskalowany liniowo, przekracza max_seconds, większe rozmiary są pomijane
+    (Status='skipped') – pętle po grupach przy 10M wierszy trwałyby godzinami.
+    """
+    sizes = sorted(sizes)
+    inputs = prepare_inputs(profile, sizes, cache_dir)
+    results = []
+    for stage in stages:
+        kind = BENCH_STAGES[stage][0]
+        last: Optional[Dict] = None
+        for n in sizes:
+            path, rows = inputs[n][kind]
+            if last is not None and last["Status"] != "ok":
+                projected = None
+            else:
+                projected = last["WallS"] * rows / last["Rows"] if last else 0.0
+            if projected is None or projected > max_seconds:
+                last = {"Stage": stage, "Rows": rows, "RowsOut": None, "WallS": None, "CpuS": None,
+                        "PeakRssMB": None, "RowsPerS": None, "Status": "skipped"}
+                print(f"[WARN] {stage} @ {rows}: pominięte (szacowany czas > {max_seconds:.0f} s)")
+            else:
+                last = measure_in_subprocess(stage, path, rows, repeat=repeat)
+                print(f"[BENCH] {stage} @ {rows}: {last['WallS']:.3f} s, "
+                      f"{last['PeakRssMB']:.0f} MB, {last['RowsPerS'] or 0:,} wierszy/s")
+            results.append(last)
+    return results
+
+
+def parse_size(text: str) -> int:
+    """'10k', '1M', '1e6', '250000' -> int."""
+    text = text.strip()
+    mult = {"k": 1_000, "m": 1_000_000, "g": 1_000_000_000}.get(text[-1:].lower())
+    return int(float(text[:-1]) * mult) if mult else int(float(text))
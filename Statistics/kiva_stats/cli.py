@@ -0,0 +1,448 @@
+"""
+python -m kiva_stats <polecenie> [opcje]
+
+Ciężkie zależności (pandas, matplotlib) są importowane dopiero wewnątrz
+polecenia, które ich potrzebuje.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPORT_STAGES = ["tables", "convergence", "plots", "density"]
+COMPARISON_STAGES = ("tables", "plots")      # porównują algorytmy na tych samych instancjach
+
+
+def _parse_logs(items: Optional[List[str]]) -> Optional[Dict[str, Path]]:
+    if not items:
+        return None
+    logs = {}
+    for item in items:
+        alg, sep, path = item.partition("=")
+        if not sep:
+            raise SystemExit(f"[ERROR] --log: oczekiwano ALG=ŚCIEŻKA, dostałem: {item!r}")
+        logs[alg] = Path(path)
+    return logs
+
+
+def _workspace(args):
+    from .workspace import Workspace
+
+    if args.preview and args.dataset:
+        raise SystemExit("--preview działa na plikach CSV; z --dataset zawęź dane przez --where")
+    return Workspace(data_dir=args.data_dir, out_dir=args.out,
+                     results_path=args.results, log_paths=_parse_logs(args.log),
+                     dataset=args.dataset, filters=_parse_filters(args.where),
+                     preview=args.preview, preview_instances=args.preview_size,
+                     preview_runs=args.preview_runs, preview_seed=args.preview_seed)
+
+
+def _parse_filters(items: Optional[List[str]]):
+    if not items:
+        return None
+    from .dataset import parse_filter
+
+    try:
+        return [parse_filter(item) for item in items]
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+
+def _run_stages(args, stages: List[str]) -> int:
+    from .stages import STAGES
+
+    ws = _workspace(args)
+    needs_all = [name for name in stages if name in COMPARISON_STAGES]
+    if needs_all and ws.dataset:
+        algs = ws.algorithms()
+        if len(algs) < 2:
+            raise SystemExit(f"[ERROR] Etapy {', '.join(needs_all)} porównują algorytmy, a po filtrach --where "
+                             f"zostało: {', '.join(algs) or 'nic'}. Zawęź filtr albo uruchom convergence/density.")
+    for name in stages:
+        t0 = time.perf_counter()
+        if name in ("plots", "density"):
+            STAGES[name](ws)
+        else:
+            STAGES[name](ws, latex=not args.no_latex)
+        print(f"[INFO] Etap '{name}' zakończony w {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+def cmd_tables(args) -> int:
+    return _run_stages(args, ["tables"])
+
+
+def cmd_convergence(args) -> int:
+    return _run_stages(args, ["convergence"])
+
+
+def cmd_plots(args) -> int:
+    return _run_stages(args, ["plots"])
+
+
+def cmd_density(args) -> int:
+    from .stages import run_density
+
+    t0 = time.perf_counter()
+    run_density(_workspace(args), log=not args.linear, chunksize=args.chunksize)
+    print(f"[INFO] Etap 'density' zakończony w {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+def cmd_sketch(args) -> int:
+    from .stages import run_sketch
+
+    t0 = time.perf_counter()
+    run_sketch(_workspace(args), latex=not args.no_latex, k=args.k, by=args.by,
+               chunksize=args.chunksize, merge=args.merge_sketch or (), save=args.save_sketch)
+    print(f"[INFO] Etap 'sketch' zakończony w {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+def cmd_ingest(args) -> int:
+    from .dataset import ingest
+    from .workspace import Workspace
+
+    if not args.dataset:
+        raise SystemExit("Podaj katalog zbioru: --dataset KATALOG")
+    ws = Workspace(data_dir=args.data_dir, results_path=args.results, log_paths=_parse_logs(args.log))
+    log_paths = {alg: p for alg, p in ws.log_paths.items() if p.exists()}
+    results_path = ws.results_path if ws.results_path.exists() else None
+    t0 = time.perf_counter()
+    if not args.no_validate:
+        from .validate import print_issues, validate
+
+        print_issues(validate(results_path, log_paths, chunksize=args.chunksize))
+    info = ingest(args.dataset, results_path=results_path, log_paths=log_paths, session=args.session,
+                  chunksize=args.chunksize, row_group_size=args.row_group_size)
+    for table in ("results", "convergence"):
+        if table in info:
+            print(f"[INFO] {table}: {sum(info[table].values())} wierszy {info[table]}")
+    print(f"[INFO] Sesja '{info['session']}' zapisana w {args.dataset} ({time.perf_counter() - t0:.2f} s)")
+    return 0
+
+
+def cmd_sql(args) -> int:
+    from .sql import QuerySession, run_query
+
+    ws = _workspace(args)
+    if args.tables:
+        print("\n".join(QuerySession(ws, engine=args.engine).tables()))
+        return 0
+    if args.file:
+        query = args.file.read_text(encoding="utf-8")
+    elif args.query:
+        query = args.query
+    else:
+        raise SystemExit("Podaj zapytanie albo --file PLIK.sql")
+    try:
+        df = run_query(ws, query, engine=args.engine, output=args.output)
+    except ValueError as exc:
+        raise SystemExit(f"[ERROR] {exc}")
+    if not args.output:
+        print(df.to_string(index=False))
+    return 0
+
+
+def cmd_validate(args) -> int:
+    from .validate import print_issues, validate
+
+    ws = _workspace(args)
+    t0 = time.perf_counter()
+    issues = validate(ws.results_path, ws.log_paths, chunksize=args.chunksize)
+    print_issues(issues)
+    issues.to_csv(ws.output("validation_report.csv"), sep=";", index=False)
+    print(f"[INFO] Zapisano validation_report.csv ({time.perf_counter() - t0:.2f} s)")
+    return 1 if args.strict and (issues["Severity"] == "error").any() else 0
+
+
+def cmd_segment(args) -> int:
+    from .segment import build_index, index_path, load_index, write_index
+
+    ws = _workspace(args)
+    for alg, path in ws.log_paths.items():
+        if not path.exists():
+            print(f"[WARN] Brak logu {path}")
+            continue
+        t0 = time.perf_counter()
+        if args.force:
+            index = build_index(path)
+            write_index(path, index)
+        else:
+            index = load_index(path)
+        print(f"[INFO] {alg}: {len(index)} przebiegów, {int(index['NRows'].sum())} wierszy "
+              f"-> {index_path(path).name} ({time.perf_counter() - t0:.2f} s)")
+    return 0
+
+
+def cmd_report(args) -> int:
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in REPORT_STAGES]
+    if unknown:
+        raise SystemExit(f"Nieznane etapy: {unknown}. Dostępne: {REPORT_STAGES}")
+    return _run_stages(args, stages)
+
+
+def cmd_build(args) -> int:
+    from .dag import Cache, build
+    from .graph import report_graph
+
+    graph = report_graph(data_dir=args.data_dir, out_dir=args.out, results_path=args.results,
+                         log_paths=_parse_logs(args.log), latex=not args.no_latex)
+    cache = Cache(args.cache_dir or args.out / ".kiva_cache")
+    t0 = time.perf_counter()
+    status = build(graph, cache, targets=args.target, jobs=args.jobs, dry_run=args.dry_run)
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("ran", "stale", "cached")}
+    if args.dry_run:
+        for name, st in status.items():
+            if st == "stale":
+                print(f"[STALE] {name}")
+    print(f"[INFO] Build: {counts['ran']} uruchomionych, {counts['stale']} do przebudowania, "
+          f"{counts['cached']} z cache ({time.perf_counter() - t0:.2f} s)")
+    return 0
+
+
+def cmd_generate(args) -> int:
+    from . import synth
+    from .workspace import DEFAULT_LOGS, DEFAULT_RESULTS
+
+    if not args.profile:
+        results = args.results or args.data_dir / DEFAULT_RESULTS
+        logs = _parse_logs(args.log) or {alg: args.data_dir / name for alg, name in DEFAULT_LOGS.items()}
+        if args.out.resolve() in {results.parent.resolve(), *(p.parent.resolve() for p in logs.values())}:
+            raise SystemExit("Katalog --out nie może być katalogiem z danymi źródłowymi.")
+    profile = _profile(args)
+    if args.save_profile:
+        synth.save_profile(profile, args.save_profile)
+        print(f"[INFO] Zapisano profil: {args.save_profile}")
+
+    names = {alg: DEFAULT_LOGS.get(alg, f"{alg}ConvergenceLog.csv") for alg in profile["logs"]}
+    report = synth.generate(profile, args.out, n_rows=args.rows, log_rows=args.log_rows,
+                            seed=args.seed, jobs=args.jobs, results_name=DEFAULT_RESULTS, log_names=names)
+    for name, (rows, size, secs) in report.items():
+        print(f"[INFO] {name}: {rows} wierszy, {size / 2**20:.1f} MB, "
+              f"{secs:.2f} s ({size / 2**20 / max(secs, 1e-9):.0f} MB/s)")
+    return 0
+
+
+def _profile(args):
+    """Profil generatora: z --profile albo dopasowany do danych źródłowych."""
+    from . import synth
+    from .workspace import DEFAULT_LOGS, DEFAULT_RESULTS
+
+    if args.profile:
+        return synth.load_profile(args.profile)
+    results = args.results or args.data_dir / DEFAULT_RESULTS
+    logs = _parse_logs(args.log) or {alg: args.data_dir / name for alg, name in DEFAULT_LOGS.items()}
+    return synth.fit_profile(results, logs)
+
+
+def cmd_bench(args) -> int:
+    import pandas as pd
+
+    from . import bench
+
+    sizes = [bench.parse_size(s) for s in args.sizes.split(",")]
+    stages = [s.strip() for s in args.stages.split(",")] if args.stages else list(bench.BENCH_STAGES)
+    unknown = [s for s in stages if s not in bench.BENCH_STAGES]
+    if unknown:
+        raise SystemExit(f"Nieznane etapy: {unknown}. Dostępne: {list(bench.BENCH_STAGES)}")
+
+    history_path = args.history or args.out / "bench_history.json"
+    history = bench.load_history(history_path)
+    reference = bench.reference_run(history)
+
+    cache_dir = args.cache_dir or args.out / ".kiva_cache" / "bench"
+    results = bench.run_benchmark(_profile(args), sizes, stages, cache_dir,
+                                  repeat=args.repeat, max_seconds=args.max_seconds)
+    rows = bench.compare(results, reference, args.threshold)
+
+    run = bench.run_metadata()
+    run["results"] = results
+    history["runs"].append(run)
+    if args.set_baseline:
+        history["baseline"] = run["id"]
+    bench.save_history(history, history_path)
+
+    table = pd.DataFrame(rows).set_index(["Stage", "Rows"])
+    print(table[["WallS", "BaselineS", "Ratio", "PeakRssMB", "RowsPerS", "Status"]].to_string())
+    ref_name = reference["id"] if reference else "brak"
+    print(f"[INFO] Zapisano przebieg {run['id']} do {history_path} (porównanie z: {ref_name})")
+
+    regressions = [r for r in rows if r["Regression"]]
+    for r in regressions:
+        print(f"[WARN] Regresja: {r['Stage']} @ {r['Rows']}: {r['WallS']:.3f} s vs "
+              f"{r['BaselineS']:.3f} s (x{r['Ratio']:.2f}, próg x{1 + args.threshold:.2f})")
+    return 1 if regressions else 0
+
+
+def cmd_memory(args) -> int:
+    from .schema import measure_memory
+
+    source = args.results or f"syntetycznego dane.csv ({args.rows} wierszy)"
+    print(f"[INFO] Pamięć wczytania {source}: loader bez typów vs read_results")
+    print(measure_memory(args.rows, path=args.results).to_string())
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--data-dir", type=Path, default=Path("."),
+                        help="katalog z dane.csv i *ConvergenceLog.csv (domyślnie bieżący)")
+    common.add_argument("--out", type=Path, default=Path("."),
+                        help="katalog wyjściowy na tabele i wykresy")
+    common.add_argument("--results", type=Path, default=None,
+                        help="ścieżka do dane.csv (nadpisuje --data-dir)")
+    common.add_argument("--log", action="append", metavar="ALG=ŚCIEŻKA",
+                        help="log konwergencji algorytmu; można podać wielokrotnie")
+    common.add_argument("--no-latex", action="store_true",
+                        help="zapisuj tylko CSV, bez wersji .tex")
+    common.add_argument("--dataset", type=Path, default=None,
+                        help="czytaj z partycjonowanego zbioru Parquet (z polecenia ingest) zamiast CSV")
+    common.add_argument("--where", action="append", metavar="WARUNEK",
+                        help="filtr dla --dataset, np. Manhattan>80, Algorithm=FA,ACO, "
+                             "Session>=2026-10-12; można podać wielokrotnie")
+    common.add_argument("--preview", action="store_true",
+                        help="szybki podgląd na warstwowej próbce (całe instancje/przebiegi per zakres "
+                             "Manhattan), wyniki w <out>/preview; bez flagi – pełne dane")
+    common.add_argument("--preview-size", type=int, default=None, metavar="N",
+                        help="instancji dane.csv na zakres Manhattan w podglądzie (domyślnie 1000)")
+    common.add_argument("--preview-runs", type=int, default=None, metavar="N",
+                        help="przebiegów logu na zakres Manhattan w podglądzie (domyślnie 40)")
+    common.add_argument("--preview-seed", type=int, default=0, help="ziarno losowania próbki podglądu")
+
+    parser = argparse.ArgumentParser(prog="kiva_stats",
+                                     description="Potok analizy wyników symulacji Kiva.")
+    parser.add_argument("--trace", type=Path, default=None,
+                        help="zapisz czasy/pamięć/wiersze etapów: .json (Chrome trace) albo .csv "
+                             "(to samo co KIVA_TRACE)")
+    parser.add_argument("--profile-stage", default=None, metavar="ETAP",
+                        help="profiler próbkujący dla jednego etapu -> <trace>.<ETAP>.folded/.svg")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("tables", parents=[common], help="tabele z dane.csv (tab.py, pareto.py)")
+    p.set_defaults(func=cmd_tables)
+
+    p = sub.add_parser("convergence", parents=[common],
+                       help="tabele z logów konwergencji (tab2.py, conv.py)")
+    p.set_defaults(func=cmd_convergence)
+
+    p = sub.add_parser("plots", parents=[common], help="wykresy PNG (etap1+3.py, conv.py)")
+    p.set_defaults(func=cmd_plots)
+
+    p = sub.add_parser("density", parents=[common],
+                       help="mapy gęstości zamiast scatterów (dane.csv czytany blokami)")
+    p.add_argument("--linear", action="store_true", help="liniowa skala kolorów zamiast logarytmicznej")
+    p.add_argument("--chunksize", type=int, default=1_000_000, help="wierszy w bloku (domyślnie 1e6)")
+    p.set_defaults(func=cmd_density)
+
+    p = sub.add_parser("sketch", parents=[common],
+                       help="statystyki, boxploty i ECDF ze szkiców kwantyli (KLL), dane.csv blokami")
+    p.add_argument("--k", type=int, default=200, help="rozmiar szkicu (błąd rangi ok. 1.65%% przy k=200)")
+    p.add_argument("--by", default=None, metavar="KOLUMNA",
+                   help="dodatkowe szkice per wartość kolumny (np. Manhattan)")
+    p.add_argument("--chunksize", type=int, default=1_000_000, help="wierszy w bloku (domyślnie 1e6)")
+    p.add_argument("--save-sketch", type=Path, default=None, help="zapisz szkice do JSON")
+    p.add_argument("--merge-sketch", type=Path, action="append",
+                   help="dołącz szkice z JSON (inny plik/proces); można podać wielokrotnie")
+    p.set_defaults(func=cmd_sketch)
+
+    p = sub.add_parser("ingest", parents=[common],
+                       help="zapisz dane.csv i logi jako zbiór Parquet (partycje: sesja/algorytm/przedział M)")
+    p.add_argument("--session", default=None,
+                   help="nazwa sesji (domyślnie data modyfikacji dane.csv); istniejąca sesja jest nadpisywana")
+    p.add_argument("--chunksize", type=int, default=1_000_000, help="wierszy dane.csv w bloku (domyślnie 1e6)")
+    p.add_argument("--row-group-size", type=int, default=64 * 1024,
+                   help="wierszy w grupie Parquet (mniej = dokładniejsze odcinanie, więcej = szybszy odczyt)")
+    p.add_argument("--no-validate", action="store_true", help="pomiń walidację plików przed zapisem")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("validate", parents=[common],
+                       help="kontrola dane.csv i logów: etykiety, duplikaty przebiegów, separatory, "
+                            "Iteration, PathLength")
+    p.add_argument("--chunksize", type=int, default=2_000_000, help="wierszy w bloku (domyślnie 2e6)")
+    p.add_argument("--strict", action="store_true", help="kod wyjścia 1, gdy są błędy (severity=error)")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("sql", parents=[common],
+                       help="zapytanie SQL nad widokami results, convergence, log_<alg>, per_run")
+    p.add_argument("query", nargs="?", default=None, help="zapytanie SQL")
+    p.add_argument("--file", type=Path, default=None, help="zapytanie z pliku .sql")
+    p.add_argument("--engine", choices=["auto", "duckdb", "sqlite"], default="auto",
+                   help="silnik (auto: duckdb, a bez niego sqlite3)")
+    p.add_argument("--output", type=Path, default=None, help="zapisz wynik do CSV (';') zamiast wypisywać")
+    p.add_argument("--tables", action="store_true", help="wypisz dostępne widoki")
+    p.set_defaults(func=cmd_sql)
+
+    p = sub.add_parser("segment", parents=[common],
+                       help="indeks przebiegów <log>.runs.csv (RunId, wiersz i bajt startu, Manhattan)")
+    p.add_argument("--force", action="store_true", help="przebuduj indeks, nawet jeśli jest aktualny")
+    p.set_defaults(func=cmd_segment)
+
+    p = sub.add_parser("report", parents=[common],
+                       help="kilka etapów w jednym procesie, dane wczytane raz")
+    p.add_argument("--stages", default=",".join(REPORT_STAGES),
+                   help=f"lista etapów po przecinku (domyślnie: {','.join(REPORT_STAGES)})")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("build", parents=[common],
+                       help="przyrostowe budowanie raportu z cache wyników pośrednich")
+    p.add_argument("--cache-dir", type=Path, default=None,
+                   help="katalog cache (domyślnie <out>/.kiva_cache)")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="liczba procesów dla niezależnych węzłów")
+    p.add_argument("--target", action="append", help="zbuduj tylko ten węzeł (i jego wejścia)")
+    p.add_argument("--dry-run", action="store_true", help="pokaż, co zostałoby przebudowane")
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("generate", parents=[common],
+                       help="syntetyczne dane.csv i logi o zadanej wielkości (profil z danych źródłowych)")
+    p.add_argument("--rows", type=int, default=1_000_000, help="wierszy w dane.csv (domyślnie 1e6)")
+    p.add_argument("--log-rows", type=int, default=None,
+                   help="wierszy w każdym logu konwergencji (domyślnie jak --rows, 0 = bez logów)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="liczba procesów generujących bloki (wynik nie zależy od -j)")
+    p.add_argument("--profile", type=Path, default=None, help="użyj zapisanego profilu JSON zamiast dopasowania")
+    p.add_argument("--save-profile", type=Path, default=None, help="zapisz dopasowany profil do JSON")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("bench", parents=[common],
+                       help="czasy i pamięć etapów na danych syntetycznych, z historią i progiem regresji")
+    p.add_argument("--sizes", default="10k,100k,1M,10M", help="rozmiary wejścia (domyślnie 10k,100k,1M,10M)")
+    p.add_argument("--stages", default=None, help="lista etapów po przecinku (domyślnie wszystkie)")
+    p.add_argument("--repeat", type=int, default=5, help="powtórzenia pomiaru, liczy się mediana")
+    p.add_argument("--threshold", type=float, default=0.2,
+                   help="próg regresji: względny wzrost czasu (domyślnie 0.2 = 20%%)")
+    p.add_argument("--history", type=Path, default=None, help="plik historii (domyślnie <out>/bench_history.json)")
+    p.add_argument("--set-baseline", action="store_true", help="oznacz ten przebieg jako baseline")
+    p.add_argument("--max-seconds", type=float, default=600.0,
+                   help="pomiń rozmiary, dla których szacowany czas etapu przekracza ten limit")
+    p.add_argument("--profile", type=Path, default=None, help="profil generatora (JSON) zamiast dopasowania")
+    p.add_argument("--cache-dir", type=Path, default=None,
+                   help="katalog na wygenerowane dane (domyślnie <out>/.kiva_cache/bench)")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser("memory", help="porównanie pamięci: typy domyślne vs kiva_stats.schema")
+    p.add_argument("--rows", type=int, default=1_000_000, help="liczba wierszy (domyślnie 1e6)")
+    p.add_argument("--results", type=Path, default=None, metavar="PLIK",
+                   help="zmierz istniejący dane.csv zamiast pliku syntetycznego")
+    p.set_defaults(func=cmd_memory)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.trace or args.profile_stage:
+        from .instrument import enable, write
+
+        enable(args.trace or Path("kiva_trace.json"), profile_stage=args.profile_stage)
+        try:
+            return args.func(args)
+        finally:
+            path = write()
+            if path:
+                print(f"[INFO] Zapisano trace: {path}")
+    return args.func(args)
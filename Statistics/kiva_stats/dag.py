@@ -0,0 +1,321 @@
+"""
+Mały graf budowania z cache adresowanym treścią.
+
+Klucz węzła to hash z: nazwy, kodu funkcji, parametrów, plików skryptów,
+od których węzeł zależy, oraz skrótów *wyników* jego wejść (dla źródła:
+skrót treści pliku). Obok wyniku cache pamięta jego skrót, więc węzeł,
+który po ponownym uruchomieniu dał identyczny wynik (np. ramka po zmianie
+pliku bez wpływu na parsowanie), nie unieważnia zależnych – klucze
+zależnych wychodzą takie same (early cutoff). Węzły z plikami wynikowymi
+(artifact) są świeże tylko wtedy, gdy każdy plik istnieje i ma zapisany
+skrót treści. Niezależne węzły idą równolegle w puli procesów.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .scripts import SCRIPTS_DIR
+
+
+@dataclass
+class Node:
+    name: str
+    func: Optional[Callable] = None          # None -> węzeł źródłowy (plik)
+    deps: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    scripts: Tuple[str, ...] = ()            # skrypty z Statistics/, których kod wchodzi do klucza
+    path: Optional[Path] = None              # tylko dla źródeł
+    artifact: bool = False                   # wynik = lista zapisanych plików
+
+
+class Graph:
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+
+    def source(self, name: str, path: Path) -> str:
+        self.nodes[name] = Node(name=name, path=Path(path))
+        return name
+
+    def add(self, name: str, func: Callable, deps: Sequence[str] = (),
+            scripts: Sequence[str] = (), artifact: bool = False, **params) -> str:
+        missing = [d for d in deps if d not in self.nodes]
+        if missing:
+            raise KeyError(f"Węzeł {name!r}: nieznane wejścia {missing}")
+        self.nodes[name] = Node(name=name, func=func, deps=tuple(deps), params=params,
+                                scripts=tuple(scripts), artifact=artifact)
+        return name
+
+    def closure(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Węzły potrzebne do zbudowania targets, w kolejności topologicznej."""
+        targets = list(targets) if targets else list(self.nodes)
+        order: List[str] = []
+        seen = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            seen.add(name)
+            if name not in self.nodes:
+                raise KeyError(f"Nieznany węzeł: {name!r}")
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for t in targets:
+            visit(t)
+        return order
+
+
+# ============================
+# CACHE
+# ============================
+
+class Cache:
+    """
+    Obiekty w <root>/objects/ab/abcdef....pkl. Hashe plików źródłowych są
+    pamiętane po (rozmiar, mtime), więc niezmieniony plik nie jest czytany ponownie.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._stat_path = self.root / "sources.json"
+        try:
+            self._stat = json.loads(self._stat_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._stat = {}
+
+    def _obj(self, key: str) -> Path:
+        return self.objects / key[:2] / f"{key}.pkl"
+
+    def _meta(self, key: str) -> Path:
+        return self.objects / key[:2] / f"{key}.json"
+
+    def has(self, key: str) -> bool:
+        return self._obj(key).exists() and self._meta(key).exists()
+
+    def meta(self, key: str) -> Dict[str, Any]:
+        """{"digest": skrót wyniku, "files": {ścieżka: skrót}} – files tylko dla artefaktów."""
+        return json.loads(self._meta(key).read_text(encoding="utf-8"))
+
+    def load(self, key: str) -> Any:
+        with open(self._obj(key), "rb") as f:
+            return pickle.load(f)
+
+    def store(self, key: str, value: Any, meta: Dict[str, Any]) -> None:
+        """Zapisuje wynik, potem metadane – has() widzi wpis dopiero kompletny."""
+        path = self._obj(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        tmp = self._meta(key).with_suffix(f".{os.getpid()}.jtmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._meta(key))
+
+    def file_digest(self, path: Path) -> str:
+        path = Path(path).resolve()
+        st = path.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self._stat.get(str(path))
+        if entry and entry[0] == stamp:
+            return entry[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._stat[str(path)] = [stamp, digest]
+        return digest
+
+    def flush(self) -> None:
+        tmp = self._stat_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._stat), encoding="utf-8")
+        os.replace(tmp, self._stat_path)
+
+
+@lru_cache(maxsize=None)
+def _code_digest(func: Callable) -> str:
+    try:
+        src = inspect.getsource(func)
+    except (OSError, TypeError):
+        src = f"{func.__module__}.{func.__qualname__}"
+    return hashlib.sha256(src.encode("utf-8")).hexdigest()
+
+
+def value_digest(value: Any) -> str:
+    """
+    Skrót treści wyniku. Ramki i serie przez hash_pandas_object (pickle tej
+    samej ramki nie musi być bajtowo identyczny), krotki / listy / słowniki
+    rekurencyjnie, reszta przez pickle.
+    """
+    import pandas as pd
+
+    h = hashlib.sha256()
+
+    def feed(v: Any) -> None:
+        if isinstance(v, (pd.DataFrame, pd.Series)):
+            h.update(type(v).__name__.encode("ascii"))
+            meta = (list(v.columns), [str(t) for t in v.dtypes]) if isinstance(v, pd.DataFrame) \
+                else (v.name, str(v.dtype))
+            h.update(repr((meta, list(v.index.names), v.shape)).encode("utf-8"))
+            try:
+                h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+                return
+            except TypeError:                # nie-haszowalne komórki (listy, słowniki)
+                pass
+        elif isinstance(v, (tuple, list)):
+            h.update(f"{type(v).__name__}:{len(v)}".encode("ascii"))
+            for item in v:
+                feed(item)
+            return
+        elif isinstance(v, dict):
+            h.update(f"dict:{len(v)}".encode("ascii"))
+            for k in sorted(v, key=repr):
+                h.update(repr(k).encode("utf-8"))
+                feed(v[k])
+            return
+        h.update(pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL))
+
+    feed(value)
+    return h.hexdigest()
+
+
+def node_key(node: Node, dep_digests: Sequence[str], cache: Cache) -> str:
+    h = hashlib.sha256()
+    h.update(node.name.encode("utf-8"))
+    if node.func is None:
+        h.update(b"source:")
+        h.update(cache.file_digest(node.path).encode("ascii"))
+        return h.hexdigest()
+
+    h.update(_code_digest(node.func).encode("ascii"))
+    h.update(repr(sorted((k, repr(v)) for k, v in node.params.items())).encode("utf-8"))
+    for script in node.scripts:
+        h.update(cache.file_digest(SCRIPTS_DIR / f"{script}.py").encode("ascii"))
+    for digest in dep_digests:
+        h.update(digest.encode("ascii"))
+    return h.hexdigest()
+
+
+# ============================
+# WYKONANIE
+# ============================
+
+def _execute(func: Callable, dep_keys: Sequence[str], params: Dict[str, Any],
+             cache_root: str, key: str, artifact: bool) -> str:
+    """Uruchamiane w procesie roboczym: wczytaj wejścia z cache, policz, zapisz. Zwraca skrót wyniku."""
+    from .instrument import flush_child
+
+    cache = Cache(Path(cache_root))
+    args = [cache.load(k) for k in dep_keys]
+    value = func(*args, **params)
+    flush_child()                            # procesy puli nie wykonują atexit
+    if artifact:
+        files = {str(p): cache.file_digest(Path(p)) for p in value}
+        meta = {"digest": value_digest(sorted(files.items())), "files": files}
+    else:
+        meta = {"digest": value_digest(value)}
+    cache.store(key, value, meta)
+    return meta["digest"]
+
+
+def _cached_digest(node: Node, key: str, cache: Cache) -> Optional[str]:
+    """Skrót wyniku, jeśli wpis jest w cache i (dla artefaktów) pliki mają zapisaną treść; inaczej None."""
+    if not cache.has(key):
+        return None
+    meta = cache.meta(key)
+    for path, digest in meta.get("files", {}).items():
+        if not Path(path).exists() or cache.file_digest(Path(path)) != digest:
+            return None
+    return meta["digest"]
+
+
+def build(graph: Graph, cache: Cache, targets: Optional[Iterable[str]] = None,
+          jobs: int = 1, dry_run: bool = False) -> Dict[str, str]:
+    """
+    Buduje targets (domyślnie cały graf). Zwraca status per węzeł:
+    'cached', 'ran' albo 'stale' (przy dry_run).
+
+    Klucz węzła powstaje dopiero, gdy znane są skróty wyników wszystkich
+    jego wejść, więc graf jest rozwijany falami: gotowe klucze -> trafienia
+    w cache -> uruchomienie reszty -> nowe skróty -> kolejne klucze. Przy
+    dry_run węzeł z nieświeżym wejściem też jest 'stale' (bez uruchomienia
+    nie wiadomo, czy wynik wejścia się zmieni).
+    """
+    order = graph.closure(targets)
+    keys: Dict[str, str] = {}
+    digests: Dict[str, str] = {}
+    status: Dict[str, str] = {}
+
+    def resolve() -> List[str]:
+        """Liczy klucze węzłów z kompletem wejść; zwraca te do uruchomienia."""
+        runnable = []
+        for name in order:
+            node = graph.nodes[name]
+            if name in status or not all(d in digests for d in node.deps):
+                continue
+            keys[name] = node_key(node, [digests[d] for d in node.deps], cache)
+            if node.func is None:                     # źródło: wynikiem jest ścieżka, skrót = klucz
+                digests[name] = keys[name]
+                if cache.has(keys[name]):
+                    status[name] = "cached"
+                elif dry_run:
+                    status[name] = "stale"
+                else:
+                    cache.store(keys[name], str(node.path), {"digest": keys[name]})
+                    status[name] = "ran"
+                continue
+            digest = _cached_digest(node, keys[name], cache)
+            if digest is not None:
+                digests[name] = digest
+                status[name] = "cached"
+            else:
+                status[name] = "stale"
+                runnable.append(name)
+        return runnable
+
+    def submit_args(name: str):
+        node = graph.nodes[name]
+        return (node.func, [keys[d] for d in node.deps], node.params, str(cache.root), keys[name], node.artifact)
+
+    def finish(name: str, digest: str) -> None:
+        digests[name] = digest
+        status[name] = "ran"
+        print(f"[BUILD] {name}")
+
+    if dry_run:
+        # Bez uruchamiania: nieświeże węzły nie dają skrótów, ich zależni zostają 'stale'.
+        resolve()
+        for name in order:
+            status.setdefault(name, "stale")
+        cache.flush()
+        return status
+
+    if jobs <= 1:
+        runnable = resolve()
+        while runnable:
+            for name in runnable:
+                finish(name, _execute(*submit_args(name)))
+            runnable = resolve()
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            running = {pool.submit(_execute, *submit_args(name)): name for name in resolve()}
+            while running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    finish(running.pop(fut), fut.result())
+                for name in resolve():
+                    running[pool.submit(_execute, *submit_args(name))] = name
+
+    cache.flush()
+    return status
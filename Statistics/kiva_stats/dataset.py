@@ -0,0 +1,320 @@
+"""
+Partycjonowany zbiór Parquet (układ Hive) z dane.csv i logów konwergencji.
+
+    <root>/results/Session=2026-10-19/Algorithm=FA/Range=dlugie/part-0.parquet
+    <root>/convergence/Session=.../Algorithm=.../Range=.../part-0.parquet
+
+Partycje: sesja (domyślnie data modyfikacji pliku źródłowego), algorytm
+i przedział Manhattan (te same progi co conv.classify_range). W plikach
+wiersze posortowane po Manhattan w grupach po row_group_size, więc
+statystyki min/max grup też odcinają dane. Filtry w formacie list krotek
+(jak pandas.read_parquet): [("Algorithm", "=", "FA"), ("Manhattan", ">", 80)];
+predykat na Manhattan dokłada też odcięcie partycji Range.
+
+Wymaga pyarrow (opcjonalna zależność – reszta pakietu działa bez niego).
+"""
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .schema import CONVERGENCE_SCHEMA, DERIVED_SCHEMA, RESULTS_SCHEMA, apply_schema
+
+PARTITION_KEYS = ("Session", "Algorithm", "Range")
+# (klucz partycji, górna granica Manhattan włącznie) – jak conv.classify_range
+RANGES: Tuple[Tuple[str, float], ...] = (("krotkie", 40), ("srednie", 80), ("dlugie", np.inf))
+UNKNOWN_RANGE = "brak"
+MANIFEST = "_kiva_dataset.json"
+ROW_GROUP_SIZE = 64 * 1024
+
+Filter = Tuple[str, str, object]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Zbiór partycjonowany wymaga pyarrow: pip install pyarrow") from exc
+
+
+def range_keys(manhattan: pd.Series) -> np.ndarray:
+    """Klucz partycji Range dla każdego wiersza (braki -> 'brak')."""
+    m = manhattan.to_numpy(dtype=np.float64, na_value=np.nan)
+    idx = np.searchsorted([hi for _, hi in RANGES[:-1]], m, side="left")
+    keys = np.array([k for k, _ in RANGES], dtype=object)[np.minimum(idx, len(RANGES) - 1)]
+    keys[np.isnan(m)] = UNKNOWN_RANGE
+    return keys
+
+
+# ============================
+# 1. ZAPIS
+# ============================
+
+def _arrow_schema(columns: Dict[str, str]):
+    import pyarrow as pa
+
+    types = {"float32": pa.float32(), "int16": pa.int16(), "int32": pa.int32(),
+             "int64": pa.int64(), "bool": pa.bool_()}
+    return pa.schema([(c, types[t]) for c, t in columns.items()])
+
+
+class _PartitionWriter:
+    """Jeden otwarty ParquetWriter na partycję; bloki dopisywane jako kolejne grupy wierszy."""
+
+    def __init__(self, table_dir: Path, session: str, columns: Dict[str, str], row_group_size: int):
+        self.table_dir = table_dir
+        self.session = session
+        self.columns = columns
+        self.schema = _arrow_schema(columns)
+        self.row_group_size = row_group_size
+        self.writers: Dict[Tuple[str, str], object] = {}
+        self.rows: Dict[str, int] = {}
+
+    def write(self, df: pd.DataFrame, algorithms: np.ndarray) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        ranges = range_keys(df["Manhattan"])
+        keys = pd.DataFrame({"a": algorithms, "r": ranges})
+        for (alg, rng), idx in keys.groupby(["a", "r"], sort=True).indices.items():
+            part = df.iloc[idx].sort_values("Manhattan", kind="stable")
+            table = pa.Table.from_pandas(part[list(self.columns)], schema=self.schema, preserve_index=False)
+            writer = self.writers.get((alg, rng))
+            if writer is None:
+                d = self.table_dir / f"Session={self.session}" / f"Algorithm={alg}" / f"Range={rng}"
+                d.mkdir(parents=True, exist_ok=True)
+                writer = self.writers[(alg, rng)] = pq.ParquetWriter(d / "part-0.parquet", self.schema)
+            writer.write_table(table, row_group_size=self.row_group_size)
+            self.rows[alg] = self.rows.get(alg, 0) + len(part)
+
+    def close(self) -> None:
+        for writer in self.writers.values():
+            writer.close()
+
+
+def _session_dir(root: Path, table: str, session: str) -> Path:
+    d = Path(root) / table / f"Session={session}"
+    if d.exists():
+        print(f"[INFO] Nadpisuję istniejącą sesję {table}/{d.name}")
+        shutil.rmtree(d)
+    return d
+
+
+def default_session(path: Path) -> str:
+    """Sesja = data modyfikacji pliku źródłowego (RRRR-MM-DD)."""
+    return datetime.fromtimestamp(Path(path).stat().st_mtime).strftime("%Y-%m-%d")
+
+
+def ingest_results(root: Path, path: Path, session: str, chunksize: int = 1_000_000,
+                   row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, int]:
+    """
+    dane.csv blokami -> results/. Kolumna Row (numer wiersza w pliku) pozwala
+    odtworzyć kolejność, a InstanceId (Row // liczba algorytmów) – instancje
+    po odfiltrowaniu części danych.
+    """
+    from .schema import iter_results
+
+    _require_pyarrow()
+    columns = {"Row": "int64", "InstanceId": "int32",
+               **{c: t for c, t in RESULTS_SCHEMA.items() if c != "Algorithm"}}
+    _session_dir(root, "results", session)
+    out = _PartitionWriter(Path(root) / "results", session, columns, row_group_size)
+    start, n_algs = 0, None
+    try:
+        for chunk in iter_results(path, chunksize=chunksize):
+            n_algs = n_algs or chunk["Algorithm"].nunique()
+            chunk["Row"] = np.arange(start, start + len(chunk), dtype=np.int64)
+            chunk["InstanceId"] = (chunk["Row"] // n_algs).astype(DERIVED_SCHEMA["InstanceId"])
+            start += len(chunk)
+            out.write(chunk, chunk["Algorithm"].astype(str).to_numpy())
+    finally:
+        out.close()
+    return out.rows
+
+
+def ingest_convergence(root: Path, log_paths: Dict[str, Path], session: str,
+                       row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, int]:
+    """Logi -> convergence/; RunId liczony przed podziałem (przebieg ma stały Manhattan)."""
+    from .scripts import load_script
+
+    _require_pyarrow()
+    conv = load_script("conv")
+    columns = {"Row": "int64", "RunId": "int32",
+               **{c: t for c, t in CONVERGENCE_SCHEMA.items() if c != "Algorithm"}}
+    _session_dir(root, "convergence", session)
+    out = _PartitionWriter(Path(root) / "convergence", session, columns, row_group_size)
+    try:
+        for alg, path in log_paths.items():
+            df = conv.load_algorithm_log(path, alg).reset_index(drop=True)
+            df["Row"] = np.arange(len(df), dtype=np.int64)
+            # partycja po nazwie algorytmu z Workspace (w logach ACO/CHA etykieta to "Camel")
+            out.write(df, np.full(len(df), alg, dtype=object))
+    finally:
+        out.close()
+    return out.rows
+
+
+def ingest(root: Path, results_path: Optional[Path] = None, log_paths: Optional[Dict[str, Path]] = None,
+           session: Optional[str] = None, chunksize: int = 1_000_000,
+           row_group_size: int = ROW_GROUP_SIZE) -> Dict:
+    """Zapisuje dane.csv i/lub logi jako jedną sesję; aktualizuje manifest w root."""
+    root = Path(root)
+    sources = [p for p in [results_path, *(log_paths or {}).values()] if p]
+    if not sources:
+        raise ValueError("Brak plików do wczytania.")
+    session = session or default_session(sources[0])
+    if "/" in session or "=" in session:
+        raise ValueError(f"Niedozwolona nazwa sesji: {session!r}")
+
+    rows: Dict[str, Dict[str, int]] = {}
+    if results_path:
+        rows["results"] = ingest_results(root, results_path, session, chunksize, row_group_size)
+    if log_paths:
+        rows["convergence"] = ingest_convergence(root, log_paths, session, row_group_size)
+
+    manifest_path = root / MANIFEST
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    sessions = manifest.setdefault("sessions", {})
+    known = set(sessions.get(session, {}).get("sources", []))
+    sessions.setdefault(session, {}).update({
+        "ingested": datetime.now().isoformat(timespec="seconds"),
+        "sources": sorted(known | {str(Path(p).resolve()) for p in sources}),
+        **rows,
+    })
+    manifest_path.write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding="utf-8")
+    return {"session": session, **rows}
+
+
+# ============================
+# 2. ODCZYT Z FILTRAMI
+# ============================
+
+def _range_filter(filters: Sequence[Filter]) -> Optional[Filter]:
+    """Predykaty na Manhattan -> zbiór partycji Range, które mogą zawierać pasujące wiersze."""
+    keep = {k for k, _ in RANGES}
+    lo_edges = {k: lo for (k, _), lo in zip(RANGES, [-np.inf] + [hi for _, hi in RANGES[:-1]])}
+    his = dict(RANGES)
+    touched = False
+    for col, op, val in filters:
+        if col != "Manhattan":
+            continue
+        touched = True
+        vals = [float(v) for v in (val if op in ("in", "not in") else [val])]
+        for key in list(keep):
+            lo, hi = lo_edges[key], his[key]          # przedział (lo, hi]
+            if op in ("=", "==", "in"):
+                hit = any(lo < v <= hi for v in vals)
+            elif op == ">":
+                hit = hi > vals[0]
+            elif op == ">=":
+                hit = hi >= vals[0]
+            elif op in ("<", "<="):
+                hit = lo < vals[0]
+            else:
+                hit = True
+            if not hit:
+                keep.discard(key)
+    if not touched:
+        return None
+    return ("Range", "in", sorted(keep))
+
+
+def _expression(filters: Optional[Sequence[Filter]]):
+    import pyarrow.parquet as pq
+
+    if not filters:
+        return None
+    filters = list(filters)
+    extra = _range_filter(filters)
+    if extra:
+        filters.append(extra)
+    return pq.filters_to_expression(filters)
+
+
+def _read(root: Path, table: str, filters: Optional[Sequence[Filter]],
+          columns: Optional[List[str]]) -> pd.DataFrame:
+    _require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    part_schema = pa.schema([(k, pa.string()) for k in PARTITION_KEYS])
+    dataset = ds.dataset(Path(root) / table, format="parquet",
+                         partitioning=ds.partitioning(part_schema, flavor="hive"))
+    if columns is not None:
+        columns = list(dict.fromkeys(["Session", "Row", *columns]))
+    tab = dataset.to_table(columns=columns, filter=_expression(filters))
+    df = tab.to_pandas()
+    # kolejność jak w plikach źródłowych: sesja, potem numer wiersza
+    df = df.sort_values(["Session", "Row"], kind="stable").reset_index(drop=True)
+    for key in ("Session", "Range"):
+        if key in df.columns:
+            df[key] = df[key].astype("category")
+    return df.drop(columns="Row")
+
+
+def _renumber(df: pd.DataFrame, col: str) -> None:
+    """Identyfikatory (RunId, InstanceId) są lokalne dla sesji – numeracja ciągła po całości."""
+    if col in df.columns:
+        df[col] = df.groupby(["Session", col], sort=False, observed=True).ngroup().astype(DERIVED_SCHEMA[col])
+
+
+def read_results(root: Path, filters: Optional[Sequence[Filter]] = None,
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """dane.csv ze zbioru; tylko partycje i grupy wierszy pasujące do filtrów są dekodowane."""
+    df = _read(root, "results", filters, columns)
+    _renumber(df, "InstanceId")
+    apply_schema(df, {**RESULTS_SCHEMA, "InstanceId": DERIVED_SCHEMA["InstanceId"]})
+    return df
+
+
+def read_convergence(root: Path, algorithm: str, filters: Optional[Sequence[Filter]] = None,
+                     columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Log jednego algorytmu (z RunId) – jak conv.load_algorithm_log, ale z filtrami."""
+    df = _read(root, "convergence", [("Algorithm", "=", algorithm), *(filters or [])], columns)
+    _renumber(df, "RunId")
+    apply_schema(df, {**CONVERGENCE_SCHEMA, "RunId": DERIVED_SCHEMA["RunId"]})
+    return df
+
+
+def algorithms(root: Path, table: str = "convergence") -> List[str]:
+    """Algorytmy obecne w zbiorze (z nazw katalogów, bez czytania plików)."""
+    return sorted({p.name.split("=", 1)[1] for p in (Path(root) / table).glob("Session=*/Algorithm=*")})
+
+
+_OPS = ("<=", ">=", "!=", "==", "<", ">", "=")
+
+
+def parse_filter(text: str) -> Filter:
+    """'Manhattan>80' -> ("Manhattan", ">", 80); 'Algorithm=FA,ACO' -> ("Algorithm", "in", [...])."""
+    for op in _OPS:
+        col, sep, value = text.partition(op)
+        if sep and col.strip():
+            break
+    else:
+        raise ValueError(f"Nieprawidłowy filtr: {text!r} (oczekiwano np. Manhattan>80)")
+    col = col.strip()
+
+    def conv(v: str):
+        v = v.strip()
+        if col in PARTITION_KEYS:
+            return v
+        try:
+            return int(v)
+        except ValueError:
+            try:
+                return float(v.replace(",", "."))
+            except ValueError:
+                return v
+
+    values = [conv(v) for v in value.split(",")] if col in PARTITION_KEYS else [conv(value)]
+    if len(values) > 1:
+        if op not in ("=", "==", "!="):
+            raise ValueError(f"Lista wartości tylko z = lub !=: {text!r}")
+        return (col, "not in" if op == "!=" else "in", values)
+    return (col, "==" if op == "=" else op, values[0])
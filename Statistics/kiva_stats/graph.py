@@ -0,0 +1,180 @@
+"""
+Graf raportu: źródła -> ramki -> metryki per przebieg -> agregaty -> tabele/wykresy.
+
+Każda funkcja tutaj jest węzłem grafu (musi być na poziomie modułu,
+żeby dało się ją wysłać do procesu roboczego).
+"""
+from pathlib import Path
+from typing import Dict, Optional
+
+from .dag import Graph
+from .scripts import load_script
+from .stages import save_open_figures, use_headless_backend, write_table
+from .workspace import DEFAULT_LOGS, DEFAULT_RESULTS
+
+
+# ============================
+# 1. PARSOWANIE
+# ============================
+
+def parse_results(path: str):
+    tab = load_script("tab")
+    df = tab.load_data(Path(path))
+    return tab.assign_instances(df, tab.find_algorithm_column(df))
+
+
+def parse_log(path: str, alg: str):
+    return load_script("conv").load_algorithm_log(path, alg)
+
+
+# ============================
+# 2. METRYKI PER PRZEBIEG
+# ============================
+
+def run_metrics(df, alg: str):
+    return load_script("conv").compute_run_metrics(df, alg, ks_rel=(1.8, 1.5, 1.1))
+
+
+def run_summary(df):
+    return load_script("tab2").summarize_runs(df)
+
+
+def run_curves(df):
+    return load_script("conv").build_optratio_and_improvement_curves(df, dt=50.0, max_time=1000.0)
+
+
+# ============================
+# 3. AGREGATY
+# ============================
+
+def basic_stats(df):
+    tab = load_script("tab")
+    return tab.compute_basic_stats(df, tab.find_algorithm_column(df), tab.find_metric_column(df))
+
+
+def win_and_ranks(df):
+    tab = load_script("tab")
+    return tab.compute_win_rate_and_ranks(df, tab.find_algorithm_column(df), tab.find_metric_column(df))
+
+
+def dominance(df):
+    tab = load_script("tab")
+    return tab.compute_dominance_matrix(df, tab.find_algorithm_column(df), tab.find_metric_column(df))
+
+
+def pareto_tables(df):
+    tab = load_script("tab")
+    return load_script("pareto").compute_pareto_tables(df, tab.find_algorithm_column(df))
+
+
+def comparison(*summaries):
+    import pandas as pd
+
+    return load_script("tab2").aggregate_algorithm_stats(pd.concat(summaries, ignore_index=True))
+
+
+def time_metrics(*per_runs):
+    import pandas as pd
+
+    per_run = pd.concat(per_runs, ignore_index=True)
+    return load_script("conv").summarize_time_metrics(per_run).set_index("Algorithm").round(3)
+
+
+def survival(*per_runs):
+    import pandas as pd
+
+    per_run = pd.concat(per_runs, ignore_index=True)
+    return load_script("conv").summarize_survival_metrics(per_run, timeout_ms=1000.0)
+
+
+# ============================
+# 4. ARTEFAKTY
+# ============================
+
+def write_tables(value, names, out_dir: str, latex: bool = True):
+    """value to jedna tabela albo krotka tabel w kolejności names."""
+    tables = value if isinstance(value, tuple) else (value,)
+    paths = []
+    for df, name in zip(tables, names):
+        paths += write_table(df, Path(out_dir), name, latex=latex)
+    return [str(p) for p in paths]
+
+
+def plot_convergence(*curves, algs, kind: str, out_dir: str):
+    use_headless_backend()
+    conv = load_script("conv")
+    alg_curves = dict(zip(algs, curves))
+    if kind == "opt":
+        conv.plot_optratio_time_by_range_all(alg_curves)
+        name = "09_optratio_time_by_range"
+    else:
+        conv.plot_improvementpct_time_by_range_all(alg_curves)
+        name = "10_improvementpct_time_by_range"
+    return [str(p) for p in save_open_figures(Path(out_dir), name)]
+
+
+# ============================
+# 5. DEFINICJA GRAFU
+# ============================
+
+def report_graph(data_dir: Path = Path("."), out_dir: Path = Path("."),
+                 results_path: Optional[Path] = None,
+                 log_paths: Optional[Dict[str, Path]] = None,
+                 latex: bool = True) -> Graph:
+    data_dir = Path(data_dir)
+    out = str(Path(out_dir).resolve())
+    results_path = Path(results_path) if results_path else data_dir / DEFAULT_RESULTS
+    if log_paths is None:
+        log_paths = {alg: data_dir / name for alg, name in DEFAULT_LOGS.items()}
+
+    g = Graph()
+
+    # --- dane.csv ---
+    g.source("src:results", results_path)
+    g.add("results", parse_results, ["src:results"], scripts=("tab", "kiva_stats/schema"))
+    g.add("basic_stats", basic_stats, ["results"], scripts=("tab",))
+    g.add("win_ranks", win_and_ranks, ["results"], scripts=("tab",))
+    g.add("dominance", dominance, ["results"], scripts=("tab",))
+    g.add("pareto", pareto_tables, ["results"], scripts=("tab", "pareto"))
+
+    g.add("tables:basic_stats", write_tables, ["basic_stats"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_basic_stats",), out_dir=out, latex=latex)
+    g.add("tables:win_ranks", write_tables, ["win_ranks"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_win_rate", "table_ranks"), out_dir=out, latex=latex)
+    g.add("tables:dominance", write_tables, ["dominance"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_dominance_counts", "table_dominance_percent"),
+          out_dir=out, latex=latex)
+    g.add("tables:pareto", write_tables, ["pareto"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_pareto_membership", "table_pareto_hypervolume"),
+          out_dir=out, latex=latex)
+
+    # --- logi konwergencji ---
+    algs = list(log_paths)
+    for alg, path in log_paths.items():
+        g.source(f"src:log:{alg}", path)
+        g.add(f"log:{alg}", parse_log, [f"src:log:{alg}"],
+              scripts=("conv", "kiva_stats/schema", "kiva_stats/segment"), alg=alg)
+        g.add(f"per_run:{alg}", run_metrics, [f"log:{alg}"], scripts=("conv",), alg=alg)
+        g.add(f"summary:{alg}", run_summary, [f"log:{alg}"], scripts=("tab2",))
+        g.add(f"curves:{alg}", run_curves, [f"log:{alg}"], scripts=("conv",))
+
+    per_runs = [f"per_run:{a}" for a in algs]
+    g.add("comparison", comparison, [f"summary:{a}" for a in algs], scripts=("tab2",))
+    g.add("time_metrics", time_metrics, per_runs, scripts=("conv",))
+    g.add("survival", survival, per_runs, scripts=("conv",))
+
+    g.add("tables:comparison", write_tables, ["comparison"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("AlgorithmsComparisonTable",), out_dir=out, latex=latex)
+    g.add("tables:time_metrics", write_tables, ["time_metrics"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_time_metrics",), out_dir=out, latex=latex)
+    g.add("tables:survival", write_tables, ["survival"], artifact=True,
+          scripts=("kiva_stats/stages",), names=("table_survival",), out_dir=out, latex=latex)
+
+    curves = [f"curves:{a}" for a in algs]
+    plots_dir = str(Path(out) / "plots_report")
+    g.add("plots:optratio", plot_convergence, curves, artifact=True, scripts=("conv",),
+          algs=tuple(algs), kind="opt", out_dir=plots_dir)
+    g.add("plots:improvement", plot_convergence, curves, artifact=True, scripts=("conv",),
+          algs=tuple(algs), kind="imp", out_dir=plots_dir)
+
+    return g
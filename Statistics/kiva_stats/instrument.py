@@ -0,0 +1,350 @@
+"""
+Instrumentacja etapów: czas (wall/CPU), alokacje (tracemalloc), wiersze we/wy.
+
+Domyślnie wyłączona – dekorator `traced` i `stage(...)` kosztują wtedy
+jedno sprawdzenie flagi. Włączenie:
+  - zmienna środowiskowa KIVA_TRACE=ścieżka.json|ścieżka.csv (działa też
+    przy uruchamianiu skryptów bezpośrednio, zapis przy wyjściu z procesu),
+  - albo `python -m kiva_stats --trace ścieżka ...` / enable(ścieżka).
+.json -> Chrome trace-event (chrome://tracing, Perfetto), .csv -> tabela ';'.
+
+Procesy potomne (pula w `build -j`) piszą własne zdarzenia do
+<trace>.<pid>: procesy puli kończą się przez os._exit, więc atexit tam
+nie działa – zadanie wywołuje flush_child() po każdym wykonaniu. Proces
+główny przy write() dołącza pliki potomnych do swojego trace i je usuwa.
+
+KIVA_PROFILE_STAGE=nazwa (lub --profile-stage) dołącza do tego etapu
+próbkujący profiler (wątek czytający sys._current_frames) i zapisuje
+<trace>.<etap>.folded (flamegraph.pl / speedscope) oraz .svg.
+"""
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ENV_TRACE = "KIVA_TRACE"
+ENV_PROFILE = "KIVA_PROFILE_STAGE"
+ENV_INTERVAL = "KIVA_PROFILE_INTERVAL_MS"
+_ENV_OWNER = "KIVA_TRACE_PID"
+
+_state = {
+    "enabled": False,
+    "path": None,
+    "profile_stage": None,
+    "interval": 0.005,
+    "events": [],
+    "stack": [],
+    "samples": {},          # stos (folded) -> liczba próbek, sumowane po wywołaniach etapu
+    "t0": 0.0,
+}
+
+
+# ============================
+# 1. WŁĄCZANIE / ZAPIS
+# ============================
+
+def enabled() -> bool:
+    return _state["enabled"]
+
+
+def enable(path: Path, profile_stage: Optional[str] = None, interval_ms: float = 5.0) -> None:
+    """Włącza śledzenie; wynik trafia do path przy write() albo przy wyjściu z procesu."""
+    if _state["enabled"]:
+        return
+    _state.update(enabled=True, path=Path(path), profile_stage=profile_stage,
+                  interval=interval_ms / 1000.0, events=[], stack=[], samples={},
+                  t0=time.perf_counter())
+    # procesy potomne (np. pula w `build -j`) dziedziczą środowisko i piszą do <trace>.<pid>
+    os.environ.setdefault(ENV_TRACE, str(path))
+    os.environ.setdefault(_ENV_OWNER, str(os.getpid()))
+    if not _is_child():
+        for old in _child_files(Path(path)):          # pozostałości po przerwanym uruchomieniu
+            old.unlink()
+    if profile_stage:
+        os.environ.setdefault(ENV_PROFILE, profile_stage)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    atexit.register(write)
+
+
+def _is_child() -> bool:
+    owner = os.environ.get(_ENV_OWNER)
+    return bool(owner) and owner != str(os.getpid())
+
+
+def _child_files(path: Path) -> List[Path]:
+    """Pliki <trace>.<pid> zapisane przez procesy potomne."""
+    return sorted(p for p in path.parent.glob(f"{path.stem}.*{path.suffix}")
+                  if p.name[len(path.stem) + 1:-len(path.suffix) or None].isdigit())
+
+
+def _output_path() -> Path:
+    path = _state["path"]
+    if _is_child():
+        return path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+    return path
+
+
+def _reset_after_fork() -> None:
+    # potomek z fork dostaje kopię zdarzeń rodzica – zbiera tylko własne
+    if _state["enabled"]:
+        _state.update(events=[], stack=[], samples={})
+
+
+def flush_child() -> None:
+    """W procesie potomnym zapisuje dotychczasowe zdarzenia do <trace>.<pid> (nadpisuje plik)."""
+    if _state["enabled"] and _is_child():
+        write()
+
+
+def write() -> Optional[Path]:
+    """
+    Zapisuje zebrane zdarzenia (.json -> Chrome trace, inaczej CSV ';'). W
+    procesie głównym dołącza zdarzenia i próbki z plików procesów potomnych.
+    """
+    if not _state["enabled"]:
+        return None
+    child = _is_child()
+    events = [dict(e, Pid=os.getpid()) for e in _state["events"]]
+    samples = dict(_state["samples"])
+    if not child:
+        events += _merge_children(_state["path"], samples)
+    if not events:
+        return None
+    atexit.unregister(write)  # zapisane jawnie – nie powtarzaj przy wyjściu
+    path = _output_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".json":
+        _write_chrome(path, events)
+    else:
+        _write_csv(path, events)
+    if samples:
+        _write_profile(path, _state["profile_stage"], samples, quiet=child)
+    return path
+
+
+def _merge_children(path: Path, samples: Dict[str, int]) -> List[Dict]:
+    """Zdarzenia z plików <trace>.<pid> (pliki są usuwane); próbki profilu dodaje do samples."""
+    import json
+
+    events = []
+    for child in _child_files(path):
+        if path.suffix.lower() == ".json":
+            for e in json.loads(child.read_text(encoding="utf-8"))["traceEvents"]:
+                events.append(dict(e["args"], Stage=e["name"], Pid=e["pid"], Thread=e["tid"],
+                                   StartS=e["ts"] / 1e6, WallS=e["dur"] / 1e6))
+        else:
+            with open(child, encoding="utf-8") as f:
+                cols = f.readline().rstrip("\n").split(";")
+                for line in f:
+                    e = dict(zip(cols, line.rstrip("\n").split(";")))
+                    events.append({k: (None if v == "" else v) for k, v in e.items()})
+        child.unlink()
+        if _state["profile_stage"]:
+            folded = _profile_path(child, _state["profile_stage"], ".folded")
+            if folded.exists():
+                for line in folded.read_text(encoding="utf-8").splitlines():
+                    stack, _, n = line.rpartition(" ")
+                    samples[stack] = samples.get(stack, 0) + int(n)
+                folded.unlink()
+                folded.with_suffix(".svg").unlink(missing_ok=True)
+    return events
+
+
+def _write_chrome(path: Path, events: List[Dict]) -> None:
+    import json
+
+    trace = []
+    for e in events:
+        trace.append({
+            "name": e["Stage"], "cat": "stage", "ph": "X", "pid": e["Pid"], "tid": e["Thread"],
+            "ts": round(float(e["StartS"]) * 1e6, 1), "dur": round(float(e["WallS"]) * 1e6, 1),
+            "args": {k: e.get(k) for k in ("Depth", "CpuS", "AllocBytes", "PeakBytes", "RowsIn", "RowsOut")},
+        })
+    path.write_text(json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"}), encoding="utf-8")
+
+
+def _write_csv(path: Path, events: List[Dict]) -> None:
+    cols = ["Stage", "Pid", "Depth", "StartS", "WallS", "CpuS", "AllocBytes", "PeakBytes", "RowsIn", "RowsOut"]
+    lines = [";".join(cols)]
+    for e in sorted(events, key=lambda e: float(e["StartS"])):
+        lines.append(";".join("" if e.get(c) is None else str(e[c]) for c in cols))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _from_env() -> None:
+    path = os.environ.get(ENV_TRACE)
+    if path:
+        enable(Path(path), profile_stage=os.environ.get(ENV_PROFILE),
+               interval_ms=float(os.environ.get(ENV_INTERVAL, "5")))
+
+
+# ============================
+# 2. ETAPY
+# ============================
+
+def _rows(obj) -> Optional[int]:
+    if isinstance(obj, tuple):
+        obj = next((o for o in obj if hasattr(o, "shape")), None)
+    shape = getattr(obj, "shape", None)
+    return int(shape[0]) if shape else None
+
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None):
+    """
+    Mierzy blok kodu. Zwraca słownik, do którego można wpisać "RowsOut".
+    Szczyt alokacji liczony per etap, z uwzględnieniem zagnieżdżeń.
+    """
+    if not _state["enabled"]:
+        yield {}
+        return
+
+    stack = _state["stack"]
+    if stack:  # szczyt rodzica do tej pory, zanim wyzerujemy licznik
+        stack[-1]["_peak"] = max(stack[-1]["_peak"], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    mem0 = tracemalloc.get_traced_memory()[0]
+    rec = {"Stage": name, "Depth": len(stack), "RowsIn": rows_in, "RowsOut": None,
+           "Thread": threading.get_ident(), "_peak": 0}
+    stack.append(rec)
+
+    sampler = _Sampler(_state["interval"], _state["samples"]) if name == _state["profile_stage"] else None
+    if sampler:
+        sampler.start()
+    t0, c0 = time.perf_counter(), time.process_time()
+    try:
+        yield rec
+    finally:
+        wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+        if sampler:
+            sampler.stop()
+        mem1, peak = tracemalloc.get_traced_memory()
+        stack.pop()
+        rec.update(StartS=round(t0 - _state["t0"], 6), WallS=round(wall, 6), CpuS=round(cpu, 6),
+                   AllocBytes=mem1 - mem0, PeakBytes=max(rec.pop("_peak"), peak) - mem0)
+        _state["events"].append(rec)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Dekorator etapu: @traced() albo @traced("nazwa").
+    RowsIn = liczba wierszy pierwszego argumentu-ramki, RowsOut = wyniku.
+    """
+    def wrap(func: Callable) -> Callable:
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            if not _state["enabled"]:
+                return func(*args, **kwargs)
+            rows_in = next((r for r in map(_rows, args) if r is not None), None)
+            with stage(label, rows_in=rows_in) as rec:
+                result = func(*args, **kwargs)
+                rec["RowsOut"] = _rows(result)
+            return result
+        return inner
+    return wrap
+
+
+# ============================
+# 3. PROFILER PRÓBKUJĄCY
+# ============================
+
+class _Sampler:
+    """Co `interval` s zapisuje stos wątku, który uruchomił etap (format folded)."""
+
+    def __init__(self, interval: float, counts: Dict[str, int]):
+        self.interval = interval
+        self.target = threading.get_ident()
+        self.counts = counts
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(names))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def _profile_path(trace_path: Path, stage_name: str, suffix: str) -> Path:
+    return trace_path.with_name(f"{trace_path.stem}.{stage_name.replace('/', '_')}{suffix}")
+
+
+def _write_profile(trace_path: Path, stage_name: str, counts: Dict[str, int], quiet: bool = False) -> None:
+    folded = _profile_path(trace_path, stage_name, ".folded")
+    folded.write_text("".join(f"{k} {v}\n" for k, v in sorted(counts.items())), encoding="utf-8")
+    if quiet:                                          # plik procesu potomnego – scali go proces główny
+        return
+    _profile_path(trace_path, stage_name, ".svg").write_text(flamegraph_svg(counts, title=stage_name),
+                                                             encoding="utf-8")
+    print(f"[INFO] Profil etapu '{stage_name}': {folded} ({sum(counts.values())} próbek)")
+
+
+def flamegraph_svg(counts: Dict[str, int], title: str = "", width: int = 1200, row: int = 16) -> str:
+    """Prosty flamegraph (korzeń na dole) ze stosów w formacie folded."""
+    from html import escape
+    from zlib import crc32
+
+    tree: Dict = {"n": 0, "c": {}}
+    for stack, n in counts.items():
+        node = tree
+        node["n"] += n
+        for name in stack.split(";"):
+            node = node["c"].setdefault(name, {"n": 0, "c": {}})
+            node["n"] += n
+
+    def depth(node) -> int:
+        return 1 + max((depth(c) for c in node["c"].values()), default=0)
+
+    total = max(tree["n"], 1)
+    height = (depth(tree) + 1) * row + 24
+    rects = []
+
+    def draw(node, name: str, x: float, level: int) -> None:
+        w = node["n"] / total * width
+        if w < 0.5:
+            return
+        y = height - (level + 1) * row
+        hue = 20 + crc32(name.encode("utf-8")) % 40
+        pct = 100.0 * node["n"] / total
+        label = escape(name) if w > 7 * len(name) else ""
+        rects.append(f'<g><title>{escape(name)} ({node["n"]} próbek, {pct:.1f}%)</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" '
+                     f'fill="hsl({hue},90%,60%)"/><text x="{x + 3:.1f}" y="{y + row - 4}" '
+                     f'font-size="11" font-family="monospace">{label}</text></g>')
+        cx = x
+        for child_name, child in node["c"].items():
+            draw(child, child_name, cx, level + 1)
+            cx += child["n"] / total * width
+
+    cx = 0.0
+    for name, child in tree["c"].items():
+        draw(child, name, cx, 0)
+        cx += child["n"] / total * width
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+            f'<text x="4" y="16" font-size="13" font-family="sans-serif">{escape(title)}</text>'
+            + "".join(rects) + "</svg>")
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+_from_env()
@@ -0,0 +1,201 @@
+"""
+Tryb podglądu: mała, warstwowa próbka danych do szybkiego poprawiania wykresów.
+
+dane.csv: próbka rezerwuarowa całych instancji (wszystkie algorytmy danej
+trasy razem), osobno w każdym zakresie Manhattan (krotkie/srednie/dlugie).
+Każda instancja daje po jednym wierszu każdemu algorytmowi, więc warstwy
+(algorytm, zakres) mają równe liczności, a rangi i wygrane z
+compute_metrics liczą się jak na pełnych danych. Jedno przejście blokami:
+każda instancja dostaje losowy klucz, w warstwie zostaje k najmniejszych
+kluczy (bottom-k = próbka rezerwuarowa bez znajomości liczby instancji).
+
+Logi konwergencji: tak samo całe przebiegi per zakres, ale z indeksu
+przebiegów (kiva_stats.segment) – wybrane przebiegi są kopiowane bajtowo.
+
+Próbki zapisywane są obok źródła (<stem>.preview.csv, ten sam format co
+oryginał, więc czytają je zwykłe loadery) z manifestem <stem>.preview.json
+(rozmiar/mtime źródła, k, seed); nieaktualna próbka jest losowana od nowa.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .dataset import range_keys
+
+PREVIEW_SUFFIX = ".preview.csv"
+MANIFEST_SUFFIX = ".preview.json"
+DEFAULT_INSTANCES = 1000   # instancji dane.csv na zakres Manhattan
+DEFAULT_RUNS = 40          # przebiegów logu na zakres Manhattan
+
+
+# ============================
+# 1. PRÓBKA REZERWUAROWA (BOTTOM-K)
+# ============================
+
+def _keep_bottom_k(keys: np.ndarray, strata: np.ndarray, k: int) -> np.ndarray:
+    """Maska elementów o k najmniejszych kluczach w swojej warstwie."""
+    strata = np.asarray(strata).astype(str)
+    order = np.lexsort((keys, strata))
+    s = strata[order]
+    first = np.r_[True, s[1:] != s[:-1]]
+    starts = np.flatnonzero(first)
+    pos = np.arange(len(s)) - np.repeat(starts, np.diff(np.r_[starts, len(s)]))
+    mask = np.zeros(len(keys), dtype=bool)
+    mask[order[pos < k]] = True
+    return mask
+
+
+# ============================
+# 2. DANE.CSV – CAŁE INSTANCJE
+# ============================
+
+def sample_results(path: Path, per_range: int = DEFAULT_INSTANCES, seed: int = 0,
+                   chunksize: int = 1_000_000) -> pd.DataFrame:
+    """
+    Próbka instancji dane.csv (kolejność wierszy jak w pliku). Instancje jak w
+    tab.assign_instances: kolejne N wierszy (N = liczba algorytmów), tylko
+    komplety; zakres wg Manhattan pierwszego wiersza instancji.
+    """
+    from .schema import RESULTS_SCHEMA, apply_schema, iter_results
+
+    rng = np.random.default_rng(seed)
+    kept: Optional[pd.DataFrame] = None   # wiersze próbki + _Inst, _Key, _Range
+    carry: Optional[pd.DataFrame] = None  # niedokończona instancja z końca bloku
+    offset, n_algs = 0, None
+    chunks = iter_results(path, chunksize=chunksize)
+    chunk = next(chunks, None)
+    while chunk is not None:
+        nxt = next(chunks, None)
+        if n_algs is None:
+            n_algs = chunk["Algorithm"].nunique()
+        chunk = chunk.reset_index(drop=True)
+        chunk["_Inst"] = (np.arange(len(chunk)) + offset) // n_algs
+        offset += len(chunk)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if nxt is not None:
+            last = chunk["_Inst"].iat[-1]
+            carry = chunk[chunk["_Inst"] == last]
+            chunk = chunk[chunk["_Inst"] != last]
+        chunk = _complete_instances(chunk, n_algs)
+        if len(chunk):
+            inst = chunk["_Inst"].to_numpy()
+            first = np.r_[True, inst[1:] != inst[:-1]]
+            # jeden klucz na instancję, losowany w kolejności pliku (niezależnie od chunksize)
+            keys = rng.random(int(first.sum()))
+            chunk["_Key"] = np.repeat(keys, np.diff(np.r_[np.flatnonzero(first), len(inst)]))
+            chunk["_Range"] = np.repeat(range_keys(chunk["Manhattan"][first]),
+                                        np.diff(np.r_[np.flatnonzero(first), len(inst)]))
+            pool = chunk if kept is None else pd.concat([kept, chunk], ignore_index=True)
+            heads = ~pool["_Inst"].duplicated().to_numpy()
+            keep_inst = pool["_Inst"].to_numpy()[heads][
+                _keep_bottom_k(pool["_Key"].to_numpy()[heads], pool["_Range"].to_numpy()[heads], per_range)]
+            kept = pool[pool["_Inst"].isin(keep_inst)]
+        chunk = nxt
+
+    if kept is None:
+        return pd.DataFrame()
+    kept = kept.sort_values("_Inst", kind="stable")
+    # concat bloków o różnych kategoriach gubi category – przywracamy typy schematu
+    return apply_schema(kept.drop(columns=["_Inst", "_Key", "_Range"]).reset_index(drop=True), RESULTS_SCHEMA)
+
+
+def _complete_instances(df: pd.DataFrame, n_algs: int) -> pd.DataFrame:
+    counts = df.groupby("_Inst")["Algorithm"].transform("nunique")
+    return df[(counts == n_algs).to_numpy()]
+
+
+def _write_results(df: pd.DataFrame, out: Path) -> None:
+    # format dane.csv: ';', przecinek dziesiętny; float32 przez str, żeby
+    # 1033,04 nie stało się 1033,040039
+    df = df.copy()
+    for col in df.select_dtypes("floating").columns:
+        df[col] = df[col].astype(str).str.replace(".", ",", regex=False).where(df[col].notna(), "")
+    df.to_csv(out, sep=";", index=False)
+
+
+# ============================
+# 3. LOGI – CAŁE PRZEBIEGI
+# ============================
+
+def sample_runs(log_path: Path, per_range: int = DEFAULT_RUNS, seed: int = 0) -> pd.DataFrame:
+    """Wiersze indeksu przebiegów (kiva_stats.segment) wybranych do próbki, w kolejności logu."""
+    from .segment import load_index
+
+    index = load_index(log_path)
+    keys = np.random.default_rng(seed).random(len(index))
+    mask = _keep_bottom_k(keys, range_keys(index["Manhattan"]), per_range)
+    return index[mask]
+
+
+def _write_runs(log_path: Path, runs: pd.DataFrame, out: Path) -> None:
+    with open(log_path, "rb") as src, open(out, "wb") as dst:
+        dst.write(src.readline())
+        for start, end in zip(runs["ByteStart"].to_numpy(), runs["ByteEnd"].to_numpy()):
+            src.seek(int(start))
+            data = src.read(int(end - start))
+            dst.write(data if data.endswith(b"\n") else data + b"\n")
+
+
+# ============================
+# 4. CACHE OBOK ŹRÓDŁA
+# ============================
+
+def preview_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + PREVIEW_SUFFIX)
+
+
+def _manifest_path(path: Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.stem + MANIFEST_SUFFIX)
+
+
+def _source_info(path: Path, kind: str, per_range: int, seed: int) -> Dict:
+    st = Path(path).stat()
+    return {"kind": kind, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "per_range": per_range, "seed": seed}
+
+
+def _cached(path: Path, info: Dict) -> bool:
+    manifest, out = _manifest_path(path), preview_path(path)
+    if not (manifest.exists() and out.exists()):
+        return False
+    saved = json.loads(manifest.read_text(encoding="utf-8"))
+    return all(saved.get(k) == v for k, v in info.items())
+
+
+def _save(path: Path, info: Dict, rows: int) -> None:
+    info = dict(info, rows=rows)
+    _manifest_path(path).write_text(json.dumps(info, indent=1), encoding="utf-8")
+
+
+def results_preview(path: Path, per_range: int = DEFAULT_INSTANCES, seed: int = 0,
+                    refresh: bool = False) -> Path:
+    """Ścieżka próbki dane.csv; losuje i zapisuje ją, jeśli brak lub nieaktualna."""
+    info = _source_info(path, "results", per_range, seed)
+    out = preview_path(path)
+    if refresh or not _cached(path, info):
+        df = sample_results(path, per_range=per_range, seed=seed)
+        _write_results(df, out)
+        _save(path, info, len(df))
+        print(f"[INFO] Podgląd {Path(path).name}: {len(df)} wierszy "
+              f"(do {per_range} instancji na zakres) -> {out.name}")
+    return out
+
+
+def log_preview(log_path: Path, per_range: int = DEFAULT_RUNS, seed: int = 0,
+                refresh: bool = False) -> Path:
+    """Ścieżka próbki logu konwergencji (całe przebiegi); jak results_preview."""
+    info = _source_info(log_path, "convergence", per_range, seed)
+    out = preview_path(log_path)
+    if refresh or not _cached(log_path, info):
+        runs = sample_runs(log_path, per_range=per_range, seed=seed)
+        _write_runs(log_path, runs, out)
+        _save(log_path, info, int(runs["NRows"].sum()))
+        print(f"[INFO] Podgląd {Path(log_path).name}: {len(runs)} przebiegów "
+              f"(do {per_range} na zakres) -> {out.name}")
+    return out
@@ -0,0 +1,153 @@
+"""
+Wykresy gęstości zamiast scatterów: (Manhattan, PathLength) itp. zliczane
+do siatki 2-D per algorytm (np.bincount) w jednym przejściu po dane.csv
+blokami. Rysowanie to jeden imshow na algorytm, więc jego koszt zależy
+od liczby komórek siatki, a nie od liczby punktów.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# oś -> (min, max, szerokość komórki); mapa 106×46, więc Manhattan <= 150
+AXES: Dict[str, Tuple[float, float, float]] = {
+    "Manhattan": (0.0, 152.0, 1.0),
+    "PathLength": (0.0, 500.0, 2.0),
+    "Rotations": (0.0, 180.0, 1.0),
+    "Stretch": (1.0, 8.0, 0.05),
+    "Excess": (0.0, 300.0, 2.0),
+}
+
+# nazwa pliku -> (x, y, tytuł, opis osi y)
+DENSITY_PLOTS: Dict[str, Tuple[str, str, str, str]] = {
+    "01_density_path_vs_manhattan": ("Manhattan", "PathLength",
+                                     "Długość ścieżki względem Manhattan", "Długość ścieżki [kroki]"),
+    "02_density_rotations_vs_manhattan": ("Manhattan", "Rotations",
+                                          "Liczba obrotów względem Manhattan", "Obroty"),
+    "03_density_stretch_vs_manhattan": ("Manhattan", "Stretch",
+                                        "Współczynnik rozciągnięcia względem Manhattan",
+                                        "Ścieżka / Manhattan"),
+    "04_density_excess_vs_manhattan": ("Manhattan", "Excess",
+                                       "Nadwyżka ścieżki względem Manhattan", "Nadwyżka [kroki]"),
+}
+
+
+def column_values(df, name: str) -> np.ndarray:
+    """Wartości osi: kolumna z dane.csv albo pochodna (Stretch, Excess)."""
+    if name == "Stretch":
+        return df["PathLength"].to_numpy(np.float32) / df["Manhattan"].to_numpy(np.float32)
+    if name == "Excess":
+        return (df["PathLength"].to_numpy(np.int32) - df["Manhattan"].to_numpy(np.int32)).astype(np.float32)
+    return df[name].to_numpy(np.float32)
+
+
+class DensityGrid:
+    """Liczniki counts[alg][iy, ix] na stałej siatce; wartości spoza zakresu liczone w overflow."""
+
+    def __init__(self, x: str, y: str,
+                 x_axis: Optional[Tuple[float, float, float]] = None,
+                 y_axis: Optional[Tuple[float, float, float]] = None):
+        self.x, self.y = x, y
+        self.x_axis = tuple(x_axis or AXES[x])
+        self.y_axis = tuple(y_axis or AXES[y])
+        self.nx = int(np.ceil((self.x_axis[1] - self.x_axis[0]) / self.x_axis[2]))
+        self.ny = int(np.ceil((self.y_axis[1] - self.y_axis[0]) / self.y_axis[2]))
+        self.counts: Dict[str, np.ndarray] = {}
+        self.overflow: Dict[str, int] = {}
+
+    def add(self, alg: str, xv: np.ndarray, yv: np.ndarray) -> None:
+        ix = np.floor((xv - self.x_axis[0]) / self.x_axis[2])
+        iy = np.floor((yv - self.y_axis[0]) / self.y_axis[2])
+        ok = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        flat = iy[ok].astype(np.int64) * self.nx + ix[ok].astype(np.int64)
+        grid = np.bincount(flat, minlength=self.nx * self.ny).reshape(self.ny, self.nx)
+        if alg in self.counts:
+            self.counts[alg] += grid
+        else:
+            self.counts[alg] = grid
+        self.overflow[alg] = self.overflow.get(alg, 0) + int((~ok).sum())
+
+    def update(self, df) -> None:
+        """Dodaje blok dane.csv (już przefiltrowany do udanych prób)."""
+        xv, yv = column_values(df, self.x), column_values(df, self.y)
+        algs = df["Algorithm"].astype(str).to_numpy()
+        for alg in np.unique(algs):
+            m = algs == alg
+            self.add(str(alg), xv[m], yv[m])
+
+    def merge(self, other: "DensityGrid") -> "DensityGrid":
+        """Łączy liczniki z innej siatki o tych samych osiach (np. z innego procesu)."""
+        if (other.x_axis, other.y_axis) != (self.x_axis, self.y_axis):
+            raise ValueError("Siatki mają różne osie – nie da się ich połączyć.")
+        for alg, grid in other.counts.items():
+            self.counts[alg] = self.counts.get(alg, 0) + grid
+            self.overflow[alg] = self.overflow.get(alg, 0) + other.overflow.get(alg, 0)
+        return self
+
+    def extent(self) -> List[float]:
+        return [self.x_axis[0], self.x_axis[0] + self.nx * self.x_axis[2],
+                self.y_axis[0], self.y_axis[0] + self.ny * self.y_axis[2]]
+
+
+def stream_density(path: Path, specs: Iterable[Tuple[str, str]],
+                   chunksize: int = 1_000_000) -> Dict[Tuple[str, str], DensityGrid]:
+    """Jedno przejście po dane.csv wypełnia wszystkie siatki (tylko udane próby, PathLength > 0)."""
+    from .schema import iter_results
+
+    grids = {(x, y): DensityGrid(x, y) for x, y in specs}
+    for chunk in iter_results(path, chunksize=chunksize):
+        ok = chunk[chunk["Success"] & (chunk["PathLength"] > 0)]
+        for grid in grids.values():
+            grid.update(ok)
+    for grid in grids.values():
+        lost = sum(grid.overflow.values())
+        if lost:
+            print(f"[WARN] {grid.y} vs {grid.x}: {lost} punktów poza zakresem siatki")
+    return grids
+
+
+def plot_density(grid: DensityGrid, title: str = "", ylabel: str = "", log: bool = True):
+    """Mapa gęstości per algorytm, wykresy jeden pod drugim, wspólna skala kolorów."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm, Normalize
+
+    algs = sorted(grid.counts)
+    vmax = max((int(c.max()) for c in grid.counts.values()), default=1) or 1
+    norm = LogNorm(vmin=1, vmax=max(vmax, 2)) if log else Normalize(vmin=0, vmax=vmax)
+    extent = grid.extent()
+
+    fig, axes = plt.subplots(len(algs) or 1, 1, figsize=(9, 3.2 * max(len(algs), 1)),
+                             sharex=True, squeeze=False)
+    image = None
+    for ax, alg in zip(axes[:, 0], algs):
+        # puste komórki maskowane -> tło zamiast najciemniejszego koloru
+        counts = np.ma.masked_equal(grid.counts[alg], 0)
+        image = ax.imshow(counts, origin="lower", extent=extent, aspect="auto",
+                          norm=norm, cmap="viridis", interpolation="nearest")
+        if grid.y == "PathLength" and grid.x == "Manhattan":
+            ax.plot(extent[:2], extent[:2], "r--", linewidth=1, label="Ścieżka = Manhattan")
+            ax.set_ylim(extent[2], extent[3])
+            ax.legend(loc="upper left")
+        ax.set_title(f"{alg} (n = {int(grid.counts[alg].sum())})")
+        ax.set_ylabel(ylabel or grid.y)
+        ax.grid(True, linestyle=":", alpha=0.4)
+    axes[-1, 0].set_xlabel(grid.x)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    if image is not None:
+        fig.colorbar(image, ax=axes[:, 0].tolist(),
+                     label="Liczba prób (skala log)" if log else "Liczba prób")
+    return fig
+
+
+def draw_density_plots(path: Path, log: bool = True, chunksize: int = 1_000_000,
+                       plots: Optional[Dict[str, Tuple[str, str, str, str]]] = None) -> Iterator[tuple]:
+    """
+    Liczy wszystkie siatki w jednym przejściu, potem zwraca kolejno (nazwa, figura)
+    – generator, więc naraz otwarta jest tylko jedna figura.
+    """
+    plots = plots or DENSITY_PLOTS
+    grids = stream_density(path, [(x, y) for x, y, _, _ in plots.values()], chunksize=chunksize)
+    for name, (x, y, title, ylabel) in plots.items():
+        yield name, plot_density(grids[(x, y)], title=title, ylabel=ylabel, log=log)
@@ -0,0 +1,220 @@
+"""
+Wspólny schemat typów dla wszystkich loaderów.
+
+Algorithm jako category, liczby całkowite w najmniejszym wystarczającym
+typie (mapa 106×46, ścieżki < 32k kroków), czasy i fitness jako float32.
+Na pełnej historii dane.csv / logów to ok. 10× mniej pamięci niż
+domyślne object/int64/float64.
+"""
+from typing import Dict, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .instrument import stage
+
+RESULTS_SCHEMA: Dict[str, str] = {
+    "Algorithm": "category",
+    "TimeMs": "float32",
+    "PathLength": "int16",
+    "Rotations": "int16",
+    "Success": "bool",
+    "Step": "int32",
+    "Manhattan": "int16",
+}
+
+CONVERGENCE_SCHEMA: Dict[str, str] = {
+    "Algorithm": "category",
+    "Iteration": "int32",
+    "TimeMs": "float32",
+    "Manhattan": "int16",
+    "Fitness": "float32",
+    "BestPathLength": "int16",
+}
+
+# Kolumny dodawane przez skrypty
+DERIVED_SCHEMA: Dict[str, str] = {
+    "RunId": "int32",
+    "InstanceId": "int32",
+    "Trajektoria": "int32",
+    "Nadwyżka": "int16",
+    "Nadwyżka%": "float32",
+    "Optymalność": "float32",
+    "Stretch": "float32",
+}
+
+_SUCCESS_MAP = {"true": True, "false": False, "1": True, "0": False}
+
+
+def to_bool(s: pd.Series) -> pd.Series:
+    """
+    Success zapisany jako True/False, true/false albo 1/0 -> bool (brak = False).
+    Inny tekst to błąd danych, nie porażka – ValueError z listą wartości.
+    """
+    if pd.api.types.is_bool_dtype(s):
+        return s.astype(bool)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.fillna(0).astype(bool)
+    text = s.astype("string").str.strip().str.lower()
+    mapped = text.map(_SUCCESS_MAP)
+    unknown = mapped.isna() & text.notna() & (text != "")
+    if unknown.any():
+        values = sorted(set(s[unknown].astype(str)))
+        raise ValueError(f"{s.name}: nieznane wartości logiczne {values[:5]}"
+                         f"{' ...' if len(values) > 5 else ''} ({int(unknown.sum())} wierszy)")
+    return mapped.fillna(False).astype(bool)
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str],
+                 columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Rzutuje kolumny obecne w df na typy ze schematu, w miejscu.
+    Kolumny całkowite z brakami zostają float32 (NaN nie mieści się w int16).
+    """
+    cols = [c for c in (columns or schema) if c in df.columns and c in schema]
+    for col in cols:
+        dtype = schema[col]
+        s = df[col]
+        if str(s.dtype) == dtype:
+            continue
+        if dtype == "bool":
+            df[col] = to_bool(s)
+        elif dtype == "category":
+            df[col] = s.astype("category")
+        else:
+            if not pd.api.types.is_numeric_dtype(s):
+                s = pd.to_numeric(s.astype(str).str.replace(",", ".", regex=False), errors="coerce")
+            if np.dtype(dtype).kind == "i" and s.isna().any():
+                df[col] = s.astype("float32")
+            else:
+                df[col] = s.astype(dtype)
+    return df
+
+
+def _read_dtypes(schema: Dict[str, str]) -> Dict[str, str]:
+    # read_csv od razu wczytuje tekst jako category i float jako float32;
+    # liczby całkowite rzutujemy dopiero po odrzuceniu braków.
+    return {c: t for c, t in schema.items() if t in ("category", "float32")}
+
+
+def read_results(path, **kwargs) -> pd.DataFrame:
+    """dane.csv: separator ';', przecinek dziesiętny w TimeMs."""
+    with stage("read_csv") as rec:
+        df = pd.read_csv(path, sep=";", decimal=",", dtype=_read_dtypes(RESULTS_SCHEMA), **kwargs)
+        rec["RowsOut"] = len(df)
+    return apply_schema(df, RESULTS_SCHEMA)
+
+
+def read_convergence(path, **kwargs) -> pd.DataFrame:
+    """*ConvergenceLog.csv: separator ';', przecinek dziesiętny (Fitness bywa z kropką)."""
+    with stage("read_csv") as rec:
+        df = pd.read_csv(path, sep=";", decimal=",", dtype={"Algorithm": "category"}, **kwargs)
+        rec["RowsOut"] = len(df)
+    return apply_schema(df, CONVERGENCE_SCHEMA)
+
+
+def iter_results(path, chunksize: int = 1_000_000, **kwargs) -> Iterator[pd.DataFrame]:
+    """dane.csv blokami po chunksize wierszy, każdy blok już w typach schematu."""
+    reader = pd.read_csv(path, sep=";", decimal=",", dtype=_read_dtypes(RESULTS_SCHEMA),
+                         chunksize=chunksize, **kwargs)
+    with reader:
+        for chunk in reader:
+            yield apply_schema(chunk, RESULTS_SCHEMA)
+
+
+def set_category(df: pd.DataFrame, col: str, value: str) -> pd.DataFrame:
+    """Ustawia stałą etykietę jako category (1 bajt na wiersz zamiast wskaźnika na str)."""
+    df[col] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[value])
+    return df
+
+
+# ============================
+# POMIAR PAMIĘCI
+# ============================
+
+def _synthetic_results(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Ramka o kolumnach dane.csv (Success jako True/False), do zapisania jak w Unity."""
+    rng = np.random.default_rng(seed)
+    manh = rng.integers(5, 150, n_rows)
+    return pd.DataFrame({
+        "Algorithm": np.array(["FA", "CHA", "ACO"], dtype=object)[np.arange(n_rows) % 3],
+        "TimeMs": rng.normal(1005.0, 8.0, n_rows).round(4),
+        "PathLength": manh + rng.integers(0, 60, n_rows),
+        "Rotations": rng.integers(0, 20, n_rows),
+        "Success": np.where(rng.random(n_rows) < 0.97, "True", "False"),
+        "Step": np.arange(n_rows) // 3,
+        "Manhattan": manh,
+    })
+
+
+def _read_legacy(path) -> pd.DataFrame:
+    # loader sprzed schematu (etap1+3.load_and_prepare): read_csv bez typów, Success mapowany ręcznie
+    df = pd.read_csv(path, sep=";")
+    if df["Success"].dtype == "object":
+        df["Success"] = df["Success"].map({"True": True, "False": False, "true": True, "false": False})
+    return df
+
+
+def _derive_legacy(df: pd.DataFrame) -> pd.DataFrame:
+    # tak jak etap1+3.compute_metrics: kopia + trzy kolumny float64
+    df["Trajektoria"] = df.index // 3
+    df_ok = df[(df["Success"] == True) & (df["PathLength"] > 0)].copy()
+    df_ok["Nadwyżka"] = df_ok["PathLength"] - df_ok["Manhattan"]
+    df_ok["Nadwyżka%"] = df_ok["Nadwyżka"] / df_ok["Manhattan"] * 100
+    df_ok["Optymalność"] = df_ok["PathLength"] / df_ok["Manhattan"]
+    return df_ok
+
+
+def _derive_compact(df: pd.DataFrame) -> pd.DataFrame:
+    df["Trajektoria"] = (np.arange(len(df), dtype=np.int32) // 3)
+    df_ok = df[df["Success"] & (df["PathLength"] > 0)]
+    add_derived_columns(df_ok)
+    return df_ok
+
+
+def add_derived_columns(df_ok: pd.DataFrame) -> pd.DataFrame:
+    """Nadwyżka / Nadwyżka% / Optymalność w typach ze schematu (bez kopii ramki)."""
+    path = df_ok["PathLength"].to_numpy()
+    manh = df_ok["Manhattan"].to_numpy()
+    excess = (path - manh).astype(DERIVED_SCHEMA["Nadwyżka"])
+    manh_f = manh.astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_ok["Nadwyżka"] = excess
+        df_ok["Nadwyżka%"] = excess.astype(np.float32) / manh_f * np.float32(100)
+        df_ok["Optymalność"] = path.astype(np.float32) / manh_f
+    return df_ok
+
+
+def measure_memory(n_rows: int, path=None) -> pd.DataFrame:
+    """
+    Szczytowa pamięć (tracemalloc) i rozmiar ramek przy wczytaniu dane.csv:
+    loader sprzed schematu vs read_results, oba z wyliczeniem kolumn
+    pochodnych. Bez `path` mierzy syntetyczny plik o n_rows wierszach
+    (zapisany jak w Unity: ';' i przecinek dziesiętny).
+    """
+    import gc
+    import tempfile
+    import tracemalloc
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if path is None:
+            path = Path(tmp) / "dane.csv"
+            _synthetic_results(n_rows).to_csv(path, sep=";", decimal=",", index=False)
+        rows = []
+        for label, read, derive in (("legacy", _read_legacy, _derive_legacy),
+                                    ("schema", read_results, _derive_compact)):
+            gc.collect()
+            tracemalloc.start()
+            df = read(path)
+            frame_bytes = int(df.memory_usage(deep=True).sum())
+            derived = derive(df)
+            derived_bytes = int(derived.memory_usage(deep=True).sum())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            rows.append({"Variant": label, "Rows": len(df),
+                         "FrameMB": frame_bytes / 2**20,
+                         "DerivedMB": derived_bytes / 2**20,
+                         "PeakMB": peak / 2**20})
+            del df, derived
+    return pd.DataFrame(rows).set_index("Variant").round(1)
@@ -0,0 +1,29 @@
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+# Skrypty (tab.py, conv.py, etap1+3.py, ...) leżą obok pakietu.
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+
+def load_script(name: str) -> ModuleType:
+    """
+    Importuje skrypt z katalogu Statistics/ jako moduł.
+    Obsługuje też nazwy, które nie są poprawnymi identyfikatorami (np. 'etap1+3').
+    """
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+
+    if name.isidentifier():
+        return importlib.import_module(name)
+
+    mod_name = name.replace("+", "_")
+    if mod_name in sys.modules:
+        return sys.modules[mod_name]
+    spec = importlib.util.spec_from_file_location(mod_name, SCRIPTS_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[mod_name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,201 @@
+"""
+Podział logów konwergencji na przebiegi i indeks przebiegów obok pliku.
+
+Nowy przebieg zaczyna się, gdy cofa się TimeMs, Iteration nie rośnie
+(cofa się albo powtarza – w przebiegu rośnie ściśle, więc np. dwa
+jednowierszowe przebiegi z Iteration 1 i tym samym Manhattanem to dwa
+przebiegi) albo zmienia się Manhattan. Sam warunek na czas (dawne
+`(TimeMs.diff() < 0).cumsum()`) skleja dwa przebiegi, jeśli krótki
+przebieg kończy się wcześniej, niż startuje następny. Tej samej reguły
+używa kiva_stats.validate.
+
+Indeks <log>.runs.csv (';') ma jeden wiersz na przebieg:
+RunId;StartRow;NRows;Manhattan;ByteStart;ByteEnd. Wiersze liczone od
+pierwszej linii danych (puste linie też), bajty – od początku pliku, więc
+pojedynczy przebieg czyta się przez seek bez parsowania reszty logu.
+Pierwsza linia indeksu zapisuje rozmiar i mtime logu; nieaktualny indeks
+jest budowany od nowa.
+"""
+import io
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDEX_SUFFIX = ".runs.csv"
+INDEX_VERSION = "2"                   # v2: Iteration bez wzrostu też otwiera przebieg
+INDEX_COLUMNS = ["RunId", "StartRow", "NRows", "Manhattan", "ByteStart", "ByteEnd"]
+_BLOCK = 64 * 1024 * 1024
+
+
+# ============================
+# 1. GRANICE PRZEBIEGÓW
+# ============================
+
+def run_starts(iteration: np.ndarray, time_ms: np.ndarray, manhattan: np.ndarray,
+               prev: Optional[Tuple[float, float, float]] = None) -> np.ndarray:
+    """
+    True w wierszu, od którego zaczyna się nowy przebieg. `prev` = (Iteration,
+    TimeMs, Manhattan) ostatniego wiersza poprzedniego bloku; bez niego
+    pierwszy wiersz zawsze otwiera przebieg. Braki (NaN) nie otwierają przebiegu.
+    """
+    it = np.asarray(iteration, dtype=np.float64)
+    t = np.asarray(time_ms, dtype=np.float64)
+    m = np.asarray(manhattan, dtype=np.float64)
+    if not len(t):
+        return np.zeros(0, dtype=bool)
+    p_it, p_t, p_m = prev if prev is not None else (np.nan, np.nan, np.nan)
+    starts = ((np.diff(np.r_[p_t, t]) < 0)
+              | (np.diff(np.r_[p_it, it]) <= 0)
+              | ((np.r_[p_m, m[:-1]] != m) & ~np.isnan(m) & ~np.isnan(np.r_[p_m, m[:-1]])))
+    if prev is None:
+        starts[0] = True
+    return starts
+
+
+def assign_run_ids(df: pd.DataFrame, first: int = 0) -> np.ndarray:
+    """RunId (int32, od `first`) dla ramki logu w oryginalnej kolejności wierszy."""
+    starts = run_starts(df["Iteration"].to_numpy(np.float64, na_value=np.nan),
+                        df["TimeMs"].to_numpy(np.float64, na_value=np.nan),
+                        df["Manhattan"].to_numpy(np.float64, na_value=np.nan))
+    return (np.cumsum(starts) - 1 + first).astype(np.int32)
+
+
+# ============================
+# 2. INDEKS PRZEBIEGÓW
+# ============================
+
+def index_path(log_path: Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.stem + INDEX_SUFFIX)
+
+
+def _signature(log_path: Path) -> str:
+    st = Path(log_path).stat()
+    return f"# kiva-runs v{INDEX_VERSION} size={st.st_size} mtime_ns={st.st_mtime_ns}"
+
+
+def _line_offsets(log_path: Path) -> np.ndarray:
+    """Bajt początku każdej linii (i rozmiar pliku na końcu), czytane blokami."""
+    ends = []
+    pos = 0
+    with open(log_path, "rb") as f:
+        while True:
+            block = f.read(_BLOCK)
+            if not block:
+                break
+            ends.append(np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10) + pos + 1)
+            pos += len(block)
+    starts = np.r_[0, np.concatenate(ends) if ends else np.zeros(0, dtype=np.int64)]
+    if starts[-1] != pos:                 # ostatnia linia bez '\n'
+        starts = np.r_[starts, pos]
+    return starts.astype(np.int64)
+
+
+def _read_keys(log_path: Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    # tylko kolumny potrzebne do granic; TimeMs jako tekst (przecinek albo kropka)
+    from .validate import _parse_number
+
+    reader = pd.read_csv(log_path, sep=";", usecols=["Iteration", "TimeMs", "Manhattan"],
+                         dtype={"TimeMs": str}, keep_default_na=False, na_values=[""],
+                         chunksize=chunksize, encoding="utf-8-sig", skip_blank_lines=False)
+    with reader:
+        for chunk in reader:
+            yield pd.DataFrame({c: _parse_number(chunk[c]) for c in ("Iteration", "TimeMs", "Manhattan")})
+
+
+def build_index(log_path: Path, chunksize: int = 5_000_000) -> pd.DataFrame:
+    """Jedno przejście po logu: granice przebiegów -> tabela indeksu (bez zapisu)."""
+    starts, manh = [], []
+    offset, prev = 0, None
+    for chunk in _read_keys(log_path, chunksize):
+        it, t, m = (chunk[c].to_numpy() for c in ("Iteration", "TimeMs", "Manhattan"))
+        valid = ~np.isnan(t)
+        rows = np.flatnonzero(valid)
+        if len(rows):
+            s = run_starts(it[rows], t[rows], m[rows], prev)
+            starts.append(rows[s] + offset)
+            manh.append(m[rows][s])
+            prev = (it[rows[-1]], t[rows[-1]], m[rows[-1]])
+        offset += len(chunk)
+
+    start_rows = np.concatenate(starts) if starts else np.zeros(0, dtype=np.int64)
+    index = pd.DataFrame({
+        "RunId": np.arange(len(start_rows), dtype=np.int32),
+        "StartRow": start_rows.astype(np.int64),
+        "NRows": np.diff(np.r_[start_rows, offset]).astype(np.int64),
+        "Manhattan": (np.concatenate(manh) if manh else np.zeros(0)).astype(np.int16),
+    })
+    lines = _line_offsets(log_path)       # linia 0 = nagłówek, wiersz danych i = linia i + 1
+    index["ByteStart"] = lines[index["StartRow"].to_numpy() + 1]
+    index["ByteEnd"] = lines[np.minimum(index["StartRow"].to_numpy() + index["NRows"].to_numpy() + 1,
+                                        len(lines) - 1)]
+    return index
+
+
+def write_index(log_path: Path, index: pd.DataFrame) -> Path:
+    path = index_path(log_path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        f.write(_signature(log_path) + "\n")
+        index[INDEX_COLUMNS].to_csv(f, sep=";", index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def load_index(log_path: Path, rebuild: bool = True) -> pd.DataFrame:
+    """Indeks z pliku obok logu; brakujący lub nieaktualny (rozmiar/mtime) jest budowany i zapisywany."""
+    path = index_path(log_path)
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            if f.readline().rstrip("\n") == _signature(log_path):
+                return pd.read_csv(f, sep=";", dtype={"RunId": "int32", "Manhattan": "int16"})
+    if not rebuild:
+        raise FileNotFoundError(f"Brak aktualnego indeksu przebiegów: {path}")
+    index = build_index(log_path)
+    write_index(log_path, index)
+    print(f"[INFO] Zapisano indeks przebiegów {path.name} ({len(index)} przebiegów)")
+    return index
+
+
+# ============================
+# 3. DOSTĘP DO PRZEBIEGÓW
+# ============================
+
+def _header(log_path: Path) -> bytes:
+    with open(log_path, "rb") as f:
+        return f.readline()
+
+
+def read_runs(log_path: Path, run_ids: Iterable[int], index: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Wybrane przebiegi (seek po ByteStart/ByteEnd), typy wg schematu,
+    kolumna RunId z indeksu. Reszta pliku nie jest czytana.
+    """
+    from .schema import CONVERGENCE_SCHEMA, apply_schema
+
+    index = load_index(log_path) if index is None else index
+    sel = index.set_index("RunId").loc[list(run_ids)]
+    parts: List[bytes] = [_header(log_path).lstrip(b"\xef\xbb\xbf")]
+    run_col: List[np.ndarray] = []
+    with open(log_path, "rb") as f:
+        for rid, row in sel.iterrows():
+            f.seek(int(row["ByteStart"]))
+            data = f.read(int(row["ByteEnd"] - row["ByteStart"]))
+            parts.append(data if data.endswith(b"\n") else data + b"\n")
+            run_col.append(np.full(data.count(b"\n") + (not data.endswith(b"\n")), rid, dtype=np.int32))
+    df = pd.read_csv(io.BytesIO(b"".join(parts)), sep=";", decimal=",", dtype={"Algorithm": "category"},
+                     skip_blank_lines=False)
+    df["RunId"] = np.concatenate(run_col) if run_col else np.zeros(0, dtype=np.int32)
+    df = df.dropna(subset=["TimeMs"]).reset_index(drop=True)
+    return apply_schema(df, CONVERGENCE_SCHEMA)
+
+
+def split_index(index: pd.DataFrame, parts: int) -> List[pd.DataFrame]:
+    """Dzieli przebiegi na `parts` ciągłych części o zbliżonej liczbie wierszy (dla procesów)."""
+    cum = index["NRows"].cumsum().to_numpy()
+    total = cum[-1] if len(cum) else 0
+    cuts = np.searchsorted(cum, np.arange(1, parts) * total / parts)
+    return [index.iloc[a:b] for a, b in zip(np.r_[0, cuts], np.r_[cuts, len(index)])]
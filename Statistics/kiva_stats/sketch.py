@@ -0,0 +1,293 @@
+"""
+Szkice kwantyli (KLL) per (algorytm, metryka, opcjonalny bin), wypełniane
+blokami podczas strumieniowego czytania danych.
+
+Zamiast trzymać całą kolumnę (x.quantile(...), boxplot, ECDF) szkic trzyma
+O(k·log(n/k)) próbek z wagami 2^poziom. Błąd rangi: ok. 1.65% dla k=200
+(z dużym prawdopodobieństwem, jak w DataSketches). count/mean/std/min/max
+są liczone dokładnie. Szkice łączy się przez merge(), więc można je budować
+w osobnych procesach albo przyrostowo (zapis/odczyt JSON).
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from zlib import crc32
+
+import numpy as np
+
+DEFAULT_K = 200
+_C = 2.0 / 3.0                      # pojemność poziomu maleje geometrycznie w dół
+
+RESULT_METRICS = ("PathLength", "Rotations", "Nadwyżka", "Nadwyżka%", "Optymalność")
+
+
+# ============================
+# 1. SZKIC KLL
+# ============================
+
+class KLLSketch:
+    """Szkic KLL dla jednej kolumny liczb; dokładne count/sum/sumsq/min/max obok."""
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0):
+        self.k = int(k)
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * _C ** depth)), 2)
+
+    def _stored(self) -> int:
+        return sum(len(lv) for lv in self.levels)
+
+    def _compress(self) -> None:
+        """Kompaktuje przepełnione poziomy: sortuje, zostawia co drugi element (losowe przesunięcie)."""
+        while self._stored() > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]   # nieparzysty nadmiar zostaje
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                break
+
+    def update(self, values) -> "KLLSketch":
+        """Dodaje blok wartości (NaN pomijane)."""
+        x = np.asarray(values, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if not len(x):
+            return self
+        self.count += len(x)
+        self.total += float(x.sum())
+        self.total_sq += float(np.dot(x, x))
+        self.min = min(self.min, float(x.min()))
+        self.max = max(self.max, float(x.max()))
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Dołącza inny szkic (np. z innego procesu albo poprzedniego przebiegu)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    # --- odczyt ---
+
+    def _weighted(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Posortowane próbki i skumulowane wagi."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Kwantyl(e) q ∈ [0, 1]; q=0 i q=1 zwracają dokładne min/max."""
+        qs = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if self.count == 0:
+            out = np.full(qs.shape, np.nan)
+        else:
+            values, cum = self._weighted()
+            idx = np.searchsorted(cum, qs * cum[-1], side="left")
+            out = values[np.minimum(idx, len(values) - 1)]
+            out = np.where(qs <= 0, self.min, np.where(qs >= 1, self.max, out))
+        return out if np.ndim(q) else float(out[0])
+
+    def cdf(self, x):
+        """Przybliżone F(x) = P(X <= x)."""
+        if self.count == 0:
+            return np.full(np.shape(x), np.nan)
+        values, cum = self._weighted()
+        idx = np.searchsorted(values, np.asarray(x, dtype=np.float64), side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)] / cum[-1], 0.0)
+
+    def ecdf(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Punkty schodkowej ECDF (wartości, F) – do plt.step(..., where='post')."""
+        values, cum = self._weighted()
+        last = np.r_[values[1:] != values[:-1], True]        # jeden punkt na unikalną wartość
+        return values[last], cum[last] / cum[-1]
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    def std(self) -> float:
+        """Odchylenie standardowe z próby (ddof=1), jak pandas."""
+        if self.count < 2:
+            return np.nan
+        var = (self.total_sq - self.total ** 2 / self.count) / (self.count - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+    def box_stats(self, whis: float = 1.5) -> Dict:
+        """Słownik dla Axes.bxp: kwartyle ze szkicu, wąsy na skrajnych zachowanych próbkach w 1.5·IQR."""
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        values = np.concatenate(self.levels + [np.array([self.min, self.max])])
+        lo = values[values >= q1 - whis * iqr]
+        hi = values[values <= q3 + whis * iqr]
+        return {"med": med, "q1": q1, "q3": q3, "mean": self.mean(),
+                "whislo": float(lo.min()) if len(lo) else q1,
+                "whishi": float(hi.max()) if len(hi) else q3, "fliers": []}
+
+    # --- zapis ---
+
+    def to_dict(self) -> Dict:
+        return {"k": self.k, "count": self.count, "sum": self.total, "sumsq": self.total_sq,
+                "min": self.min if self.count else None, "max": self.max if self.count else None,
+                "levels": [lv.tolist() for lv in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: int = 0) -> "KLLSketch":
+        sk = cls(k=data["k"], seed=seed)
+        sk.levels = [np.asarray(lv, dtype=np.float64) for lv in data["levels"]] or sk.levels
+        sk.count, sk.total, sk.total_sq = data["count"], data["sum"], data["sumsq"]
+        if data["count"]:
+            sk.min, sk.max = data["min"], data["max"]
+        return sk
+
+
+# ============================
+# 2. ZBIÓR SZKICÓW (algorytm, metryka, bin)
+# ============================
+
+Key = Tuple[str, str, Optional[str]]
+
+
+class SketchSet:
+    """Szkice per (algorytm, metryka, bin); bin=None oznacza całość."""
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.sketches: Dict[Key, KLLSketch] = {}
+
+    def get(self, alg: str, metric: str, bin_label: Optional[str] = None) -> KLLSketch:
+        key = (alg, metric, bin_label)
+        if key not in self.sketches:
+            # ziarno zależne od klucza – wynik powtarzalny niezależnie od kolejności wypełniania
+            seed = crc32(json.dumps(key).encode("utf-8"))
+            self.sketches[key] = KLLSketch(self.k, seed=seed)
+        return self.sketches[key]
+
+    def update(self, df, alg_col: str, metrics: Iterable[str], by: Optional[str] = None) -> "SketchSet":
+        """Dodaje blok ramki: szkic całości per algorytm i (gdy podano `by`) per bin."""
+        algs = df[alg_col].astype(str).to_numpy()
+        bins = df[by].astype(str).to_numpy() if by else None
+        for metric in metrics:
+            values = df[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+            for alg in np.unique(algs):
+                m = algs == alg
+                self.get(str(alg), metric).update(values[m])
+                if bins is not None:
+                    for b in np.unique(bins[m]):
+                        self.get(str(alg), metric, str(b)).update(values[m & (bins == b)])
+        return self
+
+    def merge(self, other: "SketchSet") -> "SketchSet":
+        for key, sk in other.sketches.items():
+            self.get(*key).merge(sk)
+        return self
+
+    def algorithms(self, metric: str) -> List[str]:
+        return sorted({a for a, m, b in self.sketches if m == metric and b is None})
+
+    def basic_stats(self, metric: str):
+        """Odpowiednik tab.compute_basic_stats ze szkiców (kwantyle przybliżone, reszta dokładna)."""
+        import pandas as pd
+
+        rows = {}
+        for alg in self.algorithms(metric):
+            sk = self.sketches[(alg, metric, None)]
+            q25, median, q75 = sk.quantile([0.25, 0.5, 0.75])
+            rows[alg] = {"count": sk.count, "mean": sk.mean(), "std": sk.std(), "median": median,
+                         "q25": q25, "q75": q75, "min": sk.min, "max": sk.max}
+        basic = pd.DataFrame.from_dict(rows, orient="index")
+        basic.index.name = "Algorithm"
+        return basic.round(3)
+
+    def save(self, path: Path) -> None:
+        data = {"k": self.k, "sketches": [{"key": list(key), **sk.to_dict()}
+                                          for key, sk in sorted(self.sketches.items(), key=lambda kv: str(kv[0]))]}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(data), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "SketchSet":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        out = cls(k=data["k"])
+        for item in data["sketches"]:
+            out.sketches[tuple(item["key"])] = KLLSketch.from_dict(item)
+        return out
+
+
+# ============================
+# 3. STRUMIEŃ dane.csv
+# ============================
+
+def sketch_results(path: Path, metrics: Iterable[str] = RESULT_METRICS, by: Optional[str] = None,
+                   k: int = DEFAULT_K, chunksize: int = 1_000_000) -> SketchSet:
+    """Jedno przejście po dane.csv (udane próby, PathLength > 0) wypełnia szkice metryk."""
+    from .schema import add_derived_columns, iter_results
+
+    metrics = list(metrics)
+    sketches = SketchSet(k)
+    for chunk in iter_results(path, chunksize=chunksize):
+        ok = chunk[chunk["Success"] & (chunk["PathLength"] > 0)].copy()
+        add_derived_columns(ok)
+        sketches.update(ok, "Algorithm", metrics, by=by)
+    return sketches
+
+
+# ============================
+# 4. WYKRESY ZE SZKICÓW
+# ============================
+
+def plot_boxplots(sketches: SketchSet, metrics: Iterable[Tuple[str, str]]):
+    """Boxploty (Axes.bxp) jeden pod drugim; metrics = [(metryka, opis osi), ...]."""
+    import matplotlib.pyplot as plt
+
+    metrics = list(metrics)
+    fig, axes = plt.subplots(len(metrics), 1, figsize=(7, 4 * len(metrics)), sharex=True, squeeze=False)
+    for ax, (metric, label) in zip(axes[:, 0], metrics):
+        algs = sketches.algorithms(metric)
+        stats = [dict(sketches.get(alg, metric).box_stats(), label=alg) for alg in algs]
+        ax.bxp(stats, showfliers=False)
+        ax.set_title(label)
+        ax.set_ylabel(label)
+        ax.grid(True, linestyle=":", alpha=0.5)
+    axes[-1, 0].set_xlabel("Algorytm")
+    plt.tight_layout()
+    return fig
+
+
+def plot_ecdf(sketches: SketchSet, metric: str, xlabel: str):
+    """ECDF metryki dla wszystkich algorytmów na jednym wykresie."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for alg in sketches.algorithms(metric):
+        x, f = sketches.get(alg, metric).ecdf()
+        ax.step(x, f, where="post", label=alg)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("F(x)")
+    ax.set_title(f"ECDF: {xlabel}")
+    ax.grid(True, linestyle=":", alpha=0.5)
+    ax.legend()
+    plt.tight_layout()
+    return fig
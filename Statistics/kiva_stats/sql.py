@@ -0,0 +1,170 @@
+"""
+Zapytania SQL ad hoc nad dane.csv, logami konwergencji i tabelą per przebieg.
+
+Silnik w procesie: DuckDB (wektorowo, bez kopiowania ramek pandas ani
+plików Parquet), a gdy go nie ma – sqlite3 z biblioteki standardowej
+(ramki kopiowane do bazy w pamięci). Widoki:
+
+  results       dane.csv z InstanceId i Range (jak ws.instances)
+  convergence   wszystkie logi z RunId i Range, Algorithm = ACO/CHA/FA
+  log_aco, log_cha, log_fa, ...   pojedyncze logi
+  per_run       metryki per przebieg (conv.compute_run_metrics)
+
+Widok rejestrowany jest dopiero, gdy zapytanie go używa, więc
+SELECT na `results` nie czyta logów. Z --dataset (bez --where) DuckDB
+czyta Parquet bezpośrednio, ale w tej samej postaci co ramki z
+Workspace: InstanceId / RunId numerowane ciągle przez wszystkie sesje,
+w `results` tylko instancje z kompletem algorytmów. Przykład
+(proporcjatras.py):
+
+  SELECT Algorithm, Range, COUNT(DISTINCT RunId) AS Runs
+  FROM convergence GROUP BY Algorithm, Range
+
+Błąd silnika (np. GROUP BY ALL na sqlite) wychodzi jako ValueError.
+"""
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .workspace import Workspace
+
+
+def _with_range(df):
+    from .dataset import range_keys
+
+    df = df.copy()
+    df["Range"] = range_keys(df["Manhattan"])
+    return df
+
+
+class QuerySession:
+    """Połączenie z silnikiem i leniwie rejestrowane widoki danych z Workspace."""
+
+    def __init__(self, ws: Workspace, engine: str = "auto"):
+        self.ws = ws
+        self.engine = _pick_engine(engine)
+        if self.engine == "duckdb":
+            import duckdb
+
+            self.conn = duckdb.connect(":memory:")
+        else:
+            import sqlite3
+
+            self.conn = sqlite3.connect(":memory:")
+        self.registered: List[str] = []
+        self.sources: Dict[str, Callable] = {
+            "results": lambda: _with_range(ws.instances),
+            "convergence": self._convergence,
+            "per_run": lambda: ws.per_run,
+        }
+        for alg in ws.log_paths:
+            self.sources[f"log_{alg.lower()}"] = (lambda a: lambda: _with_range(ws.convergence[a]))(alg)
+
+    def _convergence(self):
+        import pandas as pd
+
+        parts = [_with_range(df).assign(Algorithm=alg) for alg, df in self.ws.convergence.items()]
+        return pd.concat(parts, ignore_index=True)
+
+    def tables(self) -> List[str]:
+        return sorted(self.sources)
+
+    def _parquet_view(self, name: str) -> bool:
+        """
+        Z --dataset (bez --where) DuckDB czyta pliki Parquet bezpośrednio, z
+        odcinaniem partycji. Identyfikatory zapisane są per sesja, więc widok
+        numeruje je od nowa (jak dataset._renumber), a `results` odrzuca
+        instancje bez kompletu algorytmów (jak tab.assign_instances).
+        """
+        ws = self.ws
+        if self.engine != "duckdb" or not ws.dataset or ws.filters or name not in ("results", "convergence"):
+            return False
+        pattern = str(Path(ws.dataset) / name / "**" / "*.parquet").replace("'", "''")
+        source = f"read_parquet('{pattern}', hive_partitioning = true)"
+        if name == "results":
+            self.conn.execute(f"""
+                CREATE VIEW results AS
+                WITH raw AS (
+                    SELECT * EXCLUDE (InstanceId),
+                           CAST(dense_rank() OVER (ORDER BY Session, InstanceId) - 1 AS INTEGER) AS InstanceId
+                    FROM {source}
+                ),
+                complete AS (
+                    SELECT InstanceId FROM raw GROUP BY InstanceId
+                    HAVING COUNT(DISTINCT Algorithm) = (SELECT COUNT(DISTINCT Algorithm) FROM raw)
+                )
+                SELECT * EXCLUDE (Row, Session) FROM raw
+                WHERE InstanceId IN (SELECT InstanceId FROM complete)
+                ORDER BY Session, Row""")
+        else:
+            self.conn.execute(f"""
+                CREATE VIEW convergence AS
+                SELECT * EXCLUDE (Row, Session, RunId),
+                       CAST(dense_rank() OVER (PARTITION BY Algorithm ORDER BY Session, RunId) - 1 AS INTEGER)
+                           AS RunId
+                FROM {source}""")
+        return True
+
+    def _register(self, name: str) -> None:
+        if name in self.registered:
+            return
+        if not self._parquet_view(name):
+            df = self.sources[name]()
+            if self.engine == "duckdb":
+                self.conn.register(name, df)
+            else:
+                # sqlite nie zna category – kopia z tekstem
+                cats = df.select_dtypes("category").columns
+                df.astype({c: str for c in cats}).to_sql(name, self.conn, index=False)
+        self.registered.append(name)
+
+    def query(self, sql: str):
+        """Wykonuje zapytanie i zwraca DataFrame; błąd silnika (składnia, brak kolumny) -> ValueError."""
+        import pandas as pd
+
+        for name in self.sources:
+            if re.search(rf"\b{re.escape(name)}\b", sql, flags=re.IGNORECASE):
+                self._register(name)
+        if self.engine == "duckdb":
+            import duckdb
+
+            try:
+                return self.conn.execute(sql).df()
+            except duckdb.Error as exc:
+                raise ValueError(f"duckdb: {exc}") from exc
+        try:
+            return pd.read_sql_query(sql, self.conn)
+        except pd.errors.DatabaseError as exc:
+            raise ValueError(f"sqlite: {exc}") from exc
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _pick_engine(engine: str) -> str:
+    if engine not in ("auto", "duckdb", "sqlite"):
+        raise ValueError(f"Nieznany silnik SQL: {engine!r} (auto, duckdb, sqlite)")
+    if engine == "sqlite":
+        return engine
+    try:
+        import duckdb  # noqa: F401
+        return "duckdb"
+    except ImportError:
+        if engine == "duckdb":
+            raise ImportError("Silnik duckdb wymaga pakietu duckdb: pip install duckdb")
+        print("[WARN] Brak duckdb – używam sqlite3 (wolniej, ramki kopiowane do bazy)")
+        return "sqlite"
+
+
+def run_query(ws: Workspace, sql: str, engine: str = "auto", output: Optional[Path] = None):
+    """Jedno zapytanie: wynik jako DataFrame, opcjonalnie zapis do CSV (';')."""
+    session = QuerySession(ws, engine=engine)
+    try:
+        df = session.query(sql)
+    finally:
+        session.close()
+    if output:
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(output, sep=";", index=False)
+        print(f"[INFO] Zapisano {output} ({len(df)} wierszy)")
+    return df
@@ -0,0 +1,239 @@
+"""
+Etapy potoku. Każdy etap dostaje Workspace i zapisuje wyniki w ws.out_dir,
+pod tymi samymi nazwami, które produkowały pojedyncze skrypty.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .instrument import stage
+from .scripts import load_script
+from .workspace import Workspace
+
+
+# nazwa pliku -> (podpis, etykieta LaTeX, format liczb)
+TABLES: Dict[str, Tuple[str, str, str]] = {
+    "table_basic_stats": (
+        "Statystyki opisowe długości ścieżki dla poszczególnych algorytmów.",
+        "tab:basic_stats", "%.3f"),
+    "table_win_rate": (
+        "Odsetek instancji, w których algorytm był najlepszy (win rate).",
+        "tab:win_rate", "%.3f"),
+    "table_ranks": (
+        "Średni ranking algorytmów na instancjach (1 = najlepszy).",
+        "tab:ranks", "%.3f"),
+    "table_dominance_counts": (
+        "Macierz dominacji: liczba instancji, w których algorytm w wierszu był lepszy niż algorytm w kolumnie.",
+        "tab:dominance_counts", "%.0f"),
+    "table_dominance_percent": (
+        "Macierz dominacji: odsetek instancji, w których algorytm w wierszu był lepszy niż algorytm w kolumnie.",
+        "tab:dominance_percent", "%.3f"),
+    "table_pareto_membership": (
+        "Udział algorytmów we froncie Pareto (długość ścieżki, obroty, czas planowania): "
+        "per instancja i w puli wszystkich wyników.",
+        "tab:pareto_membership", "%.3f"),
+    "table_pareto_hypervolume": (
+        "Wyłączny wkład algorytmów do hypervolume frontu Pareto instancji.",
+        "tab:pareto_hypervolume", "%.4f"),
+    "table_basic_stats_sketch": (
+        "Statystyki opisowe długości ścieżki ze szkiców KLL (kwantyle przybliżone, "
+        "count/mean/std/min/max dokładne).",
+        "tab:basic_stats_sketch", "%.3f"),
+    "AlgorithmsComparisonTable": (
+        "Porównanie algorytmów ACO, FA oraz CHA na podstawie logów konwergencji.",
+        "tab:alg_comparison_convergence", "%.3f"),
+    "table_time_metrics": (
+        "Średnie czasy do celu i do optimum (bez uwzględnienia cenzurowania).",
+        "tab:time_metrics", "%.3f"),
+    "table_survival": (
+        "Czas do celu, optimum i k×optimum: RMST i mediana Kaplana–Meiera "
+        "z cenzurowaniem na 1000 ms.",
+        "tab:survival", "%.3f"),
+}
+
+
+def write_table(df, out_dir: Path, name: str, latex: bool = True) -> List[Path]:
+    """Zapisuje tabelę jako CSV (';') i opcjonalnie LaTeX; zwraca zapisane ścieżki."""
+    caption, label, float_format = TABLES[name]
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = [out_dir / f"{name}.csv"]
+    df.to_csv(paths[0], sep=";")
+    if latex:
+        paths.append(out_dir / f"{name}.tex")
+        df.to_latex(paths[1], caption=caption, label=label, float_format=float_format)
+    print(f"[INFO] Zapisano {name}." + ("(csv/tex)" if latex else "csv"))
+    return paths
+
+
+# ============================
+# 1. TABELE (dane.csv)
+# ============================
+
+def run_tables(ws: Workspace, latex: bool = True) -> None:
+    """Tabele z tab.py i pareto.py."""
+    tab = load_script("tab")
+    pareto = load_script("pareto")
+
+    df = ws.instances
+    alg_col = ws.alg_col
+    metric = tab.find_metric_column(df)
+
+    basic_stats = tab.compute_basic_stats(df, alg_col, metric)
+    win_table, rank_table = tab.compute_win_rate_and_ranks(df, alg_col, metric)
+    dom_counts, dom_percent = tab.compute_dominance_matrix(df, alg_col, metric)
+    membership, hv_table = pareto.compute_pareto_tables(df, alg_col)
+
+    write_table(basic_stats, ws.out_dir, "table_basic_stats", latex=latex)
+    write_table(win_table, ws.out_dir, "table_win_rate", latex=latex)
+    write_table(rank_table, ws.out_dir, "table_ranks", latex=latex)
+    write_table(dom_counts, ws.out_dir, "table_dominance_counts", latex=latex)
+    write_table(dom_percent, ws.out_dir, "table_dominance_percent", latex=latex)
+    write_table(membership, ws.out_dir, "table_pareto_membership", latex=latex)
+    write_table(hv_table, ws.out_dir, "table_pareto_hypervolume", latex=latex)
+
+
+# ============================
+# 2. KONWERGENCJA (logi *ConvergenceLog.csv)
+# ============================
+
+def run_convergence(ws: Workspace, latex: bool = True) -> None:
+    """Tabela porównawcza z tab2.py, metryki per przebieg i analiza przeżycia z conv.py."""
+    import pandas as pd
+
+    tab2 = load_script("tab2")
+    conv = load_script("conv")
+
+    runs = pd.concat([tab2.summarize_runs(df) for df in ws.convergence.values()],
+                     ignore_index=True)
+    comparison = tab2.aggregate_algorithm_stats(runs)
+    write_table(comparison, ws.out_dir, "AlgorithmsComparisonTable", latex=latex)
+
+    per_run = ws.per_run
+    per_run.to_csv(ws.output("convergence_per_run.csv"), sep=";", index=False)
+    print("[INFO] Zapisano convergence_per_run.csv")
+
+    time_summary = conv.summarize_time_metrics(per_run).set_index("Algorithm").round(3)
+    write_table(time_summary, ws.out_dir, "table_time_metrics", latex=latex)
+
+    survival = conv.summarize_survival_metrics(per_run, timeout_ms=1000.0)
+    write_table(survival, ws.out_dir, "table_survival", latex=latex)
+
+
+# ============================
+# 3. WYKRESY
+# ============================
+
+def use_headless_backend() -> None:
+    """Backend Agg – plt.show() w skryptach nie otwiera okien, tylko ostrzega."""
+    import warnings
+    import matplotlib
+
+    matplotlib.use("Agg")
+    warnings.filterwarnings("ignore", message=".*non-interactive.*")
+
+
+def save_open_figures(out_dir: Path, name: str) -> List[Path]:
+    """Zapisuje wszystkie otwarte figury jako PNG i je zamyka."""
+    import matplotlib.pyplot as plt
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    nums = plt.get_fignums()
+    paths = []
+    for i, num in enumerate(nums):
+        fig = plt.figure(num)
+        suffix = f"_{i + 1}" if len(nums) > 1 else ""
+        paths.append(out_dir / f"{name}{suffix}.png")
+        with stage(f"render:{name}{suffix}"):
+            fig.savefig(paths[-1], dpi=150)
+        plt.close(fig)
+    return paths
+
+
+def run_plots(ws: Workspace, subdir: str = "plots_report") -> None:
+    """Rysuje wykresy z etap1+3.py i conv.py do plików PNG (bez okien)."""
+    use_headless_backend()
+
+    etap = load_script("etap1+3")
+    conv = load_script("conv")
+
+    df = ws.trajectories
+    df_ok, _ = etap.compute_metrics(df)
+    curves = {alg: conv.build_optratio_and_improvement_curves(d, dt=50.0, max_time=1000.0)
+              for alg, d in ws.convergence.items()}
+
+    plots: List[tuple] = [
+        ("01_mean_path_vs_manhattan_all", lambda: etap.plot_mean_path_vs_manhattan_all(df_ok)),
+        ("02_mean_path_vs_manhattan_separate", lambda: etap.plot_mean_path_vs_manhattan_separate(df_ok)),
+        ("03_boxplots_nadwyzka", lambda: etap.plot_boxplots_nadwyzka(df_ok)),
+        ("04_aco_failures", lambda: etap.plot_aco_failures_two_plots(df, bins=12)),
+        ("05_opt_vs_path_common", lambda: etap.plot_opt_vs_path_common(df_ok, bins=15)),
+        ("06_opt_vs_path_separate", lambda: etap.plot_opt_vs_path_separate(df_ok, bins=15)),
+        ("07_rank_distributions", lambda: etap.plot_rank_distributions(df_ok)),
+        ("08_path_distribution_vs_manhattan", lambda: etap.plot_path_distribution_vs_manhattan(df_ok, bins=20)),
+        ("09_optratio_time_by_range", lambda: conv.plot_optratio_time_by_range_all(curves)),
+        ("10_improvementpct_time_by_range", lambda: conv.plot_improvementpct_time_by_range_all(curves)),
+    ]
+    for name, draw in plots:
+        draw()
+        save_open_figures(ws.out_dir / subdir, name)
+    print(f"[INFO] Zapisano {len(plots)} wykresów w {ws.out_dir / subdir}")
+
+
+def run_density(ws: Workspace, subdir: str = "plots_manhattan", log: bool = True,
+                chunksize: int = 1_000_000) -> None:
+    """
+    Mapy gęstości (Manhattan vs długość/obroty/rozciągnięcie/nadwyżka) zamiast
+    scatterów: dane.csv czytany blokami, pamięć i czas rysowania nie rosną z liczbą prób.
+    """
+    from .raster import draw_density_plots
+
+    use_headless_backend()
+    count = 0
+    for name, _ in draw_density_plots(ws.results_source, log=log, chunksize=chunksize):
+        save_open_figures(ws.out_dir / subdir, name)
+        count += 1
+    print(f"[INFO] Zapisano {count} map gęstości w {ws.out_dir / subdir}")
+
+
+def run_sketch(ws: Workspace, latex: bool = True, subdir: str = "plots_sketch", k: int = 200,
+               by: Optional[str] = None, chunksize: int = 1_000_000,
+               merge: Sequence[Path] = (), save: Optional[Path] = None) -> None:
+    """
+    Statystyki, boxploty nadwyżki i ECDF ze szkiców kwantyli (kiva_stats.sketch):
+    dane.csv czytany blokami, pamięć nie zależy od liczby prób.
+    `merge` dołącza szkice zapisane wcześniej (inne pliki / procesy), `save` zapisuje wynik.
+    """
+    from .sketch import SketchSet, plot_boxplots, plot_ecdf, sketch_results
+
+    sketches = sketch_results(ws.results_source, by=by, k=k, chunksize=chunksize)
+    for path in merge:
+        sketches.merge(SketchSet.load(path))
+        print(f"[INFO] Dołączono szkice z {path}")
+    if save:
+        sketches.save(save)
+        print(f"[INFO] Zapisano szkice: {save}")
+
+    write_table(sketches.basic_stats("PathLength"), ws.out_dir, "table_basic_stats_sketch", latex=latex)
+
+    use_headless_backend()
+    plots: List[tuple] = [
+        ("03_boxplots_nadwyzka", lambda: plot_boxplots(sketches, [
+            ("Nadwyżka", "Nadwyżka [kroki]"), ("Nadwyżka%", "Nadwyżka [%]")])),
+        ("04_ecdf_pathlength", lambda: plot_ecdf(sketches, "PathLength", "Długość ścieżki [kroki]")),
+        ("05_ecdf_rotations", lambda: plot_ecdf(sketches, "Rotations", "Liczba obrotów")),
+        ("06_ecdf_stretch", lambda: plot_ecdf(sketches, "Optymalność", "Ścieżka / Manhattan")),
+    ]
+    for name, draw in plots:
+        draw()
+        save_open_figures(ws.out_dir / subdir, name)
+    print(f"[INFO] Zapisano {len(plots)} wykresów ze szkiców w {ws.out_dir / subdir}")
+
+
+STAGES: Dict[str, Callable[..., None]] = {
+    "tables": run_tables,
+    "convergence": run_convergence,
+    "plots": run_plots,
+    "density": run_density,
+    "sketch": run_sketch,
+}
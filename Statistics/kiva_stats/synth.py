@@ -0,0 +1,450 @@
+"""
+Generator syntetycznych dane.csv i *ConvergenceLog.csv do testów skali.
+
+Profil (zwykły dict, zapisywalny jako JSON) jest dopasowywany do obecnych
+plików: mieszanka zakresów Manhattan (classify_range), skuteczność,
+PathLength/Manhattan i obroty per algorytm i zakres, a dla logów –
+liczba wierszy i iteracji oraz czas przebiegu, odstępy między wierszami, hazard
+poprawy w zależności od numeru iteracji i wielkość poprawy.
+Rozkłady są zapisane jako kwantyle i losowane przez odwrotną dystrybuantę.
+
+Zapis idzie blokami po chunk_rows wierszy: wiersze są składane jako
+macierz bajtów o stałej szerokości pól + maska znaków, a `mat[mask]`
+daje gotowy tekst CSV bez formatowania wiersz po wierszu.
+"""
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+N_QUANTILES = 64
+RANGE_BINS = (40, 80)            # jak classify_range: <=40, <=80, >80
+HAZARD_BINS = 12                 # przedziały log2 numeru iteracji: 1, 2-3, 4-7, ...
+CHUNK_ROWS = 1 << 15              # macierz bajtów bloku mieści się w cache (większe bloki są wolniejsze)
+BOM = "\ufeff".encode("utf-8")
+RESULTS_HEADER = b"Algorithm;TimeMs;PathLength;Rotations;Success;Step;Manhattan\n"
+LOG_HEADER = b"Algorithm;Iteration;TimeMs;Manhattan;Fitness;BestPathLength\n"
+
+
+# ============================
+# 1. DOPASOWANIE PROFILU
+# ============================
+
+def _quantiles(values) -> List[float]:
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return [0.0] * (N_QUANTILES + 1)
+    return np.quantile(values, np.linspace(0.0, 1.0, N_QUANTILES + 1)).round(6).tolist()
+
+
+def _range_index(manh: np.ndarray) -> np.ndarray:
+    return np.searchsorted(np.asarray(RANGE_BINS), manh, side="left")
+
+
+def fit_results_profile(df, alg_col: str) -> Dict:
+    """Profil dane.csv (ramka po tab.assign_instances, czyli z InstanceId)."""
+    inst = df.groupby("InstanceId")[["Manhattan", "Step"]].first()
+    manh = inst["Manhattan"].to_numpy()
+    ranges = _range_index(manh)
+
+    profile = {
+        "range_p": [float(np.mean(ranges == r)) for r in range(len(RANGE_BINS) + 1)],
+        "manhattan": [_quantiles(manh[ranges == r]) for r in range(len(RANGE_BINS) + 1)],
+        "step": _quantiles(inst["Step"]),
+        "algorithms": {},
+    }
+    df_range = _range_index(df["Manhattan"].to_numpy())
+    for alg in df[alg_col].drop_duplicates():
+        is_alg = (df[alg_col] == alg).to_numpy()
+        per_range = []
+        for r in range(len(RANGE_BINS) + 1):
+            sub = df[is_alg & (df_range == r)]
+            ok = sub[sub["Success"] & (sub["PathLength"] > 0)]
+            per_range.append({
+                "success": float(sub["Success"].mean()) if len(sub) else 1.0,
+                "ratio": _quantiles(ok["PathLength"] / ok["Manhattan"]),
+                "rotations": _quantiles(ok["Rotations"]),
+                "time_ms": _quantiles(sub["TimeMs"]),
+            })
+        profile["algorithms"][str(alg)] = per_range
+    return profile
+
+
+def fit_log_profile(df, label: str) -> Dict:
+    """
+    Profil jednego logu konwergencji (ramka z conv.load_algorithm_log, z RunId).
+    Wiersz logu to zapisana iteracja; hazard poprawy liczony jest po numerze wiersza w przebiegu.
+    """
+    df = df.sort_index()
+    run = df["RunId"].to_numpy()
+    first = np.r_[True, run[1:] != run[:-1]]
+    starts = np.flatnonzero(first)
+    counts = np.diff(np.r_[starts, len(df)])
+
+    time_ms = df["TimeMs"].to_numpy(dtype=float)
+    length = df["BestPathLength"].to_numpy(dtype=float)
+    manh = df["Manhattan"].to_numpy(dtype=float)
+    iteration = np.arange(len(df)) - np.repeat(starts, counts)  # numer wiersza w przebiegu, od 0
+
+    last = np.r_[starts[1:], len(df)] - 1
+    run_end = time_ms[last]
+    dt = np.diff(time_ms, prepend=0.0)
+    dt[first] = time_ms[first]
+    dt_rel = dt / np.repeat(run_end / counts, counts)
+
+    prev = np.r_[np.nan, length[:-1]]
+    improved = ~first & (length < prev)
+    bins = np.minimum(np.floor(np.log2(iteration + 1)).astype(int), HAZARD_BINS - 1)
+    rows_per_bin = np.bincount(bins[~first], minlength=HAZARD_BINS)
+    events_per_bin = np.bincount(bins[improved], minlength=HAZARD_BINS)
+    hazard = np.where(rows_per_bin > 0, events_per_bin / np.maximum(rows_per_bin, 1), 0.0)
+
+    # log nie zapisuje każdej iteracji – numery mają przerwy
+    it_num = df["Iteration"].to_numpy(dtype=float)
+    it_gap = np.diff(it_num, prepend=0.0)
+
+    fitness_c = df["Fitness"].to_numpy(dtype=float) * length / manh
+    return {
+        "label": label,
+        "rows": _quantiles(counts),
+        "first_iteration": _quantiles(it_num[first]),
+        "iteration_gap": _quantiles(it_gap[~first]),
+        "run_ms": _quantiles(run_end),
+        "dt_rel": _quantiles(dt_rel[~first]),
+        "first_dt_rel": _quantiles(dt_rel[first]),
+        "manhattan": _quantiles(manh[first]),
+        "start_ratio": _quantiles(length[first] / manh[first]),
+        "final_ratio": _quantiles(length[last] / manh[last]),
+        "hazard": hazard.round(6).tolist(),
+        "shrink": _quantiles(length[improved] / prev[improved]),
+        "fitness_c": float(np.nanmedian(fitness_c)),
+    }
+
+
+def fit_profile(results_path: Path, log_paths: Dict[str, Path]) -> Dict:
+    """Dopasowuje profil do istniejących plików (te same loadery co raport)."""
+    import pandas as pd
+
+    from .scripts import load_script
+
+    tab = load_script("tab")
+    conv = load_script("conv")
+    df = tab.load_data(Path(results_path))
+    alg_col = tab.find_algorithm_column(df)
+    df = tab.assign_instances(df, alg_col)
+
+    profile = {"results": fit_results_profile(df, alg_col), "logs": {}}
+    for alg, path in log_paths.items():
+        label = pd.read_csv(path, sep=";", usecols=["Algorithm"], nrows=1)["Algorithm"].iloc[0]
+        log = conv.load_algorithm_log(path, alg)
+        profile["logs"][alg] = fit_log_profile(log, str(label))
+    return profile
+
+
+def save_profile(profile: Dict, path: Path) -> None:
+    Path(path).write_text(json.dumps(profile, indent=1), encoding="utf-8")
+
+
+def load_profile(path: Path) -> Dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+# ============================
+# 2. LOSOWANIE
+# ============================
+
+def _sample_table(rng: np.random.Generator, table: np.ndarray, group) -> np.ndarray:
+    """
+    Losowanie z rozkładów zadanych kwantylami (odwrotna dystrybuanta, liniowo).
+    table[g] to kwantyle rozkładu g; jedno przejście dla wszystkich grup naraz.
+    """
+    n = len(group)
+    width = table.shape[1]
+    u = rng.random(n) * (width - 1)
+    i = np.minimum(u.astype(np.intp), width - 2)
+    flat = np.ascontiguousarray(table, dtype=float).ravel()
+    pos = np.asarray(group, dtype=np.intp) * width + i          # indeksowanie 1-D zamiast table[group, i]
+    lo = flat[pos]
+    return lo + (u - i) * (flat[pos + 1] - lo)
+
+
+def _sample(rng: np.random.Generator, quantiles: List[float], n: int) -> np.ndarray:
+    return _sample_table(rng, np.asarray([quantiles], dtype=float), np.zeros(n, dtype=np.intp))
+
+
+# ============================
+# 3. KODOWANIE CSV
+# ============================
+# Każde pole to macierz bajtów [n, szerokość]; bajt 0 oznacza "brak znaku"
+# (cyfry i litery nigdy nie są zerem), więc wiersz to konkatenacja pól,
+# a tekst pliku to niezerowe bajty macierzy w kolejności wierszy.
+
+def _const(n: int, text: bytes) -> np.ndarray:
+    return np.broadcast_to(np.frombuffer(text, dtype=np.uint8), (n, len(text)))
+
+
+# Cyfry liczb 0..9999 z zerami wiodącymi zamienionymi na 0, per minimalna szerokość.
+# Tablice trzymane jako uint32 (4 bajty cyfr = jedno słowo): pobranie to indeksowanie
+# 1-D zamiast wycinania wierszy macierzy bajtów, kilkanaście razy szybsze.
+_LIMB = 10_000
+_DIGITS = np.array([list(f"{i:04d}".encode()) for i in range(_LIMB)], dtype=np.uint8)
+_N_DIGITS = np.array([len(str(i)) for i in range(_LIMB)])
+_PADDED = [np.where(np.arange(4) >= 4 - np.maximum(_N_DIGITS, w)[:, None], _DIGITS, 0).astype(np.uint8)
+           for w in range(5)]
+_DIGITS_W = _DIGITS.view(np.uint32).ravel()
+_PADDED_W = [p.view(np.uint32).ravel() for p in _PADDED]
+
+
+def _bytes(words: np.ndarray, width: int) -> np.ndarray:
+    """Słowa -> macierz bajtów [n, szerokość słowa], ostatnie `width` kolumn (cyfry są wyrównane do prawej)."""
+    size = words.dtype.itemsize
+    return words.view(np.uint8).reshape(-1, size)[:, size - width:]
+
+
+def _uint(values: np.ndarray, min_width: int = 1) -> np.ndarray:
+    """
+    Liczby całkowite >= 0 bez zer wiodących (min_width > 1 dopełnia zerami).
+    Cyfry pochodzą z tablicy dla 0..9999 – jedno indeksowanie zamiast dzielenia per cyfra.
+    """
+    v = np.asarray(values, dtype=np.int64)
+    top = int(v.max()) if len(v) else 0
+    if top < _LIMB:
+        return _bytes(_PADDED_W[min_width][v], max(min_width, len(str(top))))
+    high, low = np.divmod(v, _LIMB)
+    has_high = high > 0
+    h_digits = _uint(high, min_width=max(0, min_width - 4)) * has_high[:, None]
+    l_words = np.where(has_high, _DIGITS_W[low], _PADDED_W[min(min_width, 4)][low])
+    return np.hstack([h_digits, _bytes(l_words, 4)])
+
+
+def _fixed(values: np.ndarray, decimals: int, sep: bytes) -> List[np.ndarray]:
+    """Liczba z dokładnie `decimals` miejscami po separatorze (',' lub '.')."""
+    scaled = np.rint(np.asarray(values, dtype=float) * 10 ** decimals).astype(np.int64)
+    whole, frac = np.divmod(scaled, 10 ** decimals)
+    return [_uint(whole), _const(len(scaled), sep), _uint(frac, min_width=decimals)]
+
+
+def _labels(codes: np.ndarray, labels: List[str]) -> np.ndarray:
+    width = max(len(s) for s in labels)
+    size = 8 if width <= 8 else -(-width // 8) * 8
+    table = np.zeros((len(labels), size), dtype=np.uint8)
+    for i, s in enumerate(labels):
+        table[i, size - len(s):] = np.frombuffer(s.encode("ascii"), dtype=np.uint8)
+    if size == 8:                                    # etykiety do 8 znaków: jedno słowo uint64 na wiersz
+        return _bytes(table.view(np.uint64).ravel()[codes], width)
+    return table[codes][:, size - width:]
+
+
+def _row(n: int, *cols) -> np.ndarray:
+    """Pola rozdzielone ';', zakończone '\\n' – jedna macierz [n, suma szerokości]."""
+    fields = []
+    for i, col in enumerate(cols):
+        if i:
+            fields.append(_const(n, b";"))
+        fields.extend(col if isinstance(col, list) else [col])
+    fields.append(_const(n, b"\n"))
+    return np.concatenate(fields, axis=1)
+
+
+def _encode(mat: np.ndarray) -> bytes:
+    flat = mat.ravel()
+    return np.compress(flat != 0, flat).tobytes()  # szybsze niż mat[mat != 0]
+
+
+# ============================
+# 4. GENEROWANIE
+# ============================
+
+def results_chunk(rng: np.random.Generator, profile: Dict, n_instances: int) -> bytes:
+    """n_instances trajektorii, każda jako blok wierszy (po jednym na algorytm)."""
+    algs = list(profile["algorithms"])
+    k = len(algs)
+    n = n_instances * k
+
+    ranges = rng.choice(len(profile["range_p"]), size=n_instances, p=profile["range_p"])
+    manh_inst = np.maximum(1, np.rint(_sample_table(rng, np.array(profile["manhattan"]), ranges)))
+    step_inst = np.rint(_sample(rng, profile["step"], n_instances))
+
+    codes = np.tile(np.arange(k), n_instances)
+    manh = np.repeat(manh_inst, k)
+    rng_idx = np.repeat(ranges, k)
+    group = codes * len(profile["range_p"]) + rng_idx
+    tables = [profile["algorithms"][a][r] for a in algs for r in range(len(profile["range_p"]))]
+
+    success = rng.random(n) < np.array([t["success"] for t in tables])[group]
+    ratio = _sample_table(rng, np.array([t["ratio"] for t in tables]), group)
+    path = np.where(success, np.maximum(manh, np.rint(manh * ratio)), 0)
+    rotations = np.where(success, np.rint(_sample_table(rng, np.array([t["rotations"] for t in tables]), group)), 0)
+    time_ms = _sample_table(rng, np.array([t["time_ms"] for t in tables]), group)
+
+    return _encode(_row(
+        n,
+        _labels(codes, algs),
+        _fixed(time_ms, 2, b","),
+        _uint(path),
+        _uint(rotations),
+        _labels(success.astype(np.int8), ["False", "True"]),
+        _uint(np.repeat(step_inst, k)),
+        _uint(manh),
+    ))
+
+
+def log_chunk(rng: np.random.Generator, log: Dict, n_runs: int) -> Tuple[bytes, int]:
+    """n_runs pełnych przebiegów jednego algorytmu; zwraca (tekst, liczba wierszy)."""
+    counts = np.maximum(1, np.rint(_sample(rng, log["rows"], n_runs))).astype(np.int64)
+    run_ms = _sample(rng, log["run_ms"], n_runs)
+    manh_run = np.maximum(1, np.rint(_sample(rng, log["manhattan"], n_runs)))
+    start_len = np.maximum(manh_run, np.rint(manh_run * _sample(rng, log["start_ratio"], n_runs)))
+
+    n = int(counts.sum())
+    starts = np.cumsum(counts) - counts
+    first = np.zeros(n, dtype=bool)
+    first[starts] = True
+    ends = starts + counts - 1
+    iteration = np.arange(n) - np.repeat(starts, counts)
+
+    def run_cumsum(x: np.ndarray) -> np.ndarray:
+        csum = np.cumsum(x)
+        return csum - np.repeat(csum[starts] - x[starts], counts)
+
+    # czas: odstępy przeskalowane tak, żeby przebieg kończył się dokładnie w run_ms
+    dt = _sample_table(rng, np.array([log["dt_rel"], log["first_dt_rel"]]), first.view(np.int8))
+    time_ms = run_cumsum(dt)
+    time_ms *= np.repeat(run_ms / time_ms[ends], counts)
+
+    # numery iteracji: pierwsza + przerwy >= 1
+    gap = np.maximum(1, np.rint(_sample_table(rng, np.array([log["iteration_gap"], log["first_iteration"]]),
+                                              first.view(np.int8))))
+    iter_num = run_cumsum(gap)
+
+    # długość: poprawy w chwilach z hazardu, wielkości z rozkładu shrink przeskalowane
+    # tak, żeby przebieg kończył się w wylosowanym final_ratio * Manhattan
+    hazard = np.asarray(log["hazard"])
+    bins = np.minimum(np.floor(np.log2(iteration + 1)).astype(int), len(hazard) - 1)
+    improved = ~first & (rng.random(n) < hazard[bins])
+    weight = np.zeros(n)
+    weight[improved] = -np.log(_sample(rng, log["shrink"], int(improved.sum())))
+    progress = run_cumsum(weight)
+    total = np.repeat(progress[ends], counts)
+    progress = np.divide(progress, total, out=np.zeros(n), where=total > 0)
+
+    final_len = np.clip(np.rint(manh_run * _sample(rng, log["final_ratio"], n_runs)), manh_run, start_len)
+    log_start = np.repeat(np.log(start_len), counts)
+    log_len = log_start + progress * (np.repeat(np.log(final_len), counts) - log_start)
+    manh = np.repeat(manh_run, counts)
+    length = np.maximum(manh, np.rint(np.exp(log_len)))
+    fitness = log["fitness_c"] * manh / length
+
+    text = _encode(_row(
+        n,
+        _labels(np.zeros(n, dtype=np.int8), [log["label"]]),
+        _uint(iter_num),
+        _fixed(time_ms, 2, b","),
+        _uint(manh),
+        _fixed(fitness, 4, b"."),
+        _uint(length),
+    ))
+    return text, n
+
+
+def _results_task(profile: Dict, n_instances: int, seed) -> Tuple[bytes, int]:
+    chunk = results_chunk(np.random.default_rng(seed), profile, n_instances)
+    return chunk, n_instances * len(profile["algorithms"])
+
+
+def _log_task(log: Dict, n_runs: int, seed) -> Tuple[bytes, int]:
+    return log_chunk(np.random.default_rng(seed), log, n_runs)
+
+
+def _write_chunks(path: Path, header: bytes, task, profile: Dict, sizes: List[int],
+                  seed, jobs: int) -> Tuple[int, int]:
+    """
+    Zapisuje bloki w kolejności. Każdy blok ma własne ziarno z SeedSequence,
+    więc wynik nie zależy od jobs. Przy jobs > 1 w locie jest najwyżej 2*jobs bloków.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(len(sizes))
+    rows, written = 0, len(header)
+    with open(path, "wb") as f:
+        f.write(header)
+        if jobs <= 1:
+            for size, ss in zip(sizes, seeds):
+                chunk, n = task(profile, size, ss)
+                f.write(chunk)
+                rows += n
+                written += len(chunk)
+            return rows, written
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending = deque()
+            todo = iter(zip(sizes, seeds))
+            for size, ss in todo:
+                pending.append(pool.submit(task, profile, size, ss))
+                if len(pending) >= 2 * jobs:
+                    break
+            while pending:
+                chunk, n = pending.popleft().result()
+                f.write(chunk)
+                rows += n
+                written += len(chunk)
+                nxt = next(todo, None)
+                if nxt is not None:
+                    pending.append(pool.submit(task, profile, *nxt))
+    return rows, written
+
+
+def _split(total: int, per_chunk: int) -> List[int]:
+    return [min(per_chunk, total - lo) for lo in range(0, total, per_chunk)]
+
+
+def write_results(profile: Dict, path: Path, n_rows: int, seed=0,
+                  chunk_rows: int = CHUNK_ROWS, jobs: int = 1) -> Tuple[int, int]:
+    """Zapisuje n_rows wierszy zaokrąglone w górę do pełnych trajektorii. Zwraca (wiersze, bajty)."""
+    k = len(profile["algorithms"])
+    sizes = _split(-(-n_rows // k), max(1, chunk_rows // k))
+    return _write_chunks(path, RESULTS_HEADER, _results_task, profile, sizes, seed, jobs)
+
+
+def write_log(log: Dict, path: Path, n_rows: int, seed=0,
+              chunk_rows: int = CHUNK_ROWS, jobs: int = 1) -> Tuple[int, int]:
+    """
+    Zapisuje pełne przebiegi; liczba przebiegów = n_rows / średnia liczba wierszy przebiegu,
+    więc wierszy jest ok. n_rows. Zwraca (wiersze, bajty).
+    """
+    mean_rows = max(1.0, float(np.mean(log["rows"])))
+    n_runs = max(1, round(n_rows / mean_rows))
+    sizes = _split(n_runs, max(1, int(chunk_rows / mean_rows)))
+    return _write_chunks(path, BOM + LOG_HEADER, _log_task, log, sizes, seed, jobs)
+
+
+def generate(profile: Dict, out_dir: Path, n_rows: int, log_rows: Optional[int] = None,
+             seed: int = 0, jobs: int = 1, results_name: str = "dane.csv",
+             log_names: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[int, int, float]]:
+    """
+    Zapisuje dane.csv i logi do out_dir.
+    Zwraca {plik: (wiersze, bajty, sekundy)}.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    log_rows = n_rows if log_rows is None else log_rows
+    log_names = log_names or {alg: f"{alg}ConvergenceLog.csv" for alg in profile["logs"]}
+    seeds = np.random.SeedSequence(seed).spawn(1 + len(profile["logs"]))
+
+    report = {}
+    t0 = time.perf_counter()
+    rows, size = write_results(profile["results"], out_dir / results_name, n_rows,
+                               seed=seeds[0], jobs=jobs)
+    report[results_name] = (rows, size, time.perf_counter() - t0)
+    for ss, (alg, log) in zip(seeds[1:], profile["logs"].items()):
+        if log_rows <= 0:
+            break
+        t0 = time.perf_counter()
+        rows, size = write_log(log, out_dir / log_names[alg], log_rows, seed=ss, jobs=jobs)
+        report[log_names[alg]] = (rows, size, time.perf_counter() - t0)
+    return report
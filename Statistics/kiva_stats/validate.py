@@ -0,0 +1,357 @@
+"""
+Walidacja plików wejściowych przed liczeniem metryk – jedno przejście
+blokami, bez pętli po wierszach.
+
+Logi konwergencji:
+  - etykieta Algorithm zgodna z plikiem (ACO: ACO/Ant, CHA: CHA/Camel, FA: FA/Firefly),
+  - zduplikowane przebiegi (hash wierszy przebiegu) w pliku i między plikami,
+  - granice przebiegów widoczne tylko po Iteration / Manhattan (dawny
+    podział po samym TimeMs skleiłby te przebiegi),
+  - mieszanie separatorów dziesiętnych (',' i '.') w jednej kolumnie,
+  - BestPathLength < Manhattan (ścieżka krótsza niż dolne ograniczenie).
+dane.csv:
+  - nieznane etykiety, mieszane separatory w TimeMs, niepoprawne Success,
+  - PathLength < Manhattan przy Success, bloki instancji bez kompletu algorytmów.
+
+Wynik: lista problemów z liczbą wierszy i zakresami numerów linii w pliku
+(linia 1 = nagłówek). Kolumny z przecinkiem dziesiętnym są czytane jako
+tekst – tylko tak widać mieszanie separatorów – i parsowane raz, wektorowo.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .segment import run_starts as find_run_starts
+
+LABEL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "ACO": ("ACO", "Ant"),
+    "CHA": ("CHA", "Camel"),
+    "FA": ("FA", "Firefly"),
+}
+LOG_NUMERIC = ("Iteration", "TimeMs", "Manhattan", "Fitness", "BestPathLength")
+RESULTS_NUMERIC = ("TimeMs", "PathLength", "Rotations", "Step", "Manhattan")
+MAX_RANGES = 10                         # tyle zakresów wierszy wypisujemy na problem
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+# ============================
+# 1. ZAKRESY WIERSZY
+# ============================
+
+class RowRanges:
+    """Zbiera wiersze spełniające warunek jako zakresy (łączone także między blokami)."""
+
+    def __init__(self):
+        self.count = 0
+        self.ranges: List[List[int]] = []
+
+    def add(self, mask: np.ndarray, offset: int) -> None:
+        self.add_rows(np.flatnonzero(mask) + offset)
+
+    def add_rows(self, idx: np.ndarray) -> None:
+        """Numery wierszy rosnąco (i większe niż w poprzednich wywołaniach)."""
+        if not len(idx):
+            return
+        self.count += len(idx)
+        breaks = np.flatnonzero(np.diff(idx) != 1)
+        starts = np.r_[idx[0], idx[breaks + 1]]
+        ends = np.r_[idx[breaks], idx[-1]]
+        if self.ranges and self.ranges[-1][1] + 1 == starts[0]:
+            self.ranges[-1][1] = int(ends[0])
+            starts, ends = starts[1:], ends[1:]
+        room = MAX_RANGES + 1 - len(self.ranges)     # +1: wiemy, że jest "i więcej"
+        self.ranges.extend([int(s), int(e)] for s, e in zip(starts[:room], ends[:room]))
+
+    def describe(self) -> str:
+        # wiersz danych i -> linia i + 2 (nagłówek to linia 1)
+        text = ", ".join(f"{s + 2}" if s == e else f"{s + 2}-{e + 2}" for s, e in self.ranges[:MAX_RANGES])
+        return text + (", ..." if len(self.ranges) > MAX_RANGES else "")
+
+
+def _issue(path: Path, check: str, severity: str, rows: RowRanges, detail: str = "") -> Dict:
+    return {"File": Path(path).name, "Check": check, "Severity": severity, "Rows": rows.count,
+            "Lines": rows.describe(), "Detail": detail}
+
+
+def _read_text(path: Path, chunksize: int, text_cols: Tuple[str, ...]):
+    # kolumny z możliwym przecinkiem dziesiętnym jako tekst (żeby widzieć separator),
+    # reszta parsowana od razu przez parser C; brak = tylko puste pole.
+    # Puste linie zostają jako wiersze, żeby numery linii w raporcie były prawdziwe.
+    dtype = {c: str for c in ("Algorithm", "Success", *text_cols)}
+    return pd.read_csv(path, sep=";", dtype=dtype, keep_default_na=False, na_values=[""],
+                       chunksize=chunksize, encoding="utf-8-sig", skip_blank_lines=False)
+
+
+def _blank(chunk: pd.DataFrame) -> np.ndarray:
+    return chunk.isna().all(axis=1).to_numpy()
+
+
+def _parse_number(s: pd.Series) -> np.ndarray:
+    """Kolumna -> float64 (NaN = brak albo nie-liczba); tekst z ',' lub '.' dziesiętną."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(np.float64, na_value=np.nan)
+    s = s.str.replace(",", ".", regex=False)
+    try:
+        return s.astype("float64").to_numpy(np.float64, na_value=np.nan)
+    except (ValueError, TypeError):
+        return pd.to_numeric(s, errors="coerce").to_numpy(np.float64)
+
+
+class _DecimalStyle:
+    """Liczy wartości z ',' i z '.' w kolumnie; mieszanie = oba style obecne."""
+
+    def __init__(self):
+        self.comma = RowRanges()
+        self.dot = RowRanges()
+
+    def add(self, s: pd.Series, offset: int) -> None:
+        self.comma.add(s.str.contains(",", regex=False).fillna(False).to_numpy(bool), offset)
+        self.dot.add(s.str.contains(".", regex=False).fillna(False).to_numpy(bool), offset)
+
+    def issue(self, path: Path, col: str) -> Optional[Dict]:
+        if not (self.comma.count and self.dot.count):
+            return None
+        minority, style = (self.dot, "'.'") if self.dot.count <= self.comma.count else (self.comma, "','")
+        return _issue(path, f"decimal_mixed:{col}", "warn", minority,
+                      f"{self.comma.count} z ',' / {self.dot.count} z '.'; wypisane wiersze z {style}")
+
+
+# ============================
+# 2. LOGI KONWERGENCJI
+# ============================
+
+def _row_hashes(values: Dict[str, np.ndarray]) -> np.ndarray:
+    frame = pd.DataFrame({c: v for c, v in values.items() if c != "Iteration"})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def validate_log(path: Path, alg: str, chunksize: int = 2_000_000) -> Tuple[List[Dict], pd.DataFrame]:
+    """
+    Sprawdza jeden log; zwraca (problemy, tabela przebiegów: Start, End, Rows, Hash).
+    Granice przebiegów z segment.run_starts – ta sama reguła co RunId w loaderach.
+    """
+    aliases = LABEL_ALIASES.get(alg, (alg,))
+    bad_label, bad_number, hidden_start, too_short = RowRanges(), RowRanges(), RowRanges(), RowRanges()
+    blank_lines = RowRanges()
+    decimals = {c: _DecimalStyle() for c in ("TimeMs", "Fitness")}
+    labels: Dict[str, int] = {}
+    run_starts: List[np.ndarray] = []
+    run_hashes: List[np.ndarray] = []
+    offset = 0
+    prev, run_start, run_hash = None, 0, np.uint64(0)
+
+    for chunk in _read_text(path, chunksize, tuple(decimals)):
+        n = len(chunk)
+        blank = _blank(chunk)
+        blank_lines.add(blank, offset)
+        lab = chunk["Algorithm"].fillna("")
+        for value, cnt in lab[~blank].value_counts().items():
+            labels[value] = labels.get(value, 0) + int(cnt)
+        bad_label.add(~lab.isin(aliases).to_numpy() & ~blank, offset)
+        for col, style in decimals.items():
+            style.add(chunk[col], offset)
+
+        values = {c: _parse_number(chunk[c]) for c in LOG_NUMERIC}
+        bad_number.add(np.any([np.isnan(v) for v in values.values()], axis=0) & ~blank, offset)
+
+        t, it, manh = values["TimeMs"], values["Iteration"], values["Manhattan"]
+        # granice tylko między wierszami z TimeMs (puste linie pomijane), jak segment.build_index
+        valid = np.flatnonzero(~np.isnan(t))
+        new_run = np.zeros(n, dtype=bool)
+        time_reset = np.zeros(n, dtype=bool)
+        if len(valid):
+            new_run[valid] = find_run_starts(it[valid], t[valid], manh[valid], prev)
+            time_reset[valid] = np.diff(np.r_[np.inf if prev is None else prev[1], t[valid]]) < 0
+        hidden_start.add(new_run & ~time_reset, offset)
+        best = values["BestPathLength"]
+        too_short.add((best > 0) & (best < manh), offset)
+
+        # hash przebiegu = suma hashy (wiersz, pozycja w przebiegu) – kolejność wierszy ma znaczenie;
+        # pierwszy odcinek bloku kontynuuje przebieg z poprzedniego bloku, chyba że zaczyna nowy
+        bounds = np.unique(np.r_[0, np.flatnonzero(new_run)])
+        cont = not new_run[0]
+        seg_abs = offset + bounds
+        if cont:
+            seg_abs[0] = run_start
+        rows = np.arange(n)
+        pos = (offset + rows - seg_abs[np.searchsorted(bounds, rows, side="right") - 1]).astype(np.uint64)
+        h = pd.util.hash_array(_row_hashes(values) ^ (pos * _HASH_MIX))
+        sums = np.add.reduceat(h, bounds)
+        if cont:
+            sums[:1] += np.array([run_hash], dtype=np.uint64)
+        elif offset > run_start:
+            run_starts.append(np.array([run_start]))
+            run_hashes.append(np.array([run_hash], dtype=np.uint64))
+        run_starts.append(seg_abs[:-1])
+        run_hashes.append(sums[:-1])
+        run_start, run_hash = int(seg_abs[-1]), sums[-1]
+        if len(valid):
+            prev = (it[valid[-1]], t[valid[-1]], manh[valid[-1]])
+        offset += n
+
+    if offset > run_start:
+        run_starts.append(np.array([run_start]))
+        run_hashes.append(np.array([run_hash], dtype=np.uint64))
+    table = pd.DataFrame({"Start": np.concatenate(run_starts or [np.zeros(0)]).astype(np.int64),
+                          "Hash": np.concatenate(run_hashes or [np.zeros(0)]).astype(np.uint64)})
+    table["End"] = np.r_[table["Start"].to_numpy()[1:], offset] - 1
+    table["Rows"] = table["End"] - table["Start"] + 1
+
+    issues = []
+    if blank_lines.count:
+        issues.append(_issue(path, "blank_line", "warn", blank_lines))
+    if bad_label.count:
+        found = ", ".join(f"{k} ({v})" for k, v in labels.items() if k not in aliases)
+        issues.append(_issue(path, "label_mismatch", "error", bad_label,
+                             f"plik {alg}, oczekiwano {'/'.join(aliases)}; znaleziono {found}"))
+    if bad_number.count:
+        issues.append(_issue(path, "unparsable_number", "error", bad_number))
+    for col, style in decimals.items():
+        issue = style.issue(path, col)
+        if issue:
+            issues.append(issue)
+    if hidden_start.count:
+        issues.append(_issue(path, "run_start_without_time_reset", "warn", hidden_start,
+                             "nowy przebieg po Iteration/Manhattan bez cofnięcia TimeMs – "
+                             "podział po samym TimeMs skleiłby przebiegi"))
+    if too_short.count:
+        issues.append(_issue(path, "path_below_manhattan", "error", too_short,
+                             "BestPathLength < Manhattan"))
+    dup = table[table.duplicated("Hash", keep=False)]
+    if len(dup):
+        issues.append(_issue(path, "duplicate_run", "warn", _runs_as_ranges(dup),
+                             f"{dup['Hash'].nunique()} przebiegów powtórzonych w pliku ({len(dup)} wystąpień)"))
+    return issues, table
+
+
+def _runs_as_ranges(runs: pd.DataFrame) -> RowRanges:
+    out = RowRanges()
+    for s, e in runs.sort_values("Start")[["Start", "End"]].to_numpy():
+        out.add(np.ones(e - s + 1, dtype=bool), int(s))
+    return out
+
+
+def cross_file_duplicates(tables: Dict[str, Tuple[Path, pd.DataFrame]]) -> List[Dict]:
+    """Przebiegi o identycznym hashu w różnych logach (np. log ACO zaczynający się kopią CHA)."""
+    frames = [t.assign(Alg=alg) for alg, (_, t) in tables.items()]
+    if not frames:
+        return []
+    runs = pd.concat(frames, ignore_index=True)
+    shared = runs.groupby("Hash")["Alg"].nunique()
+    shared = runs[runs["Hash"].isin(shared[shared > 1].index)]
+    issues = []
+    for alg, part in shared.groupby("Alg", sort=False):
+        others = sorted(set(shared.loc[shared["Hash"].isin(part["Hash"]), "Alg"]) - {alg})
+        issues.append(_issue(tables[alg][0], "duplicate_run_across_files", "error", _runs_as_ranges(part),
+                             f"{len(part)} przebiegów identycznych z logiem {', '.join(others)}"))
+    return issues
+
+
+# ============================
+# 3. dane.csv
+# ============================
+
+def _incomplete_blocks(frame: pd.DataFrame, n_algs: int) -> np.ndarray:
+    """Numery wierszy z bloków bez kompletu algorytmów albo z różnym Manhattan."""
+    g = frame.groupby("b", sort=False)
+    complete = (g["a"].transform("nunique") == n_algs) & (g["m"].transform("nunique") == 1) \
+        & (g["a"].transform("size") == n_algs)
+    return frame["row"].to_numpy()[~complete.to_numpy()]
+
+
+def validate_results(path: Path, chunksize: int = 2_000_000) -> List[Dict]:
+    """dane.csv: etykiety, separatory, Success, PathLength ≥ Manhattan, kompletność bloków instancji."""
+    known = set(LABEL_ALIASES)
+    n_algs = len(known)
+    bad_label, bad_success, too_short, bad_block = RowRanges(), RowRanges(), RowRanges(), RowRanges()
+    bad_number, blank_lines = RowRanges(), RowRanges()
+    decimals = _DecimalStyle()
+    labels: Dict[str, int] = {}
+    offset, kept = 0, 0                   # kept = wiersze niepuste (tak liczą loadery)
+    carry = None                          # niedokończony blok instancji z poprzedniego bloku pliku
+    for chunk in _read_text(path, chunksize, ("TimeMs",)):
+        n = len(chunk)
+        blank = _blank(chunk)
+        blank_lines.add(blank, offset)
+        lab = chunk["Algorithm"].fillna("")
+        for value, cnt in lab[~blank].value_counts().items():
+            labels[value] = labels.get(value, 0) + int(cnt)
+        bad_label.add(~lab.isin(known).to_numpy() & ~blank, offset)
+        decimals.add(chunk["TimeMs"], offset)
+        values = {c: _parse_number(chunk[c]) for c in RESULTS_NUMERIC}
+        bad_number.add(np.any([np.isnan(v) for v in values.values()], axis=0) & ~blank, offset)
+
+        succ = chunk["Success"].fillna("").str.strip().str.lower()
+        bad_success.add(~succ.isin(["true", "false", "1", "0"]).to_numpy() & ~blank, offset)
+        ok = succ.isin(["true", "1"]).to_numpy()
+        too_short.add(ok & (values["PathLength"] < values["Manhattan"]), offset)
+
+        # blok instancji = kolejne n_algs niepustych wierszy (jak assign_instances):
+        # różne algorytmy i ten sam Manhattan
+        rows = np.flatnonzero(~blank)
+        frame = pd.DataFrame({"row": rows + offset, "b": (kept + np.arange(len(rows))) // n_algs,
+                              "a": lab.to_numpy()[rows], "m": values["Manhattan"][rows]})
+        if carry is not None:
+            frame = pd.concat([carry, frame], ignore_index=True)
+        last = frame["b"].iat[-1] if len(frame) else None
+        carry = frame[frame["b"] == last]
+        bad_block.add_rows(_incomplete_blocks(frame[frame["b"] != last], n_algs))
+        kept += len(rows)
+        offset += n
+    if carry is not None and len(carry):
+        bad_block.add_rows(_incomplete_blocks(carry, n_algs))
+
+    issues = []
+    if blank_lines.count:
+        issues.append(_issue(path, "blank_line", "warn", blank_lines, "loadery pomijają puste linie"))
+    if bad_label.count:
+        found = ", ".join(f"{k} ({v})" for k, v in labels.items() if k not in known)
+        issues.append(_issue(path, "label_unknown", "error", bad_label, f"znaleziono {found}"))
+    if bad_number.count:
+        issues.append(_issue(path, "unparsable_number", "error", bad_number))
+    issue = decimals.issue(path, "TimeMs")
+    if issue:
+        issues.append(issue)
+    if bad_success.count:
+        issues.append(_issue(path, "success_invalid", "error", bad_success))
+    if too_short.count:
+        issues.append(_issue(path, "path_below_manhattan", "error", too_short,
+                             "Success, ale PathLength < Manhattan"))
+    if bad_block.count:
+        issues.append(_issue(path, "instance_block", "warn", bad_block,
+                             f"bloki po {n_algs} wiersze bez kompletu algorytmów albo z różnym Manhattan; "
+                             f"brak jednego wiersza przesuwa wszystkie kolejne bloki"))
+    return issues
+
+
+# ============================
+# 4. CAŁOŚĆ
+# ============================
+
+def validate(results_path: Optional[Path] = None, log_paths: Optional[Dict[str, Path]] = None,
+             chunksize: int = 2_000_000) -> pd.DataFrame:
+    """Wszystkie kontrole; tabela File/Check/Severity/Rows/Lines/Detail (pusta = brak problemów)."""
+    issues: List[Dict] = []
+    if results_path and Path(results_path).exists():
+        issues += validate_results(results_path, chunksize=chunksize)
+    tables = {}
+    for alg, path in (log_paths or {}).items():
+        if not Path(path).exists():
+            continue
+        found, table = validate_log(path, alg, chunksize=chunksize)
+        issues += found
+        tables[alg] = (path, table)
+    issues += cross_file_duplicates(tables)
+    return pd.DataFrame(issues, columns=["File", "Check", "Severity", "Rows", "Lines", "Detail"])
+
+
+def print_issues(issues: pd.DataFrame) -> None:
+    if issues.empty:
+        print("[INFO] Walidacja: brak problemów")
+        return
+    for row in issues.itertuples(index=False):
+        tag = "[ERROR]" if row.Severity == "error" else "[WARN]"
+        detail = f" – {row.Detail}" if row.Detail else ""
+        print(f"{tag} {row.File}: {row.Check}, {row.Rows} wierszy (linie {row.Lines}){detail}")
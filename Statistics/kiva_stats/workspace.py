@@ -0,0 +1,144 @@
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .scripts import load_script
+
+DEFAULT_RESULTS = "dane.csv"
+DEFAULT_LOGS: Dict[str, str] = {
+    "ACO": "ACOConvergenceLog.csv",
+    "FA": "FAConvergenceLog.csv",
+    "CHA": "CHAConvergenceLog.csv",
+}
+
+
+class Workspace:
+    """
+    Dane wczytane raz na proces i współdzielone przez wszystkie etapy.
+
+    Każda ramka jest liczona leniwie przy pierwszym użyciu, więc
+    `tables` nie czyta logów konwergencji, a `convergence` nie czyta dane.csv.
+
+    Z `dataset` (katalog z kiva_stats.dataset.ingest) dane idą ze zbioru
+    Parquet, a `filters` odcinają partycje i grupy wierszy przed dekodowaniem.
+
+    Z `preview` wszystkie etapy czytają warstwową próbkę (kiva_stats.preview)
+    zamiast pełnych plików CSV, a wyniki trafiają do <out_dir>/preview, żeby
+    nie nadpisać wersji finalnej.
+    """
+
+    def __init__(self,
+                 data_dir: Path = Path("."),
+                 out_dir: Path = Path("."),
+                 results_path: Optional[Path] = None,
+                 log_paths: Optional[Dict[str, Path]] = None,
+                 dataset: Optional[Path] = None,
+                 filters: Optional[List[Tuple[str, str, object]]] = None,
+                 preview: bool = False,
+                 preview_instances: Optional[int] = None,
+                 preview_runs: Optional[int] = None,
+                 preview_seed: int = 0):
+        self.data_dir = Path(data_dir)
+        self.out_dir = Path(out_dir)
+        self.results_path = Path(results_path) if results_path else self.data_dir / DEFAULT_RESULTS
+        if log_paths is None:
+            log_paths = {alg: self.data_dir / name for alg, name in DEFAULT_LOGS.items()}
+        self.log_paths = {alg: Path(p) for alg, p in log_paths.items()}
+        self.dataset = Path(dataset) if dataset else None
+        self.filters = list(filters or [])
+        self.preview = preview
+        self.preview_instances = preview_instances
+        self.preview_runs = preview_runs
+        self.preview_seed = preview_seed
+        if preview:
+            self.out_dir = self.out_dir / "preview"
+
+    def output(self, name: str) -> Path:
+        """Ścieżka wyjściowa (katalog tworzony przy pierwszym zapisie)."""
+        path = self.out_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    # --- źródła (pełne albo próbka) ---
+
+    @cached_property
+    def results_source(self) -> Path:
+        """dane.csv albo – w trybie podglądu – jego próbka (losowana przy pierwszym użyciu)."""
+        if not self.preview:
+            return self.results_path
+        from .preview import DEFAULT_INSTANCES, results_preview
+
+        return results_preview(self.results_path, per_range=self.preview_instances or DEFAULT_INSTANCES,
+                               seed=self.preview_seed)
+
+    def log_source(self, alg: str) -> Path:
+        """Log konwergencji algorytmu albo – w trybie podglądu – próbka jego przebiegów."""
+        if not self.preview:
+            return self.log_paths[alg]
+        from .preview import DEFAULT_RUNS, log_preview
+
+        return log_preview(self.log_paths[alg], per_range=self.preview_runs or DEFAULT_RUNS,
+                           seed=self.preview_seed)
+
+    # --- dane.csv ---
+
+    @cached_property
+    def results(self):
+        """Surowe dane.csv (separator ';', przecinek dziesiętny)."""
+        if self.dataset:
+            from . import dataset
+
+            df = dataset.read_results(self.dataset, self.filters)
+            # układ kolumn jak w dane.csv + zapisany InstanceId (assign_instances go nie nadpisuje)
+            return df.drop(columns=["Session", "Range"])
+        tab = load_script("tab")
+        return tab.load_data(self.results_source)
+
+    @cached_property
+    def alg_col(self) -> str:
+        return load_script("tab").find_algorithm_column(self.results)
+
+    @cached_property
+    def instances(self):
+        """dane.csv z InstanceId, tylko instancje z kompletem algorytmów."""
+        return load_script("tab").assign_instances(self.results, self.alg_col)
+
+    @cached_property
+    def trajectories(self):
+        """dane.csv w postaci oczekiwanej przez etap1+3 (Success jako bool, Trajektoria)."""
+        df = load_script("etap1+3").prepare(self.results.copy())
+        if "InstanceId" in df.columns:
+            # ze zbioru: po filtrach wierszy "co 3 wiersze" to już nie ta sama trasa
+            df["Trajektoria"] = df["InstanceId"]
+        return df
+
+    def algorithms(self) -> List[str]:
+        """Algorytmy obecne w dane.csv (po filtrach --where)."""
+        return sorted(self.results[self.alg_col].dropna().astype(str).unique())
+
+    # --- logi konwergencji ---
+
+    @cached_property
+    def convergence(self):
+        """Słownik algorytm -> log konwergencji z RunId."""
+        if self.dataset:
+            from . import dataset
+
+            order = list(self.log_paths)  # kolejność jak przy czytaniu z CSV
+            algs = sorted(dataset.algorithms(self.dataset),
+                          key=lambda a: order.index(a) if a in order else len(order))
+            logs = {alg: dataset.read_convergence(self.dataset, alg, self.filters).drop(columns=["Session", "Range"])
+                    for alg in algs}
+            return {alg: df for alg, df in logs.items() if len(df)}
+        conv = load_script("conv")
+        return {alg: conv.load_algorithm_log(self.log_source(alg), alg) for alg in self.log_paths}
+
+    @cached_property
+    def per_run(self):
+        """Metryki per przebieg dla wszystkich algorytmów (conv.compute_run_metrics)."""
+        import pandas as pd
+
+        conv = load_script("conv")
+        parts = [conv.compute_run_metrics(df, alg, ks_rel=(1.8, 1.5, 1.1))
+                 for alg, df in self.convergence.items()]
+        return pd.concat(parts, ignore_index=True)
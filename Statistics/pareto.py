@@ -0,0 +1,298 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import List, Tuple
+
+from kiva_stats.instrument import traced
+from kiva_stats.schema import to_bool
+from tab import load_data, find_algorithm_column, assign_instances
+
+# ============================================
+# 1. KONFIGURACJA
+# ============================================
+
+DATA_PATH = Path("dane.csv")  # zmień jeśli plik jest gdzie indziej
+
+# Kryteria (wszystkie minimalizowane). Obrót robota jest wolny, więc
+# Rotations jest pełnoprawnym kryterium obok długości i czasu planowania.
+INSTANCE_OBJECTIVES = ["PathLength", "Rotations", "TimeMs"]
+
+# W puli wszystkich wyników różne instancje mają różne Manhattan,
+# więc długość normalizujemy do współczynnika rozciągnięcia.
+POOLED_OBJECTIVES = ["Stretch", "Rotations", "TimeMs"]
+
+HV_REF_MARGIN = 0.1  # punkt referencyjny = 1 + margines po normalizacji do [0, 1]
+
+
+# ============================================
+# 2. PRZYGOTOWANIE DANYCH
+# ============================================
+
+def prepare_feasible(df: pd.DataFrame, alg_col: str) -> pd.DataFrame:
+    """
+    Dodaje kolumny Feasible (Success i PathLength > 0) oraz Stretch.
+    Nieudane próby nie należą do żadnego frontu.
+    """
+    df = df.copy()
+    df["Feasible"] = to_bool(df["Success"]) & (df["PathLength"] > 0)
+    manh = df["Manhattan"].where(df["Manhattan"] > 0).astype("float32")
+    df["Stretch"] = df["PathLength"].astype("float32") / manh
+    return df
+
+
+def build_objective_tensor(df: pd.DataFrame, alg_col: str,
+                           objectives: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Tensor X[instancja, algorytm, kryterium] (NaN dla prób nieudanych)
+    oraz maska feasible[instancja, algorytm].
+    """
+    algs = sorted(df[alg_col].unique())
+    inst = np.sort(df["InstanceId"].unique())
+
+    wide = df.pivot_table(index="InstanceId", columns=alg_col,
+                          values=objectives + ["Feasible"], aggfunc="first")
+    wide = wide.reindex(index=inst)
+
+    feasible = wide["Feasible"].reindex(columns=algs).fillna(False).to_numpy(dtype=bool)
+    X = np.stack(
+        [wide[obj].reindex(columns=algs).to_numpy(dtype=float) for obj in objectives],
+        axis=2,
+    )
+    X[~feasible] = np.nan
+    return X, feasible, algs
+
+
+# ============================================
+# 3. SORTOWANIE NIEZDOMINOWANE PER INSTANCJA
+# ============================================
+
+def dominance_tensor(X: np.ndarray) -> np.ndarray:
+    """
+    dom[n, i, j] = True, gdy algorytm i dominuje j w instancji n
+    (<= we wszystkich kryteriach i < w co najmniej jednym).
+    Próby nieudane (NaN) nie dominują i są dominowane przez każdą udaną.
+    """
+    Xf = np.where(np.isnan(X), np.inf, X)
+    a = Xf[:, :, None, :]
+    b = Xf[:, None, :, :]
+    dom = np.all(a <= b, axis=3) & np.any(a < b, axis=3)
+    feasible = ~np.isnan(X).any(axis=2)
+    dom &= feasible[:, :, None]
+    return dom
+
+
+def nondominated_ranks(X: np.ndarray) -> np.ndarray:
+    """
+    Numer frontu (1 = niezdominowany) dla każdego (instancja, algorytm),
+    NaN dla prób nieudanych. Obieranie frontów wykonywane na całym tensorze
+    naraz – liczba kroków to co najwyżej liczba algorytmów.
+    """
+    dom = dominance_tensor(X)
+    feasible = ~np.isnan(X).any(axis=2)
+    n_inst, k = feasible.shape
+
+    ranks = np.zeros((n_inst, k))
+    remaining = feasible.copy()
+    front = 0
+    while remaining.any():
+        front += 1
+        # zdominowany przez kogoś, kto jeszcze nie został przypisany do frontu
+        dominated = np.any(dom & remaining[:, :, None], axis=1)
+        current = remaining & ~dominated
+        ranks[current] = front
+        remaining &= ~current
+
+    ranks[~feasible] = np.nan
+    return ranks
+
+
+# ============================================
+# 4. HYPERVOLUME PER INSTANCJA
+# ============================================
+
+def normalize_per_instance(X: np.ndarray) -> np.ndarray:
+    """Skaluje każde kryterium w każdej instancji do [0, 1] (min–max z prób udanych)."""
+    lo = np.nanmin(np.where(np.isnan(X), np.inf, X), axis=1, keepdims=True)
+    hi = np.nanmax(np.where(np.isnan(X), -np.inf, X), axis=1, keepdims=True)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    return (X - lo) / span
+
+
+def hypervolume_subsets(Xn: np.ndarray, ref: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hypervolume przez inkluzję–ekskluzję po podzbiorach algorytmów
+    (liczba algorytmów jest mała, więc 2^k podzbiorów to tanio).
+    Zwraca HV całego zbioru i HV bez każdego algorytmu: (hv_all[n], hv_without[n, k]).
+    """
+    n_inst, k, _ = Xn.shape
+    # próba nieudana = punkt w ref -> zerowy wkład do każdego przecięcia
+    P = np.where(np.isnan(Xn), ref, Xn)
+
+    hv_all = np.zeros(n_inst)
+    hv_without = np.zeros((n_inst, k))
+    for mask in range(1, 1 << k):
+        members = [i for i in range(k) if mask >> i & 1]
+        corner = P[:, members, :].max(axis=1)
+        vol = np.prod(np.clip(ref - corner, 0.0, None), axis=1)
+        sign = 1.0 if len(members) % 2 == 1 else -1.0
+        hv_all += sign * vol
+        for i in range(k):
+            if i not in members:
+                hv_without[:, i] += sign * vol
+    return hv_all, hv_without
+
+
+def hypervolume_contributions(X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Wyłączny wkład każdego algorytmu do HV instancji: (contrib[n, k], hv_all[n])."""
+    Xn = normalize_per_instance(X)
+    hv_all, hv_without = hypervolume_subsets(Xn, ref=1.0 + HV_REF_MARGIN)
+    contrib = hv_all[:, None] - hv_without
+    contrib[np.isnan(X).any(axis=2)] = np.nan
+    return contrib, hv_all
+
+
+# ============================================
+# 5. FRONT PULI WSZYSTKICH WYNIKÓW (O(n log n))
+# ============================================
+
+def pareto_mask_2d(F: np.ndarray) -> np.ndarray:
+    """
+    Maska punktów niezdominowanych dla 2 kryteriów: sortowanie + bieżące minimum.
+    Identyczne punkty nie dominują się nawzajem.
+    """
+    uniq, inverse = np.unique(F, axis=0, return_inverse=True)  # leksykograficznie
+    prev_min = np.minimum.accumulate(np.concatenate(([np.inf], uniq[:-1, 1])))
+    nd_unique = uniq[:, 1] < prev_min
+    return nd_unique[inverse.ravel()]
+
+
+def pareto_mask_3d(F: np.ndarray) -> np.ndarray:
+    """
+    Maska punktów niezdominowanych dla 3 kryteriów w O(n log n):
+    przegląd w kolejności leksykograficznej, drzewo Fenwicka po randze
+    drugiego kryterium przechowuje minimum trzeciego.
+    """
+    uniq, inverse = np.unique(F, axis=0, return_inverse=True)
+    ranks = np.searchsorted(np.unique(uniq[:, 1]), uniq[:, 1]) + 1
+    size = int(ranks.max()) if len(ranks) else 0
+    tree = np.full(size + 1, np.inf)
+    f3 = uniq[:, 2]
+
+    nd_unique = np.empty(len(uniq), dtype=bool)
+    for idx in range(len(uniq)):
+        r = ranks[idx]
+        best = np.inf
+        i = r
+        while i > 0:
+            if tree[i] < best:
+                best = tree[i]
+            i -= i & -i
+        nd_unique[idx] = best > f3[idx]
+        i = r
+        while i <= size:
+            if f3[idx] < tree[i]:
+                tree[i] = f3[idx]
+            i += i & -i
+    return nd_unique[inverse.ravel()]
+
+
+def pareto_mask(F: np.ndarray) -> np.ndarray:
+    """Front Pareto dla 2 lub 3 kryteriów (minimalizacja)."""
+    if F.shape[1] == 2:
+        return pareto_mask_2d(F)
+    if F.shape[1] == 3:
+        return pareto_mask_3d(F)
+    raise ValueError("Obsługiwane są tylko 2 lub 3 kryteria.")
+
+
+# ============================================
+# 6. TABELE
+# ============================================
+
+@traced()
+def compute_pareto_tables(df: pd.DataFrame, alg_col: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Zwraca:
+      membership_table – udział w froncie per instancja i w puli wszystkich wyników,
+      hv_table         – wkład do hypervolume per instancja.
+    """
+    df = prepare_feasible(df, alg_col)
+
+    # --- per instancja ---
+    X, feasible, algs = build_objective_tensor(df, alg_col, INSTANCE_OBJECTIVES)
+    ranks = nondominated_ranks(X)
+    on_front = ranks == 1
+    n_instances = X.shape[0]
+
+    membership = pd.DataFrame(index=pd.Index(algs, name=alg_col))
+    membership["FrontRate"] = on_front.sum(axis=0) / n_instances
+    membership["FrontRateFeasible"] = on_front.sum(axis=0) / np.maximum(feasible.sum(axis=0), 1)
+    membership["MeanFrontRank"] = np.nanmean(ranks, axis=0)
+
+    # --- pula wszystkich wyników ---
+    pooled = df[df["Feasible"]].dropna(subset=POOLED_OBJECTIVES)
+    pooled_mask = pareto_mask(pooled[POOLED_OBJECTIVES].to_numpy(dtype=float))
+    pooled = pooled.assign(OnFront=pooled_mask)
+    pooled_rate = pooled.groupby(alg_col)["OnFront"].mean()
+    pooled_share = pooled.groupby(alg_col)["OnFront"].sum() / max(int(pooled_mask.sum()), 1)
+    membership["PooledFrontRate"] = pooled_rate.reindex(algs).fillna(0.0).values
+    membership["PooledFrontShare"] = pooled_share.reindex(algs).fillna(0.0).values
+
+    membership = membership.sort_values("FrontRate", ascending=False).round(3)
+
+    # --- hypervolume ---
+    contrib, hv_all = hypervolume_contributions(X)
+    total_contrib = np.nansum(contrib)
+    hv_table = pd.DataFrame(index=pd.Index(algs, name=alg_col))
+    hv_table["HVContribMean"] = np.nanmean(contrib, axis=0)
+    hv_table["HVContribMedian"] = np.nanmedian(contrib, axis=0)
+    hv_table["HVContribShare"] = np.nansum(contrib, axis=0) / (total_contrib if total_contrib > 0 else 1.0)
+    hv_table["HVContribShareOfInstance"] = np.nanmean(
+        contrib / np.where(hv_all > 0, hv_all, np.nan)[:, None], axis=0
+    )
+    hv_table = hv_table.sort_values("HVContribShare", ascending=False).round(4)
+
+    return membership, hv_table
+
+
+# ============================================
+# 7. GŁÓWNA FUNKCJA
+# ============================================
+
+def main():
+    df = load_data(DATA_PATH)
+    alg_col = find_algorithm_column(df)
+    df = assign_instances(df, alg_col)
+    print(f"[INFO] Liczba instancji (po filtracji): {df['InstanceId'].nunique()}")
+
+    membership, hv_table = compute_pareto_tables(df, alg_col)
+
+    print("\n=== FRONT PARETO (PathLength, Rotations, TimeMs) ===")
+    print(membership)
+    print("\n=== WKŁAD DO HYPERVOLUME (per instancja) ===")
+    print(hv_table)
+
+    membership.to_csv("table_pareto_membership.csv", sep=";")
+    hv_table.to_csv("table_pareto_hypervolume.csv", sep=";")
+
+    membership.to_latex(
+        "table_pareto_membership.tex",
+        caption="Udział algorytmów we froncie Pareto (długość ścieżki, obroty, czas planowania): "
+                "per instancja i w puli wszystkich wyników.",
+        label="tab:pareto_membership",
+        float_format="%.3f",
+    )
+    hv_table.to_latex(
+        "table_pareto_hypervolume.tex",
+        caption="Wyłączny wkład algorytmów do hypervolume frontu Pareto instancji.",
+        label="tab:pareto_hypervolume",
+        float_format="%.4f",
+    )
+
+    print("\n[INFO] Zapisano:")
+    print("  - table_pareto_membership.(csv/tex)")
+    print("  - table_pareto_hypervolume.(csv/tex)")
+
+
+if __name__ == "__main__":
+    main()
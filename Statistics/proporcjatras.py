@@ -1,53 +1,38 @@
-import pandas as pd
-import numpy as np
+from pathlib import Path
 
-# Ścieżki do plików (dostosuj nazwy jeśli inne)
-paths = {
-    'ACO': 'ACOConvergenceLog.csv',
-    'Firefly': 'FAConvergenceLog.csv',
-    'Camel': 'CHAConvergenceLog.csv'
-}
-
-def classify_range(manh: float) -> str:
-    if manh <= 40:
-        return 'krótkie (M ≤ 40)'
-    elif manh <= 80:
-        return 'średnie (41 ≤ M ≤ 80)'
-    else:
-        return 'długie (M > 80)'
-
-all_counts = {}
-
-for alg_name, path in paths.items():
-    print(f"\nŁadowanie: {alg_name} ({path})")
-
-    df = pd.read_csv(path, sep=';', decimal=',')
-
-    # upewniamy się że wartości numeryczne są numeryczne
-    df['TimeMs'] = pd.to_numeric(df['TimeMs'], errors='coerce')
-    df['Manhattan'] = pd.to_numeric(df['Manhattan'], errors='coerce')
+from kiva_stats.sql import run_query
+from kiva_stats.workspace import Workspace
 
-    # ===========================
-    # AUTOMATYCZNE WYKRYCIE RunId
-    # kiedy TimeMs się cofa => nowy run
-    # ===========================
-    df = df.sort_index()  # zachowuje kolejność oryginalną
-    df['RunId'] = (df['TimeMs'].diff() < 0).cumsum()
-
-    # teraz mamy jeden Manhattan na Run:
-    manh_per_run = df.groupby('RunId')['Manhattan'].first()
-
-    # klasyfikacja
-    ranges = manh_per_run.apply(classify_range)
-    counts = ranges.value_counts()
-
-    all_counts[alg_name] = counts
+# Logi z bieżącego katalogu (ACOConvergenceLog.csv, FAConvergenceLog.csv, CHAConvergenceLog.csv);
+# RunId i Range (kiva_stats.dataset.RANGES) liczy Workspace, jak w pozostałych etapach
+names = {
+    'ACO': 'ACO',
+    'FA': 'Firefly',
+    'CHA': 'Camel'
+}
+range_labels = {
+    'krotkie': 'krótkie (M ≤ 40)',
+    'srednie': 'średnie (41 ≤ M ≤ 80)',
+    'dlugie': 'długie (M > 80)'
+}
 
-    print(counts)
+# Manhattan jest stały w przebiegu (zmiana Manhattan otwiera nowy RunId),
+# więc jeden GROUP BY zastępuje wczytywanie logów i klasyfikację per przebieg
+counts = run_query(Workspace(Path(".")), """
+    SELECT Algorithm, Range, COUNT(DISTINCT RunId) AS Runs
+    FROM convergence
+    GROUP BY Algorithm, Range
+""")
+counts['Algorithm'] = counts['Algorithm'].map(names).fillna(counts['Algorithm'])
+counts['Range'] = counts['Range'].map(range_labels).fillna(counts['Range'])
+table = counts.pivot_table(index='Range', columns='Algorithm', values='Runs', aggfunc='sum', fill_value=0)
+
+for alg_name in [n for n in names.values() if n in table.columns]:
+    print(f"\n{alg_name}:")
+    print(table[alg_name].sort_values(ascending=False).to_string())
 
 # ===========================
-# SUMA GLOBALNA (opcjonalnie)
+# SUMA GLOBALNA
 # ===========================
 print("\n=== SUMA GLOBALNA ===")
-all_sum = sum(all_counts.values())
-print(all_sum)
+print(table.sum(axis=1).sort_values(ascending=False).to_string())
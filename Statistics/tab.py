@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from kiva_stats.instrument import traced
+from kiva_stats.schema import read_results
+
 # ============================================
 # 1. KONFIGURACJA
 # ============================================
@@ -48,13 +51,14 @@ def find_algorithm_column(df: pd.DataFrame) -> str:
 # 3. WCZYTANIE DANYCH
 # ============================================
 
+@traced()
 def load_data(path: Path) -> pd.DataFrame:
     """
-    Próbuje wczytać CSV z separatorem ';' i przecinkiem jako separator dziesiętny.
-    Jeśli się wywali, próbuje standardowego wczytania.
+    Próbuje wczytać CSV z separatorem ';' i przecinkiem jako separator dziesiętny
+    (typy wg kiva_stats.schema). Jeśli się wywali, próbuje standardowego wczytania.
     """
     try:
-        df = pd.read_csv(path, sep=";", decimal=",")
+        df = read_results(path)
     except Exception:
         df = pd.read_csv(path)
     return df
@@ -63,12 +67,15 @@ def load_data(path: Path) -> pd.DataFrame:
 # 4. BUDOWANIE INSTANCJI (GRUP)
 # ============================================
 
+@traced()
 def assign_instances(df: pd.DataFrame, alg_col: str) -> pd.DataFrame:
     """
     Zakładamy, że dane są w formacie:
       kolejne N wierszy (N = liczba algorytmów) = ta sama instancja.
     Nadajemy kolumnę 'InstanceId' i wyrzucamy instancje, które
-    nie mają kompletnego zestawu algorytmów.
+    nie mają kompletnego zestawu algorytmów. Istniejąca kolumna
+    'InstanceId' (np. ze zbioru Parquet) jest zachowywana – po filtrach
+    wierszy numeracja „pakietami” pomieszałaby różne instancje.
     """
     df = df.reset_index(drop=True)
     n_algs = df[alg_col].nunique()
@@ -76,7 +83,8 @@ def assign_instances(df: pd.DataFrame, alg_col: str) -> pd.DataFrame:
         raise ValueError("Mam mniej niż 2 różne algorytmy w danych.")
 
     # przypisujemy instancje „pakietami” po n_algs wierszy
-    df["InstanceId"] = df.index // n_algs
+    if "InstanceId" not in df.columns:
+        df["InstanceId"] = df.index // n_algs
 
     # wyrzucamy instancje, w których nie ma wszystkich algorytmów
     counts = df.groupby("InstanceId")[alg_col].nunique()
@@ -86,13 +94,14 @@ def assign_instances(df: pd.DataFrame, alg_col: str) -> pd.DataFrame:
         print("[WARN] Usuwam instancje bez pełnego zestawu algorytmów:", list(dropped.index))
 
     df = df[df["InstanceId"].isin(valid_ids)].copy()
-    df["InstanceId"] = df["InstanceId"].astype(int)
+    df["InstanceId"] = df["InstanceId"].astype("int32")
     return df
 
 # ============================================
 # 5. STATYSTYKI OPISOWE
 # ============================================
 
+@traced()
 def compute_basic_stats(df: pd.DataFrame, alg_col: str, metric: str) -> pd.DataFrame:
     """
     Statystyki opisowe długości ścieżki:
@@ -116,6 +125,7 @@ def compute_basic_stats(df: pd.DataFrame, alg_col: str, metric: str) -> pd.DataF
 # 6. WIN RATE I ŚREDNI RANKING
 # ============================================
 
+@traced()
 def compute_win_rate_and_ranks(df: pd.DataFrame, alg_col: str, metric: str):
     """
     Dla każdej instancji:
@@ -171,6 +181,7 @@ def compute_win_rate_and_ranks(df: pd.DataFrame, alg_col: str, metric: str):
 # 7. MACIERZ DOMINACJI
 # ============================================
 
+@traced()
 def compute_dominance_matrix(df: pd.DataFrame, alg_col: str, metric: str):
     """
     Macierz dominacji:
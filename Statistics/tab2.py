@@ -3,6 +3,10 @@ import numpy as np
 from pathlib import Path
 from typing import Dict
 
+from kiva_stats.instrument import traced
+from kiva_stats.schema import CONVERGENCE_SCHEMA, apply_schema, read_convergence, set_category
+from kiva_stats.segment import assign_run_ids
+
 # ============================
 # 1. CONFIG
 # ============================
@@ -25,6 +29,7 @@ FOURTH_FILE = BASE_DIR / "ExtraStats.csv"  # zmień nazwę lub zakomentuj jeśli
 # 2. LOADING & PREPROCESSING
 # ============================
 
+@traced()
 def load_convergence_log(path: Path, alg_name: str) -> pd.DataFrame:
     """
     Load convergence log for a single algorithm.
@@ -33,26 +38,19 @@ def load_convergence_log(path: Path, alg_name: str) -> pd.DataFrame:
     Separator: ';'
     Decimal: ','
     """
-    df = pd.read_csv(path, sep=";", decimal=",")
+    df = read_convergence(path)  # types from kiva_stats.schema
     # Enforce algorithm name (in case file has no Algorithm column or wrong one)
-    df["Algorithm"] = alg_name
-
-    # Ensure numeric types
-    numeric_cols = ["Iteration", "TimeMs", "Manhattan", "Fitness", "BestPathLength"]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    set_category(df, "Algorithm", alg_name)
 
     # Drop rows with missing core fields
     df = df.dropna(subset=["TimeMs", "Fitness", "BestPathLength"])
+    apply_schema(df, CONVERGENCE_SCHEMA)
 
     # Keep original order, then detect runs
     df = df.reset_index(drop=True)
 
-    # RunId: whenever time goes backwards (TimeMs diff < 0) → new run
-    time_diff = df["TimeMs"].diff()
-    new_run_flags = (time_diff < 0) | time_diff.isna()
-    df["RunId"] = new_run_flags.cumsum()  # 0, 1, 2, ...
+    # RunId: time or Iteration goes backwards, or Manhattan changes → new run
+    df["RunId"] = assign_run_ids(df, first=1)  # 1, 2, 3, ...
 
     return df
 
@@ -61,6 +59,7 @@ def load_convergence_log(path: Path, alg_name: str) -> pd.DataFrame:
 # 3. RUN-LEVEL SUMMARY
 # ============================
 
+@traced()
 def summarize_runs(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create per-run summary:
@@ -93,6 +92,7 @@ def summarize_runs(df: pd.DataFrame) -> pd.DataFrame:
 # 4. ALGORITHM-LEVEL COMPARISON
 # ============================
 
+@traced()
 def aggregate_algorithm_stats(run_summary: pd.DataFrame) -> pd.DataFrame:
     """
     Build algorithm-level comparison table from run-level data.